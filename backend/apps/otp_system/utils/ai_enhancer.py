@@ -41,9 +41,8 @@ class AIEnhancer:
             }
         
         try:
-            import google.generativeai as genai
-            genai.configure(api_key=self.api_key)
-            model = genai.GenerativeModel(self.model_name)
+            from utils import gemini_client
+            model = gemini_client.get_model(self.model_name)
             
             prompt = f"""
 أنت مساعد ذكي متخصص في التعليم. مهمتك تحسين تعليمات المشروع التعليمي لتكون أكثر وضوحاً وتنظيماً.
@@ -116,9 +115,8 @@ class AIEnhancer:
             }
         
         try:
-            import google.generativeai as genai
-            genai.configure(api_key=self.api_key)
-            model = genai.GenerativeModel(self.model_name)
+            from utils import gemini_client
+            model = gemini_client.get_model(self.model_name)
             
             prompt = f"""
 أنت مساعد ذكي متخصص في التعليم. مهمتك تحسين شروط تسليم المشروع التعليمي.
@@ -190,9 +188,8 @@ class AIEnhancer:
 """
         
         try:
-            import google.generativeai as genai
-            genai.configure(api_key=self.api_key)
-            model = genai.GenerativeModel(self.model_name)
+            from utils import gemini_client
+            model = gemini_client.get_model(self.model_name)
             
             prompt = f"""
 أنت مساعد ذكي متخصص في التعليم. أنشئ تعليمات واضحة لمشروع تعليمي.
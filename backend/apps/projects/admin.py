@@ -13,6 +13,12 @@ class ProjectAdmin(admin.ModelAdmin):
     ordering = ['-created_at']
     readonly_fields = ['created_at', 'updated_at', 'telegram_sent']
     filter_horizontal = ['sections']
+    
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if change:
+            from .validation_cache import invalidate_project
+            invalidate_project(obj)
 
 
 @admin.register(Student)
@@ -5,6 +5,9 @@ AI Validator for Project Submissions
 import os
 from django.conf import settings
 import logging
+from .check_runner import Check, run_checks, merge_validation_data
+from .progress import publish_check
+from .check_metrics import measure_check
 
 logger = logging.getLogger(__name__)
 
@@ -18,10 +21,9 @@ class AIValidator:
         """تهيئة AI Validator"""
         # Gemini API
         try:
-            import google.generativeai as genai
-            genai.configure(api_key=settings.GEMINI_API_KEY)
-            self.gemini_flash = genai.GenerativeModel('gemini-1.5-flash')
-            self.gemini_vision = genai.GenerativeModel('gemini-1.5-pro-vision')
+            from utils import gemini_client
+            self.gemini_flash = gemini_client.get_model('gemini-1.5-flash')
+            self.gemini_vision = gemini_client.get_model('gemini-1.5-pro-vision')
             logger.info("✅ Gemini API initialized")
         except Exception as e:
             logger.error(f"❌ Failed to initialize Gemini: {str(e)}")
@@ -94,16 +96,25 @@ class AIValidator:
         
         try:
             # 1. فحص المدة
-            duration_result = self._check_video_duration(file_path, project)
+            duration_result = measure_check(self._check_video_duration, file_path, project, submission.file_hash)
             results['checks']['duration'] = duration_result
+            publish_check('duration', results['checks']['duration'])
             
             if duration_result['status'] == 'fail':
                 results['rejection_reasons'].append(duration_result['message'])
                 results['status'] = 'rejected'
                 return results
             
+            # 2-4. الفحوصات المستقلة (بالتوازي - كل فحص بمهلة خاصة)
+            checks = run_checks([
+                Check('ocr', self._check_video_ocr, file_path, student_name, fallback_score=50),
+                Check('content_analysis', self._analyze_video_content, file_path, project, submission.file_hash),
+                Check('similarity', self._check_video_similarity, file_path, submission, fallback_score=80),
+            ])
+            merge_validation_data(submission, checks)
+            
             # 2. OCR على آخر 5 ثواني
-            ocr_result = self._check_video_ocr(file_path, student_name)
+            ocr_result = checks['ocr']
             results['checks']['ocr'] = ocr_result
             
             if ocr_result['status'] == 'fail':
@@ -112,14 +123,14 @@ class AIValidator:
                 results['warnings'].append(ocr_result['message'])
             
             # 3. تحليل المحتوى بـ Gemini Vision
-            gemini_result = self._analyze_video_content(file_path, project)
+            gemini_result = checks['content_analysis']
             results['checks']['content_analysis'] = gemini_result
             
             if gemini_result['status'] == 'fail':
                 results['rejection_reasons'].append(gemini_result['message'])
             
             # 4. كشف التشابه
-            similarity_result = self._check_video_similarity(file_path, submission)
+            similarity_result = checks['similarity']
             results['checks']['similarity'] = similarity_result
             
             if similarity_result['status'] == 'fail':
@@ -177,8 +188,10 @@ class AIValidator:
         
         try:
             # 1. استخراج النص من PDF
-            text_result = self._extract_pdf_text(file_path)
-            results['checks']['text_extraction'] = text_result
+            text_result = measure_check(self._extract_pdf_text, file_path, submission.file_hash)
+            # النص الكامل محفوظ في مخزن النصوص (ExtractedText) - لا داعي لتكراره في النتائج
+            results['checks']['text_extraction'] = {k: v for k, v in text_result.items() if k != 'text'}
+            publish_check('text_extraction', results['checks']['text_extraction'])
             
             if text_result['status'] == 'fail':
                 results['rejection_reasons'].append(text_result['message'])
@@ -187,8 +200,16 @@ class AIValidator:
             
             extracted_text = text_result.get('text', '')
             
+            # 2-4. الفحوصات المستقلة (بالتوازي - كل فحص بمهلة خاصة)
+            checks = run_checks([
+                Check('statistics', self._check_pdf_stats, text_result, project),
+                Check('content_analysis', self._analyze_pdf_content, extracted_text, project),
+                Check('plagiarism', self._check_pdf_plagiarism, extracted_text, submission, fallback_score=80),
+            ])
+            merge_validation_data(submission, checks)
+            
             # 2. فحص عدد الكلمات والصفحات
-            stats_result = self._check_pdf_stats(text_result, project)
+            stats_result = checks['statistics']
             results['checks']['statistics'] = stats_result
             
             if stats_result['status'] == 'fail':
@@ -197,14 +218,14 @@ class AIValidator:
                 results['warnings'].append(stats_result['message'])
             
             # 3. تحليل المحتوى بـ Gemini
-            content_result = self._analyze_pdf_content(extracted_text, project)
+            content_result = checks['content_analysis']
             results['checks']['content_analysis'] = content_result
             
             if content_result['status'] == 'fail':
                 results['rejection_reasons'].append(content_result['message'])
             
             # 4. كشف الانتحال
-            plagiarism_result = self._check_pdf_plagiarism(extracted_text, submission)
+            plagiarism_result = checks['plagiarism']
             results['checks']['plagiarism'] = plagiarism_result
             
             if plagiarism_result['status'] == 'fail':
@@ -263,26 +284,35 @@ class AIValidator:
         }
         
         try:
+            # جميع فحوصات الصورة مستقلة (بالتوازي - كل فحص بمهلة خاصة)
+            checks = run_checks([
+                Check('ocr', self._check_image_ocr, file_path),
+                Check('vision_analysis', self._analyze_image_content, file_path, project),
+                Check('quality', self._check_image_quality, file_path),
+                Check('similarity', self._check_image_similarity, file_path, submission, fallback_score=80),
+            ])
+            merge_validation_data(submission, checks)
+            
             # 1. OCR - قراءة النص من الصورة
-            ocr_result = self._check_image_ocr(file_path)
+            ocr_result = checks['ocr']
             results['checks']['ocr'] = ocr_result
             
             # 2. تحليل بـ Gemini Vision
-            vision_result = self._analyze_image_content(file_path, project)
+            vision_result = checks['vision_analysis']
             results['checks']['vision_analysis'] = vision_result
             
             if vision_result['status'] == 'fail':
                 results['rejection_reasons'].append(vision_result['message'])
             
             # 3. فحص الجودة (الدقة والحجم)
-            quality_result = self._check_image_quality(file_path)
+            quality_result = checks['quality']
             results['checks']['quality'] = quality_result
             
             if quality_result['status'] == 'warning':
                 results['warnings'].append(quality_result['message'])
             
             # 4. كشف التشابه
-            similarity_result = self._check_image_similarity(file_path, submission)
+            similarity_result = checks['similarity']
             results['checks']['similarity'] = similarity_result
             
             if similarity_result['status'] == 'fail':
@@ -325,6 +355,7 @@ class AIValidator:
         1. استخراج النص
         2. فحص الإحصائيات
         3. تحليل بـ Gemini
+        4. كشف التشابه (النص + البنية)
         """
         logger.info(f"📝 بدء فحص المستند #{submission.id}")
         
@@ -342,11 +373,11 @@ class AIValidator:
         try:
             # 1. استخراج النص حسب نوع الملف
             if file_ext in ['doc', 'docx']:
-                text_result = self._extract_word_text(file_path)
+                text_result = measure_check(self._extract_word_text, file_path, submission.file_hash)
             elif file_ext in ['xls', 'xlsx']:
-                text_result = self._extract_excel_text(file_path)
+                text_result = measure_check(self._extract_excel_text, file_path, submission.file_hash)
             elif file_ext in ['ppt', 'pptx']:
-                text_result = self._extract_ppt_text(file_path)
+                text_result = measure_check(self._extract_ppt_text, file_path, submission.file_hash)
             else:
                 return {
                     'status': 'rejected',
@@ -355,7 +386,9 @@ class AIValidator:
                     'checks': {}
                 }
             
-            results['checks']['text_extraction'] = text_result
+            # النص الكامل محفوظ في مخزن النصوص (ExtractedText) - لا داعي لتكراره في النتائج
+            results['checks']['text_extraction'] = {k: v for k, v in text_result.items() if k != 'text'}
+            publish_check('text_extraction', results['checks']['text_extraction'])
             
             if text_result['status'] == 'fail':
                 results['rejection_reasons'].append(text_result['message'])
@@ -364,8 +397,16 @@ class AIValidator:
             
             extracted_text = text_result.get('text', '')
             
+            # 2-3. الفحوصات المستقلة (بالتوازي - كل فحص بمهلة خاصة)
+            checks = run_checks([
+                Check('statistics', self._check_document_stats, text_result, project),
+                Check('content_analysis', self._analyze_document_content, extracted_text, project, file_ext),
+                Check('similarity', self._check_document_similarity, extracted_text, file_path, file_ext, submission, fallback_score=80),
+            ])
+            merge_validation_data(submission, checks)
+            
             # 2. فحص الإحصائيات
-            stats_result = self._check_document_stats(text_result, project)
+            stats_result = checks['statistics']
             results['checks']['statistics'] = stats_result
             
             if stats_result['status'] == 'fail':
@@ -374,17 +415,27 @@ class AIValidator:
                 results['warnings'].append(stats_result['message'])
             
             # 3. تحليل المحتوى بـ Gemini
-            content_result = self._analyze_document_content(extracted_text, project, file_ext)
+            content_result = checks['content_analysis']
             results['checks']['content_analysis'] = content_result
             
             if content_result['status'] == 'fail':
                 results['rejection_reasons'].append(content_result['message'])
             
+            # 4. كشف التشابه
+            similarity_result = checks['similarity']
+            results['checks']['similarity'] = similarity_result
+            
+            if similarity_result['status'] == 'fail':
+                results['rejection_reasons'].append(similarity_result['message'])
+            elif similarity_result['status'] == 'warning':
+                results['warnings'].append(similarity_result['message'])
+            
             # حساب الدرجة النهائية
             scores = [
                 text_result.get('score', 0),
                 stats_result.get('score', 0),
-                content_result.get('score', 0)
+                content_result.get('score', 0),
+                similarity_result.get('score', 0)
             ]
             results['overall_score'] = sum(scores) / len(scores)
             
@@ -430,8 +481,9 @@ class AIValidator:
         
         try:
             # 1. فحص مدة الصوت
-            duration_result = self._check_audio_duration(file_path, project)
+            duration_result = measure_check(self._check_audio_duration, file_path, project, submission.file_hash)
             results['checks']['duration'] = duration_result
+            publish_check('duration', results['checks']['duration'])
             
             if duration_result['status'] == 'fail':
                 results['rejection_reasons'].append(duration_result['message'])
@@ -439,23 +491,31 @@ class AIValidator:
                 return results
             
             # 2. Speech-to-Text
-            stt_result = self._audio_to_text(file_path)
+            stt_result = measure_check(self._audio_to_text, file_path)
             results['checks']['speech_to_text'] = stt_result
+            publish_check('speech_to_text', results['checks']['speech_to_text'])
             
             if stt_result['status'] == 'fail':
                 results['rejection_reasons'].append(stt_result['message'])
             
             transcribed_text = stt_result.get('text', '')
             
+            # 3-4. الفحوصات المعتمدة على النص فقط (بالتوازي - كل فحص بمهلة خاصة)
+            checks = run_checks([
+                Check('content_analysis', self._analyze_audio_content, transcribed_text, project),
+                Check('similarity', self._check_audio_similarity, transcribed_text, submission, fallback_score=80),
+            ])
+            merge_validation_data(submission, checks)
+            
             # 3. تحليل المحتوى بـ Gemini
-            content_result = self._analyze_audio_content(transcribed_text, project)
+            content_result = checks['content_analysis']
             results['checks']['content_analysis'] = content_result
             
             if content_result['status'] == 'fail':
                 results['rejection_reasons'].append(content_result['message'])
             
             # 4. كشف التشابه
-            similarity_result = self._check_audio_similarity(transcribed_text, submission)
+            similarity_result = checks['similarity']
             results['checks']['similarity'] = similarity_result
             
             if similarity_result['status'] == 'fail':
@@ -496,35 +556,31 @@ class AIValidator:
     # Video Validation Helper Methods
     # ====================================
     
-    def _check_video_duration(self, file_path, project):
+    def _check_video_duration(self, file_path, project, file_hash=None):
         """
-        فحص مدة الفيديو
+        فحص مدة الفيديو (من رأس الملف بدون فك الترميز)
         
         Args:
             file_path: مسار الفيديو
             project: كائن المشروع
+            file_hash: hash الملف (لإعادة استخدام معلومات الملف المخزنة)
             
         Returns:
             dict: نتيجة الفحص
         """
         try:
-            import cv2
+            from .media_probe import probe
             
-            video = cv2.VideoCapture(file_path)
+            info = probe(file_path, file_hash=file_hash)
             
-            if not video.isOpened():
+            if not info or not info.get('has_video'):
                 return {
                     'status': 'fail',
                     'message': 'فشل في فتح الفيديو',
                     'score': 0
                 }
             
-            # حساب المدة
-            fps = video.get(cv2.CAP_PROP_FPS)
-            frame_count = video.get(cv2.CAP_PROP_FRAME_COUNT)
-            duration = frame_count / fps if fps > 0 else 0
-            
-            video.release()
+            duration = info['duration']
             
             # التحقق من قيود المدة
             constraints = project.file_constraints or {}
@@ -562,6 +618,7 @@ class AIValidator:
             return {
                 'status': 'fail',
                 'message': f'خطأ في قراءة الفيديو: {str(e)}',
+                'fallback': True,
                 'score': 0
             }
     
@@ -569,6 +626,9 @@ class AIValidator:
         """
         OCR على آخر 5 ثواني من الفيديو للتحقق من اسم الطالب
         
+        الإطارات تُقرأ تسلسلياً وتُصغّر ويُحذف المكرر منها، ثم تُقص مناطق النص
+        ويُتعرف عليها دفعة واحدة (video_ocr)
+        
         Args:
             file_path: مسار الفيديو
             student_name: اسم الطالب
@@ -577,65 +637,30 @@ class AIValidator:
             dict: نتيجة الفحص
         """
         try:
-            import cv2
-            import easyocr
-            from apps.projects.utils import normalize_arabic_name
+            from .ocr_pool import get_reader_pool
+            from .video_ocr import sample_tail_frames, read_name
             
-            # تهيئة EasyOCR (العربية + الإنجليزية)
-            reader = easyocr.Reader(['ar', 'en'], gpu=False)
-            
-            video = cv2.VideoCapture(file_path)
-            
-            if not video.isOpened():
+            try:
+                frames, stats = sample_tail_frames(file_path)
+            except ValueError:
                 return {
                     'status': 'fail',
                     'message': 'فشل في فتح الفيديو',
                     'score': 0
                 }
             
-            # الحصول على معلومات الفيديو
-            fps = video.get(cv2.CAP_PROP_FPS)
-            total_frames = int(video.get(cv2.CAP_PROP_FRAME_COUNT))
-            
-            # آخر 5 ثواني
-            start_frame = max(0, total_frames - int(fps * 5))
-            
-            # استخراج إطارات من آخر 5 ثواني (كل ثانية إطار)
-            frames_to_check = []
-            for i in range(5):
-                frame_pos = start_frame + int(i * fps)
-                if frame_pos < total_frames:
-                    video.set(cv2.CAP_PROP_POS_FRAMES, frame_pos)
-                    ret, frame = video.read()
-                    if ret:
-                        frames_to_check.append(frame)
+            # قراءة النص من الإطارات (قارئ EasyOCR مشترك - العربية + الإنجليزية)
+            with get_reader_pool().acquire() as reader:
+                reading = read_name(reader, frames, student_name)
             
-            video.release()
-            
-            # قراءة النص من الإطارات
-            detected_texts = []
-            for frame in frames_to_check:
-                result = reader.readtext(frame)
-                for detection in result:
-                    text = detection[1]
-                    detected_texts.append(text)
-            
-            # دمج النصوص
-            combined_text = ' '.join(detected_texts)
+            combined_text = reading['text']
+            match_percentage = reading['match_percentage']
+            stats.update({'regions': reading['regions'], 'mode': reading['mode']})
             logger.info(f"📝 النصوص المستخرجة: {combined_text[:100]}...")
-            
-            # تطبيع الأسماء للمقارنة
-            normalized_student = normalize_arabic_name(student_name)
-            normalized_detected = normalize_arabic_name(combined_text)
-            
-            # البحث عن الاسم
-            name_parts = normalized_student.split()
-            found_parts = sum(1 for part in name_parts if part in normalized_detected)
-            
-            # نسبة التطابق
-            match_percentage = (found_parts / len(name_parts)) * 100 if name_parts else 0
-            
-            logger.info(f"🔍 تطابق الاسم: {match_percentage:.1f}% ({found_parts}/{len(name_parts)} أجزاء)")
+            logger.info(
+                f"🔍 تطابق الاسم: {match_percentage:.1f}% ({reading['found_parts']}/{reading['name_parts']} أجزاء)"
+                f" - {stats['kept']}/{stats['sampled']} إطار، {stats['regions']} منطقة ({stats['mode']})"
+            )
             
             if match_percentage >= 75:
                 return {
@@ -643,6 +668,7 @@ class AIValidator:
                     'message': f'تم العثور على الاسم في الفيديو ({match_percentage:.0f}% تطابق)',
                     'detected_text': combined_text[:200],
                     'match_percentage': match_percentage,
+                    'frames': stats,
                     'score': 100
                 }
             elif match_percentage >= 50:
@@ -651,6 +677,7 @@ class AIValidator:
                     'message': f'تطابق جزئي للاسم ({match_percentage:.0f}%). يرجى التأكد',
                     'detected_text': combined_text[:200],
                     'match_percentage': match_percentage,
+                    'frames': stats,
                     'score': 70
                 }
             else:
@@ -659,6 +686,7 @@ class AIValidator:
                     'message': 'لم يتم العثور على الاسم في آخر 5 ثواني من الفيديو',
                     'detected_text': combined_text[:200],
                     'match_percentage': match_percentage,
+                    'frames': stats,
                     'score': 0
                 }
                 
@@ -667,36 +695,40 @@ class AIValidator:
             return {
                 'status': 'warning',
                 'message': f'تعذر قراءة النص من الفيديو: {str(e)}',
+                'fallback': True,
                 'score': 50
             }
     
-    def _analyze_video_content(self, file_path, project):
+    def _analyze_video_content(self, file_path, project, file_hash=None):
         """
         تحليل محتوى الفيديو باستخدام Gemini Vision
         
         Args:
             file_path: مسار الفيديو
             project: كائن المشروع
+            file_hash: hash الملف (لإعادة استخدام الملف المرفوع سابقاً)
             
         Returns:
             dict: نتيجة التحليل
         """
         try:
-            import google.generativeai as genai
+            from .video_proxy import get_video_input
             
             if not self.gemini_vision:
                 return {
                     'status': 'warning',
                     'message': 'Gemini Vision غير متاح',
+                    'fallback': True,
                     'score': 70
                 }
             
-            # رفع الفيديو لـ Gemini
-            logger.info(f"📤 رفع الفيديو لـ Gemini...")
-            video_file = genai.upload_file(file_path)
+            # نسخة خفيفة من الفيديو (أو الملف المرفوع سابقاً لنفس المحتوى)
+            logger.info(f"📤 تجهيز الفيديو لـ Gemini...")
+            video_input, input_kind = get_video_input(file_path, file_hash)
+            source = 'هذه الصورة تحتوي على إطارات مرتبة زمنياً من فيديو. ' if input_kind == 'keyframes' else ''
             
             # تجهيز Prompt
-            prompt = f"""حلل هذا الفيديو بدقة وأجب بصيغة JSON:
+            prompt = f"""{source}حلل هذا الفيديو بدقة وأجب بصيغة JSON:
 
 معلومات المشروع:
 - العنوان: {project.title}
@@ -712,7 +744,7 @@ class AIValidator:
 
 أجب فقط بصيغة JSON بدون أي نص إضافي."""
             
-            response = self.gemini_vision.generate_content([prompt, video_file])
+            response = self.gemini_vision.generate_content([prompt, video_input])
             
             # تحليل النتيجة
             import json
@@ -728,6 +760,7 @@ class AIValidator:
                     'issues': [],
                     'recommendation': 'approved'
                 }
+            result['video_input'] = input_kind
             
             # حساب الدرجة
             quality = result.get('quality_score', 70)
@@ -771,6 +804,7 @@ class AIValidator:
             return {
                 'status': 'warning',
                 'message': f'تعذر تحليل الفيديو: {str(e)}',
+                'fallback': True,
                 'score': 70
             }
     
@@ -786,47 +820,28 @@ class AIValidator:
             dict: نتيجة الفحص
         """
         try:
-            import videohash
             from .models import Submission
+            from .similarity.video_index import check_and_index
+            
+            # حساب بصمة الفيديو ومقارنتها مع كل فيديوهات المشروع
+            fingerprint = check_and_index(submission, file_path)
+            if fingerprint is None:
+                return {
+                    'status': 'warning',
+                    'message': 'تعذر حساب بصمة الفيديو',
+                    'score': 80
+                }
             
-            # حساب hash للفيديو الحالي
-            current_hash = videohash.VideoHash(path=file_path)
-            
-            # البحث عن فيديوهات سابقة في نفس المشروع
-            previous_submissions = Submission.objects.filter(
-                project=submission.project,
-                file_type='video',
-                validation_data__video_hash__isnull=False
-            ).exclude(id=submission.id)
-            
-            # مقارنة مع الفيديوهات السابقة
-            similarities = []
-            for prev_sub in previous_submissions:
-                try:
-                    prev_hash_data = prev_sub.validation_data.get('video_hash')
-                    if prev_hash_data:
-                        # إعادة بناء hash
-                        prev_hash = videohash.VideoHash(
-                            storage_path=prev_hash_data
-                        )
-                        
-                        # حساب الفرق (كلما أقل = أكثر تشابه)
-                        difference = current_hash - prev_hash
-                        similarity_percent = max(0, 100 - difference)
-                        
-                        if similarity_percent > 80:
-                            similarities.append({
-                                'submission_id': prev_sub.id,
-                                'student': prev_sub.submitted_student_name,
-                                'similarity': similarity_percent,
-                                'difference': difference
-                            })
-                except:
-                    continue
-            
-            # حفظ hash الحالي
-            submission.validation_data = submission.validation_data or {}
-            submission.validation_data['video_hash'] = str(current_hash)
+            # التوقيع الحالي (يُدمج في validation_data عند اكتمال الفحص في مهلته)
+            validation_data = {'video_hash': fingerprint['signature']}
+            
+            similarities = fingerprint['matches']
+            if similarities:
+                names = dict(Submission.objects.filter(
+                    id__in=[s['submission_id'] for s in similarities]
+                ).values_list('id', 'submitted_student_name'))
+                for similar in similarities:
+                    similar['student'] = names.get(similar['submission_id'])
             
             # التحقق من النتائج
             if similarities:
@@ -837,6 +852,7 @@ class AIValidator:
                         'status': 'fail',
                         'message': f"فيديو مشابه جداً ({most_similar['similarity']:.0f}%) لتسليم سابق",
                         'similar_submissions': similarities[:3],
+                        'validation_data': validation_data,
                         'score': 0
                     }
                 else:
@@ -844,12 +860,14 @@ class AIValidator:
                         'status': 'warning',
                         'message': f"تشابه متوسط ({most_similar['similarity']:.0f}%) مع تسليم سابق",
                         'similar_submissions': similarities[:3],
+                        'validation_data': validation_data,
                         'score': 70
                     }
             else:
                 return {
                     'status': 'pass',
                     'message': 'الفيديو أصلي (لا يوجد تشابه)',
+                    'validation_data': validation_data,
                     'score': 100
                 }
                 
@@ -858,6 +876,7 @@ class AIValidator:
             return {
                 'status': 'warning',
                 'message': 'تعذر فحص التشابه',
+                'fallback': True,
                 'score': 80
             }
     
@@ -865,38 +884,33 @@ class AIValidator:
     # PDF Validation Helper Methods
     # ====================================
     
-    def _extract_pdf_text(self, file_path):
+    def _extract_pdf_text(self, file_path, file_hash=None):
         """
-        استخراج النص من PDF
+        استخراج النص من PDF (من مخزن النصوص إذا تم استخراجه سابقاً)
+        
+        الصفحات تُستخرج بالتوازي ويتوقف الاستخراج عند PDF_EXTRACT_TARGET_CHARS
+        حرف، وهو ما تحتاجه فحوصات الإحصائيات والمحتوى والانتحال.
         
         Args:
             file_path: مسار الملف
+            file_hash: hash الملف
             
         Returns:
             dict: النص المستخرج + البيانات الإحصائية
         """
         try:
-            import pdfplumber
-            
-            text = ''
-            page_count = 0
-            images_count = 0
-            
-            with pdfplumber.open(file_path) as pdf:
-                page_count = len(pdf.pages)
-                
-                for page in pdf.pages:
-                    # استخراج النص
-                    page_text = page.extract_text()
-                    if page_text:
-                        text += page_text + '\n'
-                    
-                    # عد الصور
-                    if hasattr(page, 'images'):
-                        images_count += len(page.images)
-            
-            # إحصائيات
-            word_count = len(text.split())
+            from .text_store import get_document
+            
+            document = get_document(
+                file_hash, file_path, 'pdf',
+                max_chars=getattr(settings, 'PDF_EXTRACT_TARGET_CHARS', 20000)
+            )
+            text = document.text
+            page_count = document.page_count
+            images_count = document.metadata.get('images_count', 0)
+            
+            # إحصائيات (عدد الكلمات تقديري إذا توقف الاستخراج مبكراً)
+            word_count = document.estimated_word_count
             char_count = len(text)
             
             logger.info(f"📊 PDF: {page_count} صفحة، {word_count} كلمة، {images_count} صورة")
@@ -919,6 +933,10 @@ class AIValidator:
                 'page_count': page_count,
                 'char_count': char_count,
                 'images_count': images_count,
+                'pages_extracted': document.extracted_pages,
+                'word_count_estimated': document.partial,
+                'ocr_pages': document.metadata.get('ocr_pages', []),
+                'page_timings': document.metadata.get('page_timings', []),
                 'score': 100
             }
             
@@ -930,6 +948,7 @@ class AIValidator:
                 'text': '',
                 'word_count': 0,
                 'page_count': 0,
+                'fallback': True,
                 'score': 0
             }
     
@@ -1001,6 +1020,7 @@ class AIValidator:
             return {
                 'status': 'warning',
                 'message': 'تعذر فحص الإحصائيات',
+                'fallback': True,
                 'score': 70
             }
     
@@ -1020,6 +1040,7 @@ class AIValidator:
                 return {
                     'status': 'warning',
                     'message': 'Gemini غير متاح',
+                    'fallback': True,
                     'score': 70
                 }
             
@@ -1108,12 +1129,14 @@ class AIValidator:
             return {
                 'status': 'warning',
                 'message': f'تعذر تحليل المحتوى: {str(e)}',
+                'fallback': True,
                 'score': 70
             }
     
     def _check_pdf_plagiarism(self, text, submission):
         """
         كشف الانتحال في PDF
+        المقارنة مع كل التسليمات السابقة في المشروع عبر فهرس بصمات MinHash
         
         Args:
             text: النص المستخرج
@@ -1124,63 +1147,21 @@ class AIValidator:
         """
         try:
             from .models import Submission
-            from sklearn.feature_extraction.text import TfidfVectorizer
-            from sklearn.metrics.pairwise import cosine_similarity
-            import numpy as np
-            
-            # البحث عن تسليمات سابقة في نفس المشروع
-            previous_submissions = Submission.objects.filter(
-                project=submission.project,
-                file_type='pdf',
-                validation_data__pdf_text__isnull=False
-            ).exclude(id=submission.id)[:20]  # آخر 20 تسليم
-            
-            if not previous_submissions.exists():
-                # حفظ النص للمقارنة المستقبلية
-                submission.validation_data = submission.validation_data or {}
-                submission.validation_data['pdf_text'] = text[:5000]  # حفظ أول 5000 حرف
-                
-                return {
-                    'status': 'pass',
-                    'message': 'لا توجد تسليمات سابقة للمقارنة',
-                    'score': 100
-                }
+            from .similarity.text_index import check_and_index
             
-            # تجهيز النصوص
-            current_text = text[:5000]  # أول 5000 حرف
-            previous_texts = [
-                sub.validation_data.get('pdf_text', '')[:5000]
-                for sub in previous_submissions
-                if sub.validation_data and sub.validation_data.get('pdf_text')
-            ]
+            match = check_and_index(submission, 'pdf', text)
             
-            if not previous_texts:
-                submission.validation_data = submission.validation_data or {}
-                submission.validation_data['pdf_text'] = current_text
+            if match is None or not match['matches']:
                 return {
                     'status': 'pass',
-                    'message': 'لا توجد نصوص سابقة صالحة للمقارنة',
+                    'message': 'لا توجد تسليمات سابقة مشابهة للمقارنة',
+                    'max_similarity': 0,
                     'score': 100
                 }
             
-            # TF-IDF + Cosine Similarity
-            all_texts = [current_text] + previous_texts
-            vectorizer = TfidfVectorizer(max_features=1000, stop_words=None)
-            tfidf_matrix = vectorizer.fit_transform(all_texts)
+            max_similarity = match['max_similarity']
             
-            # حساب التشابه مع كل نص سابق
-            current_vector = tfidf_matrix[0:1]
-            previous_vectors = tfidf_matrix[1:]
-            similarities = cosine_similarity(current_vector, previous_vectors)[0]
-            
-            # أعلى نسبة تشابه
-            max_similarity = float(np.max(similarities)) * 100
-            max_similarity_idx = int(np.argmax(similarities))
-            
-            # حفظ النص الحالي
-            submission.validation_data = submission.validation_data or {}
-            submission.validation_data['pdf_text'] = current_text
-            submission.validation_data['max_similarity'] = max_similarity
+            validation_data = {'max_similarity': max_similarity}
             
             logger.info(f"📊 أعلى نسبة تشابه: {max_similarity:.1f}%")
             
@@ -1188,7 +1169,7 @@ class AIValidator:
             threshold = submission.project.plagiarism_threshold  # من المشروع
             
             if max_similarity > 85:
-                similar_sub = list(previous_submissions)[max_similarity_idx]
+                similar_sub = Submission.objects.filter(id=match['matches'][0]['submission_id']).first()
                 return {
                     'status': 'fail',
                     'message': f'تشابه عالي جداً ({max_similarity:.0f}%) مع تسليم سابق',
@@ -1197,7 +1178,8 @@ class AIValidator:
                         'id': similar_sub.id,
                         'student': similar_sub.submitted_student_name,
                         'submitted_at': similar_sub.submitted_at.isoformat()
-                    },
+                    } if similar_sub else None,
+                    'validation_data': validation_data,
                     'score': 0
                 }
             elif max_similarity > threshold:
@@ -1205,6 +1187,7 @@ class AIValidator:
                     'status': 'warning',
                     'message': f'تشابه متوسط ({max_similarity:.0f}%) مع تسليم سابق',
                     'max_similarity': max_similarity,
+                    'validation_data': validation_data,
                     'score': 70
                 }
             else:
@@ -1212,6 +1195,7 @@ class AIValidator:
                     'status': 'pass',
                     'message': f'نسبة التشابه منخفضة ({max_similarity:.0f}%)',
                     'max_similarity': max_similarity,
+                    'validation_data': validation_data,
                     'score': 100
                 }
                 
@@ -1220,6 +1204,7 @@ class AIValidator:
             return {
                 'status': 'warning',
                 'message': 'تعذر فحص الانتحال',
+                'fallback': True,
                 'score': 80
             }
     
@@ -1238,10 +1223,10 @@ class AIValidator:
             dict: النص المستخرج
         """
         try:
-            import easyocr
+            from .ocr_pool import get_reader_pool
             
-            reader = easyocr.Reader(['ar', 'en'], gpu=False)
-            result = reader.readtext(file_path)
+            with get_reader_pool().acquire() as reader:
+                result = reader.readtext(file_path)
             
             # استخراج النصوص
             texts = [detection[1] for detection in result]
@@ -1266,6 +1251,7 @@ class AIValidator:
                 'message': 'تعذر قراءة النص من الصورة',
                 'text': '',
                 'word_count': 0,
+                'fallback': True,
                 'score': 70
             }
     
@@ -1281,18 +1267,25 @@ class AIValidator:
             dict: نتيجة التحليل
         """
         try:
-            import google.generativeai as genai
-            from PIL import Image
+            from .image_quality import open_preview
             
             if not self.gemini_vision:
                 return {
                     'status': 'warning',
                     'message': 'Gemini Vision غير متاح',
+                    'fallback': True,
                     'score': 70
                 }
             
-            # تحميل الصورة
-            img = Image.open(file_path)
+            # تحميل الصورة (معاينة مصغّرة - Gemini يصغّر الصور الكبيرة على أي حال)
+            img = open_preview(file_path, getattr(settings, 'IMAGE_ANALYSIS_MAX_SIDE', 2048), mode='RGB')
+            if img is None:
+                # غير JPEG وأكبر من حد فك الترميز - لا نفك الصورة كاملة لأجل Gemini
+                return {
+                    'status': 'warning',
+                    'message': 'الصورة كبيرة جداً لتحليل محتواها',
+                    'score': 70
+                }
             
             # تجهيز Prompt
             prompt = f"""حلل هذه الصورة بدقة وأجب بصيغة JSON:
@@ -1359,12 +1352,14 @@ class AIValidator:
             return {
                 'status': 'warning',
                 'message': 'تعذر تحليل الصورة',
+                'fallback': True,
                 'score': 70
             }
     
     def _check_image_quality(self, file_path):
         """
-        فحص جودة الصورة (الدقة والحجم)
+        فحص جودة الصورة (الدقة، الحدة، الإضاءة)
+        الأبعاد من رأس الملف والمقاييس من معاينة مصغّرة (بدون فك الصورة كاملة)
         
         Args:
             file_path: مسار الصورة
@@ -1373,45 +1368,56 @@ class AIValidator:
             dict: نتيجة الفحص
         """
         try:
-            from PIL import Image
+            from .image_quality import measure
             
-            img = Image.open(file_path)
-            width, height = img.size
+            info = measure(file_path)
+            width, height = info['width'], info['height']
             pixels = width * height
             
-            logger.info(f"📏 حجم الصورة: {width}x{height} ({pixels:,} pixels)")
+            logger.info(
+                f"📏 حجم الصورة: {width}x{height} ({pixels:,} pixels) - "
+                f"الحدة: {info['sharpness']} - الإضاءة: {info['brightness']}"
+            )
             
-            # التقييم
+            # التقييم (كل مشكلة لها رسالة ودرجة - الدرجة النهائية أقلها)
+            issues = []
             if pixels < 100000:  # أقل من 0.1 ميجا بكسل
-                return {
-                    'status': 'warning',
-                    'message': f'الصورة صغيرة ({width}x{height})',
-                    'width': width,
-                    'height': height,
-                    'score': 60
-                }
+                issues.append((f'الصورة صغيرة ({width}x{height})', 60))
             elif pixels > 25000000:  # أكبر من 25 ميجا بكسل
+                issues.append((f'الصورة كبيرة جداً ({width}x{height})', 80))
+            
+            # تحذير فقط بدون خصم: الحد لم يُعاير على معاينة IMAGE_QUALITY_PREVIEW_SIDE
+            # (التصغير يغيّر تباين Laplacian) فلا يُستخدم لخفض الدرجة
+            if info['sharpness'] is not None and info['sharpness'] < getattr(settings, 'IMAGE_BLUR_THRESHOLD', 100):
+                issues.append(('الصورة قد تكون ضبابية (غير واضحة)', 100))
+            
+            if info['brightness'] is not None:
+                if info['brightness'] < 40 or info['dark_ratio'] > 0.5:
+                    issues.append(('الصورة معتمة', 70))
+                elif info['brightness'] > 215 or info['bright_ratio'] > 0.5:
+                    issues.append(('الصورة شديدة الإضاءة', 70))
+            
+            if issues:
                 return {
                     'status': 'warning',
-                    'message': f'الصورة كبيرة جداً ({width}x{height})',
-                    'width': width,
-                    'height': height,
-                    'score': 80
-                }
-            else:
-                return {
-                    'status': 'pass',
-                    'message': f'حجم الصورة مناسب ({width}x{height})',
-                    'width': width,
-                    'height': height,
-                    'score': 100
+                    'message': '، '.join(message for message, _ in issues),
+                    **info,
+                    'score': min(score for _, score in issues)
                 }
+            
+            return {
+                'status': 'pass',
+                'message': f'جودة الصورة مناسبة ({width}x{height})',
+                **info,
+                'score': 100
+            }
                 
         except Exception as e:
             logger.error(f"❌ خطأ في فحص جودة الصورة: {str(e)}")
             return {
                 'status': 'warning',
                 'message': 'تعذر فحص الجودة',
+                'fallback': True,
                 'score': 70
             }
     
@@ -1428,50 +1434,33 @@ class AIValidator:
         """
         try:
             import imagehash
-            from PIL import Image
-            from .models import Submission
+            from .similarity.image_index import check_and_index
+            from .image_quality import open_preview
             
-            # حساب hash للصورة الحالية
-            img = Image.open(file_path)
+            # حساب hash للصورة الحالية (من معاينة مصغّرة - البصمة 8x8 فقط)
+            img = open_preview(file_path, 256)
+            if img is None:
+                return {
+                    'status': 'warning',
+                    'message': 'الصورة كبيرة جداً لحساب بصمتها',
+                    'score': 80
+                }
             current_hash = imagehash.average_hash(img)
             
-            # البحث عن صور سابقة
-            previous_submissions = Submission.objects.filter(
-                project=submission.project,
-                file_type='image',
-                validation_data__image_hash__isnull=False
-            ).exclude(id=submission.id)[:20]
+            validation_data = {'image_hash': str(current_hash)}
             
-            if not previous_submissions.exists():
-                submission.validation_data = submission.validation_data or {}
-                submission.validation_data['image_hash'] = str(current_hash)
+            # المقارنة مع كل صور المشروع عبر فهرس البصمات
+            match = check_and_index(submission, current_hash)
+            if not match or not match['matches']:
                 return {
                     'status': 'pass',
-                    'message': 'لا توجد صور سابقة للمقارنة',
+                    'message': 'لا توجد صور سابقة مشابهة',
+                    'similarity': 0,
+                    'validation_data': validation_data,
                     'score': 100
                 }
             
-            # المقارنة
-            max_similarity = 0
-            similar_sub = None
-            
-            for prev_sub in previous_submissions:
-                try:
-                    prev_hash_str = prev_sub.validation_data.get('image_hash')
-                    if prev_hash_str:
-                        prev_hash = imagehash.hex_to_hash(prev_hash_str)
-                        difference = current_hash - prev_hash
-                        similarity = max(0, 100 - (difference * 2))
-                        
-                        if similarity > max_similarity:
-                            max_similarity = similarity
-                            similar_sub = prev_sub
-                except:
-                    continue
-            
-            # حفظ hash الحالي
-            submission.validation_data = submission.validation_data or {}
-            submission.validation_data['image_hash'] = str(current_hash)
+            max_similarity = match['max_similarity']
             
             logger.info(f"📊 أعلى تشابه: {max_similarity:.1f}%")
             
@@ -1481,6 +1470,7 @@ class AIValidator:
                     'status': 'fail',
                     'message': f'صورة مشابهة جداً ({max_similarity:.0f}%) لتسليم سابق',
                     'similarity': max_similarity,
+                    'validation_data': validation_data,
                     'score': 0
                 }
             elif max_similarity > 70:
@@ -1488,6 +1478,7 @@ class AIValidator:
                     'status': 'warning',
                     'message': f'تشابه متوسط ({max_similarity:.0f}%)',
                     'similarity': max_similarity,
+                    'validation_data': validation_data,
                     'score': 70
                 }
             else:
@@ -1495,6 +1486,7 @@ class AIValidator:
                     'status': 'pass',
                     'message': f'الصورة أصلية ({max_similarity:.0f}% تشابه)',
                     'similarity': max_similarity,
+                    'validation_data': validation_data,
                     'score': 100
                 }
                 
@@ -1503,6 +1495,7 @@ class AIValidator:
             return {
                 'status': 'warning',
                 'message': 'تعذر فحص التشابه',
+                'fallback': True,
                 'score': 80
             }
     
@@ -1510,14 +1503,102 @@ class AIValidator:
     # Document Validation Helper Methods
     # ====================================
     
-    def _extract_word_text(self, file_path):
-        """استخراج النص من Word"""
+    def _check_document_similarity(self, text, file_path, file_ext, submission):
+        """
+        كشف التشابه في المستندات
+        - بصمة النص (MinHash) كما في PDF
+        - البصمة البنيوية (الشرائح، الأوراق، الجداول، الصور المضمّنة) لكشف
+          النسخ مع إعادة الصياغة - تعطي تحذيراً فقط لأن قوالب المعلم متشابهة البنية
+        
+        Returns:
+            dict: نتيجة الفحص
+        """
         try:
-            from docx import Document
+            from .models import Submission
+            from .similarity.text_index import check_and_index
+            from .similarity import document_index
             
-            doc = Document(file_path)
-            text = '\n'.join([para.text for para in doc.paragraphs if para.text])
-            word_count = len(text.split())
+            text_match = check_and_index(submission, 'document', text)
+            structure_match = document_index.check_and_index(submission, file_path, file_ext)
+            
+            text_similarity = text_match['max_similarity'] if text_match else 0.0
+            structure_similarity = structure_match['max_similarity'] if structure_match else 0.0
+            
+            validation_data = {
+                'max_similarity': text_similarity,
+                'structure_similarity': structure_similarity,
+            }
+            
+            logger.info(f"📊 تشابه المستند: النص {text_similarity:.1f}% - البنية {structure_similarity:.1f}%")
+            
+            details = {
+                'max_similarity': text_similarity,
+                'structure_similarity': structure_similarity,
+            }
+            threshold = submission.project.plagiarism_threshold
+            structure_threshold = getattr(settings, 'DOCUMENT_STRUCTURE_THRESHOLD', 90)
+            min_tokens = getattr(settings, 'DOCUMENT_STRUCTURE_MIN_TOKENS', 8)
+            
+            if text_similarity > 85:
+                similar_sub = Submission.objects.filter(id=text_match['matches'][0]['submission_id']).first()
+                return {
+                    'status': 'fail',
+                    'message': f'تشابه عالي جداً ({text_similarity:.0f}%) مع تسليم سابق',
+                    **details,
+                    'similar_submission': {
+                        'id': similar_sub.id,
+                        'student': similar_sub.submitted_student_name,
+                        'submitted_at': similar_sub.submitted_at.isoformat()
+                    } if similar_sub else None,
+                    'validation_data': validation_data,
+                    'score': 0
+                }
+            elif text_similarity > threshold:
+                return {
+                    'status': 'warning',
+                    'message': f'تشابه متوسط ({text_similarity:.0f}%) مع تسليم سابق',
+                    **details,
+                    'validation_data': validation_data,
+                    'score': 70
+                }
+            elif (
+                structure_similarity >= structure_threshold
+                and structure_match['tokens'] >= min_tokens
+            ):
+                return {
+                    'status': 'warning',
+                    'message': f'بنية المستند مطابقة ({structure_similarity:.0f}%) لتسليم سابق',
+                    **details,
+                    'similar_submission_id': structure_match['matches'][0]['submission_id'],
+                    'validation_data': validation_data,
+                    'score': 70
+                }
+            else:
+                return {
+                    'status': 'pass',
+                    'message': f'نسبة التشابه منخفضة ({text_similarity:.0f}%)',
+                    **details,
+                    'validation_data': validation_data,
+                    'score': 100
+                }
+                
+        except Exception as e:
+            logger.error(f"❌ خطأ في كشف تشابه المستند: {str(e)}")
+            return {
+                'status': 'warning',
+                'message': 'تعذر فحص التشابه',
+                'fallback': True,
+                'score': 80
+            }
+    
+    def _extract_word_text(self, file_path, file_hash=None):
+        """استخراج النص من Word (من مخزن النصوص إذا تم استخراجه سابقاً)"""
+        try:
+            from .text_store import get_document
+            
+            document = get_document(file_hash, file_path, 'docx')
+            text = document.text
+            word_count = document.word_count
             
             logger.info(f"📄 Word: {word_count} كلمة")
             
@@ -1545,27 +1626,19 @@ class AIValidator:
                 'message': f'فشل في قراءة الملف: {str(e)}',
                 'text': '',
                 'word_count': 0,
+                'fallback': True,
                 'score': 0
             }
     
-    def _extract_excel_text(self, file_path):
-        """استخراج النص من Excel"""
+    def _extract_excel_text(self, file_path, file_hash=None):
+        """استخراج النص من Excel (من مخزن النصوص إذا تم استخراجه سابقاً)"""
         try:
-            from openpyxl import load_workbook
-            
-            wb = load_workbook(file_path)
-            text = ''
-            cell_count = 0
+            from .text_store import get_document
             
-            for sheet in wb.sheetnames:
-                ws = wb[sheet]
-                for row in ws.iter_rows(values_only=True):
-                    for cell in row:
-                        if cell:
-                            text += str(cell) + ' '
-                            cell_count += 1
-            
-            word_count = len(text.split())
+            document = get_document(file_hash, file_path, 'xlsx')
+            text = document.text
+            cell_count = document.metadata.get('cell_count', 0)
+            word_count = document.word_count
             
             logger.info(f"📊 Excel: {cell_count} خلية، {word_count} كلمة")
             
@@ -1595,24 +1668,19 @@ class AIValidator:
                 'message': f'فشل في قراءة الملف: {str(e)}',
                 'text': '',
                 'word_count': 0,
+                'fallback': True,
                 'score': 0
             }
     
-    def _extract_ppt_text(self, file_path):
-        """استخراج النص من PowerPoint"""
+    def _extract_ppt_text(self, file_path, file_hash=None):
+        """استخراج النص من PowerPoint (من مخزن النصوص إذا تم استخراجه سابقاً)"""
         try:
-            from pptx import Presentation
-            
-            prs = Presentation(file_path)
-            text = ''
-            slide_count = len(prs.slides)
+            from .text_store import get_document
             
-            for slide in prs.slides:
-                for shape in slide.shapes:
-                    if hasattr(shape, "text"):
-                        text += shape.text + '\n'
-            
-            word_count = len(text.split())
+            document = get_document(file_hash, file_path, 'pptx')
+            text = document.text
+            slide_count = document.page_count
+            word_count = document.word_count
             
             logger.info(f"📊 PPT: {slide_count} شريحة، {word_count} كلمة")
             
@@ -1642,6 +1710,7 @@ class AIValidator:
                 'message': f'فشل في قراءة الملف: {str(e)}',
                 'text': '',
                 'word_count': 0,
+                'fallback': True,
                 'score': 0
             }
     
@@ -1683,6 +1752,7 @@ class AIValidator:
                 return {
                     'status': 'warning',
                     'message': 'Gemini غير متاح',
+                    'fallback': True,
                     'score': 70
                 }
             
@@ -1736,6 +1806,7 @@ JSON فقط."""
             return {
                 'status': 'warning',
                 'message': 'تعذر التحليل',
+                'fallback': True,
                 'score': 70
             }
     
@@ -1743,23 +1814,24 @@ JSON فقط."""
     # Audio Validation Helper Methods
     # ====================================
     
-    def _check_audio_duration(self, file_path, project):
+    def _check_audio_duration(self, file_path, project, file_hash=None):
         """
-        فحص مدة الصوت
+        فحص مدة الصوت (من رأس الملف بدون تحميله في الذاكرة)
         
         Args:
             file_path: مسار الملف الصوتي
             project: كائن المشروع
+            file_hash: hash الملف (لإعادة استخدام معلومات الملف المخزنة)
             
         Returns:
             dict: نتيجة الفحص
         """
         try:
-            from pydub import AudioSegment
+            from .media_probe import get_duration
             
-            # تحميل الملف الصوتي
-            audio = AudioSegment.from_file(file_path)
-            duration = len(audio) / 1000.0  # بالثواني
+            duration = get_duration(file_path, file_hash=file_hash)
+            if duration is None:
+                raise ValueError('تعذر قراءة مدة الملف')
             
             # قراءة القيود من المشروع
             constraints = project.file_constraints or {}
@@ -1798,6 +1870,7 @@ JSON فقط."""
             return {
                 'status': 'fail',
                 'message': f'خطأ في قراءة الملف الصوتي: {str(e)}',
+                'fallback': True,
                 'score': 0
             }
     
@@ -1812,72 +1885,41 @@ JSON فقط."""
             dict: النص المستخرج
         """
         try:
-            import speech_recognition as sr
-            from pydub import AudioSegment
-            import os
+            from .speech import transcribe
             
-            recognizer = sr.Recognizer()
-            
-            # تحويل الملف إلى WAV إذا لزم الأمر
-            audio = AudioSegment.from_file(file_path)
+            # التعرف على كامل الملف (نوافذ متوازية بدون ملفات مؤقتة)
+            transcript = transcribe(file_path)
+            text = transcript['text']
+            word_count = len(text.split())
             
-            # تحديد مدة الصوت للمعالجة (أول دقيقة فقط لتوفير الوقت)
-            duration_ms = min(len(audio), 60000)  # أول دقيقة
-            audio_sample = audio[:duration_ms]
+            logger.info(
+                f"📝 Speech-to-Text ({transcript['backend']}): {word_count} كلمة - "
+                f"{transcript['windows']} نافذة، {transcript['failed_windows']} فشلت"
+            )
             
-            # حفظ مؤقتاً كـ WAV
-            temp_wav = file_path + '.temp.wav'
-            audio_sample.export(temp_wav, format='wav')
+            details = {
+                'text': text,
+                'word_count': word_count,
+                'duration': transcript['duration'],
+                'windows': transcript['windows'],
+                'failed_windows': transcript['failed_windows'],
+                'backend': transcript['backend'],
+            }
             
-            try:
-                # قراءة الملف الصوتي
-                with sr.AudioFile(temp_wav) as source:
-                    audio_data = recognizer.record(source)
-                
-                # محاولة التعرف على النص (العربية أولاً، ثم الإنجليزية)
-                text = ''
-                try:
-                    text = recognizer.recognize_google(audio_data, language='ar-SA')
-                    logger.info(f"📝 تم التعرف على النص بالعربية")
-                except:
-                    try:
-                        text = recognizer.recognize_google(audio_data, language='en-US')
-                        logger.info(f"📝 تم التعرف على النص بالإنجليزية")
-                    except:
-                        pass
-                
-                # حذف الملف المؤقت
-                if os.path.exists(temp_wav):
-                    os.remove(temp_wav)
-                
-                word_count = len(text.split())
-                
-                logger.info(f"📝 Speech-to-Text: {word_count} كلمة")
-                
-                if word_count < 5:
-                    return {
-                        'status': 'fail',
-                        'message': 'لم يتم التعرف على كلام واضح في الملف الصوتي',
-                        'text': text,
-                        'word_count': word_count,
-                        'score': 0
-                    }
-                
+            if word_count < 5:
                 return {
-                    'status': 'pass',
-                    'message': f'تم استخراج {word_count} كلمة',
-                    'text': text,
-                    'word_count': word_count,
-                    'score': 100
+                    'status': 'fail',
+                    'message': 'لم يتم التعرف على كلام واضح في الملف الصوتي',
+                    **details,
+                    'score': 0
                 }
-                
-            finally:
-                # تأكد من حذف الملف المؤقت
-                if os.path.exists(temp_wav):
-                    try:
-                        os.remove(temp_wav)
-                    except:
-                        pass
+            
+            return {
+                'status': 'pass',
+                'message': f'تم استخراج {word_count} كلمة',
+                **details,
+                'score': 100
+            }
                 
         except Exception as e:
             logger.error(f"❌ خطأ في Speech-to-Text: {str(e)}")
@@ -1886,6 +1928,7 @@ JSON فقط."""
                 'message': f'تعذر تحويل الصوت إلى نص: {str(e)}',
                 'text': '',
                 'word_count': 0,
+                'fallback': True,
                 'score': 50
             }
     
@@ -1905,6 +1948,7 @@ JSON فقط."""
                 return {
                     'status': 'warning',
                     'message': 'Gemini غير متاح',
+                    'fallback': True,
                     'score': 70
                 }
             
@@ -1980,12 +2024,14 @@ JSON فقط."""
             return {
                 'status': 'warning',
                 'message': 'تعذر تحليل المحتوى',
+                'fallback': True,
                 'score': 70
             }
     
     def _check_audio_similarity(self, text, submission):
         """
         كشف التشابه في الملفات الصوتية
+        المقارنة مع كل التسليمات السابقة في المشروع عبر فهرس بصمات MinHash
         
         Args:
             text: النص المستخرج من الصوت
@@ -1995,10 +2041,7 @@ JSON فقط."""
             dict: نتيجة الفحص
         """
         try:
-            from .models import Submission
-            from sklearn.feature_extraction.text import TfidfVectorizer
-            from sklearn.metrics.pairwise import cosine_similarity
-            import numpy as np
+            from .similarity.text_index import check_and_index
             
             if not text or len(text.strip()) < 10:
                 return {
@@ -2007,56 +2050,17 @@ JSON فقط."""
                     'score': 70
                 }
             
-            # البحث عن صوتيات سابقة
-            previous_submissions = Submission.objects.filter(
-                project=submission.project,
-                file_type='audio',
-                validation_data__audio_text__isnull=False
-            ).exclude(id=submission.id)[:20]
+            match = check_and_index(submission, 'audio', text)
             
-            if not previous_submissions.exists():
-                # حفظ النص للمقارنة المستقبلية
-                submission.validation_data = submission.validation_data or {}
-                submission.validation_data['audio_text'] = text[:3000]
-                
+            if match is None or not match['matches']:
                 return {
                     'status': 'pass',
-                    'message': 'لا توجد صوتيات سابقة للمقارنة',
+                    'message': 'لا توجد صوتيات سابقة مشابهة للمقارنة',
+                    'max_similarity': 0,
                     'score': 100
                 }
             
-            # تجهيز النصوص
-            current_text = text[:3000]
-            previous_texts = [
-                sub.validation_data.get('audio_text', '')[:3000]
-                for sub in previous_submissions
-                if sub.validation_data and sub.validation_data.get('audio_text')
-            ]
-            
-            if not previous_texts:
-                submission.validation_data = submission.validation_data or {}
-                submission.validation_data['audio_text'] = current_text
-                return {
-                    'status': 'pass',
-                    'message': 'لا توجد نصوص سابقة صالحة للمقارنة',
-                    'score': 100
-                }
-            
-            # TF-IDF + Cosine Similarity
-            all_texts = [current_text] + previous_texts
-            vectorizer = TfidfVectorizer(max_features=500)
-            tfidf_matrix = vectorizer.fit_transform(all_texts)
-            
-            # حساب التشابه
-            current_vector = tfidf_matrix[0:1]
-            previous_vectors = tfidf_matrix[1:]
-            similarities = cosine_similarity(current_vector, previous_vectors)[0]
-            
-            max_similarity = float(np.max(similarities)) * 100
-            
-            # حفظ النص الحالي
-            submission.validation_data = submission.validation_data or {}
-            submission.validation_data['audio_text'] = current_text
+            max_similarity = match['max_similarity']
             
             logger.info(f"📊 أعلى نسبة تشابه: {max_similarity:.1f}%")
             
@@ -2066,6 +2070,7 @@ JSON فقط."""
                     'status': 'fail',
                     'message': f'تشابه عالي جداً ({max_similarity:.0f}%) مع تسليم سابق',
                     'max_similarity': max_similarity,
+                    'similar_submission_id': match['matches'][0]['submission_id'],
                     'score': 0
                 }
             elif max_similarity > 60:
@@ -2088,5 +2093,6 @@ JSON فقط."""
             return {
                 'status': 'warning',
                 'message': 'تعذر فحص التشابه',
+                'fallback': True,
                 'score': 80
             }
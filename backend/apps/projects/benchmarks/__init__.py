@@ -0,0 +1,12 @@
+"""
+AIValidator Benchmarks
+قياس زمن وذاكرة فحوصات التحقق بدون ملفات طلاب حقيقية وبدون Gemini
+
+- fixtures: توليد ملفات اصطناعية بأحجام مختلفة (فيديو، PDF، صور، مستندات، صوت)
+- fakes: بدائل محلية ثابتة النتيجة لـ Gemini والتعرف على الكلام
+- runner: تشغيل التحقق وقياس كل فحص ومقارنة التقرير مع تقرير سابق
+
+Usage:
+    python manage.py benchmark_validator --output report.json
+    python manage.py benchmark_validator --baseline report.json
+"""
@@ -0,0 +1,139 @@
+"""
+Benchmark Fakes
+بدائل محلية ثابتة النتيجة للخدمات الخارجية أثناء القياس
+
+- Gemini: رد JSON ثابت يحتوي كل الحقول التي تقرأها الفحوصات، مع تأخير اختياري
+  يحاكي زمن الشبكة (الرفع والتحليل لا يغادران الجهاز)
+- التعرف على الكلام: محرك يعيد كلمات ثابتة حسب محتوى النافذة
+"""
+import json
+import time
+import hashlib
+import threading
+from types import SimpleNamespace
+from contextlib import contextmanager, ExitStack
+from unittest import mock
+from django.test.utils import override_settings
+from utils import external_calls
+from .fixtures import WORDS
+
+FAKE_SPEECH_BACKEND = 'benchmark'
+
+FAKE_ANALYSIS = {
+    # فيديو وصور
+    'quality_score': 85,
+    'content_relevance': 85,
+    'relevance': 85,
+    'has_inappropriate_content': False,
+    'summary': 'محتوى تعليمي عن الطاقة المتجددة',
+    'description': 'محتوى تعليمي عن الطاقة المتجددة',
+    # نصوص (PDF، مستندات، صوت)
+    'content_quality': 85,
+    'relevance_to_topic': 85,
+    'language_quality': 85,
+    'has_copied_content': False,
+    'key_topics': ['الطاقة المتجددة'],
+    'issues': [],
+    'recommendation': 'approved',
+}
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeGeminiModel:
+    """نفس واجهة utils.gemini_client.GeminiModel بدون اتصال"""
+
+    def __init__(self, name, latency=0.0):
+        self.name = name
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def generate_content(self, contents, use_cache=True, **kwargs):
+        with self._lock:
+            self.calls += 1
+        external_calls.record('gemini')
+        if self.latency:
+            time.sleep(self.latency)
+        return FakeResponse(json.dumps(FAKE_ANALYSIS, ensure_ascii=False))
+
+
+class FakeGemini:
+    """بدائل get_model و upload_file و get_cached_file في utils.gemini_client"""
+
+    def __init__(self, latency=0.0, upload_latency=0.0):
+        self.latency = latency
+        self.upload_latency = upload_latency
+        self.models = {}
+        self.uploads = 0
+
+    def get_model(self, name=None):
+        name = name or 'default'
+        if name not in self.models:
+            self.models[name] = FakeGeminiModel(name, latency=self.latency)
+        return self.models[name]
+
+    def upload_file(self, path, cache_key=None, **kwargs):
+        self.uploads += 1
+        external_calls.record('gemini')
+        if self.upload_latency:
+            time.sleep(self.upload_latency)
+        return SimpleNamespace(name=f'files/benchmark-{self.uploads}', uri=f'benchmark://{path}', state='ACTIVE')
+
+    def get_cached_file(self, cache_key):
+        # القياس دائماً على المسار البارد (بدون ملفات مرفوعة سابقاً)
+        return None
+
+    @property
+    def calls(self):
+        return sum(model.calls for model in self.models.values())
+
+
+def make_speech_backend(latency=0.0):
+    """محرك تعرف على الكلام ثابت النتيجة (كلمات مختارة حسب hash النافذة)"""
+    from ..speech import SpeechBackend
+
+    class BenchmarkSpeechBackend(SpeechBackend):
+        name = FAKE_SPEECH_BACKEND
+
+        def transcribe(self, pcm, sample_rate):
+            if latency:
+                time.sleep(latency)
+            seed = hashlib.sha256(pcm).digest()
+            return ' '.join(WORDS[b % len(WORDS)] for b in seed[:12])
+
+    return BenchmarkSpeechBackend
+
+
+@contextmanager
+def installed(gemini_latency=0.0, upload_latency=0.0, speech_latency=0.0):
+    """
+    تفعيل البدائل داخل الكتلة
+
+    Usage:
+        with installed(gemini_latency=0.5) as gemini:
+            AIValidator().validate_submission(submission)
+        gemini.calls
+    """
+    from utils import gemini_client
+    from .. import speech
+
+    gemini = FakeGemini(latency=gemini_latency, upload_latency=upload_latency)
+    previous_backend = speech.BACKENDS.get(FAKE_SPEECH_BACKEND)
+    speech.register_backend(make_speech_backend(speech_latency))
+
+    with ExitStack() as stack:
+        stack.enter_context(mock.patch.object(gemini_client, 'get_model', gemini.get_model))
+        stack.enter_context(mock.patch.object(gemini_client, 'upload_file', gemini.upload_file))
+        stack.enter_context(mock.patch.object(gemini_client, 'get_cached_file', gemini.get_cached_file))
+        stack.enter_context(override_settings(STT_BACKEND=FAKE_SPEECH_BACKEND))
+        try:
+            yield gemini
+        finally:
+            if previous_backend:
+                speech.BACKENDS[FAKE_SPEECH_BACKEND] = previous_backend
+            else:
+                speech.BACKENDS.pop(FAKE_SPEECH_BACKEND, None)
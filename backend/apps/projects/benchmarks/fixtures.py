@@ -0,0 +1,377 @@
+"""
+Synthetic Fixtures
+توليد ملفات اختبار اصطناعية ثابتة المحتوى لكل نوع ملف وبعدة أحجام
+
+- نفس المعاملات تعطي نفس الملف (نفس الـ hash) في كل تشغيل
+- الفيديو يحتوي اسم الطالب بالعربية مكتوباً في آخر الثواني (لفحص OCR)
+- الفيديو يحتاج OpenCV أو ffmpeg، وبدونهما يُتخطى مع ذكر السبب
+"""
+import os
+import wave
+import logging
+import subprocess
+import numpy as np
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+FILE_TYPES = ('video', 'pdf', 'image', 'document', 'audio')
+SIZE_NAMES = ('small', 'medium', 'large')
+
+SIZES = {
+    'video': {
+        'small': {'seconds': 10, 'width': 320, 'height': 240, 'fps': 15},
+        'medium': {'seconds': 30, 'width': 640, 'height': 360, 'fps': 24},
+        'large': {'seconds': 90, 'width': 1280, 'height': 720, 'fps': 30},
+    },
+    'pdf': {
+        'small': {'pages': 2},
+        'medium': {'pages': 20},
+        'large': {'pages': 100},
+    },
+    'image': {
+        'small': {'width': 640, 'height': 480},
+        'medium': {'width': 1920, 'height': 1080},
+        'large': {'width': 4000, 'height': 3000},
+    },
+    'document': {
+        'small': {'paragraphs': 20, 'rows': 50, 'slides': 5},
+        'medium': {'paragraphs': 200, 'rows': 500, 'slides': 30},
+        'large': {'paragraphs': 2000, 'rows': 5000, 'slides': 100},
+    },
+    'audio': {
+        'small': {'seconds': 10},
+        'medium': {'seconds': 60},
+        'large': {'seconds': 300},
+    },
+}
+
+STUDENT_NAME = 'محمد أحمد العلي'
+
+FONT_PATHS = (
+    '/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf',
+    '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf',
+    '/usr/share/fonts/TTF/DejaVuSans.ttf',
+    'C:/Windows/Fonts/arial.ttf',
+)
+
+WORDS = (
+    'الطاقة المتجددة مصدر مهم للكهرباء في المستقبل وتشمل الطاقة الشمسية وطاقة الرياح '
+    'renewable energy solar panels wind turbines reduce emissions and protect the environment'
+).split()
+
+
+class FixtureUnavailable(Exception):
+    """لا يمكن توليد الملف في هذه البيئة (مكتبة أو برنامج غير متوفر)"""
+
+
+def _sentence(seed, length=12):
+    """جملة ثابتة من قائمة الكلمات (نفس seed = نفس الجملة)"""
+    rng = np.random.default_rng(seed)
+    return ' '.join(WORDS[i] for i in rng.integers(0, len(WORDS), length))
+
+
+def _font(size):
+    from PIL import ImageFont
+
+    path = getattr(settings, 'BENCHMARK_FONT_PATH', '') or next((p for p in FONT_PATHS if os.path.exists(p)), None)
+    if path:
+        return ImageFont.truetype(path, size)
+    return ImageFont.load_default()
+
+
+def _shape_arabic(text):
+    """
+    تجهيز النص العربي للرسم
+
+    Returns:
+        tuple: (النص، خيارات ImageDraw.text)
+    """
+    from PIL import features
+
+    if features.check('raqm'):
+        return text, {'direction': 'rtl'}
+    try:
+        import arabic_reshaper
+        from bidi.algorithm import get_display
+        return get_display(arabic_reshaper.reshape(text)), {}
+    except ImportError:
+        # بدون تشكيل: الأحرف منفصلة لكن بالترتيب الصحيح من اليمين لليسار
+        return text[::-1], {}
+
+
+# ==================== PDF ====================
+
+def make_pdf(path, pages):
+    """PDF بنص مختلف في كل صفحة (بدون مكتبات خارجية)"""
+    objects = ['<< /Type /Catalog /Pages 2 0 R >>', None, '<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>']
+    kids = []
+    for number in range(pages):
+        lines = [f'Page {number + 1}'] + [
+            ' '.join(w for w in _sentence(number * 100 + i).split() if w.isascii()) for i in range(30)
+        ]
+        stream = 'BT /F1 11 Tf 14 TL 56 760 Td ' + ' '.join(f'({line}) Tj T*' for line in lines) + ' ET'
+        objects.append(f'<< /Length {len(stream)} >>\nstream\n{stream}\nendstream')
+        objects.append(
+            f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] '
+            f'/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>'
+        )
+        kids.append(f'{len(objects)} 0 R')
+    objects[1] = f'<< /Type /Pages /Kids [{" ".join(kids)}] /Count {len(kids)} >>'
+
+    data = b'%PDF-1.4\n'
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(data))
+        data += f'{number} 0 obj\n{body}\nendobj\n'.encode('latin-1')
+    xref = len(data)
+    data += f'xref\n0 {len(objects) + 1}\n0000000000 65535 f \n'.encode('latin-1')
+    data += ''.join(f'{offset:010d} 00000 n \n' for offset in offsets).encode('latin-1')
+    data += f'trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n'.encode('latin-1')
+
+    with open(path, 'wb') as f:
+        f.write(data)
+    return path
+
+
+# ==================== Images ====================
+
+def make_image(path, width, height):
+    """صورة JPEG بتدرج لوني وأشكال ونص (محتوى غير متكرر لفحص الجودة والبصمة)"""
+    from PIL import Image, ImageDraw
+
+    x = np.linspace(0, 255, width, dtype=np.float32)
+    y = np.linspace(0, 255, height, dtype=np.float32)[:, None]
+    pixels = np.stack([
+        np.broadcast_to(x, (height, width)),
+        np.broadcast_to(y, (height, width)),
+        (x + y) % 256,
+    ], axis=-1).astype(np.uint8)
+    image = Image.fromarray(pixels)
+
+    draw = ImageDraw.Draw(image)
+    rng = np.random.default_rng(width * height)
+    for _ in range(40):
+        x0, y0 = int(rng.integers(0, width)), int(rng.integers(0, height))
+        size = int(rng.integers(width // 40 + 1, width // 8 + 2))
+        draw.ellipse((x0, y0, x0 + size, y0 + size), fill=tuple(int(c) for c in rng.integers(0, 256, 3)))
+    draw.text((width // 20, height // 20), 'Renewable Energy', fill='white', font=_font(max(12, height // 15)))
+
+    image.save(path, 'JPEG', quality=90)
+    return path
+
+
+# ==================== Documents ====================
+
+def make_docx(path, paragraphs):
+    from docx import Document
+
+    document = Document()
+    document.add_heading('Renewable Energy', level=1)
+    for i in range(paragraphs):
+        document.add_paragraph(_sentence(i, 25))
+    document.save(path)
+    return path
+
+
+def make_xlsx(path, rows):
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('data')
+    sheet.append(['#', 'source', 'value', 'note'])
+    for i in range(rows):
+        sheet.append([i + 1, WORDS[i % len(WORDS)], (i * 37) % 1000, _sentence(i, 6)])
+    workbook.save(path)
+    return path
+
+
+def make_pptx(path, slides):
+    from pptx import Presentation
+
+    presentation = Presentation()
+    layout = presentation.slide_layouts[1]
+    for i in range(slides):
+        slide = presentation.slides.add_slide(layout)
+        slide.shapes.title.text = f'Slide {i + 1}'
+        slide.placeholders[1].text = '\n'.join(_sentence(i * 10 + j, 10) for j in range(4))
+    presentation.save(path)
+    return path
+
+
+# ==================== Audio ====================
+
+def make_wav(path, seconds, sample_rate=None):
+    """
+    WAV (PCM 16-bit mono) بمقاطع نغمية يفصلها صمت
+
+    الصيغة تطابق STT_SAMPLE_RATE حتى يُقرأ مباشرة بدون ffmpeg
+    """
+    sample_rate = sample_rate or getattr(settings, 'STT_SAMPLE_RATE', 16000)
+    rng = np.random.default_rng(seconds)
+    with wave.open(path, 'wb') as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(sample_rate)
+        # الكتابة ثانية بثانية حتى لا يُحمّل الملف كاملاً في الذاكرة
+        t = np.arange(sample_rate, dtype=np.float32) / sample_rate
+        for second in range(seconds):
+            if second % 5 == 4:
+                samples = np.zeros(sample_rate, dtype=np.float32)
+            else:
+                frequency = 180 + 40 * (second % 7)
+                samples = 0.3 * np.sin(2 * np.pi * frequency * t) * (0.6 + 0.4 * np.sin(2 * np.pi * 3 * t))
+                samples += 0.02 * rng.standard_normal(sample_rate)
+            w.writeframes((samples * 32767).astype(np.int16).tobytes())
+    return path
+
+
+# ==================== Video ====================
+
+def video_frames(seconds, width, height, fps, student_name):
+    """إطارات RGB: مشهد متحرك، واسم الطالب في آخر 5 ثوانٍ (تُستخدم أيضاً في اختبارات video_ocr)"""
+    from PIL import Image, ImageDraw
+
+    name, text_options = _shape_arabic(student_name)
+    font = _font(max(16, height // 10))
+    base = Image.fromarray(np.zeros((height, width, 3), dtype=np.uint8))
+    name_from = max(0, seconds - 5) * fps
+
+    for index in range(seconds * fps):
+        frame = base.copy()
+        draw = ImageDraw.Draw(frame)
+        shift = index * 4 % width
+        draw.rectangle((0, 0, width, height), fill=(20, 60 + index % 120, 110))
+        draw.ellipse((shift, height // 3, shift + height // 3, 2 * height // 3), fill=(240, 200, 40))
+        draw.text((width // 20, height // 20), f'Scene {index // (fps * 5) + 1}', fill='white', font=font)
+        if index >= name_from:
+            draw.rectangle((0, 2 * height // 3, width, height), fill='white')
+            draw.text(
+                (width // 2, 5 * height // 6), name, fill='black', font=font, anchor='mm', **text_options
+            )
+        yield np.asarray(frame)
+
+
+def _write_video_cv2(path, frames, width, height, fps):
+    import cv2
+
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), fps, (width, height))
+    if not writer.isOpened():
+        raise FixtureUnavailable('OpenCV لا يدعم كتابة mp4v في هذه البيئة')
+    try:
+        for frame in frames:
+            writer.write(cv2.cvtColor(frame, cv2.COLOR_RGB2BGR))
+    finally:
+        writer.release()
+
+
+def _write_video_ffmpeg(path, frames, width, height, fps, seconds):
+    """ترميز الإطارات عبر ffmpeg مع مسار صوتي (للفحوصات التي تقرأ الصوت)"""
+    binary = getattr(settings, 'FFMPEG_BINARY', 'ffmpeg')
+    process = subprocess.Popen(
+        [binary, '-nostdin', '-v', 'error', '-y',
+         '-f', 'rawvideo', '-pix_fmt', 'rgb24', '-s', f'{width}x{height}', '-r', str(fps), '-i', '-',
+         '-f', 'lavfi', '-i', f'sine=frequency=220:duration={seconds}',
+         '-c:v', 'libx264', '-preset', 'veryfast', '-pix_fmt', 'yuv420p',
+         '-c:a', 'aac', '-shortest', path],
+        stdin=subprocess.PIPE,
+        stderr=subprocess.PIPE
+    )
+    try:
+        for frame in frames:
+            process.stdin.write(frame.tobytes())
+    finally:
+        process.stdin.close()
+        process.wait()
+    if process.returncode != 0:
+        raise FixtureUnavailable(f'فشل ffmpeg: {process.stderr.read().decode(errors="ignore")[:200]}')
+
+
+def make_video(path, seconds, width, height, fps, student_name=STUDENT_NAME):
+    """
+    فيديو MP4 مع اسم الطالب في آخر الثواني
+
+    Raises:
+        FixtureUnavailable: إذا لم يتوفر OpenCV ولا ffmpeg
+    """
+    frames = video_frames(seconds, width, height, fps, student_name)
+    try:
+        _write_video_ffmpeg(path, frames, width, height, fps, seconds)
+        return path
+    except FileNotFoundError:
+        pass
+
+    try:
+        _write_video_cv2(path, video_frames(seconds, width, height, fps, student_name), width, height, fps)
+        return path
+    except ImportError:
+        raise FixtureUnavailable('توليد الفيديو يحتاج ffmpeg أو OpenCV')
+
+
+# ==================== Generation ====================
+
+def _generate(directory, file_type, size, params):
+    """
+    Returns:
+        list: [(المسار، اسم المتغير)] - المستندات تعطي ثلاثة ملفات
+    """
+    base = os.path.join(directory, f'{file_type}_{size}')
+    if file_type == 'pdf':
+        return [(make_pdf(base + '.pdf', params['pages']), 'pdf')]
+    if file_type == 'image':
+        return [(make_image(base + '.jpg', params['width'], params['height']), 'jpg')]
+    if file_type == 'audio':
+        return [(make_wav(base + '.wav', params['seconds']), 'wav')]
+    if file_type == 'video':
+        return [(make_video(base + '.mp4', params['seconds'], params['width'], params['height'], params['fps']), 'mp4')]
+    if file_type == 'document':
+        return [
+            (make_docx(base + '.docx', params['paragraphs']), 'docx'),
+            (make_xlsx(base + '.xlsx', params['rows']), 'xlsx'),
+            (make_pptx(base + '.pptx', params['slides']), 'pptx'),
+        ]
+    raise ValueError(f'نوع ملف غير معروف: {file_type}')
+
+
+def make_fixtures(directory, file_types=FILE_TYPES, sizes=SIZE_NAMES, reuse=True):
+    """
+    توليد ملفات الاختبار في المجلد
+
+    Args:
+        directory: مجلد الملفات
+        file_types: أنواع الملفات
+        sizes: الأحجام (small, medium, large)
+        reuse: استخدام الملف الموجود بنفس الاسم بدلاً من توليده من جديد
+
+    Returns:
+        list: [{'file_type', 'size', 'variant', 'path', 'bytes', 'params', 'student_name'}]
+              أو {'file_type', 'size', 'skipped': السبب} للملفات غير المتاحة
+    """
+    os.makedirs(directory, exist_ok=True)
+    fixtures = []
+    for file_type in file_types:
+        for size in sizes:
+            params = SIZES[file_type][size]
+            try:
+                existing = [
+                    (os.path.join(directory, name), name.rsplit('.', 1)[1])
+                    for name in sorted(os.listdir(directory))
+                    if name.startswith(f'{file_type}_{size}.')
+                ] if reuse else []
+                generated = existing or _generate(directory, file_type, size, params)
+            except (FixtureUnavailable, ImportError) as e:
+                logger.warning(f"⚠️ تخطي {file_type}/{size}: {str(e)}")
+                fixtures.append({'file_type': file_type, 'size': size, 'skipped': str(e)})
+                continue
+
+            for path, variant in generated:
+                fixtures.append({
+                    'file_type': file_type,
+                    'size': size,
+                    'variant': variant,
+                    'path': path,
+                    'bytes': os.path.getsize(path),
+                    'params': params,
+                    'student_name': STUDENT_NAME,
+                })
+    return fixtures
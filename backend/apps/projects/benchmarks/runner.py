@@ -0,0 +1,455 @@
+"""
+Benchmark Runner
+تشغيل AIValidator على ملفات الاختبار وقياس الزمن وذروة الذاكرة لكل فحص
+
+- القياس يعمل في قاعدة بيانات اختبار مؤقتة (مثل test runner) تُحذف بعد التقرير،
+  فلا يُكتب شيء في قاعدة البيانات التي يشير إليها DATABASE_URL
+- كل ملف يُفحص في مشروع وتسليم مؤقتين يُحذفان بعد القياس
+- القياس على المسار البارد: النص المستخرج ومعلومات الوسائط المحفوظة تُحذف قبل كل تكرار
+- الفحوصات تعمل بالتسلسل افتراضياً حتى تُنسب الذاكرة لكل فحص بدقة
+- التقرير JSON قابل للمقارنة مع تقرير سابق (كشف التراجع في الأداء)
+"""
+import os
+import sys
+import time
+import hashlib
+import logging
+import platform
+import resource
+import functools
+import statistics
+import threading
+import subprocess
+from contextlib import contextmanager
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.test.utils import override_settings
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+REPORT_VERSION = 1
+INSTRUMENTED_PREFIXES = ('_check_', '_analyze_', '_extract_')
+INSTRUMENTED_METHODS = ('_audio_to_text',)
+
+BENCHMARK_TEACHER_EMAIL = 'benchmark@smartedu.local'
+
+# قيود واسعة حتى تعمل كل مراحل الفحص على كل الأحجام
+BENCHMARK_CONSTRAINTS = {
+    'duration': {'min': 1, 'max': 24 * 3600},
+    'min_words': 1,
+    'max_words': 10 ** 7,
+    'min_pages': 1,
+    'max_pages': 10 ** 5,
+}
+
+# الفروق الأصغر من هذا تعتبر ضوضاء قياس وليست تراجعاً
+MIN_SECONDS_DELTA = 0.05
+MIN_RSS_DELTA_MB = 5
+
+
+# ==================== Memory ====================
+
+def _rss_reader():
+    """
+    دالة قراءة الذاكرة الحالية للعملية بالبايت
+
+    Returns:
+        tuple: (الدالة أو None، اسم المصدر)
+    """
+    try:
+        import psutil
+        process = psutil.Process()
+        return (lambda: process.memory_info().rss), 'psutil'
+    except ImportError:
+        pass
+
+    if os.path.exists('/proc/self/statm'):
+        page_size = os.sysconf('SC_PAGE_SIZE')
+
+        def read():
+            with open('/proc/self/statm') as f:
+                return int(f.read().split()[1]) * page_size
+        return read, 'statm'
+
+    return None, 'ru_maxrss'
+
+
+def _max_rss():
+    """ذروة الذاكرة منذ بداية العملية بالبايت"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS بالبايت و Linux بالكيلوبايت
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class MemorySampler:
+    """
+    خيط يقرأ الذاكرة كل بضعة ميلي ثوانٍ ويحدّث ذروة كل قياس مفتوح
+
+    Usage:
+        with MemorySampler() as sampler:
+            with sampler.measure() as m:
+                ...
+            m['peak_delta']
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.read, self.source = _rss_reader()
+        self._open = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def current(self):
+        return self.read() if self.read else _max_rss()
+
+    def _sample(self):
+        rss = self.current()
+        with self._lock:
+            for measurement in self._open.values():
+                measurement['peak'] = max(measurement['peak'], rss)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def __enter__(self):
+        if self.read:
+            self._thread = threading.Thread(target=self._run, name='benchmark-rss', daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    @contextmanager
+    def measure(self):
+        start = self.current()
+        measurement = {'start': start, 'peak': start, 'peak_delta': 0}
+        with self._lock:
+            self._open[id(measurement)] = measurement
+        try:
+            yield measurement
+        finally:
+            self._sample()
+            with self._lock:
+                del self._open[id(measurement)]
+            measurement['peak_delta'] = max(0, measurement['peak'] - start)
+
+
+# ==================== Instrumentation ====================
+
+def _instrumented_names(validator):
+    return sorted(
+        name for name in dir(type(validator))
+        if name.startswith(INSTRUMENTED_PREFIXES) or name in INSTRUMENTED_METHODS
+    )
+
+
+def instrument(validator, sampler, timings):
+    """
+    تغليف فحوصات الـ validator لتسجيل الزمن وذروة الذاكرة في timings
+
+    timings: {اسم الفحص: {'seconds', 'peak_rss_delta', 'calls'}}
+    """
+    lock = threading.Lock()
+
+    def wrap(name, method):
+        check_name = name.lstrip('_')
+
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                with sampler.measure() as measurement:
+                    return method(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - started
+                with lock:
+                    entry = timings.setdefault(check_name, {'seconds': 0.0, 'peak_rss_delta': 0, 'calls': 0})
+                    entry['seconds'] += elapsed
+                    entry['calls'] += 1
+                    entry['peak_rss_delta'] = max(entry['peak_rss_delta'], measurement['peak_delta'])
+        return wrapper
+
+    for name in _instrumented_names(validator):
+        setattr(validator, name, wrap(name, getattr(validator, name)))
+    return validator
+
+
+# ==================== Fixtures in the database ====================
+
+def _file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _benchmark_teacher():
+    from apps.accounts.models import Teacher
+
+    teacher, _ = Teacher.objects.get_or_create(
+        email=BENCHMARK_TEACHER_EMAIL,
+        defaults={
+            'full_name': 'Benchmark',
+            'phone': '0500000000',
+            'school_name': 'Benchmark',
+            'password_hash': '!',
+            'is_active': False,
+        }
+    )
+    return teacher
+
+
+def _create_submission(fixture, file_hash):
+    from ..models import Project, Submission
+
+    requirements = []
+    if fixture['file_type'] == 'video':
+        requirements.append({'type': 'name_in_video', 'location': 'last_5_seconds'})
+
+    project = Project.objects.create(
+        teacher=_benchmark_teacher(),
+        title='Benchmark - الطاقة المتجددة',
+        description='مشروع مؤقت لقياس أداء التحقق',
+        subject='Benchmark',
+        deadline=timezone.now() + timedelta(days=7),
+        file_type=fixture['file_type'],
+        file_constraints=BENCHMARK_CONSTRAINTS,
+        validation_requirements=requirements,
+        is_active=False,
+    )
+    return Submission.objects.create(
+        project=project,
+        submitted_student_name=fixture['student_name'],
+        file_path=fixture['path'],
+        file_name=os.path.basename(fixture['path']),
+        file_size=fixture['bytes'],
+        file_type=fixture['variant'],
+        file_hash=file_hash,
+    )
+
+
+def _reset_caches(file_hash):
+    """حذف ما حُفظ عن الملف حتى يكون القياس على المسار البارد"""
+    from ..models import ExtractedText
+    from ..media_probe import CACHE_PREFIX
+    from utils import gemini_client
+
+    ExtractedText.objects.filter(file_hash=file_hash).delete()
+    cache.delete(f'{CACHE_PREFIX}:{file_hash}')
+    gemini_client._cache.clear()
+
+
+# ==================== Running ====================
+
+@contextmanager
+def test_database():
+    """
+    إنشاء قاعدة بيانات اختبار مؤقتة وتوجيه كل الاتصالات إليها (بما فيها خيوط الفحوصات المتوازية)
+
+    Raises:
+        RuntimeError: تعذر إنشاء قاعدة الاختبار (مثل عدم وجود صلاحية CREATEDB)
+    """
+    from django.db import connection
+
+    old_name = connection.settings_dict['NAME']
+    try:
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    except Exception as e:
+        raise RuntimeError(f'تعذر إنشاء قاعدة بيانات اختبار للقياس: {e}') from e
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def run_once(fixture, file_hash, sampler):
+    """
+    فحص ملف واحد مرة واحدة
+
+    Returns:
+        dict: {'status', 'overall_score', 'wall_seconds', 'peak_rss_delta', 'checks'}
+    """
+    from ..ai_validator import AIValidator
+
+    _reset_caches(file_hash)
+    submission = _create_submission(fixture, file_hash)
+    project = submission.project
+    timings = {}
+    try:
+        validator = instrument(AIValidator(), sampler, timings)
+        started = time.perf_counter()
+        with sampler.measure() as measurement:
+            results = validator.validate_submission(submission)
+        return {
+            'status': results.get('status'),
+            'overall_score': round(float(results.get('overall_score') or 0), 2),
+            'wall_seconds': time.perf_counter() - started,
+            'peak_rss_delta': measurement['peak_delta'],
+            'checks': timings,
+        }
+    finally:
+        # البصمات والتسليم تُحذف مع المشروع
+        project.delete()
+        _reset_caches(file_hash)
+
+
+def _mb(value):
+    return round(value / (1024 * 1024), 2)
+
+
+def _summarize(runs):
+    """تجميع التكرارات: الوسيط للمقارنة والأقل كمرجع"""
+    walls = [run['wall_seconds'] for run in runs]
+    checks = {}
+    for name in sorted({name for run in runs for name in run['checks']}):
+        seconds = [run['checks'][name]['seconds'] for run in runs if name in run['checks']]
+        peaks = [run['checks'][name]['peak_rss_delta'] for run in runs if name in run['checks']]
+        checks[name] = {
+            'seconds': round(statistics.median(seconds), 4),
+            'min_seconds': round(min(seconds), 4),
+            'peak_rss_delta_mb': _mb(max(peaks)),
+            'calls': runs[-1]['checks'].get(name, {}).get('calls', 0),
+        }
+    return {
+        'status': runs[-1]['status'],
+        'overall_score': runs[-1]['overall_score'],
+        'wall_seconds': round(statistics.median(walls), 4),
+        'min_wall_seconds': round(min(walls), 4),
+        'peak_rss_delta_mb': _mb(max(run['peak_rss_delta'] for run in runs)),
+        'checks': checks,
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=settings.BASE_DIR, capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run(fixtures, repeat=3, parallel=False, gemini_latency=0.0, speech_latency=0.0, progress=None):
+    """
+    قياس كل الملفات
+
+    Args:
+        fixtures: ناتج fixtures.make_fixtures
+        repeat: عدد التكرارات لكل ملف (التقرير يأخذ الوسيط)
+        parallel: تشغيل الفحوصات المستقلة بالتوازي (AI_VALIDATION_PARALLEL)
+        gemini_latency: تأخير رد Gemini المحاكى بالثواني
+        speech_latency: تأخير التعرف على كل نافذة صوتية بالثواني
+        progress: دالة تُستدعى بنتيجة كل ملف
+
+    Returns:
+        dict: التقرير
+    """
+    from . import fakes
+
+    results = []
+    skipped = [fixture for fixture in fixtures if 'skipped' in fixture]
+
+    with test_database(), MemorySampler() as sampler, \
+            fakes.installed(gemini_latency=gemini_latency, speech_latency=speech_latency) as gemini, \
+            override_settings(AI_VALIDATION_PARALLEL=parallel):
+        for fixture in fixtures:
+            if 'skipped' in fixture:
+                continue
+            file_hash = _file_hash(fixture['path'])
+            runs = [run_once(fixture, file_hash, sampler) for _ in range(max(1, repeat))]
+            result = {
+                'key': f"{fixture['file_type']}/{fixture['size']}/{fixture['variant']}",
+                'file_type': fixture['file_type'],
+                'size': fixture['size'],
+                'variant': fixture['variant'],
+                'bytes': fixture['bytes'],
+                'params': fixture['params'],
+                **_summarize(runs),
+            }
+            results.append(result)
+            if progress:
+                progress(result)
+        gemini_calls = gemini.calls
+
+    return {
+        'version': REPORT_VERSION,
+        'created_at': timezone.now().isoformat(),
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'git_commit': _git_commit(),
+            'rss_source': sampler.source,
+            'peak_rss_mb': _mb(_max_rss()),
+        },
+        'options': {
+            'repeat': repeat,
+            'parallel': parallel,
+            'gemini_latency': gemini_latency,
+            'speech_latency': speech_latency,
+        },
+        'gemini_calls': gemini_calls,
+        'results': results,
+        'skipped': [
+            {'key': f"{fixture['file_type']}/{fixture['size']}", 'reason': fixture['skipped']}
+            for fixture in skipped
+        ],
+    }
+
+
+# ==================== Comparison ====================
+
+def _change(current, baseline):
+    return round((current - baseline) / baseline, 4) if baseline else None
+
+
+def compare(report, baseline, threshold=0.2):
+    """
+    مقارنة التقرير مع تقرير سابق
+
+    Args:
+        threshold: نسبة الزيادة التي تعتبر تراجعاً (0.2 = أبطأ بـ 20%)
+
+    Returns:
+        list: [{'key', 'check', 'metric', 'baseline', 'current', 'change', 'regression'}]
+              لكل مقياس موجود في التقريرين
+    """
+    previous = {result['key']: result for result in baseline.get('results', [])}
+    rows = []
+
+    def add(key, check, metric, current, old, min_delta):
+        rows.append({
+            'key': key,
+            'check': check,
+            'metric': metric,
+            'baseline': old,
+            'current': current,
+            'change': _change(current, old),
+            'regression': current - old > max(old * threshold, min_delta),
+        })
+
+    for result in report.get('results', []):
+        old = previous.get(result['key'])
+        if not old:
+            continue
+        add(result['key'], None, 'wall_seconds', result['wall_seconds'], old['wall_seconds'], MIN_SECONDS_DELTA)
+        add(result['key'], None, 'peak_rss_delta_mb', result['peak_rss_delta_mb'], old['peak_rss_delta_mb'], MIN_RSS_DELTA_MB)
+        for name, check in result['checks'].items():
+            old_check = old['checks'].get(name)
+            if not old_check:
+                continue
+            add(result['key'], name, 'seconds', check['seconds'], old_check['seconds'], MIN_SECONDS_DELTA)
+            add(
+                result['key'], name, 'peak_rss_delta_mb',
+                check['peak_rss_delta_mb'], old_check['peak_rss_delta_mb'], MIN_RSS_DELTA_MB
+            )
+    return rows
@@ -0,0 +1,224 @@
+"""
+Check Metrics
+قياس موارد كل فحص تحقق وتجميعها حسب المشروع ونوع الملف
+
+لكل فحص يُحفظ في validation_results['checks'][name]['metrics']:
+- wall_ms: الزمن الفعلي
+- cpu_ms: زمن المعالج لخيط الفحص (عمل مجموعات العمليات مثل صفحات PDF لا يُحسب هنا)
+- bytes_read: البايتات المقروءة في خيط الفحص (من /proc/thread-self/io، None إذا لم يتوفر)
+- external_calls: عدد الاستدعاءات الخارجية حسب النوع ({'gemini': 2, 'speech': 6})
+
+النتائج المعاد استخدامها من ValidationCache (cached=True) لا تُجمع: لم تُشغّل فيها
+الفحوصات، فتُعد فقط في cached_hits.
+"""
+import math
+import time
+import logging
+from datetime import timedelta
+from django.utils import timezone
+from utils import external_calls
+
+logger = logging.getLogger(__name__)
+
+IO_STATS_PATH = '/proc/thread-self/io'
+
+
+def _bytes_read():
+    """البايتات المقروءة في الخيط الحالي حتى الآن (None إذا لم تتوفر)"""
+    try:
+        with open(IO_STATS_PATH) as f:
+            for line in f:
+                if line.startswith('rchar:'):
+                    return int(line.split()[1])
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+class CheckMetrics:
+    """
+    قياس فحص واحد
+
+    Usage:
+        with CheckMetrics() as metrics:
+            result = self._check_video_ocr(file_path, student_name)
+        metrics.attach(result)
+    """
+
+    def __init__(self):
+        self.metrics = None
+
+    def __enter__(self):
+        self._track = external_calls.track()
+        self.calls = self._track.__enter__()
+        self._wall = time.perf_counter()
+        self._cpu = time.thread_time()
+        self._read = _bytes_read()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._track.__exit__(None, None, None)
+        read = _bytes_read()
+        self.metrics = {
+            'wall_ms': round((time.perf_counter() - self._wall) * 1000, 1),
+            'cpu_ms': round((time.thread_time() - self._cpu) * 1000, 1),
+            'bytes_read': read - self._read if read is not None and self._read is not None else None,
+            'external_calls': dict(self.calls),
+        }
+        if exc is not None:
+            # الـ fallback يحتفظ بقياس الفحص الفاشل
+            exc.check_metrics = self.metrics
+        return False
+
+    def attach(self, result):
+        """إضافة القياس إلى نتيجة الفحص"""
+        if isinstance(result, dict) and self.metrics is not None:
+            result['metrics'] = self.metrics
+        return result
+
+
+def measure_check(func, *args, **kwargs):
+    """تنفيذ فحص وإضافة قياسه إلى نتيجته"""
+    with CheckMetrics() as metrics:
+        result = func(*args, **kwargs)
+    return metrics.attach(result)
+
+
+# ==================== Aggregation ====================
+
+def percentile(values, q):
+    """النسبة المئوية (nearest-rank) لقائمة مرتبة"""
+    if not values:
+        return None
+    index = max(0, math.ceil(q / 100 * len(values)) - 1)
+    return values[index]
+
+
+def _stats(values):
+    values = sorted(v for v in values if v is not None)
+    if not values:
+        return None
+    return {
+        'count': len(values),
+        'p50': percentile(values, 50),
+        'p95': percentile(values, 95),
+        'max': values[-1],
+    }
+
+
+class _Group:
+    """عينات مجموعة (نوع ملف أو مشروع)"""
+
+    def __init__(self):
+        self.submissions = 0
+        self.processing_time = []
+        self.checks = {}
+
+    def add(self, processing_time, results):
+        self.submissions += 1
+        self.processing_time.append(processing_time)
+        for name, result in (results.get('checks') or {}).items():
+            metrics = result.get('metrics') if isinstance(result, dict) else None
+            samples = self.checks.setdefault(name, {
+                'wall_ms': [], 'cpu_ms': [], 'bytes_read': [], 'external_calls': {}, 'timeouts': 0, 'measured': 0
+            })
+            if result.get('timed_out'):
+                samples['timeouts'] += 1
+            if not metrics:
+                # تسليم قديم بدون قياس
+                continue
+            samples['measured'] += 1
+            samples['wall_ms'].append(metrics.get('wall_ms'))
+            samples['cpu_ms'].append(metrics.get('cpu_ms'))
+            samples['bytes_read'].append(metrics.get('bytes_read'))
+            for kind, count in (metrics.get('external_calls') or {}).items():
+                samples['external_calls'].setdefault(kind, []).append(count)
+
+    def report(self):
+        checks = {}
+        for name, samples in self.checks.items():
+            checks[name] = {
+                'measured': samples['measured'],
+                'timeouts': samples['timeouts'],
+                'wall_ms': _stats(samples['wall_ms']),
+                'cpu_ms': _stats(samples['cpu_ms']),
+                'bytes_read': _stats(samples['bytes_read']),
+                # الفحوصات التي لم تستدعِ الخدمة تُحسب صفراً
+                'external_calls': {
+                    kind: _stats(counts + [0] * (samples['measured'] - len(counts)))
+                    for kind, counts in samples['external_calls'].items()
+                },
+            }
+        # الأبطأ أولاً حسب p95
+        ordered = sorted(checks.items(), key=lambda item: -((item[1]['wall_ms'] or {}).get('p95') or 0))
+        return {
+            'submissions': self.submissions,
+            'processing_time': _stats(self.processing_time),
+            'checks': dict(ordered),
+        }
+
+
+def aggregate(rows):
+    """
+    تجميع قياسات الفحوصات
+
+    Args:
+        rows: [(project_id, project_title, file_type, processing_time, validation_results)]
+
+    Returns:
+        dict: {'by_file_type': {file_type: تقرير}, 'by_project': {project_id: تقرير + title/file_type},
+               'cached_hits': عدد النتائج المعاد استخدامها (غير مجمّعة)}
+    """
+    by_type = {}
+    by_project = {}
+    titles = {}
+    cached_hits = 0
+    for project_id, title, file_type, processing_time, results in rows:
+        if not isinstance(results, dict) or results.get('partial'):
+            continue
+        if results.get('cached'):
+            cached_hits += 1
+            continue
+        by_type.setdefault(file_type, _Group()).add(processing_time, results)
+        by_project.setdefault(project_id, _Group()).add(processing_time, results)
+        titles[project_id] = (title, file_type)
+
+    return {
+        'by_file_type': {file_type: group.report() for file_type, group in by_type.items()},
+        'by_project': {
+            project_id: {'title': titles[project_id][0], 'file_type': titles[project_id][1], **group.report()}
+            for project_id, group in by_project.items()
+        },
+        'cached_hits': cached_hits,
+    }
+
+
+def collect(teacher, project_id=None, file_type=None, days=30, limit=2000):
+    """
+    قياسات آخر التسليمات المفحوصة لمشاريع المعلم
+
+    Args:
+        teacher: المعلم
+        project_id: مشروع واحد (اختياري)
+        file_type: نوع ملف واحد (اختياري)
+        days: الفترة بالأيام
+        limit: أقصى عدد تسليمات (الأحدث أولاً)
+    """
+    from .models import Submission
+
+    submissions = Submission.objects.filter(
+        project__teacher=teacher,
+        ai_checked=True,
+        processed_at__gte=timezone.now() - timedelta(days=days),
+    )
+    if project_id:
+        submissions = submissions.filter(project_id=project_id)
+    if file_type:
+        submissions = submissions.filter(project__file_type=file_type)
+
+    rows = submissions.order_by('-processed_at').values_list(
+        'project_id', 'project__title', 'project__file_type', 'processing_time', 'validation_results'
+    )[:limit]
+    report = aggregate(rows)
+    report.update({'days': days, 'limit': limit})
+    return report
@@ -0,0 +1,189 @@
+"""
+Check Runner for AI Validation
+تشغيل فحوصات التحقق المستقلة بالتوازي مع مهلة لكل فحص
+
+الفحص الذي تنتهي مهلته يكمل في الخلفية ويتم تجاهل نتيجته، لذلك:
+- الفحوصات لا تعدّل submission.validation_data مباشرة بل تعيد التحديثات في
+  result['validation_data'] ويدمجها المستدعي (merge_validation_data) للفحوصات المكتملة فقط
+- كتابة البصمات في الفهرس تتحقق من is_abandoned() قبل الحفظ
+"""
+import time
+import logging
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from django.conf import settings
+from .progress import publish_check
+from .check_metrics import CheckMetrics
+
+logger = logging.getLogger(__name__)
+
+_current_check = contextvars.ContextVar('current_check', default=None)
+
+
+class Check:
+    """
+    تعريف فحص واحد
+
+    Args:
+        name: اسم الفحص كما يظهر في results['checks']
+        func: الدالة التي تنفذ الفحص وتعيد dict
+        args: معاملات الدالة
+        timeout: المهلة بالثواني (None = من الإعدادات)
+        fallback_score: الدرجة عند انتهاء المهلة أو حدوث خطأ (النتيجة تحمل fallback=True
+                        فلا تُخزن في ValidationCache)
+    """
+
+    def __init__(self, name, func, *args, timeout=None, fallback_score=70):
+        self.name = name
+        self.func = func
+        self.args = args
+        self.timeout = timeout or get_check_timeout(name)
+        self.fallback_score = fallback_score
+        # يُضبط عند انتهاء المهلة - الخيط المتأخر يتوقف عن الكتابة المشتركة
+        self.abandoned = threading.Event()
+
+    def fallback(self, message, error=None):
+        """نتيجة بديلة عند فشل الفحص أو تجاوز المهلة"""
+        result = {
+            'status': 'warning',
+            'message': message,
+            'fallback': True,
+            'score': self.fallback_score,
+        }
+        metrics = getattr(error, 'check_metrics', None)
+        if metrics:
+            result['metrics'] = metrics
+        return result
+
+    def run(self):
+        """تنفيذ الفحص مع قياس الزمن والموارد"""
+        with CheckMetrics() as metrics:
+            result = self.func(*self.args)
+        return metrics.attach(result)
+
+
+def get_check_timeout(name):
+    """المهلة المحددة لفحص معين (بالثواني)"""
+    timeouts = getattr(settings, 'AI_CHECK_TIMEOUTS', {})
+    return timeouts.get(name, getattr(settings, 'AI_CHECK_DEFAULT_TIMEOUT', 120))
+
+
+def is_abandoned():
+    """هل انتهت مهلة الفحص الجاري في هذا الخيط (نتيجته لن تُستخدم)"""
+    check = _current_check.get()
+    return check is not None and check.abandoned.is_set()
+
+
+def merge_validation_data(submission, results):
+    """
+    دمج تحديثات validation_data التي أعادتها الفحوصات في التسليم
+
+    الفحوصات التي انتهت مهلتها تحمل النتيجة البديلة فقط فلا تُدمج بياناتها.
+    """
+    for result in results.values():
+        if not isinstance(result, dict):
+            continue
+        updates = result.pop('validation_data', None)
+        if updates and not result.get('timed_out'):
+            submission.validation_data = submission.validation_data or {}
+            submission.validation_data.update(updates)
+
+
+def _run_in_thread(check):
+    """تنفيذ الفحص داخل خيط منفصل مع إغلاق اتصال قاعدة البيانات الخاص به"""
+    from django.db import connection
+
+    token = _current_check.set(check)
+    try:
+        return check.run()
+    finally:
+        _current_check.reset(token)
+        # كل خيط يفتح اتصالاً خاصاً به مع قاعدة البيانات
+        connection.close()
+
+
+def run_checks(checks, parallel=None, max_workers=None):
+    """
+    تشغيل مجموعة فحوصات مستقلة
+
+    Args:
+        checks: قائمة Check
+        parallel: التشغيل بالتوازي (None = AI_VALIDATION_PARALLEL)
+        max_workers: الحد الأقصى للخيوط (None = AI_VALIDATION_MAX_WORKERS)
+
+    Returns:
+        dict: {اسم الفحص: النتيجة} بنفس ترتيب الفحوصات
+
+    نتيجة كل فحص تُنشر للطالب فور انتهائه (progress.publish_check).
+    تحديثات validation_data تبقى في النتائج - يدمجها المستدعي بـ merge_validation_data.
+    """
+    if parallel is None:
+        parallel = getattr(settings, 'AI_VALIDATION_PARALLEL', True)
+
+    if not parallel or len(checks) < 2:
+        return _run_sequential(checks)
+
+    if max_workers is None:
+        max_workers = getattr(settings, 'AI_VALIDATION_MAX_WORKERS', 4)
+
+    results = {}
+    executor = ThreadPoolExecutor(
+        max_workers=max(1, min(max_workers, len(checks))),
+        thread_name_prefix='ai-check'
+    )
+
+    try:
+        started = time.monotonic()
+        futures = {executor.submit(_run_in_thread, check): check for check in checks}
+        deadlines = {future: started + check.timeout for future, check in futures.items()}
+        pending = set(futures)
+
+        while pending:
+            # الانتظار حتى أقرب مهلة أو انتهاء أي فحص
+            next_deadline = min(deadlines[f] for f in pending)
+            done, pending = wait(
+                pending,
+                timeout=max(0, next_deadline - time.monotonic()),
+                return_when=FIRST_COMPLETED
+            )
+
+            for future in done:
+                check = futures[future]
+                try:
+                    results[check.name] = future.result()
+                except Exception as e:
+                    logger.error(f"❌ خطأ في فحص {check.name}: {str(e)}")
+                    results[check.name] = check.fallback(f'تعذر إكمال الفحص: {str(e)}', e)
+                publish_check(check.name, results[check.name])
+
+            now = time.monotonic()
+            for future in [f for f in pending if deadlines[f] <= now]:
+                check = futures[future]
+                future.cancel()
+                check.abandoned.set()
+                pending.discard(future)
+                logger.warning(f"⏱️ انتهت مهلة فحص {check.name} ({check.timeout}ث)")
+                result = check.fallback(f'انتهت مهلة الفحص ({check.timeout} ثانية)')
+                result['timed_out'] = True
+                result['metrics'] = {'wall_ms': round(check.timeout * 1000, 1)}
+                results[check.name] = result
+                publish_check(check.name, result)
+    finally:
+        # لا ننتظر الفحوصات المتأخرة - تكمل في الخلفية ويتم تجاهل نتيجتها
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    return {check.name: results[check.name] for check in checks}
+
+
+def _run_sequential(checks):
+    """تشغيل الفحوصات بالتتابع (الوضع القديم)"""
+    results = {}
+    for check in checks:
+        try:
+            results[check.name] = check.run()
+        except Exception as e:
+            logger.error(f"❌ خطأ في فحص {check.name}: {str(e)}")
+            results[check.name] = check.fallback(f'تعذر إكمال الفحص: {str(e)}', e)
+        publish_check(check.name, results[check.name])
+    return results
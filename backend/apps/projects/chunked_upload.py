@@ -0,0 +1,332 @@
+"""
+Chunked Upload
+رفع الملفات الكبيرة على أجزاء قابلة للاستئناف (مبني على submit_token)
+
+البروتوكول:
+1. POST   <project_id>/uploads/          بدء الرفع (submit_token، student_id، file_name، file_size)
+2. PUT    uploads/<upload_id>/           جزء من الملف (الجسم خام + رأس Upload-Offset)
+3. GET    uploads/<upload_id>/           الموضع الحالي لاستئناف الرفع بعد الانقطاع
+4. DELETE uploads/<upload_id>/           إلغاء الرفع
+
+- الأجزاء تُكتب مباشرة في ملف جزئي داخل MEDIA_ROOT (نفس نظام ملفات التسليمات)
+- SHA-256 يُحدّث مع كل جزء ويُحفظ في ذاكرة العملية؛ إذا وصل الجزء لعملية أخرى
+  يُعاد بناؤه من الملف الجزئي مرة واحدة
+- الجزء الأول: كشف النوع الحقيقي من أول البايتات، فالملف المزيف يُرفض قبل رفع الباقي
+- بعد آخر جزء: فحص الفيروسات ثم نقل الملف لمخزن المحتوى (rename بدون نسخ،
+  أو مرجع للنسخة الموجودة إذا كان المحتوى مكرراً)
+- إذا فشل الإنهاء أو إنشاء التسليم بعد آخر جزء، يعيد العميل PUT فارغاً عند
+  Upload-Offset = file_size؛ finalize لا يكرر النقل إذا سبق حفظ الملف (file_hash)
+"""
+import os
+import fcntl
+import hashlib
+import secrets
+import logging
+import threading
+from collections import OrderedDict
+from datetime import timedelta
+from pathlib import Path
+from django.conf import settings
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+READ_SIZE = 64 * 1024
+MAX_CACHED_HASHERS = 64
+
+# upload_id -> (offset, hasher) لآخر الجلسات في هذه العملية
+_hashers = OrderedDict()
+_hashers_lock = threading.Lock()
+
+
+class UploadError(Exception):
+    """خطأ في الرفع يُعاد للعميل (مع رمز HTTP وبيانات إضافية)"""
+
+    def __init__(self, message, status=400, **extra):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+        self.extra = extra
+
+
+def chunk_size():
+    """حجم الجزء المقترح للعميل"""
+    return getattr(settings, 'UPLOAD_CHUNK_SIZE', 2 * 1024 * 1024)
+
+
+def partial_dir():
+    return Path(settings.MEDIA_ROOT) / 'uploads' / 'partial'
+
+
+def partial_path(session):
+    return partial_dir() / f'{session.upload_id}.part'
+
+
+def start(project, otp, student_name, student_id, file_name, file_ext, file_size):
+    """
+    إنشاء جلسة رفع وملفها الجزئي الفارغ
+
+    Returns:
+        UploadSession
+    """
+    from .models import UploadSession
+
+    ttl = getattr(settings, 'UPLOAD_SESSION_TTL_HOURS', 24)
+    session = UploadSession.objects.create(
+        upload_id=secrets.token_urlsafe(24),
+        project=project,
+        otp=otp,
+        student_name=student_name,
+        student_id=student_id,
+        file_name=file_name,
+        file_ext=file_ext,
+        file_size=file_size,
+        expires_at=timezone.now() + timedelta(hours=ttl),
+    )
+    partial_dir().mkdir(parents=True, exist_ok=True)
+    partial_path(session).touch()
+    logger.info(f"📤 بدء رفع على أجزاء {session.upload_id} ({file_size:,} بايت) للمشروع #{project.id}")
+    return session
+
+
+def _remember(upload_id, offset, hasher):
+    with _hashers_lock:
+        _hashers[upload_id] = (offset, hasher)
+        _hashers.move_to_end(upload_id)
+        while len(_hashers) > MAX_CACHED_HASHERS:
+            _hashers.popitem(last=False)
+
+
+def _forget(upload_id):
+    with _hashers_lock:
+        _hashers.pop(upload_id, None)
+
+
+def _hasher(session, fd):
+    """hash الجزء المستلم حتى الآن (من الذاكرة أو بإعادة قراءة الملف الجزئي)"""
+    with _hashers_lock:
+        cached = _hashers.get(session.upload_id)
+    if cached and cached[0] == session.received:
+        return cached[1].copy()
+
+    hasher = hashlib.sha256()
+    remaining = session.received
+    os.lseek(fd, 0, os.SEEK_SET)
+    while remaining:
+        data = os.read(fd, min(READ_SIZE, remaining))
+        if not data:
+            break
+        hasher.update(data)
+        remaining -= len(data)
+    return hasher
+
+
+def _check_type(session, head, allowed_extensions):
+    """فحص النوع الحقيقي من أول بايتات الملف (مع الجزء الأول)"""
+    from utils.storage import secure_upload
+    from utils.upload_stream import detect_mime
+
+    mime = detect_mime(head)
+    result = secure_upload.check_mime(session.file_name, mime, allowed_extensions)
+    if not result['valid']:
+        reject(session, result['error'])
+        raise UploadError(result['error'], status=415)
+    session.mime_type = mime or ''
+
+
+def _ensure_open(session):
+    if session.status != 'uploading':
+        raise UploadError('جلسة الرفع غير نشطة', status=410, upload_status=session.status)
+    if timezone.now() > session.expires_at:
+        reject(session, 'انتهت صلاحية جلسة الرفع')
+        raise UploadError('انتهت صلاحية جلسة الرفع', status=410)
+
+
+def write_chunk(session, offset, stream, length, allowed_extensions=None):
+    """
+    كتابة جزء في الملف الجزئي وتحديث hash
+
+    Args:
+        session: UploadSession
+        offset: موضع الجزء (يجب أن يساوي البايتات المستلمة)
+        stream: مصدر قابل للقراءة (request.stream)
+        length: طول الجزء (Content-Length)
+        allowed_extensions: الامتدادات المسموحة (لفحص النوع مع الجزء الأول)
+
+    Returns:
+        UploadSession: بعد تحديث received
+
+    Raises:
+        UploadError
+    """
+    from .models import UploadSession
+
+    _ensure_open(session)
+    max_chunk = getattr(settings, 'UPLOAD_CHUNK_MAX_SIZE', 8 * 1024 * 1024)
+
+    if offset != session.received:
+        raise UploadError('موضع الجزء لا يطابق ما تم استلامه', status=409, offset=session.received)
+    if length <= 0 and offset == session.file_size:
+        # الملف مكتمل: إعادة محاولة الإنهاء بدون كتابة
+        return session
+    if length <= 0:
+        raise UploadError('الجزء فارغ', offset=session.received)
+    if length > max_chunk:
+        raise UploadError('حجم الجزء كبير جداً', status=413, max_chunk_size=max_chunk)
+    if offset + length > session.file_size:
+        raise UploadError('الجزء يتجاوز حجم الملف المعلن', offset=session.received)
+
+    fd = os.open(partial_path(session), os.O_RDWR)
+    try:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise UploadError('جزء آخر من نفس الملف قيد الرفع', status=409, offset=session.received)
+
+        hasher = _hasher(session, fd)
+        os.lseek(fd, offset, os.SEEK_SET)
+        os.ftruncate(fd, offset)
+
+        head = bytearray()
+        written = 0
+        while written < length:
+            data = stream.read(min(READ_SIZE, length - written))
+            if not data:
+                # انقطع الاتصال - ما وصل صالح ويُستأنف منه
+                break
+            os.write(fd, data)
+            hasher.update(data)
+            if offset == 0 and len(head) < 2048:
+                head += data[:2048 - len(head)]
+            written += len(data)
+
+        if offset == 0 and written:
+            _check_type(session, bytes(head), allowed_extensions)
+
+        updated = UploadSession.objects.filter(pk=session.pk, received=offset).update(
+            received=offset + written,
+            mime_type=session.mime_type,
+            updated_at=timezone.now(),
+        )
+        if not updated:
+            raise UploadError('تغيّر موضع الرفع أثناء الكتابة', status=409)
+
+        session.received = offset + written
+        _remember(session.upload_id, session.received, hasher)
+    finally:
+        os.close(fd)
+
+    return session
+
+
+def finalize(session):
+    """
+    إنهاء الرفع: التحقق من الحجم، فحص الفيروسات، ونقل الملف لمخزن المحتوى
+
+    قابل للإعادة: إذا نُقل الملف في محاولة سابقة يُعاد مساره بدون فحص أو نقل
+    (virus = None).
+
+    Returns:
+        dict: {'file_path', 'sha256', 'size', 'virus'}
+
+    Raises:
+        UploadError
+    """
+    from utils import media_store
+    from utils.av import av_scanner
+
+    _ensure_open(session)
+    if session.received != session.file_size:
+        raise UploadError('لم يكتمل رفع الملف', status=409, offset=session.received)
+
+    if session.file_hash:
+        return {
+            'file_path': str(media_store.blob_path(session.file_hash, session.file_ext.lower())),
+            'sha256': session.file_hash,
+            'size': session.file_size,
+            'virus': None,
+        }
+
+    path = partial_path(session)
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        hasher = _hasher(session, fd)
+
+        # الأجزاء وصلت في طلبات منفصلة فلا يمكن إبقاء اتصال INSTREAM مفتوحاً بينها
+        virus = {'scanned': False, 'is_safe': True, 'virus_name': None, 'message': 'تم قبول الملف (ClamAV غير متوفر)'}
+        try:
+            scanner = av_scanner.open_stream()
+        except OSError as e:
+            # خطأ مؤقت - الملف الجزئي يبقى والعميل يعيد المحاولة
+            raise UploadError(f'خطأ في الفحص: {str(e)}', status=503, offset=session.received)
+        if scanner:
+            os.lseek(fd, 0, os.SEEK_SET)
+            while True:
+                data = os.read(fd, READ_SIZE)
+                if not data:
+                    break
+                scanner.send(data)
+            virus = {'scanned': True, **scanner.finish()}
+    finally:
+        os.close(fd)
+
+    if not virus['is_safe']:
+        reject(session, virus['message'])
+        raise UploadError(virus['message'], status=422)
+
+    sha256 = hasher.hexdigest()
+    destination = media_store.put(path, sha256, session.file_ext, session.file_size)
+    session.file_hash = sha256
+    session.save(update_fields=['file_hash', 'updated_at'])
+    _forget(session.upload_id)
+
+    logger.info(f"✅ اكتمل الرفع على أجزاء {session.upload_id} -> {destination}")
+    return {
+        'file_path': str(destination),
+        'sha256': sha256,
+        'size': session.file_size,
+        'virus': virus,
+    }
+
+
+def reject(session, reason):
+    """رفض الجلسة وحذف ملفها الجزئي"""
+    session.status = 'rejected'
+    session.error = reason
+    session.save(update_fields=['status', 'error', 'updated_at'])
+    discard(session)
+
+
+def discard(session):
+    from utils import media_store
+
+    _forget(session.upload_id)
+    if session.file_hash and session.status != 'completed':
+        # نُقل للمخزن ولم يُنشأ التسليم - تحرير المرجع الذي أضافه finalize (مرة واحدة)
+        media_store.release(media_store.blob_path(session.file_hash, session.file_ext.lower()))
+        session.file_hash = ''
+        session.save(update_fields=['file_hash', 'updated_at'])
+    try:
+        os.remove(partial_path(session))
+    except FileNotFoundError:
+        pass
+
+
+def cleanup_expired(now=None):
+    """
+    حذف الجلسات المنتهية وملفاتها الجزئية
+
+    Returns:
+        int: عدد الجلسات المحذوفة
+    """
+    from .models import UploadSession
+
+    expired = UploadSession.objects.filter(expires_at__lt=now or timezone.now())
+    count = 0
+    for session in expired.iterator():
+        discard(session)
+        count += 1
+    expired.delete()
+    if count:
+        logger.info(f"🧹 حذف {count} جلسة رفع منتهية")
+    return count
@@ -0,0 +1,109 @@
+"""
+Image Quality
+فحص جودة الصور بدون فك ترميز الصورة كاملة
+
+- الأبعاد والصيغة من رأس الملف فقط (Image.open لا يفك الترميز)
+- JPEG: فك ترميز مصغّر عبر draft (تصغير DCT بمعامل 1/2، 1/4، 1/8 أثناء القراءة)
+  فصورة 48 ميجا بكسل تُقرأ كصورة رمادية بحجم المعاينة تقريباً
+- باقي الصيغ (PNG...) تُفك كاملة فقط إذا كانت تحت IMAGE_QUALITY_MAX_DECODE_PIXELS،
+  وإلا لا توجد معاينة والفحوصات التي تحتاجها تُتخطى (لا فك ترميز كامل كبديل)
+- مقاييس الحدة والإضاءة بـ NumPy على المعاينة الرمادية
+"""
+import logging
+import numpy as np
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# حدود الإضاءة (قيم رمادية 0-255)
+DARK_LEVEL = 16
+BRIGHT_LEVEL = 240
+
+
+def open_preview(file_path, max_side, mode='L'):
+    """
+    فتح الصورة مصغّرة بأقل ذاكرة ممكنة
+
+    Args:
+        file_path: مسار الصورة
+        max_side: أقصى طول للضلع في المعاينة
+        mode: نمط الألوان ('L' رمادي، 'RGB' ملون)
+
+    Returns:
+        PIL.Image | None: صورة محمّلة في الذاكرة (الملف مغلق)، None إذا كانت الصورة
+                          غير JPEG وأكبر من حد فك الترميز
+    """
+    from PIL import Image, ImageOps
+
+    with Image.open(file_path) as img:
+        if img.format == 'JPEG':
+            # يختار المفكك أصغر معامل تصغير يعطي حجماً >= المطلوب
+            img.draft(mode, (max_side, max_side))
+        elif img.width * img.height > getattr(settings, 'IMAGE_QUALITY_MAX_DECODE_PIXELS', 25000000):
+            return None
+
+        # convert يفك الترميز وينتج صورة مستقلة عن الملف
+        preview = img.convert(mode)
+
+    preview.thumbnail((max_side, max_side), Image.BOX)
+    return ImageOps.exif_transpose(preview) if 'exif' in preview.info else preview
+
+
+def read_header(file_path):
+    """الأبعاد والصيغة من رأس الملف"""
+    from PIL import Image
+
+    with Image.open(file_path) as img:
+        return {'width': img.width, 'height': img.height, 'format': img.format}
+
+
+def sharpness(gray):
+    """تباين Laplacian (قيمة منخفضة = صورة ضبابية)"""
+    lap = (
+        4 * gray[1:-1, 1:-1]
+        - gray[:-2, 1:-1] - gray[2:, 1:-1]
+        - gray[1:-1, :-2] - gray[1:-1, 2:]
+    )
+    return float(lap.var())
+
+
+def exposure(gray):
+    """
+    مقاييس الإضاءة
+
+    Returns:
+        dict: brightness (المتوسط)، contrast (الانحراف المعياري)،
+              dark_ratio و bright_ratio (نسبة البكسلات المعتمة/المحترقة)
+    """
+    histogram = np.bincount(gray.astype(np.uint8).ravel(), minlength=256)
+    total = histogram.sum()
+    return {
+        'brightness': float(gray.mean()),
+        'contrast': float(gray.std()),
+        'dark_ratio': float(histogram[:DARK_LEVEL].sum() / total),
+        'bright_ratio': float(histogram[BRIGHT_LEVEL:].sum() / total),
+    }
+
+
+def measure(file_path):
+    """
+    قياس جودة الصورة
+
+    Returns:
+        dict: width, height, format + sharpness/brightness/contrast/dark_ratio/bright_ratio
+              (None للمقاييس إذا لم تُحسب المعاينة)
+    """
+    max_side = getattr(settings, 'IMAGE_QUALITY_PREVIEW_SIDE', 512)
+    info = read_header(file_path)
+
+    preview = open_preview(file_path, max_side)
+    if preview is None:
+        logger.info(f"⏭️ الصورة كبيرة جداً لفك ترميزها ({info['width']}x{info['height']}) - الأبعاد فقط")
+        info.update(sharpness=None, brightness=None, contrast=None, dark_ratio=None, bright_ratio=None)
+        return info
+
+    gray = np.asarray(preview, dtype=np.float32)
+    info['preview'] = list(preview.size)
+    info['sharpness'] = round(sharpness(gray), 1) if min(gray.shape) >= 3 else None
+    info.update({key: round(value, 3) for key, value in exposure(gray).items()})
+    return info
@@ -0,0 +1,113 @@
+"""
+Django Management Command: Benchmark Validator
+قياس زمن وذاكرة فحوصات AIValidator على ملفات اصطناعية (بدون Gemini وبدون إنترنت)
+في قاعدة بيانات اختبار مؤقتة (مستخدم قاعدة البيانات يحتاج صلاحية إنشاء قاعدة بيانات)
+
+Usage:
+    python manage.py benchmark_validator --output report.json
+    python manage.py benchmark_validator --types pdf image --sizes small medium
+    python manage.py benchmark_validator --baseline report.json --threshold 0.15
+    python manage.py benchmark_validator --gemini-latency 1.5 --parallel
+"""
+import os
+import json
+import shutil
+import logging
+import tempfile
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = 'Benchmark AIValidator checks on synthetic fixtures with local Gemini/speech fakes'
+
+    def add_arguments(self, parser):
+        from apps.projects.benchmarks.fixtures import FILE_TYPES, SIZE_NAMES
+
+        parser.add_argument('--types', nargs='+', choices=FILE_TYPES, default=list(FILE_TYPES))
+        parser.add_argument('--sizes', nargs='+', choices=SIZE_NAMES, default=['small', 'medium'])
+        parser.add_argument('--repeat', type=int, default=3, help='Runs per fixture (the report keeps the median)')
+        parser.add_argument('--output', help='Write the JSON report to this path')
+        parser.add_argument('--baseline', help='Compare against a previous JSON report')
+        parser.add_argument('--threshold', type=float, default=0.2, help='Slowdown ratio counted as a regression')
+        parser.add_argument('--fixtures-dir', help='Generate (or reuse) fixtures in this directory')
+        parser.add_argument('--keep-fixtures', action='store_true', help='Do not delete generated fixtures')
+        parser.add_argument('--parallel', action='store_true', help='Run independent checks in parallel')
+        parser.add_argument('--gemini-latency', type=float, default=0.0, help='Simulated Gemini latency (seconds)')
+        parser.add_argument('--speech-latency', type=float, default=0.0, help='Simulated STT latency per window')
+        parser.add_argument('--verbose-logs', action='store_true', help='Keep validator logging at INFO')
+
+    def handle(self, *args, **options):
+        from apps.projects.benchmarks import fixtures as fixture_module, runner
+
+        baseline = None
+        if options['baseline']:
+            try:
+                with open(options['baseline'], encoding='utf-8') as f:
+                    baseline = json.load(f)
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Cannot read baseline {options['baseline']}: {e}")
+
+        if not options['verbose_logs']:
+            # سجلات الفحوصات تغطي على نتائج القياس
+            logging.getLogger('apps.projects').setLevel(logging.WARNING)
+
+        directory = options['fixtures_dir'] or tempfile.mkdtemp(prefix='validator_benchmark_')
+        keep = options['keep_fixtures'] or bool(options['fixtures_dir'])
+        try:
+            self.stdout.write(f'🧪 Generating fixtures in {directory}')
+            fixtures = fixture_module.make_fixtures(directory, options['types'], options['sizes'])
+            for fixture in fixtures:
+                if 'skipped' in fixture:
+                    self.stdout.write(self.style.WARNING(
+                        f"  ⏭️  {fixture['file_type']}/{fixture['size']}: {fixture['skipped']}"
+                    ))
+
+            def progress(result):
+                self.stdout.write(
+                    f"  {result['key']:<24} {result['bytes'] / 1024:>10.0f}KB"
+                    f"  {result['wall_seconds']:>8.3f}s  +{result['peak_rss_delta_mb']:>7.1f}MB"
+                    f"  {result['status']}"
+                )
+                for name, check in result['checks'].items():
+                    self.stdout.write(
+                        f"      {name:<28} {check['seconds']:>8.3f}s  +{check['peak_rss_delta_mb']:>7.1f}MB"
+                    )
+
+            try:
+                report = runner.run(
+                    fixtures,
+                    repeat=options['repeat'],
+                    parallel=options['parallel'],
+                    gemini_latency=options['gemini_latency'],
+                    speech_latency=options['speech_latency'],
+                    progress=progress,
+                )
+            except RuntimeError as e:
+                raise CommandError(str(e))
+        finally:
+            if not keep:
+                shutil.rmtree(directory, ignore_errors=True)
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"📄 Report written to {os.path.abspath(options['output'])}"))
+
+        if baseline is None:
+            return
+
+        rows = runner.compare(report, baseline, threshold=options['threshold'])
+        regressions = [row for row in rows if row['regression']]
+        self.stdout.write(f"\n📊 Compared {len(rows)} metrics with {options['baseline']}")
+        for row in rows:
+            if row['change'] is None or (abs(row['change']) < 0.05 and not row['regression']):
+                continue
+            style = self.style.ERROR if row['regression'] else self.style.SUCCESS if row['change'] < 0 else str
+            self.stdout.write(style(
+                f"  {row['key']:<24} {row['check'] or 'total':<28} {row['metric']:<18}"
+                f" {row['baseline']:>9} -> {row['current']:<9} ({row['change']:+.0%})"
+            ))
+
+        if regressions:
+            raise CommandError(f'{len(regressions)} metric(s) regressed more than {options["threshold"]:.0%}')
+        self.stdout.write(self.style.SUCCESS('✅ No regressions'))
@@ -0,0 +1,18 @@
+"""
+Django Management Command: Cleanup Uploads
+حذف جلسات الرفع على أجزاء المنتهية وملفاتها الجزئية (للتشغيل الدوري عبر cron)
+
+Usage:
+    python manage.py cleanup_uploads
+"""
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Delete expired chunked upload sessions and their partial files'
+
+    def handle(self, *args, **options):
+        from apps.projects.chunked_upload import cleanup_expired
+
+        count = cleanup_expired()
+        self.stdout.write(self.style.SUCCESS(f'🧹 Deleted {count} expired upload session(s)'))
@@ -0,0 +1,59 @@
+"""
+Django Management Command: Index Fingerprints
+فهرسة بصمات التشابه للتسليمات السابقة (مرة واحدة بعد الترقية، وآمن لإعادة التشغيل)
+
+فحوصات التشابه لا تفهرس التسليمات القديمة بنفسها حتى لا تُضاف مسحات لقاعدة البيانات
+إلى طلب التحقق؛ التسليمات المفهرسة مسبقاً تُتخطى.
+
+بصمات الفيديو تحتاج ffmpeg/OpenCV وقد تستغرق وقتاً طويلاً، فتُشغَّل على worker التحقق:
+
+Usage:
+    python manage.py index_fingerprints
+    python manage.py index_fingerprints --project 12
+    python manage.py index_fingerprints --kind text --kind image     # بدون الفيديو (build.sh)
+    python manage.py index_fingerprints --kind video --limit 50
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+KINDS = ['text', 'image', 'video']
+
+
+class Command(BaseCommand):
+    help = 'Index similarity fingerprints for earlier submissions that do not have one yet'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--project', type=int, help='Only index this project')
+        parser.add_argument(
+            '--kind', action='append', choices=KINDS,
+            help='Only index these fingerprint kinds (repeatable)'
+        )
+        parser.add_argument('--limit', type=int, help='Maximum videos to fingerprint per project')
+
+    def handle(self, *args, **options):
+        from apps.projects.models import Project
+        from apps.projects.similarity import image_index, text_index, video_index
+
+        projects = Project.objects.all().order_by('id')
+        if options['project']:
+            projects = projects.filter(pk=options['project'])
+            if not projects.exists():
+                raise CommandError(f"Project #{options['project']} not found")
+
+        kinds = options['kind'] or KINDS
+        total = 0
+        for project in projects.iterator():
+            counts = {}
+            if 'text' in kinds:
+                for kind in text_index.LEGACY_TEXT_KEYS:
+                    counts[kind] = text_index.backfill_legacy(project, kind)
+            if 'image' in kinds and project.file_type == 'image':
+                counts['image'] = image_index.backfill_legacy(project)
+            if 'video' in kinds and project.file_type == 'video':
+                counts['video'] = video_index.backfill_missing(project, limit=options['limit'])
+
+            for kind, indexed in counts.items():
+                if indexed:
+                    self.stdout.write(f'  #{project.id} {kind}: {indexed}')
+                total += indexed
+
+        self.stdout.write(self.style.SUCCESS(f'📚 Indexed {total} fingerprint(s)'))
@@ -0,0 +1,63 @@
+"""
+Django Management Command: Revalidate Project
+إعادة التحقق من كل تسليمات مشروع كمهمة واحدة (بعد تعديل متطلبات التحقق)
+
+Usage:
+    python manage.py revalidate_project 12
+    python manage.py revalidate_project 12 --chunk-size 50
+    python manage.py revalidate_project 12 --async
+    python manage.py revalidate_project 12 --job 7     # استئناف مهمة من نقطة الحفظ
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = 'Revalidate every submission of a project as one resumable batch job'
+
+    def add_arguments(self, parser):
+        parser.add_argument('project_id', type=int)
+        parser.add_argument('--chunk-size', type=int, help='Submissions per bulk_update chunk')
+        parser.add_argument('--job', type=int, help='Resume an existing job from its checkpoint')
+        parser.add_argument(
+            '--async',
+            action='store_true',
+            dest='run_async',
+            help='Queue the job on the Celery validation queue instead of running it here',
+        )
+
+    def handle(self, *args, **options):
+        from apps.projects.models import Project, RevalidationJob
+        from apps.projects.revalidation import start_job, run_job
+
+        project = Project.objects.filter(pk=options['project_id']).first()
+        if not project:
+            raise CommandError(f"Project #{options['project_id']} not found")
+
+        if options['job']:
+            job = RevalidationJob.objects.filter(pk=options['job'], project=project).first()
+            if not job:
+                raise CommandError(f"Job #{options['job']} not found for project #{project.id}")
+            if job.status == 'failed':
+                job.status = 'pending'
+                job.save(update_fields=['status', 'updated_at'])
+        else:
+            job, created = start_job(project, dispatch=options['run_async'])
+            if not created and options['run_async']:
+                self.stdout.write(self.style.WARNING(f'⚠️ Job #{job.id} is already {job.status}'))
+
+        if options['run_async']:
+            self.stdout.write(self.style.SUCCESS(f'📬 Job #{job.id} queued ({job.total} submissions)'))
+            return
+
+        self.stdout.write(f'🔁 Job #{job.id}: {job.processed}/{job.total} done, resuming after submission #{job.last_submission_id}')
+
+        def progress(current):
+            self.stdout.write(
+                f'  {current.processed}/{current.total} ({current.progress}%)'
+                f' - reused {current.reused}, failed {current.failed}'
+            )
+
+        job = run_job(job, chunk_size=options['chunk_size'], progress=progress)
+
+        style = self.style.SUCCESS if job.status == 'completed' else self.style.WARNING
+        self.stdout.write(style(f'✅ Job #{job.id}: {job.status} ({job.processed}/{job.total})'))
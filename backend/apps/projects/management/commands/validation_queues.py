@@ -0,0 +1,39 @@
+"""
+Django Management Command: Validation Queues
+عرض حالة طوابير التحقق: عدد الرسائل المنتظرة وزمن الانتظار
+
+Usage:
+    python manage.py validation_queues
+    python manage.py validation_queues --no-depth
+"""
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Show depth and wait time (lag) of each validation queue'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--no-depth',
+            action='store_true',
+            help='Do not connect to the broker to read queue depth',
+        )
+
+    def handle(self, *args, **options):
+        from apps.projects.queues import lag_report
+
+        report = lag_report(include_depth=not options['no_depth'])
+
+        self.stdout.write(f"{'QUEUE':<22}{'WORKERS':>8}{'DEPTH':>8}{'LAST':>10}{'EWMA':>10}{'MAX':>10}{'SAMPLES':>9}")
+        for entry in report.values():
+            lag = entry['lag'] or {}
+            depth = '-' if entry['depth'] is None else entry['depth']
+            self.stdout.write(
+                f"{entry['queue']:<22}{entry['concurrency']:>8}{depth:>8}"
+                f"{self._seconds(lag.get('last')):>10}{self._seconds(lag.get('ewma')):>10}"
+                f"{self._seconds(lag.get('max')):>10}{lag.get('samples', 0):>9}"
+            )
+
+    @staticmethod
+    def _seconds(value):
+        return '-' if value is None else f'{value:.1f}s'
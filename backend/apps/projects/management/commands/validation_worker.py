@@ -0,0 +1,45 @@
+"""
+Django Management Command: Validation Worker
+تشغيل Celery worker لطابور تحقق نوع ملف واحد بالتزامن والـ prefetch الخاص به
+
+Usage:
+    python manage.py validation_worker video
+    python manage.py validation_worker pdf --concurrency 8
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = 'Start a Celery worker for one per-media-type validation queue'
+
+    def add_arguments(self, parser):
+        parser.add_argument('file_type', help='pdf | document | image | audio | video')
+        parser.add_argument('--concurrency', type=int, help='Override the configured concurrency')
+        parser.add_argument('--loglevel', default='info')
+
+    def handle(self, *args, **options):
+        from config.celery import app
+
+        file_type = options['file_type']
+        config = settings.VALIDATION_QUEUES.get(file_type)
+        if not config:
+            raise CommandError(
+                f"Unknown file type '{file_type}'. Choose from: {', '.join(settings.VALIDATION_QUEUES)}"
+            )
+
+        concurrency = options['concurrency'] or config['concurrency']
+        self.stdout.write(self.style.SUCCESS(
+            f"🚀 {config['queue']}: concurrency={concurrency}, prefetch={config['prefetch']}"
+        ))
+
+        app.worker_main([
+            'worker',
+            '-Q', config['queue'],
+            '-n', f'{file_type}@%h',
+            '-c', str(concurrency),
+            '--prefetch-multiplier', str(config['prefetch']),
+            # المهام الطويلة لا تحجز رسائل خلفها
+            '-O', 'fair',
+            '-l', options['loglevel'],
+        ])
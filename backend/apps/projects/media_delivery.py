@@ -0,0 +1,225 @@
+"""
+Media Delivery
+تقديم ملفات التسليمات للمعلم مع دعم HTTP Range (تقليب الفيديو بدون تحميله كاملاً)
+
+- الرابط موقّع (django.core.signing) لأن <video>/<iframe> لا ترسل رأس Authorization؛
+  التوقيع يحمل رقم التسليم ورقم المعلم، والتسليم يُجلب بشرط project__teacher
+- ETag من SHA-256 الملف المحفوظ (file_hash) و Last-Modified من وقت الملف،
+  فالطلبات المتكررة تُرد بـ 304 بدون قراءة الملف
+- MEDIA_ACCEL_BACKEND:
+    ''         Django يقدّم الجزء المطلوب؛ الملف يُمرر لـ wsgi.file_wrapper
+               (gunicorn يستخدم sendfile من موضع البداية بطول Content-Length)
+    'nginx'    رأس X-Accel-Redirect وnginx يقدّم الملف ويعالج Range بنفسه
+    'sendfile' رأس X-Sendfile (Apache mod_xsendfile / lighttpd)
+"""
+import os
+import re
+import time
+import mimetypes
+from urllib.parse import quote
+from django.conf import settings
+from django.core import signing
+from django.http import FileResponse, HttpResponse
+from django.urls import reverse
+from django.utils.http import http_date, parse_http_date_safe
+
+SALT = 'projects.submission-media'
+PREVIEW_SALT = 'projects.submission-preview'
+
+_RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def sign(submission, teacher):
+    """توقيع رابط ملف التسليم لمعلم"""
+    return signing.dumps([submission.id, teacher.id], salt=SALT, compress=True)
+
+
+def unsign(token):
+    """
+    Returns:
+        tuple | None: (submission_id, teacher_id) أو None إذا كان التوقيع غير صالح أو منتهياً
+    """
+    try:
+        submission_id, teacher_id = signing.loads(
+            token, salt=SALT, max_age=getattr(settings, 'MEDIA_LINK_MAX_AGE', 3600)
+        )
+    except (signing.BadSignature, ValueError, TypeError):
+        return None
+    return submission_id, teacher_id
+
+
+def signed_url(request, submission, teacher):
+    return request.build_absolute_uri(reverse('submission_media', args=[sign(submission, teacher)]))
+
+
+def preview_expiry(now=None):
+    """
+    وقت انتهاء روابط المعاينة المُصدرة الآن
+
+    الوقت مقرّب لنهاية النافذة التالية (نافذة = نصف PREVIEW_LINK_MAX_AGE)، فكل الروابط
+    المُصدرة في نفس النافذة متطابقة وتبقى في cache المتصفح، وعمر الرابط بين نصف
+    PREVIEW_LINK_MAX_AGE وكامله
+    """
+    window = max(1, getattr(settings, 'PREVIEW_LINK_MAX_AGE', 7 * 24 * 3600) // 2)
+    now = int(time.time() if now is None else now)
+    return (now // window + 2) * window
+
+
+def preview_url(request, submission, teacher):
+    """رابط مصغّرة التسليم (صلاحية طويلة ومحدودة - انظر preview_expiry)"""
+    token = signing.Signer(salt=PREVIEW_SALT).sign(f'{submission.id}.{teacher.id}.{preview_expiry()}')
+    return request.build_absolute_uri(reverse('submission_preview', args=[token]))
+
+
+def unsign_preview(token):
+    """
+    Returns:
+        tuple | None: (submission_id, teacher_id, expires) أو None إذا كان التوقيع غير صالح أو منتهياً
+    """
+    try:
+        submission_id, teacher_id, expires = map(int, signing.Signer(salt=PREVIEW_SALT).unsign(token).split('.'))
+    except (signing.BadSignature, ValueError):
+        return None
+    if expires <= time.time():
+        return None
+    return submission_id, teacher_id, expires
+
+
+def parse_range(header, size):
+    """
+    نطاق واحد من رأس Range
+
+    Returns:
+        tuple | None | False: (start, end) شامل، None = الملف كاملاً، False = نطاق غير قابل للتلبية
+    """
+    match = _RANGE.match(header.strip()) if header else None
+    if not match:
+        # صيغة غير مدعومة (مثل عدة نطاقات) - الملف كاملاً كما تسمح RFC 9110
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # bytes=-N آخر N بايت
+        length = int(last)
+        if length == 0:
+            return False
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        return False
+    return start, end
+
+
+class RangeFile:
+    """ملف محدود بنطاق (fileno متاح لـ sendfile والقراءة تتوقف عند نهاية النطاق)"""
+
+    def __init__(self, file, start, length):
+        self.file = file
+        self.remaining = length
+        file.seek(start)
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def _not_modified(request, etag, mtime):
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match:
+        return etag in [tag.strip() for tag in if_none_match.split(',')] or if_none_match.strip() == '*'
+    since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+    return since is not None and int(mtime) <= since
+
+
+def _range_applies(request, etag, mtime):
+    """If-Range: النطاق يُطبّق فقط إذا لم يتغير الملف"""
+    if_range = request.headers.get('If-Range')
+    if not if_range:
+        return True
+    if if_range.startswith('"') or if_range.startswith('W/'):
+        return if_range == etag
+    since = parse_http_date_safe(if_range)
+    return since is not None and int(mtime) <= since
+
+
+def serve(request, file_path, file_name, file_hash=None, cache_control=None):
+    """
+    تقديم الملف مع Range و ETag/Last-Modified
+
+    Args:
+        file_path: المسار المطلق للملف
+        file_name: الاسم الأصلي (Content-Disposition)
+        file_hash: SHA-256 المحفوظ (ETag)؛ إذا لم يتوفر يُبنى من الحجم ووقت التعديل
+        cache_control: قيمة Cache-Control (افتراضياً private لمدة صلاحية الرابط)
+
+    Returns:
+        HttpResponse
+    """
+    stat = os.stat(file_path)
+    size = stat.st_size
+    etag = f'"{file_hash}"' if file_hash else f'"{int(stat.st_mtime):x}-{size:x}"'
+    content_type = mimetypes.guess_type(file_name)[0] or 'application/octet-stream'
+
+    headers = {
+        'ETag': etag,
+        'Last-Modified': http_date(stat.st_mtime),
+        'Accept-Ranges': 'bytes',
+        'Cache-Control': cache_control or f"private, max-age={getattr(settings, 'MEDIA_LINK_MAX_AGE', 3600)}",
+        'Content-Disposition': f"inline; filename*=UTF-8''{quote(file_name)}",
+    }
+
+    if _not_modified(request, etag, stat.st_mtime):
+        response = HttpResponse(status=304)
+        for key in ('ETag', 'Last-Modified', 'Cache-Control'):
+            response[key] = headers[key]
+        return response
+
+    backend = getattr(settings, 'MEDIA_ACCEL_BACKEND', '')
+    if backend in ('nginx', 'sendfile'):
+        # الخادم الأمامي يقرأ الملف ويعالج Range؛ Django يرد بالرؤوس فقط
+        response = HttpResponse(content_type=content_type)
+        if backend == 'nginx':
+            relative = os.path.relpath(file_path, settings.MEDIA_ROOT).replace(os.sep, '/')
+            response['X-Accel-Redirect'] = quote(f"{settings.MEDIA_ACCEL_PREFIX.rstrip('/')}/{relative}")
+        else:
+            response['X-Sendfile'] = file_path
+        for key, value in headers.items():
+            response[key] = value
+        return response
+
+    byte_range = None
+    if _range_applies(request, etag, stat.st_mtime):
+        byte_range = parse_range(request.headers.get('Range'), size)
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        response['Accept-Ranges'] = 'bytes'
+        return response
+
+    start, end = byte_range or (0, size - 1)
+    length = end - start + 1 if size else 0
+
+    if request.method == 'HEAD':
+        response = HttpResponse(content_type=content_type)
+    else:
+        response = FileResponse(RangeFile(open(file_path, 'rb'), start, length), content_type=content_type)
+    response['Content-Length'] = str(length)
+    if byte_range:
+        response.status_code = 206
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    for key, value in headers.items():
+        response[key] = value
+    return response
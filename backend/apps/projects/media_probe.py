@@ -0,0 +1,291 @@
+"""
+Media Probe
+قراءة معلومات ملفات الفيديو والصوت من رأس الملف بدون فك الترميز
+
+- المدة، الدقة، الترميز (codec)، معدل البت
+- الطريقة الأساسية: ffprobe (يقرأ رأس الحاوية فقط)
+- بدائل بدون أدوات خارجية: MP4/MOV (صندوق moov) و WAV، ثم OpenCV للفيديو
+- النتيجة تُحفظ في الـ cache حسب hash الملف
+"""
+import os
+import json
+import wave
+import struct
+import logging
+import subprocess
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+CACHE_PREFIX = 'media_probe'
+
+MP4_EXTENSIONS = ('.mp4', '.m4a', '.m4v', '.mov', '.3gp')
+
+
+def _empty_info(source):
+    return {
+        'duration': None,
+        'width': None,
+        'height': None,
+        'fps': None,
+        'video_codec': None,
+        'audio_codec': None,
+        'sample_rate': None,
+        'channels': None,
+        'bitrate': None,
+        'format': None,
+        'has_video': False,
+        'has_audio': False,
+        'probed_with': source,
+    }
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _parse_rate(value):
+    """تحويل '30000/1001' إلى 29.97"""
+    try:
+        num, _, den = str(value).partition('/')
+        return float(num) / float(den or 1) if float(den or 1) else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _probe_ffprobe(file_path):
+    """قراءة المعلومات عبر ffprobe"""
+    binary = getattr(settings, 'FFPROBE_BINARY', 'ffprobe')
+    try:
+        output = subprocess.run(
+            [binary, '-v', 'error', '-show_format', '-show_streams', '-of', 'json', file_path],
+            capture_output=True,
+            timeout=getattr(settings, 'MEDIA_PROBE_TIMEOUT', 15),
+            check=True
+        ).stdout
+        data = json.loads(output or b'{}')
+    except FileNotFoundError:
+        return None
+    except (subprocess.SubprocessError, ValueError) as e:
+        logger.warning(f"⚠️ فشل ffprobe للملف {file_path}: {str(e)}")
+        return None
+
+    fmt = data.get('format') or {}
+    info = _empty_info('ffprobe')
+    info['duration'] = _to_float(fmt.get('duration'))
+    info['bitrate'] = _to_int(fmt.get('bit_rate'))
+    info['format'] = fmt.get('format_name')
+
+    for stream in data.get('streams', []):
+        codec_type = stream.get('codec_type')
+        if codec_type == 'video' and not info['has_video']:
+            # صورة الغلاف في ملفات الصوت ليست فيديو
+            if (stream.get('disposition') or {}).get('attached_pic'):
+                continue
+            info['has_video'] = True
+            info['width'] = _to_int(stream.get('width'))
+            info['height'] = _to_int(stream.get('height'))
+            info['video_codec'] = stream.get('codec_name')
+            info['fps'] = _parse_rate(stream.get('avg_frame_rate')) or _parse_rate(stream.get('r_frame_rate'))
+        elif codec_type == 'audio' and not info['has_audio']:
+            info['has_audio'] = True
+            info['audio_codec'] = stream.get('codec_name')
+            info['sample_rate'] = _to_int(stream.get('sample_rate'))
+            info['channels'] = _to_int(stream.get('channels'))
+
+        if info['duration'] is None:
+            info['duration'] = _to_float(stream.get('duration'))
+
+    return info
+
+
+def _iter_boxes(f, start, end):
+    """المرور على صناديق MP4 بين موضعين (بدون قراءة المحتوى)"""
+    position = start
+    while position + 8 <= end:
+        f.seek(position)
+        header = f.read(8)
+        if len(header) < 8:
+            return
+        size, box_type = struct.unpack('>I4s', header)
+        header_size = 8
+        if size == 1:
+            size = struct.unpack('>Q', f.read(8))[0]
+            header_size = 16
+        elif size == 0:
+            size = end - position
+        if size < header_size:
+            return
+        yield box_type, position + header_size, position + size
+        position += size
+
+
+def _find_box(f, start, end, path):
+    """البحث عن صندوق متداخل مثل [b'mdia', b'hdlr']"""
+    for box_type, body_start, body_end in _iter_boxes(f, start, end):
+        if box_type == path[0]:
+            if len(path) == 1:
+                return body_start, body_end
+            return _find_box(f, body_start, body_end, path[1:])
+    return None
+
+
+def _probe_mp4(file_path):
+    """قراءة المدة والدقة والترميز من صندوق moov في ملفات MP4/MOV"""
+    with open(file_path, 'rb') as f:
+        file_size = os.fstat(f.fileno()).st_size
+        moov = _find_box(f, 0, file_size, [b'moov'])
+        if not moov:
+            return None
+
+        info = _empty_info('mp4')
+        mvhd = _find_box(f, moov[0], moov[1], [b'mvhd'])
+        if mvhd:
+            f.seek(mvhd[0])
+            version = f.read(1)[0]
+            f.seek(mvhd[0] + (20 if version == 1 else 12))
+            if version == 1:
+                timescale, duration = struct.unpack('>IQ', f.read(12))
+            else:
+                timescale, duration = struct.unpack('>II', f.read(8))
+            if timescale:
+                info['duration'] = duration / timescale
+
+        for box_type, trak_start, trak_end in _iter_boxes(f, moov[0], moov[1]):
+            if box_type != b'trak':
+                continue
+
+            hdlr = _find_box(f, trak_start, trak_end, [b'mdia', b'hdlr'])
+            if not hdlr:
+                continue
+            f.seek(hdlr[0] + 8)
+            handler = f.read(4)
+
+            codec = None
+            stsd = _find_box(f, trak_start, trak_end, [b'mdia', b'minf', b'stbl', b'stsd'])
+            if stsd:
+                f.seek(stsd[0] + 12)
+                codec = f.read(4).decode('latin-1').strip() or None
+
+            if handler == b'vide' and not info['has_video']:
+                info['has_video'] = True
+                info['video_codec'] = codec
+                tkhd = _find_box(f, trak_start, trak_end, [b'tkhd'])
+                if tkhd:
+                    # العرض والارتفاع في آخر 8 bytes (fixed-point 16.16)
+                    f.seek(tkhd[1] - 8)
+                    width, height = struct.unpack('>II', f.read(8))
+                    info['width'], info['height'] = width >> 16, height >> 16
+            elif handler == b'soun' and not info['has_audio']:
+                info['has_audio'] = True
+                info['audio_codec'] = codec
+
+        if info['duration']:
+            info['bitrate'] = int(file_size * 8 / info['duration'])
+        info['format'] = 'mp4'
+        return info
+
+
+def _probe_wav(file_path):
+    """قراءة معلومات ملفات WAV من الرأس"""
+    with wave.open(file_path, 'rb') as w:
+        info = _empty_info('wav')
+        info['has_audio'] = True
+        info['audio_codec'] = 'pcm'
+        info['format'] = 'wav'
+        info['sample_rate'] = w.getframerate()
+        info['channels'] = w.getnchannels()
+        if info['sample_rate']:
+            info['duration'] = w.getnframes() / info['sample_rate']
+        info['bitrate'] = info['sample_rate'] * info['channels'] * w.getsampwidth() * 8
+        return info
+
+
+def _probe_opencv(file_path):
+    """قراءة معلومات الفيديو عبر OpenCV (خصائص الحاوية بدون قراءة الإطارات)"""
+    import cv2
+
+    video = cv2.VideoCapture(file_path)
+    try:
+        if not video.isOpened():
+            return None
+        info = _empty_info('opencv')
+        fps = video.get(cv2.CAP_PROP_FPS)
+        frame_count = video.get(cv2.CAP_PROP_FRAME_COUNT)
+        info['has_video'] = True
+        info['fps'] = fps or None
+        info['duration'] = frame_count / fps if fps > 0 else None
+        info['width'] = int(video.get(cv2.CAP_PROP_FRAME_WIDTH)) or None
+        info['height'] = int(video.get(cv2.CAP_PROP_FRAME_HEIGHT)) or None
+        return info
+    finally:
+        video.release()
+
+
+def _probe_uncached(file_path):
+    lower = str(file_path).lower()
+    probers = [_probe_ffprobe]
+    if lower.endswith(MP4_EXTENSIONS):
+        probers.append(_probe_mp4)
+    if lower.endswith('.wav'):
+        probers.append(_probe_wav)
+    probers.append(_probe_opencv)
+
+    for prober in probers:
+        try:
+            info = prober(file_path)
+        except ImportError:
+            continue
+        except Exception as e:
+            logger.warning(f"⚠️ تعذر قراءة معلومات الملف ({prober.__name__}): {str(e)}")
+            continue
+        if info and info.get('duration'):
+            return info
+    return None
+
+
+def probe(file_path, file_hash=None):
+    """
+    قراءة معلومات ملف الوسائط
+
+    Args:
+        file_path: مسار الملف
+        file_hash: SHA-256 للملف (لاستخدام الـ cache)
+
+    Returns:
+        dict | None: {'duration', 'width', 'height', 'fps', 'video_codec', 'audio_codec',
+                      'sample_rate', 'channels', 'bitrate', 'format', 'has_video',
+                      'has_audio', 'probed_with'} أو None إذا تعذرت القراءة
+    """
+    cache_key = f'{CACHE_PREFIX}:{file_hash}' if file_hash else None
+    if cache_key:
+        info = cache.get(cache_key)
+        if info:
+            return info
+
+    info = _probe_uncached(file_path)
+    if info and cache_key:
+        cache.set(cache_key, info, getattr(settings, 'MEDIA_PROBE_CACHE_TIMEOUT', 7 * 24 * 3600))
+    return info
+
+
+def get_duration(file_path, file_hash=None):
+    """
+    مدة الملف بالثواني
+
+    Returns:
+        float | None
+    """
+    info = probe(file_path, file_hash=file_hash)
+    return info['duration'] if info else None
@@ -0,0 +1,36 @@
+# Generated by Django 5.0.7 on 2026-10-17 10:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0007_project_ai_validation_enabled_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ValidationCache',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_hash', models.CharField(max_length=64, verbose_name='Hash الملف')),
+                ('requirements_digest', models.CharField(max_length=64, verbose_name='بصمة متطلبات المشروع')),
+                ('student_key', models.CharField(blank=True, default='', max_length=100, verbose_name='معرف الطالب')),
+                ('results', models.JSONField(default=dict, verbose_name='نتائج التحقق')),
+                ('validation_data', models.JSONField(blank=True, default=dict, verbose_name='بيانات المقارنة')),
+                ('hit_count', models.IntegerField(default=0, verbose_name='مرات الاستخدام')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='تاريخ الإنشاء')),
+                ('last_used_at', models.DateTimeField(auto_now=True, verbose_name='آخر استخدام')),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='validation_cache', to='projects.project', verbose_name='المشروع')),
+                ('source_submission', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='projects.submission', verbose_name='التسليم الأصلي')),
+            ],
+            options={
+                'verbose_name': 'نتيجة تحقق مخزنة',
+                'verbose_name_plural': 'نتائج التحقق المخزنة',
+                'db_table': 'validation_cache',
+                'unique_together': {('project', 'file_hash', 'requirements_digest', 'student_key')},
+            },
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.0.7 on 2026-10-17 21:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0008_validationcache'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TextFingerprint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('pdf', 'PDF'), ('audio', 'صوت')], max_length=20, verbose_name='النوع')),
+                ('signature', models.BinaryField(verbose_name='البصمة')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='تاريخ الإنشاء')),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='text_fingerprints', to='projects.project', verbose_name='المشروع')),
+                ('submission', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='text_fingerprints', to='projects.submission', verbose_name='التسليم')),
+            ],
+            options={
+                'verbose_name': 'بصمة نص',
+                'verbose_name_plural': 'بصمات النصوص',
+                'db_table': 'text_fingerprints',
+                'unique_together': {('submission', 'kind')},
+            },
+        ),
+        migrations.CreateModel(
+            name='TextFingerprintBand',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=20, verbose_name='النوع')),
+                ('band_key', models.BigIntegerField(verbose_name='مفتاح النطاق')),
+                ('fingerprint', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bands', to='projects.textfingerprint', verbose_name='البصمة')),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='projects.project', verbose_name='المشروع')),
+            ],
+            options={
+                'verbose_name': 'مفتاح بصمة نص',
+                'verbose_name_plural': 'مفاتيح بصمات النصوص',
+                'db_table': 'text_fingerprint_bands',
+                'indexes': [models.Index(fields=['project', 'kind', 'band_key'], name='text_band_lookup_idx')],
+            },
+        ),
+    ]
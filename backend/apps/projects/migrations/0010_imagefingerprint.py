@@ -0,0 +1,30 @@
+# Generated by Django 5.0.7 on 2026-10-17 21:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0009_textfingerprint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageFingerprint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('phash', models.BigIntegerField(verbose_name='البصمة')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='تاريخ الإنشاء')),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='image_fingerprints', to='projects.project', verbose_name='المشروع')),
+                ('submission', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='image_fingerprint', to='projects.submission', verbose_name='التسليم')),
+            ],
+            options={
+                'verbose_name': 'بصمة صورة',
+                'verbose_name_plural': 'بصمات الصور',
+                'db_table': 'image_fingerprints',
+                'indexes': [models.Index(fields=['project', 'id'], name='image_fp_project_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.0.7 on 2026-10-17 21:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0010_imagefingerprint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VideoFingerprint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('signature', models.BigIntegerField(verbose_name='التوقيع')),
+                ('keyframes', models.BinaryField(verbose_name='بصمات الإطارات')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='تاريخ الإنشاء')),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='video_fingerprints', to='projects.project', verbose_name='المشروع')),
+                ('submission', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='video_fingerprint', to='projects.submission', verbose_name='التسليم')),
+            ],
+            options={
+                'verbose_name': 'بصمة فيديو',
+                'verbose_name_plural': 'بصمات الفيديو',
+                'db_table': 'video_fingerprints',
+                'indexes': [models.Index(fields=['project', 'signature'], name='video_fp_project_idx')],
+            },
+        ),
+    ]
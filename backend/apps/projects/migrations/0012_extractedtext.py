@@ -0,0 +1,35 @@
+# Generated by Django 5.0.7 on 2026-10-17 21:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0011_videofingerprint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExtractedText',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_hash', models.CharField(max_length=64, unique=True, verbose_name='Hash الملف')),
+                ('kind', models.CharField(max_length=10, verbose_name='نوع الملف')),
+                ('content', models.BinaryField(verbose_name='النص المضغوط')),
+                ('page_offsets', models.JSONField(default=list, verbose_name='بداية كل صفحة')),
+                ('page_word_counts', models.JSONField(default=list, verbose_name='عدد كلمات كل صفحة')),
+                ('word_count', models.IntegerField(default=0, verbose_name='عدد الكلمات')),
+                ('char_count', models.IntegerField(default=0, verbose_name='عدد الأحرف')),
+                ('page_count', models.IntegerField(default=0, verbose_name='عدد الصفحات')),
+                ('metadata', models.JSONField(blank=True, default=dict, verbose_name='بيانات إضافية')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='تاريخ الاستخراج')),
+                ('last_used_at', models.DateTimeField(auto_now=True, verbose_name='آخر استخدام')),
+            ],
+            options={
+                'verbose_name': 'نص مستخرج',
+                'verbose_name_plural': 'النصوص المستخرجة',
+                'db_table': 'extracted_texts',
+            },
+        ),
+    ]
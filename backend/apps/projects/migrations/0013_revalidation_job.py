@@ -0,0 +1,41 @@
+# Generated by Django 5.0.7 on 2026-10-17 21:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_teacher_subjects'),
+        ('projects', '0012_extractedtext'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RevalidationJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'في الانتظار'), ('running', 'قيد التنفيذ'), ('completed', 'مكتمل'), ('failed', 'فشل'), ('cancelled', 'ملغي')], default='pending', max_length=20, verbose_name='الحالة')),
+                ('total', models.IntegerField(default=0, verbose_name='عدد التسليمات')),
+                ('processed', models.IntegerField(default=0, verbose_name='تمت معالجتها')),
+                ('failed', models.IntegerField(default=0, verbose_name='فشلت')),
+                ('reused', models.IntegerField(default=0, verbose_name='نتائج معاد استخدامها')),
+                ('last_submission_id', models.IntegerField(default=0, verbose_name='آخر تسليم تمت معالجته')),
+                ('requirements_digest', models.CharField(blank=True, default='', max_length=64, verbose_name='بصمة متطلبات المشروع')),
+                ('error', models.TextField(blank=True, default='', verbose_name='الخطأ')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='تاريخ الإنشاء')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='تاريخ البدء')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='تاريخ الانتهاء')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='آخر تحديث')),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='revalidation_jobs', to='projects.project', verbose_name='المشروع')),
+                ('requested_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='accounts.teacher', verbose_name='طلب بواسطة')),
+            ],
+            options={
+                'verbose_name': 'إعادة تحقق جماعية',
+                'verbose_name_plural': 'عمليات إعادة التحقق الجماعية',
+                'db_table': 'revalidation_jobs',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
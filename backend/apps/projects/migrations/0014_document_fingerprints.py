@@ -0,0 +1,18 @@
+# Generated by Django 5.0.7 on 2026-10-17 21:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0013_revalidation_job'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='textfingerprint',
+            name='kind',
+            field=models.CharField(choices=[('pdf', 'PDF'), ('audio', 'صوت'), ('document', 'مستند'), ('document_structure', 'بنية مستند')], max_length=20, verbose_name='النوع'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.0.7 on 2026-10-17 22:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('otp_system', '0001_initial'),
+        ('projects', '0014_document_fingerprints'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadSession',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('upload_id', models.CharField(max_length=64, unique=True, verbose_name='معرّف الرفع')),
+                ('student_name', models.CharField(max_length=200, verbose_name='اسم الطالب')),
+                ('student_id', models.CharField(max_length=50, verbose_name='رقم الطالب')),
+                ('file_name', models.CharField(max_length=255, verbose_name='اسم الملف')),
+                ('file_ext', models.CharField(max_length=20, verbose_name='الامتداد')),
+                ('file_size', models.BigIntegerField(verbose_name='الحجم الكلي (بايت)')),
+                ('received', models.BigIntegerField(default=0, verbose_name='البايتات المستلمة')),
+                ('mime_type', models.CharField(blank=True, default='', max_length=100, verbose_name='النوع الفعلي')),
+                ('status', models.CharField(choices=[('uploading', 'جاري الرفع'), ('completed', 'مكتمل'), ('rejected', 'مرفوض')], default='uploading', max_length=20, verbose_name='الحالة')),
+                ('error', models.TextField(blank=True, default='', verbose_name='سبب الرفض')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='تاريخ الإنشاء')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='آخر تحديث')),
+                ('expires_at', models.DateTimeField(verbose_name='تاريخ الانتهاء')),
+                ('otp', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='otp_system.projectotp', verbose_name='رمز التسليم')),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='upload_sessions', to='projects.project', verbose_name='المشروع')),
+                ('submission', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='projects.submission', verbose_name='التسليم')),
+            ],
+            options={
+                'verbose_name': 'جلسة رفع',
+                'verbose_name_plural': 'جلسات الرفع',
+                'db_table': 'upload_sessions',
+                'indexes': [models.Index(fields=['expires_at'], name='upload_session_expiry_idx')],
+            },
+        ),
+    ]
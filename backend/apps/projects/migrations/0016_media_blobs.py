@@ -0,0 +1,30 @@
+# Generated by Django 5.0.7 on 2026-10-17 22:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0015_upload_session'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, verbose_name='SHA-256')),
+                ('ext', models.CharField(blank=True, default='', max_length=20, verbose_name='الامتداد')),
+                ('size', models.BigIntegerField(verbose_name='الحجم (بايت)')),
+                ('ref_count', models.PositiveIntegerField(default=0, verbose_name='عدد المراجع')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='تاريخ الإنشاء')),
+            ],
+            options={
+                'verbose_name': 'ملف مخزن',
+                'verbose_name_plural': 'ملفات المخزن',
+                'db_table': 'media_blobs',
+                'unique_together': {('sha256', 'ext')},
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.7 on 2026-10-17 22:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0016_media_blobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='submission',
+            name='previews',
+            field=models.JSONField(blank=True, default=dict, verbose_name='المعاينات (مصغّرة / شكل موجي)'),
+        ),
+    ]
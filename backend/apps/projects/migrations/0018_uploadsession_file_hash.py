@@ -0,0 +1,18 @@
+# Generated by Django 5.0.7 on 2026-10-17 22:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0017_submission_previews'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uploadsession',
+            name='file_hash',
+            field=models.CharField(blank=True, default='', max_length=64, verbose_name='SHA-256 بعد النقل للمخزن'),
+        ),
+    ]
@@ -224,6 +224,11 @@ class Submission(models.Model):
         verbose_name='مدة المعالجة (ثواني)'
     )
     processed_at = models.DateTimeField(null=True, blank=True, verbose_name='تاريخ الانتهاء من المعالجة')
+    previews = models.JSONField(
+        default=dict,
+        blank=True,
+        verbose_name='المعاينات (مصغّرة / شكل موجي)'
+    )
     
     # نتائج الفحص والتحقق (القديمة - متوافقة)
     validation_data = models.JSONField(null=True, blank=True, verbose_name='بيانات التحقق')
@@ -267,3 +272,266 @@ class TelegramSendLog(models.Model):
     def __str__(self):
         status = "✅" if self.success else "❌"
         return f"{status} {self.project.title} → {self.section.section_name}"
+
+
+class ValidationCache(models.Model):
+    """نتائج التحقق المخزنة حسب محتوى الملف ومتطلبات المشروع"""
+    
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='validation_cache', verbose_name='المشروع')
+    file_hash = models.CharField(max_length=64, verbose_name='Hash الملف')
+    requirements_digest = models.CharField(max_length=64, verbose_name='بصمة متطلبات المشروع')
+    student_key = models.CharField(max_length=100, blank=True, default='', verbose_name='معرف الطالب')
+    source_submission = models.ForeignKey(
+        Submission,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name='التسليم الأصلي'
+    )
+    results = models.JSONField(default=dict, verbose_name='نتائج التحقق')
+    validation_data = models.JSONField(default=dict, blank=True, verbose_name='بيانات المقارنة')
+    hit_count = models.IntegerField(default=0, verbose_name='مرات الاستخدام')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='تاريخ الإنشاء')
+    last_used_at = models.DateTimeField(auto_now=True, verbose_name='آخر استخدام')
+    
+    class Meta:
+        db_table = 'validation_cache'
+        verbose_name = 'نتيجة تحقق مخزنة'
+        verbose_name_plural = 'نتائج التحقق المخزنة'
+        unique_together = ['project', 'file_hash', 'requirements_digest', 'student_key']
+    
+    def __str__(self):
+        return f"{self.file_hash[:12]} - {self.project_id}"
+
+
+class TextFingerprint(models.Model):
+    """بصمة MinHash لنص التسليم (لكشف الانتحال)"""
+    
+    KIND_CHOICES = [
+        ('pdf', 'PDF'),
+        ('audio', 'صوت'),
+        ('document', 'مستند'),
+        ('document_structure', 'بنية مستند'),
+    ]
+    
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='text_fingerprints', verbose_name='المشروع')
+    submission = models.ForeignKey(Submission, on_delete=models.CASCADE, related_name='text_fingerprints', verbose_name='التسليم')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, verbose_name='النوع')
+    signature = models.BinaryField(verbose_name='البصمة')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='تاريخ الإنشاء')
+    
+    class Meta:
+        db_table = 'text_fingerprints'
+        verbose_name = 'بصمة نص'
+        verbose_name_plural = 'بصمات النصوص'
+        unique_together = ['submission', 'kind']
+    
+    def __str__(self):
+        return f"{self.kind} - Submission #{self.submission_id}"
+
+
+class TextFingerprintBand(models.Model):
+    """مفاتيح LSH لبصمة النص (فهرس البحث عن النصوص المتشابهة)"""
+    
+    fingerprint = models.ForeignKey(TextFingerprint, on_delete=models.CASCADE, related_name='bands', verbose_name='البصمة')
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='+', verbose_name='المشروع')
+    kind = models.CharField(max_length=20, verbose_name='النوع')
+    band_key = models.BigIntegerField(verbose_name='مفتاح النطاق')
+    
+    class Meta:
+        db_table = 'text_fingerprint_bands'
+        verbose_name = 'مفتاح بصمة نص'
+        verbose_name_plural = 'مفاتيح بصمات النصوص'
+        indexes = [
+            models.Index(fields=['project', 'kind', 'band_key'], name='text_band_lookup_idx'),
+        ]
+
+
+class ImageFingerprint(models.Model):
+    """البصمة الإدراكية للصورة (average hash 64-bit) لكشف الصور المتشابهة"""
+    
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='image_fingerprints', verbose_name='المشروع')
+    submission = models.OneToOneField(Submission, on_delete=models.CASCADE, related_name='image_fingerprint', verbose_name='التسليم')
+    phash = models.BigIntegerField(verbose_name='البصمة')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='تاريخ الإنشاء')
+    
+    class Meta:
+        db_table = 'image_fingerprints'
+        verbose_name = 'بصمة صورة'
+        verbose_name_plural = 'بصمات الصور'
+        indexes = [
+            models.Index(fields=['project', 'id'], name='image_fp_project_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.phash & 0xFFFFFFFFFFFFFFFF:016x} - Submission #{self.submission_id}"
+
+
+class VideoFingerprint(models.Model):
+    """بصمة الفيديو: توقيع 64-bit للفيديو كاملاً + بصمة لكل إطار مفتاحي"""
+    
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='video_fingerprints', verbose_name='المشروع')
+    submission = models.OneToOneField(Submission, on_delete=models.CASCADE, related_name='video_fingerprint', verbose_name='التسليم')
+    signature = models.BigIntegerField(verbose_name='التوقيع')
+    keyframes = models.BinaryField(verbose_name='بصمات الإطارات')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='تاريخ الإنشاء')
+    
+    class Meta:
+        db_table = 'video_fingerprints'
+        verbose_name = 'بصمة فيديو'
+        verbose_name_plural = 'بصمات الفيديو'
+        indexes = [
+            models.Index(fields=['project', 'signature'], name='video_fp_project_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.signature & 0xFFFFFFFFFFFFFFFF:016x} - Submission #{self.submission_id}"
+
+
+class ExtractedText(models.Model):
+    """النص المستخرج من ملف (مرة واحدة لكل hash) - مضغوط"""
+    
+    file_hash = models.CharField(max_length=64, unique=True, verbose_name='Hash الملف')
+    kind = models.CharField(max_length=10, verbose_name='نوع الملف')
+    content = models.BinaryField(verbose_name='النص المضغوط')
+    page_offsets = models.JSONField(default=list, verbose_name='بداية كل صفحة')
+    page_word_counts = models.JSONField(default=list, verbose_name='عدد كلمات كل صفحة')
+    word_count = models.IntegerField(default=0, verbose_name='عدد الكلمات')
+    char_count = models.IntegerField(default=0, verbose_name='عدد الأحرف')
+    page_count = models.IntegerField(default=0, verbose_name='عدد الصفحات')
+    metadata = models.JSONField(default=dict, blank=True, verbose_name='بيانات إضافية')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='تاريخ الاستخراج')
+    last_used_at = models.DateTimeField(auto_now=True, verbose_name='آخر استخدام')
+    
+    class Meta:
+        db_table = 'extracted_texts'
+        verbose_name = 'نص مستخرج'
+        verbose_name_plural = 'النصوص المستخرجة'
+    
+    def __str__(self):
+        return f"{self.kind} - {self.file_hash[:12]} ({self.word_count} كلمة)"
+
+
+class RevalidationJob(models.Model):
+    """إعادة التحقق من كل تسليمات المشروع كمهمة واحدة (مع نقطة استئناف)"""
+    
+    STATUS_CHOICES = [
+        ('pending', 'في الانتظار'),
+        ('running', 'قيد التنفيذ'),
+        ('completed', 'مكتمل'),
+        ('failed', 'فشل'),
+        ('cancelled', 'ملغي'),
+    ]
+    
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='revalidation_jobs', verbose_name='المشروع')
+    requested_by = models.ForeignKey(
+        Teacher,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name='طلب بواسطة'
+    )
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending', verbose_name='الحالة')
+    total = models.IntegerField(default=0, verbose_name='عدد التسليمات')
+    processed = models.IntegerField(default=0, verbose_name='تمت معالجتها')
+    failed = models.IntegerField(default=0, verbose_name='فشلت')
+    reused = models.IntegerField(default=0, verbose_name='نتائج معاد استخدامها')
+    last_submission_id = models.IntegerField(default=0, verbose_name='آخر تسليم تمت معالجته')
+    requirements_digest = models.CharField(max_length=64, blank=True, default='', verbose_name='بصمة متطلبات المشروع')
+    error = models.TextField(blank=True, default='', verbose_name='الخطأ')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='تاريخ الإنشاء')
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name='تاريخ البدء')
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name='تاريخ الانتهاء')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='آخر تحديث')
+    
+    class Meta:
+        db_table = 'revalidation_jobs'
+        verbose_name = 'إعادة تحقق جماعية'
+        verbose_name_plural = 'عمليات إعادة التحقق الجماعية'
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"{self.project_id} - {self.processed}/{self.total} ({self.status})"
+    
+    @property
+    def progress(self):
+        """نسبة الإنجاز (0-100)"""
+        return round(self.processed * 100 / self.total, 1) if self.total else 100.0
+    
+    @property
+    def is_active(self):
+        return self.status in ('pending', 'running')
+
+
+class UploadSession(models.Model):
+    """رفع ملف على أجزاء قابل للاستئناف (الملفات الكبيرة من الجوال)"""
+    
+    STATUS_CHOICES = [
+        ('uploading', 'جاري الرفع'),
+        ('completed', 'مكتمل'),
+        ('rejected', 'مرفوض'),
+    ]
+    
+    upload_id = models.CharField(max_length=64, unique=True, verbose_name='معرّف الرفع')
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='upload_sessions', verbose_name='المشروع')
+    otp = models.ForeignKey(
+        'otp_system.ProjectOTP',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name='رمز التسليم'
+    )
+    student_name = models.CharField(max_length=200, verbose_name='اسم الطالب')
+    student_id = models.CharField(max_length=50, verbose_name='رقم الطالب')
+    file_name = models.CharField(max_length=255, verbose_name='اسم الملف')
+    file_ext = models.CharField(max_length=20, verbose_name='الامتداد')
+    file_size = models.BigIntegerField(verbose_name='الحجم الكلي (بايت)')
+    received = models.BigIntegerField(default=0, verbose_name='البايتات المستلمة')
+    mime_type = models.CharField(max_length=100, blank=True, default='', verbose_name='النوع الفعلي')
+    file_hash = models.CharField(max_length=64, blank=True, default='', verbose_name='SHA-256 بعد النقل للمخزن')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='uploading', verbose_name='الحالة')
+    error = models.TextField(blank=True, default='', verbose_name='سبب الرفض')
+    submission = models.ForeignKey(
+        Submission,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name='التسليم'
+    )
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='تاريخ الإنشاء')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='آخر تحديث')
+    expires_at = models.DateTimeField(verbose_name='تاريخ الانتهاء')
+    
+    class Meta:
+        db_table = 'upload_sessions'
+        verbose_name = 'جلسة رفع'
+        verbose_name_plural = 'جلسات الرفع'
+        indexes = [
+            models.Index(fields=['expires_at'], name='upload_session_expiry_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.file_name} - {self.received}/{self.file_size} ({self.status})"
+
+
+class MediaBlob(models.Model):
+    """ملف في مخزن المحتوى (نسخة واحدة لكل محتوى مهما تكرر رفعه)"""
+    
+    sha256 = models.CharField(max_length=64, verbose_name='SHA-256')
+    ext = models.CharField(max_length=20, blank=True, default='', verbose_name='الامتداد')
+    size = models.BigIntegerField(verbose_name='الحجم (بايت)')
+    ref_count = models.PositiveIntegerField(default=0, verbose_name='عدد المراجع')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='تاريخ الإنشاء')
+    
+    class Meta:
+        db_table = 'media_blobs'
+        verbose_name = 'ملف مخزن'
+        verbose_name_plural = 'ملفات المخزن'
+        unique_together = ['sha256', 'ext']
+    
+    def __str__(self):
+        return f"{self.sha256[:12]}.{self.ext} ({self.ref_count} مرجع)"
@@ -0,0 +1,209 @@
+"""
+EasyOCR Reader Pool
+مخزن مشترك لقارئات EasyOCR على مستوى العملية
+
+تحميل نموذج EasyOCR يستغرق عدة ثوانٍ ومئات الميجابايت، لذلك يتم تحميل
+القارئ مرة واحدة في كل عملية Celery worker وإعادة استخدامه في كل عمليات التحقق.
+"""
+import os
+import queue
+import threading
+import logging
+from contextlib import contextmanager
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LANGUAGES = ('ar', 'en')
+
+
+def _current_rss_mb():
+    """
+    استهلاك الذاكرة الحالي للعملية (RSS) بالميجابايت
+
+    Returns:
+        float | None: الذاكرة المستخدمة أو None إذا تعذر القياس
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            rss_pages = int(f.read().split()[1])
+        return rss_pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except Exception:
+        pass
+
+    try:
+        import resource
+        # ru_maxrss بالكيلوبايت على Linux (ذروة الاستهلاك وليس الحالي)
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    except Exception:
+        return None
+
+
+class OCRReaderPool:
+    """
+    مجموعة قارئات EasyOCR جاهزة للاستخدام
+
+    - كل قارئ يُستخدم من خيط (thread) واحد في نفس الوقت
+    - يتم إنشاء القارئات عند الحاجة حتى الوصول لحجم المجموعة
+    - لا يتم إنشاء قارئ إضافي إذا تجاوزت ذاكرة العملية الحد المسموح
+    """
+
+    def __init__(self, languages=DEFAULT_LANGUAGES, size=None, max_memory_mb=None, gpu=False):
+        """
+        Args:
+            languages: لغات القارئ
+            size: الحد الأقصى لعدد القارئات في العملية
+            max_memory_mb: حد الذاكرة للعملية قبل منع إنشاء قارئ جديد
+            gpu: استخدام GPU
+        """
+        self.languages = list(languages)
+        self.size = max(1, size or getattr(settings, 'OCR_READER_POOL_SIZE', 1))
+        self.max_memory_mb = max_memory_mb or getattr(settings, 'OCR_READER_MAX_MEMORY_MB', 0)
+        self.gpu = gpu
+
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    @property
+    def created(self):
+        """عدد القارئات المحمّلة في هذه العملية"""
+        return self._created
+
+    def _create_reader(self):
+        """تحميل قارئ EasyOCR جديد"""
+        import easyocr
+
+        logger.info(f"📥 تحميل قارئ EasyOCR {self.languages} ({self._created + 1}/{self.size})")
+        return easyocr.Reader(self.languages, gpu=self.gpu)
+
+    def _can_grow(self):
+        """هل يمكن إنشاء قارئ إضافي؟"""
+        if self._created >= self.size:
+            return False
+
+        # القارئ الأول مسموح دائماً حتى لا يتوقف الـ OCR بالكامل
+        if self._created == 0 or not self.max_memory_mb:
+            return True
+
+        rss = _current_rss_mb()
+        if rss is not None and rss >= self.max_memory_mb:
+            logger.warning(
+                f"⚠️ ذاكرة العملية {rss:.0f}MB تجاوزت الحد {self.max_memory_mb}MB - "
+                f"لن يتم تحميل قارئ OCR إضافي"
+            )
+            return False
+
+        return True
+
+    def _take(self, timeout):
+        """الحصول على قارئ متاح أو إنشاء قارئ جديد"""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            grow = self._can_grow()
+            if grow:
+                # حجز المكان قبل التحميل حتى لا تتجاوز الخيوط الأخرى الحد
+                self._created += 1
+
+        if grow:
+            try:
+                return self._create_reader()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+
+        try:
+            return self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError('لا يوجد قارئ OCR متاح حالياً')
+
+    @contextmanager
+    def acquire(self, timeout=None):
+        """
+        استعارة قارئ من المجموعة
+
+        Usage:
+            with pool.acquire() as reader:
+                reader.readtext(image)
+        """
+        if timeout is None:
+            timeout = getattr(settings, 'OCR_READER_ACQUIRE_TIMEOUT', 120)
+
+        reader = self._take(timeout)
+        try:
+            yield reader
+        finally:
+            self._idle.put(reader)
+
+    def preload(self, count=1):
+        """
+        تحميل مسبق لعدد من القارئات (عند بدء الـ worker)
+
+        Args:
+            count: عدد القارئات المطلوب تحميلها
+        """
+        readers = []
+        try:
+            for _ in range(min(count, self.size)):
+                with self._lock:
+                    if not self._can_grow():
+                        break
+                    self._created += 1
+                try:
+                    readers.append(self._create_reader())
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+        finally:
+            for reader in readers:
+                self._idle.put(reader)
+
+        return len(readers)
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_reader_pool(languages=DEFAULT_LANGUAGES):
+    """
+    الحصول على مجموعة القارئات المشتركة لهذه اللغات
+
+    Args:
+        languages: لغات القارئ
+
+    Returns:
+        OCRReaderPool: المجموعة المشتركة في هذه العملية
+    """
+    key = tuple(languages)
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                pool = OCRReaderPool(languages=key)
+                _pools[key] = pool
+    return pool
+
+
+def preload_readers(languages=DEFAULT_LANGUAGES):
+    """
+    تحميل القارئات مسبقاً عند بدء عملية الـ worker
+
+    Returns:
+        int: عدد القارئات المحمّلة
+    """
+    try:
+        count = getattr(settings, 'OCR_PRELOAD_READERS', 1)
+        loaded = get_reader_pool(languages).preload(count)
+        logger.info(f"✅ تم تحميل {loaded} قارئ OCR مسبقاً")
+        return loaded
+    except Exception as e:
+        logger.error(f"❌ فشل التحميل المسبق لقارئ OCR: {str(e)}")
+        return 0
@@ -0,0 +1,265 @@
+"""
+Parallel PDF Extraction
+استخراج نص PDF على مستوى الصفحات بالتوازي
+
+- الصفحات تُوزع على مجموعة عمليات (process pool) على دفعات بالترتيب
+- الاستخراج يتوقف عند الوصول لعدد الأحرف الذي تحتاجه الفحوصات
+- OCR فقط للصفحات التي لا تحتوي على طبقة نص (صفحات ممسوحة ضوئياً)
+- زمن استخراج كل صفحة يُسجل مع النتيجة
+
+دوال الاستخراج في العمليات الفرعية لا تستخدم Django.
+"""
+import os
+import time
+import atexit
+import logging
+import threading
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+
+
+def _open_pdf(path):
+    """فتح PDF مع إبقائه مفتوحاً لدفعات الصفحات التالية من نفس الملف"""
+    import pdfplumber
+
+    stat = os.stat(path)
+    key = (path, stat.st_mtime_ns, stat.st_size)
+    cached = getattr(_local, 'pdf', None)
+    if cached and cached[0] == key:
+        return cached[1]
+    if cached:
+        cached[1].close()
+    pdf = pdfplumber.open(path)
+    _local.pdf = (key, pdf)
+    return pdf
+
+
+def _extract_from(pdf, page_numbers):
+    results = []
+    for number in page_numbers:
+        started = time.perf_counter()
+        page = pdf.pages[number]
+        text = page.extract_text() or ''
+        images = len(page.images) if hasattr(page, 'images') else 0
+        if hasattr(page, 'flush_cache'):
+            page.flush_cache()
+        results.append({
+            'page': number,
+            'text': text,
+            'images': images,
+            'seconds': round(time.perf_counter() - started, 4),
+        })
+    return results
+
+
+def extract_page_batch(path, page_numbers):
+    """
+    استخراج نص مجموعة صفحات (تعمل داخل عملية فرعية)
+
+    Returns:
+        list[dict]: [{'page', 'text', 'images', 'seconds'}]
+    """
+    return _extract_from(_open_pdf(path), page_numbers)
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    """مجموعة العمليات المشتركة (None = الاستخراج في نفس العملية)"""
+    global _executor
+    from django.conf import settings
+
+    processes = getattr(settings, 'PDF_EXTRACT_PROCESSES', 2)
+    if processes <= 1:
+        return None
+
+    with _executor_lock:
+        if _executor is None:
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+
+            method = getattr(settings, 'PDF_EXTRACT_START_METHOD', 'spawn')
+            _executor = ProcessPoolExecutor(
+                max_workers=processes,
+                mp_context=multiprocessing.get_context(method)
+            )
+            atexit.register(_shutdown_executor)
+        return _executor
+
+
+def _use_threads(error):
+    """التحويل لمجموعة خيوط إذا تعذر إنشاء عمليات فرعية (مثل عمليات daemon)"""
+    global _executor
+    from django.conf import settings
+    from concurrent.futures import ThreadPoolExecutor
+
+    logger.warning(f"⚠️ تعذر استخدام عمليات فرعية لاستخراج PDF، سيتم استخدام خيوط: {str(error)}")
+    with _executor_lock:
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, 'PDF_EXTRACT_PROCESSES', 2),
+            thread_name_prefix='pdf-extract'
+        )
+        return _executor
+
+
+def _shutdown_executor():
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _reset_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def _source_path(source):
+    """مسار الملف على القرص إن وجد (العمليات الفرعية تحتاج مساراً)"""
+    if isinstance(source, (str, os.PathLike)):
+        return os.fspath(source)
+    if hasattr(source, 'temporary_file_path'):
+        return source.temporary_file_path()
+    return None
+
+
+def _ocr_page(page):
+    """قراءة نص صفحة ممسوحة ضوئياً عبر مجموعة قارئات OCR المشتركة"""
+    import numpy as np
+    from .ocr_pool import get_reader_pool
+
+    image = page.to_image(resolution=200).original.convert('RGB')
+    with get_reader_pool().acquire() as reader:
+        lines = reader.readtext(np.array(image), detail=0, paragraph=True)
+    return ' '.join(lines)
+
+
+def _iter_batches(pdf, path, total_pages, batch_pages, parallel=True):
+    """
+    نتائج دفعات الصفحات بالترتيب (بالتوازي إذا كان ذلك ممكناً)
+
+    Yields:
+        list[dict]: نتائج صفحات الدفعة
+    """
+    from django.conf import settings
+    from concurrent.futures.process import BrokenProcessPool
+
+    batches = deque(
+        range(start, min(start + batch_pages, total_pages))
+        for start in range(0, total_pages, batch_pages)
+    )
+
+    executor = _get_executor() if parallel and path and len(batches) > 1 else None
+    if executor is None:
+        for batch in batches:
+            yield _extract_from(pdf, batch)
+        return
+
+    in_flight_limit = getattr(settings, 'PDF_EXTRACT_PROCESSES', 2) * 2
+    timeout = getattr(settings, 'PDF_EXTRACT_BATCH_TIMEOUT', 120)
+    pending = deque()
+
+    def submit_next():
+        nonlocal executor
+        batch = batches.popleft()
+        try:
+            pending.append((batch, executor.submit(extract_page_batch, path, list(batch))))
+        except (AssertionError, OSError, RuntimeError) as e:
+            executor = _use_threads(e)
+            pending.append((batch, executor.submit(extract_page_batch, path, list(batch))))
+
+    try:
+        while batches and len(pending) < in_flight_limit:
+            submit_next()
+
+        while pending:
+            batch, future = pending.popleft()
+            try:
+                results = future.result(timeout=timeout)
+            except BrokenProcessPool:
+                _reset_executor()
+                results = _extract_from(pdf, batch)
+            if batches:
+                submit_next()
+            yield results
+    finally:
+        # الإيقاف المبكر: إلغاء الدفعات التي لم تبدأ
+        for _, future in pending:
+            future.cancel()
+
+
+def extract_pdf(source, max_chars=None, ocr=True, parallel=True):
+    """
+    استخراج نص PDF صفحة بصفحة
+
+    Args:
+        source: مسار الملف أو كائن ملف
+        max_chars: التوقف بعد استخراج هذا العدد من الأحرف (None = كامل الملف)
+        ocr: قراءة الصفحات التي لا تحتوي نصاً عبر OCR
+        parallel: استخدام مجموعة العمليات المشتركة (False داخل طلبات الويب)
+
+    Returns:
+        tuple: (نصوص الصفحات المستخرجة بالترتيب، metadata)
+            metadata: total_pages, images_count, page_timings, ocr_pages, partial
+    """
+    import pdfplumber
+    from django.conf import settings
+
+    path = _source_path(source)
+    if path is None and hasattr(source, 'seek'):
+        source.seek(0)
+
+    batch_pages = getattr(settings, 'PDF_EXTRACT_BATCH_PAGES', 4)
+    ocr_budget = getattr(settings, 'PDF_OCR_MAX_PAGES', 10) if ocr else 0
+
+    pages, timings, ocr_pages = [], [], []
+    images_count = 0
+    chars = 0
+    started = time.perf_counter()
+
+    with pdfplumber.open(path or source) as pdf:
+        total_pages = len(pdf.pages)
+
+        for batch in _iter_batches(pdf, path, total_pages, batch_pages, parallel=parallel):
+            for result in batch:
+                text = result['text']
+                timing = {'page': result['page'] + 1, 'seconds': result['seconds']}
+
+                if not text.strip() and ocr_budget > 0:
+                    ocr_budget -= 1
+                    ocr_started = time.perf_counter()
+                    try:
+                        text = _ocr_page(pdf.pages[result['page']])
+                        ocr_pages.append(result['page'] + 1)
+                    except Exception as e:
+                        logger.warning(f"⚠️ تعذر OCR للصفحة {result['page'] + 1}: {str(e)}")
+                    timing['ocr_seconds'] = round(time.perf_counter() - ocr_started, 4)
+
+                pages.append(text)
+                timings.append(timing)
+                images_count += result['images']
+                chars += len(text) + 1
+
+            if max_chars and chars >= max_chars:
+                break
+
+    partial = len(pages) < total_pages
+    logger.info(
+        f"📄 استخراج PDF: {len(pages)}/{total_pages} صفحة في {time.perf_counter() - started:.2f}ث"
+        f"{' (توقف مبكر)' if partial else ''}{f'، OCR لـ {len(ocr_pages)} صفحة' if ocr_pages else ''}"
+    )
+
+    return pages, {
+        'total_pages': total_pages,
+        'images_count': images_count,
+        'page_timings': timings,
+        'ocr_pages': ocr_pages,
+        'partial': partial,
+    }
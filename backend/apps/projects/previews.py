@@ -0,0 +1,225 @@
+"""
+Submission Previews
+معاينات خفيفة لقائمة تسليمات المعلم (تُنشأ في الخلفية: بعد التحقق بالـ AI،
+أو مباشرة بعد الرفع إذا لم يكن للتسليم تحقق AI)
+
+- الصور: مصغّرة WebP من فك ترميز مصغّر (image_quality.open_preview)
+- PDF: الصفحة الأولى فقط عبر pdfium بمقياس حجم المصغّرة
+- الفيديو: إطار واحد عبر ffmpeg (-ss قبل -i للقفز لأقرب keyframe بدون فك ما قبله)
+- الصوت: شكل موجي قصير (قمم مطبّعة 0-100) يُحفظ في Submission.previews مباشرة
+
+الملفات تُحفظ حسب hash المحتوى: MEDIA_ROOT/previews/ab/cd/<sha256>/
+فإعادة تسليم نفس الملف تستخدم نفس المعاينة، والرابط ثابت داخل نافذة صلاحيته
+فيُخزَّن في المتصفح طويلاً.
+"""
+import io
+import os
+import shutil
+import logging
+import subprocess
+from pathlib import Path
+import numpy as np
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+PREVIEW_DIR = 'previews'
+THUMBNAIL_NAME = 'thumb.webp'
+
+IMAGE_EXTENSIONS = {'jpg', 'jpeg', 'png', 'gif', 'webp', 'bmp'}
+VIDEO_EXTENSIONS = {'mp4', 'mov', 'avi', 'mkv', 'webm', 'm4v'}
+AUDIO_EXTENSIONS = {'mp3', 'wav', 'm4a', 'ogg', 'aac', 'flac'}
+
+WAVEFORM_SAMPLE_RATE = 8000
+WAVEFORM_BLOCK_SECONDS = 0.1
+
+
+def preview_kind(file_path):
+    """نوع المعاينة حسب امتداد الملف (None = بدون معاينة)"""
+    ext = os.path.splitext(str(file_path).lower())[1].lstrip('.')
+    if ext in IMAGE_EXTENSIONS:
+        return 'image'
+    if ext == 'pdf':
+        return 'pdf'
+    if ext in VIDEO_EXTENSIONS:
+        return 'video'
+    if ext in AUDIO_EXTENSIONS:
+        return 'audio'
+    return None
+
+
+def preview_dir(sha256):
+    return Path(settings.MEDIA_ROOT) / PREVIEW_DIR / sha256[:2] / sha256[2:4] / sha256
+
+
+def thumbnail_path(sha256):
+    return preview_dir(sha256) / THUMBNAIL_NAME
+
+
+def _thumbnail_side():
+    return getattr(settings, 'PREVIEW_THUMBNAIL_SIDE', 320)
+
+
+def save_thumbnail(image, sha256):
+    """
+    حفظ المصغّرة WebP (كتابة ملف مؤقت ثم rename حتى لا تُقدَّم صورة ناقصة)
+
+    Returns:
+        dict: {'thumbnail': المسار نسبةً إلى MEDIA_ROOT، 'width', 'height'}
+    """
+    from PIL import Image
+
+    side = _thumbnail_side()
+    if image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+    if max(image.size) > side:
+        image.thumbnail((side, side), Image.BOX)
+
+    destination = thumbnail_path(sha256)
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    temp = destination.with_suffix('.part')
+    image.save(temp, 'WEBP', quality=getattr(settings, 'PREVIEW_THUMBNAIL_QUALITY', 70), method=4)
+    os.replace(temp, destination)
+    return {
+        'thumbnail': destination.relative_to(settings.MEDIA_ROOT).as_posix(),
+        'width': image.width,
+        'height': image.height,
+    }
+
+
+def image_thumbnail(file_path):
+    from .image_quality import open_preview
+
+    return open_preview(file_path, _thumbnail_side(), mode='RGB')
+
+
+def pdf_thumbnail(file_path):
+    """الصفحة الأولى فقط بمقياس المصغّرة"""
+    import pypdfium2 as pdfium
+
+    pdf = pdfium.PdfDocument(file_path)
+    try:
+        if len(pdf) == 0:
+            return None
+        page = pdf[0]
+        scale = _thumbnail_side() / max(page.get_size())
+        return page.render(scale=scale).to_pil()
+    finally:
+        pdf.close()
+
+
+def video_poster(file_path, file_hash=None):
+    """
+    إطار الغلاف (عند 10% من المدة، بحد أقصى ثانيتين)
+
+    Raises:
+        FileNotFoundError: ffmpeg غير متوفر
+        subprocess.SubprocessError: فشل استخراج الإطار
+    """
+    from PIL import Image
+    from .media_probe import get_duration
+
+    duration = get_duration(file_path, file_hash=file_hash) or 0
+    position = min(2.0, duration * 0.1)
+    side = _thumbnail_side()
+
+    output = subprocess.run(
+        [getattr(settings, 'FFMPEG_BINARY', 'ffmpeg'), '-nostdin', '-v', 'error',
+         '-ss', f'{position:.2f}', '-i', file_path,
+         '-frames:v', '1', '-vf', f"scale='min({side},iw)':-2",
+         '-f', 'image2pipe', '-vcodec', 'png', '-'],
+        capture_output=True,
+        timeout=getattr(settings, 'PREVIEW_TIMEOUT', 60),
+        check=True
+    ).stdout
+    if not output:
+        return None
+    return Image.open(io.BytesIO(output))
+
+
+def audio_waveform(file_path, points=None):
+    """
+    شكل موجي قصير: أعلى قمة في كل جزء من الملف مطبّعة إلى 0-100
+
+    Returns:
+        list[int]: طولها points (أو أقل للملفات القصيرة جداً)
+    """
+    from .speech import iter_windows
+
+    points = points or getattr(settings, 'PREVIEW_WAVEFORM_POINTS', 64)
+    peaks = [
+        int(np.abs(np.frombuffer(pcm, dtype=np.int16)).max())
+        for _, _, pcm in iter_windows(
+            file_path,
+            window_seconds=WAVEFORM_BLOCK_SECONDS,
+            overlap_seconds=0,
+            sample_rate=WAVEFORM_SAMPLE_RATE,
+            max_seconds=0,
+        )
+        if len(pcm) >= 2
+    ]
+    if not peaks:
+        return []
+
+    buckets = np.array_split(np.array(peaks), min(points, len(peaks)))
+    levels = np.array([bucket.max() for bucket in buckets], dtype=np.float32)
+    top = levels.max()
+    if top == 0:
+        return [0] * len(levels)
+    return [int(round(level)) for level in levels * 100 / top]
+
+
+def generate(file_path, file_hash):
+    """
+    إنشاء معاينة الملف (أو إعادة استخدام معاينة موجودة لنفس المحتوى)
+
+    Returns:
+        dict: {'kind', ...} - thumbnail/width/height للصور وPDF والفيديو، waveform للصوت،
+              {} إذا لم يكن للنوع معاينة
+    """
+    kind = preview_kind(file_path)
+    if kind is None or not file_hash:
+        return {}
+
+    if kind == 'audio':
+        return {'kind': kind, 'waveform': audio_waveform(file_path)}
+
+    existing = thumbnail_path(file_hash)
+    if existing.exists():
+        from PIL import Image
+
+        with Image.open(existing) as image:
+            width, height = image.size
+        return {
+            'kind': kind,
+            'thumbnail': existing.relative_to(settings.MEDIA_ROOT).as_posix(),
+            'width': width,
+            'height': height,
+        }
+
+    if kind == 'image':
+        image = image_thumbnail(file_path)
+    elif kind == 'pdf':
+        image = pdf_thumbnail(file_path)
+    else:
+        image = video_poster(file_path, file_hash=file_hash)
+
+    if image is None:
+        return {'kind': kind}
+    return {'kind': kind, **save_thumbnail(image, file_hash)}
+
+
+def enqueue(submission):
+    """إرسال إنشاء المعاينة للخلفية (تعذر الإرسال لا يُفشل التسليم)"""
+    from .tasks import generate_submission_previews
+
+    try:
+        generate_submission_previews.delay(submission.id)
+    except Exception as e:
+        logger.warning(f"⚠️ تعذر إرسال معاينة Submission #{submission.id}: {str(e)}")
+
+
+def remove(sha256):
+    """حذف معاينات المحتوى (عند حذف آخر تسليم يشير إليه)"""
+    if sha256:
+        shutil.rmtree(preview_dir(sha256), ignore_errors=True)
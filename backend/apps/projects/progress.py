@@ -0,0 +1,189 @@
+"""
+Validation Progress
+نشر نتائج الفحوصات أولاً بأول أثناء التحقق من التسليم
+
+- كل فحص ينتهي يُنشر فوراً (بدلاً من انتظار كل الفحوصات)
+- الحالة المبدئية تصبح rejected عند أول فحص فاشل (الطالب يعرف مبكراً)
+- النتائج الجزئية تُحفظ في validation_results (partial=True) وفي الـ cache برقم إصدار
+- الطالب يستعلم برقم آخر إصدار وصله (أو SSE قصير مع retry) والرد فوري بدون انتظار
+  داخل الخادم، مع Retry-After لتحديد موعد الاستعلام التالي
+"""
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+CACHE_PREFIX = 'validation_progress'
+FINAL_STATUSES = ('approved', 'rejected', 'needs_review')
+
+_current = contextvars.ContextVar('validation_progress', default=None)
+
+
+def _cache_key(submission_id):
+    return f'{CACHE_PREFIX}:{submission_id}'
+
+
+def _summary(result):
+    """الحقول التي تُعرض للطالب من نتيجة الفحص"""
+    if not isinstance(result, dict):
+        return {'status': 'warning', 'message': str(result), 'score': None}
+    return {
+        'status': result.get('status'),
+        'message': result.get('message'),
+        'score': result.get('score'),
+    }
+
+
+class ProgressReporter:
+    """نشر تقدم التحقق لتسليم واحد"""
+
+    def __init__(self, submission_id):
+        self.submission_id = submission_id
+        self.lock = threading.Lock()
+        previous = cache.get(_cache_key(submission_id)) or {}
+        self.state = {
+            'submission_id': submission_id,
+            # رقم الإصدار يستمر من المحاولة السابقة حتى لا يفوت المنتظرين أي تحديث
+            'version': previous.get('version', 0),
+            'status': 'processing',
+            'done': False,
+            'provisional_status': None,
+            'checks': {},
+            'completed_checks': [],
+            'rejection_reasons': [],
+            'partial': True,
+        }
+
+    def _publish(self, persist=True):
+        from .models import Submission
+
+        self.state['version'] += 1
+        self.state['updated_at'] = timezone.now().isoformat()
+        cache.set(_cache_key(self.submission_id), self.state, getattr(settings, 'VALIDATION_PROGRESS_TTL', 3600))
+        if persist:
+            # الـ cache قد لا يكون مشتركاً بين العمليات (LocMem) - قاعدة البيانات هي المرجع
+            Submission.objects.filter(pk=self.submission_id).update(validation_results=self.state)
+
+    def start(self):
+        with self.lock:
+            self._publish()
+
+    def check(self, name, result):
+        """نشر نتيجة فحص واحد بمجرد انتهائه"""
+        with self.lock:
+            summary = _summary(result)
+            self.state['checks'][name] = summary
+            if name not in self.state['completed_checks']:
+                self.state['completed_checks'].append(name)
+            if summary['status'] == 'fail':
+                self.state['provisional_status'] = 'rejected'
+                if summary['message'] and summary['message'] not in self.state['rejection_reasons']:
+                    self.state['rejection_reasons'].append(summary['message'])
+            self._publish()
+
+    def finish(self, submission):
+        """نشر النتيجة النهائية (validation_results حُفظت مع التسليم)"""
+        with self.lock:
+            self.state.update({
+                'status': submission.validation_status,
+                'done': submission.validation_status in FINAL_STATUSES,
+                'provisional_status': None,
+                'partial': False,
+                'ai_score': float(submission.ai_score) if submission.ai_score is not None else None,
+                'rejection_reasons': submission.rejection_reasons or [],
+            })
+            for name, result in (submission.validation_results or {}).get('checks', {}).items():
+                self.state['checks'][name] = _summary(result)
+                if name not in self.state['completed_checks']:
+                    self.state['completed_checks'].append(name)
+            self._publish(persist=False)
+
+
+@contextmanager
+def reporting(submission_id):
+    """
+    تفعيل نشر التقدم للفحوصات التي تعمل داخل الكتلة (في نفس الخيط)
+
+    Usage:
+        with reporting(submission.id) as reporter:
+            results = validator.validate_submission(submission)
+        ...
+        reporter.finish(submission)
+    """
+    reporter = ProgressReporter(submission_id)
+    reporter.start()
+    token = _current.set(reporter)
+    try:
+        yield reporter
+    finally:
+        _current.reset(token)
+
+
+def publish_check(name, result):
+    """نشر نتيجة فحص إذا كان هناك تحقق جارٍ ينشر تقدمه"""
+    reporter = _current.get()
+    if reporter is None:
+        return
+    try:
+        reporter.check(name, result)
+    except Exception as e:
+        logger.warning(f"⚠️ تعذر نشر نتيجة الفحص {name}: {str(e)}")
+
+
+def clear(submission_id):
+    """حذف التقدم المنشور (عند إعادة التسليم للطابور بعد خطأ)"""
+    cache.delete(_cache_key(submission_id))
+
+
+def _state_from_submission(submission):
+    """الحالة من قاعدة البيانات (عند عدم وجودها في الـ cache)"""
+    results = submission.validation_results or {}
+    if results.get('partial'):
+        return results
+    return {
+        'submission_id': submission.id,
+        'version': results.get('version', 0),
+        'status': submission.validation_status,
+        'done': submission.validation_status in FINAL_STATUSES and submission.ai_checked,
+        'provisional_status': None,
+        'checks': {name: _summary(result) for name, result in results.get('checks', {}).items()},
+        'completed_checks': list(results.get('checks', {})),
+        'rejection_reasons': submission.rejection_reasons or [],
+        'partial': False,
+        'ai_score': float(submission.ai_score) if submission.ai_score is not None else None,
+    }
+
+
+def get_state(submission_id, use_db=True):
+    """
+    حالة التحقق الحالية
+
+    Returns:
+        dict | None: None إذا لم يكن التسليم موجوداً
+    """
+    from .models import Submission
+
+    state = cache.get(_cache_key(submission_id))
+    if state is not None or not use_db:
+        return state
+
+    submission = Submission.objects.filter(pk=submission_id).only(
+        'id', 'validation_status', 'validation_results', 'rejection_reasons', 'ai_score', 'ai_checked'
+    ).first()
+    return _state_from_submission(submission) if submission else None
+
+
+def retry_after(state):
+    """
+    الثواني قبل الاستعلام التالي (None بعد النتيجة النهائية)
+
+    الطلب لا ينتظر داخل الخادم: worker الـ gunicorn المتزامن يبقى متاحاً لباقي الـ API
+    """
+    if state is None or state['done']:
+        return None
+    return getattr(settings, 'VALIDATION_PROGRESS_RETRY_AFTER', 2)
@@ -0,0 +1,151 @@
+"""
+Validation Queues
+توزيع مهام التحقق على طوابير Celery حسب نوع ملف المشروع
+
+- طابور لكل نوع (pdf, document, image, audio, video) بمهلة وتزامن خاص
+- الأولوية: إعادة التسليم قرب الموعد النهائي أولاً
+- قياس زمن الانتظار في كل طابور (من الإرسال حتى بدء التنفيذ)
+"""
+import time
+import logging
+from datetime import datetime
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+LAG_CACHE_PREFIX = 'queue_lag'
+LAG_HEADER = 'ready_at'
+
+# الأولويات في Redis: 0 = الأعلى
+PRIORITY_RESUBMISSION_LAST_HOUR = 0
+PRIORITY_RESUBMISSION_URGENT = 1
+PRIORITY_URGENT = 3
+PRIORITY_DEFAULT = 5
+
+
+def queue_config(file_type):
+    """إعدادات طابور نوع الملف (النوع غير المعروف يذهب لطابور pdf)"""
+    queues = settings.VALIDATION_QUEUES
+    return queues.get(file_type) or queues['pdf']
+
+
+def priority_for(submission, now=None):
+    """
+    أولوية مهمة التحقق
+
+    - إعادة تسليم وباقي أقل من ساعة على الموعد: 0
+    - إعادة تسليم قرب الموعد (VALIDATION_URGENT_HOURS): 1
+    - تسليم أول قرب الموعد: 3
+    - غير ذلك: 5
+    """
+    now = now or timezone.now()
+    hours_left = (submission.project.deadline - now).total_seconds() / 3600
+    urgent = hours_left <= getattr(settings, 'VALIDATION_URGENT_HOURS', 24)
+    resubmission = (submission.attempt_number or 1) > 1
+
+    if resubmission and hours_left <= 1:
+        return PRIORITY_RESUBMISSION_LAST_HOUR
+    if resubmission and urgent:
+        return PRIORITY_RESUBMISSION_URGENT
+    if urgent:
+        return PRIORITY_URGENT
+    return PRIORITY_DEFAULT
+
+
+def dispatch_validation(submission, **options):
+    """
+    إرسال التسليم للتحقق بالـ AI في طابور نوع ملف المشروع
+
+    Args:
+        submission: كائن Submission
+        options: خيارات إضافية لـ apply_async (countdown...)
+
+    Returns:
+        AsyncResult
+    """
+    from .tasks import process_submission_with_ai
+
+    config = queue_config(submission.project.file_type)
+    priority = priority_for(submission)
+    logger.info(
+        f"📬 Submission #{submission.id} -> {config['queue']} (أولوية {priority})"
+    )
+    return process_submission_with_ai.apply_async(
+        args=[submission.id],
+        queue=config['queue'],
+        priority=priority,
+        time_limit=config['time_limit'],
+        soft_time_limit=config['soft_time_limit'],
+        **options
+    )
+
+
+def stamp_ready_at(headers):
+    """وقت جاهزية الرسالة للتنفيذ (وقت الإرسال أو وقت eta للمهام المؤجلة)"""
+    ready_at = time.time()
+    eta = headers.get('eta')
+    if eta:
+        try:
+            ready_at = max(ready_at, datetime.fromisoformat(eta).timestamp())
+        except (TypeError, ValueError):
+            pass
+    headers[LAG_HEADER] = ready_at
+
+
+def record_lag(queue, lag):
+    """تحديث إحصائيات زمن الانتظار للطابور (في الـ cache المشترك بين العمليات)"""
+    key = f'{LAG_CACHE_PREFIX}:{queue}'
+    stats = cache.get(key) or {'samples': 0, 'ewma': lag, 'max': 0.0}
+    stats['samples'] += 1
+    stats['last'] = round(lag, 3)
+    stats['ewma'] = round(0.8 * stats['ewma'] + 0.2 * lag, 3)
+    stats['max'] = round(max(stats['max'], lag), 3)
+    stats['updated_at'] = time.time()
+    cache.set(key, stats, None)
+
+    threshold = getattr(settings, 'VALIDATION_LAG_WARNING_SECONDS', 120)
+    if lag > threshold:
+        logger.warning(f"🐢 طابور {queue}: انتظرت المهمة {lag:.0f}ث قبل التنفيذ")
+    return stats
+
+
+def track_task_start(task):
+    """حساب زمن انتظار المهمة عند بدء تنفيذها في الـ worker"""
+    request = task.request
+    ready_at = getattr(request, LAG_HEADER, None) or (request.headers or {}).get(LAG_HEADER)
+    queue = (request.delivery_info or {}).get('routing_key')
+    if not ready_at or not queue:
+        return None
+    return record_lag(queue, max(0.0, time.time() - float(ready_at)))
+
+
+def queue_depth(queue):
+    """عدد الرسائل المنتظرة في الطابور (None إذا تعذر الاتصال بالـ broker)"""
+    from config.celery import app
+
+    try:
+        with app.connection_for_read() as conn:
+            return conn.default_channel.queue_declare(queue=queue, passive=True).message_count
+    except Exception as e:
+        logger.warning(f"⚠️ تعذر قراءة طول الطابور {queue}: {str(e)}")
+        return None
+
+
+def lag_report(include_depth=True):
+    """
+    تقرير الطوابير
+
+    Returns:
+        dict: {file_type: {'queue', 'depth', 'lag': {'last', 'ewma', 'max', 'samples', 'updated_at'}}}
+    """
+    report = {}
+    for file_type, config in settings.VALIDATION_QUEUES.items():
+        report[file_type] = {
+            'queue': config['queue'],
+            'concurrency': config['concurrency'],
+            'depth': queue_depth(config['queue']) if include_depth else None,
+            'lag': cache.get(f"{LAG_CACHE_PREFIX}:{config['queue']}"),
+        }
+    return report
@@ -0,0 +1,243 @@
+"""
+Bulk Revalidation
+إعادة التحقق من كل تسليمات المشروع كمهمة واحدة
+
+يُستخدم عند تعديل المعلم لمتطلبات التحقق أو حد الانتحال:
+- AIValidator يُنشأ مرة واحدة لكل المهمة
+- النص يُستخرج مرة واحدة لكل hash ملف (مخزن النصوص)
+- الطالب الذي أعاد تسليم نفس الملف يعيد استخدام نتيجة تسليمه الأول (ValidationCache
+  بنفس بصمة المتطلبات الجديدة)؛ المفتاح يشمل الطالب فنفس الملف من طالب آخر يُفحص كاملاً
+- فهارس التشابه للمشروع تُحمّل مرة واحدة
+- النتائج تُحفظ بـ bulk_update على دفعات، مع نقطة استئناف بعد كل دفعة
+- updated_at نبضة حياة تُحدَّث بعد كل تسليم؛ مهمة توقفت نبضتها أكثر من
+  REVALIDATION_STALE_SECONDS (worker قُتل أو نفدت ذاكرته) تُعتبر فاشلة وتُستأنف
+"""
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+def is_stale(job):
+    """مهمة pending/running لم تُحدَّث نبضتها منذ REVALIDATION_STALE_SECONDS"""
+    if job.status not in ('pending', 'running'):
+        return False
+    cutoff = getattr(settings, 'REVALIDATION_STALE_SECONDS', 1800)
+    return (timezone.now() - job.updated_at).total_seconds() > cutoff
+
+
+def _heartbeat(job):
+    from .models import RevalidationJob
+
+    RevalidationJob.objects.filter(pk=job.pk).update(updated_at=timezone.now())
+
+
+def start_job(project, requested_by=None, dispatch=True):
+    """
+    إنشاء مهمة إعادة تحقق للمشروع (أو إرجاع المهمة الجارية)
+
+    Args:
+        project: كائن المشروع
+        requested_by: المعلم
+        dispatch: إرسال المهمة إلى Celery
+
+    Returns:
+        tuple: (RevalidationJob, created) - created=False للمهمة الجارية أو المستأنفة
+               (بما فيها مهمة متوقفة حسب is_stale)
+    """
+    from .models import RevalidationJob
+    from .validation_cache import requirements_digest
+
+    active = project.revalidation_jobs.filter(status__in=['pending', 'running']).first()
+    if active and not is_stale(active):
+        return active, False
+    if active:
+        # الـ worker توقف بدون تحديث الحالة - تُعامل كمهمة فاشلة (تُستأنف أدناه إذا لم تتغير المتطلبات)
+        active.status = 'failed'
+        active.error = 'stale'
+        active.save(update_fields=['status', 'error', 'updated_at'])
+        logger.warning(f"⚠️ إعادة التحقق #{active.id} متوقفة منذ {active.updated_at} عند {active.processed}/{active.total}")
+
+    digest = requirements_digest(project)
+
+    # مهمة فشلت بنفس المتطلبات: الاستئناف من آخر نقطة محفوظة
+    latest = project.revalidation_jobs.order_by('-created_at').first()
+    if latest and latest.status == 'failed' and latest.requirements_digest == digest:
+        latest.status = 'pending'
+        latest.error = ''
+        latest.save(update_fields=['status', 'error', 'updated_at'])
+        logger.info(f"🔁 استئناف إعادة التحقق #{latest.id} من {latest.processed}/{latest.total}")
+        if dispatch:
+            enqueue(latest)
+        return latest, False
+
+    job = RevalidationJob.objects.create(
+        project=project,
+        requested_by=requested_by,
+        total=project.submissions.count(),
+        requirements_digest=digest,
+    )
+    logger.info(f"🔁 إعادة تحقق جماعية #{job.id} للمشروع #{project.id} ({job.total} تسليم)")
+
+    if dispatch:
+        enqueue(job)
+    return job, True
+
+
+def enqueue(job):
+    """إرسال (أو استئناف) المهمة في طابور نوع ملف المشروع"""
+    from .tasks import revalidate_project_task
+    from .queues import queue_config, PRIORITY_DEFAULT
+
+    config = queue_config(job.project.file_type)
+    slice_seconds = getattr(settings, 'REVALIDATION_SLICE_SECONDS', 600)
+    return revalidate_project_task.apply_async(
+        args=[job.id],
+        queue=config['queue'],
+        priority=PRIORITY_DEFAULT,
+        soft_time_limit=slice_seconds + config['soft_time_limit'],
+        time_limit=slice_seconds + config['time_limit'],
+    )
+
+
+def _revalidate_one(submission, validator):
+    """
+    إعادة التحقق من تسليم واحد (بدون حفظ - الحفظ على دفعات)
+
+    Returns:
+        str: 'validated' | 'reused' | 'failed'
+    """
+    from .tasks import apply_results
+    from .validation_cache import get_cached_results, store_results
+
+    started = time.time()
+    try:
+        results = get_cached_results(submission)
+        outcome = 'reused'
+        if results is None:
+            results = validator.validate_submission(submission)
+            store_results(submission, results)
+            outcome = 'validated'
+        apply_results(submission, results, time.time() - started)
+        return outcome
+    except Exception as e:
+        # النتيجة السابقة تبقى كما هي
+        logger.error(f"❌ فشل إعادة التحقق من Submission #{submission.id}: {str(e)}")
+        return 'failed'
+    finally:
+        # كل خيط يفتح اتصال قاعدة بيانات خاص به
+        connection.close()
+
+
+def run_job(job_id, chunk_size=None, max_seconds=None, progress=None):
+    """
+    تنفيذ المهمة من آخر نقطة استئناف
+
+    Args:
+        job_id: معرف RevalidationJob (أو الكائن نفسه)
+        chunk_size: عدد التسليمات في كل دفعة (None = REVALIDATION_CHUNK_SIZE)
+        max_seconds: التوقف بعد هذه المدة مع بقاء الحالة running (None = حتى النهاية)
+        progress: دالة تُستدعى بالمهمة بعد كل دفعة
+
+    Returns:
+        RevalidationJob
+    """
+    from celery.exceptions import SoftTimeLimitExceeded
+    from .models import RevalidationJob, Submission
+    from .tasks import RESULT_FIELDS
+    from .ai_validator import AIValidator
+    from .similarity import preload_project
+
+    job = job_id if isinstance(job_id, RevalidationJob) else RevalidationJob.objects.select_related('project').get(pk=job_id)
+    if job.status in ('completed', 'cancelled'):
+        return job
+
+    project = job.project
+    chunk_size = chunk_size or getattr(settings, 'REVALIDATION_CHUNK_SIZE', 25)
+    workers = getattr(settings, 'REVALIDATION_WORKERS', 4)
+
+    job.status = 'running'
+    job.started_at = job.started_at or timezone.now()
+    job.save(update_fields=['status', 'started_at', 'updated_at'])
+
+    validator = AIValidator()
+    started = time.monotonic()
+
+    try:
+        with preload_project(project), ThreadPoolExecutor(max_workers=workers, thread_name_prefix='revalidate') as executor:
+            while True:
+                job.refresh_from_db(fields=['status'])
+                if job.status == 'cancelled':
+                    logger.info(f"⏹️ تم إلغاء إعادة التحقق #{job.id} عند {job.processed}/{job.total}")
+                    return job
+
+                chunk = list(
+                    Submission.objects.filter(project=project, id__gt=job.last_submission_id).order_by('id')[:chunk_size]
+                )
+                if not chunk:
+                    job.status = 'completed'
+                    job.finished_at = timezone.now()
+                    job.save(update_fields=['status', 'finished_at', 'updated_at'])
+                    break
+
+                for submission in chunk:
+                    submission.project = project
+
+                outcomes = []
+                for outcome in executor.map(lambda sub: _revalidate_one(sub, validator), chunk):
+                    outcomes.append(outcome)
+                    _heartbeat(job)
+                updated = [sub for sub, outcome in zip(chunk, outcomes) if outcome != 'failed']
+
+                with transaction.atomic():
+                    if updated:
+                        Submission.objects.bulk_update(updated, RESULT_FIELDS + ['file_hash'])
+                    job.processed += len(chunk)
+                    job.failed += outcomes.count('failed')
+                    job.reused += outcomes.count('reused')
+                    job.last_submission_id = chunk[-1].id
+                    job.save(update_fields=['processed', 'failed', 'reused', 'last_submission_id', 'updated_at'])
+
+                if progress:
+                    progress(job)
+
+                if max_seconds and time.monotonic() - started >= max_seconds:
+                    break
+    except SoftTimeLimitExceeded:
+        # مهلة الشريحة في Celery - المهمة تبقى running وتُستأنف من نقطة الحفظ
+        raise
+    except Exception as e:
+        job.status = 'failed'
+        job.error = str(e)
+        job.save(update_fields=['status', 'error', 'updated_at'])
+        logger.error(f"❌ فشل إعادة التحقق #{job.id}: {str(e)}")
+        raise
+
+    elapsed = time.monotonic() - started
+    logger.info(
+        f"🔁 إعادة التحقق #{job.id}: {job.processed}/{job.total} في {elapsed:.1f}ث"
+        f" (معاد استخدامها {job.reused}، فشلت {job.failed})"
+    )
+    return job
+
+
+def job_status(job):
+    """حالة المهمة للـ API"""
+    return {
+        'id': job.id,
+        'project_id': job.project_id,
+        'status': job.status,
+        'total': job.total,
+        'processed': job.processed,
+        'failed': job.failed,
+        'reused': job.reused,
+        'progress': job.progress,
+        'error': job.error or None,
+        'created_at': job.created_at.isoformat(),
+        'started_at': job.started_at.isoformat() if job.started_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+    }
@@ -0,0 +1,38 @@
+"""
+Signals
+تحرير مراجع مخزن المحتوى عند حذف التسليمات وملفات المشاريع
+
+حذف المشروع يحذف تسليماته وملفاته (CASCADE) فيُرسل post_delete لكل سجل،
+والملف يُحذف من القرص فقط عندما لا يشير إليه أي سجل آخر (وكذلك معاينة التسليم).
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from utils import media_store
+
+from . import previews
+from .models import Submission, ProjectFile
+
+
+def _release_on_commit(file_path):
+    # بعد نجاح المعاملة فقط؛ التراجع عن الحذف يجب ألا يحذف الملف
+    if media_store.is_stored(file_path):
+        transaction.on_commit(lambda: media_store.release(file_path))
+
+
+def _remove_previews(file_hash):
+    if not Submission.objects.filter(file_hash=file_hash).exists():
+        previews.remove(file_hash)
+
+
+@receiver(post_delete, sender=Submission)
+def release_submission_file(sender, instance, **kwargs):
+    _release_on_commit(instance.file_path)
+    if instance.previews.get('thumbnail'):
+        file_hash = instance.file_hash
+        transaction.on_commit(lambda: _remove_previews(file_hash))
+
+
+@receiver(post_delete, sender=ProjectFile)
+def release_project_file(sender, instance, **kwargs):
+    _release_on_commit(instance.file_path)
@@ -0,0 +1,36 @@
+"""
+Similarity Indexes
+فهارس التشابه الدائمة لكل مشروع
+"""
+from contextlib import contextmanager
+
+
+def copy_fingerprints(source_submission_id, submission):
+    """
+    نسخ بصمات التشابه من تسليم سابق لتسليم جديد بنفس الملف
+    حتى يبقى التسليم الجديد ضمن المقارنات القادمة
+    """
+    from . import text_index, image_index, video_index
+
+    if not source_submission_id:
+        return
+    text_index.copy_fingerprints(source_submission_id, submission)
+    image_index.copy_fingerprints(source_submission_id, submission)
+    video_index.copy_fingerprints(source_submission_id, submission)
+
+
+@contextmanager
+def preload_project(project):
+    """
+    تحميل فهارس التشابه للمشروع مرة واحدة (لإعادة التحقق الجماعية)
+    """
+    from . import image_index, video_index
+
+    if project.file_type == 'image':
+        image_index.warm(project)
+
+    if project.file_type == 'video':
+        with video_index.project_snapshot(project):
+            yield
+    else:
+        yield
@@ -0,0 +1,144 @@
+"""
+Document Structure Fingerprints
+البصمة البنيوية لمستندات Word/Excel/PowerPoint (OOXML)
+
+بصمة النص وحدها لا تكشف النسخ مع إعادة الصياغة، لذلك تُبنى مجموعة رموز من
+بنية الملف وتُفهرس بنفس آلية MinHash + LSH في text_index (النوع document_structure):
+- عدد الشرائح وعدد الأشكال والصور في كل شريحة
+- أسماء الأوراق وأبعاد البيانات وعدد الصيغ في كل ورقة
+- الجداول (عدد الصفوف والأعمدة) وتسلسل العناوين في Word
+- الصور المضمّنة: CRC32 والحجم من الفهرس المركزي لملف ZIP (بدون قراءة الصور)
+
+الملفات القديمة (doc/xls/ppt) ليست ZIP فلا تُحسب لها بصمة بنيوية.
+"""
+import re
+import zipfile
+import logging
+
+logger = logging.getLogger(__name__)
+
+KIND = 'document_structure'
+
+MEDIA_PREFIXES = {
+    'docx': 'word/media/',
+    'xlsx': 'xl/media/',
+    'pptx': 'ppt/media/',
+}
+
+_SLIDE_NAME = re.compile(r'^ppt/slides/slide(\d+)\.xml$')
+_SHEET_NAME = re.compile(r'^xl/worksheets/sheet(\d+)\.xml$')
+_DIMENSION = re.compile(rb'<dimension ref="([A-Z0-9:]+)"')
+_SHEET_TITLE = re.compile(rb'<sheet [^>]*name="([^"]+)"')
+_HEADING = re.compile(rb'<w:pStyle w:val="((?:Heading|Title)[^"]*)"')
+
+
+def _bucket(count):
+    """تقريب العدد (لوغاريتمياً) حتى لا تغيّر إضافة فقرة واحدة البصمة"""
+    return count.bit_length()
+
+
+def _media_tokens(archive, prefix):
+    return [
+        f'media:{info.CRC:08x}:{info.file_size}'
+        for info in archive.infolist()
+        if info.filename.startswith(prefix) and info.file_size
+    ]
+
+
+def _numbered(archive, pattern):
+    """أجزاء ZIP المرقمة (slide1.xml، sheet1.xml...) مرتبة حسب الرقم"""
+    parts = []
+    for name in archive.namelist():
+        match = pattern.match(name)
+        if match:
+            parts.append((int(match.group(1)), name))
+    return [name for _, name in sorted(parts)]
+
+
+def _word_tokens(archive):
+    xml = archive.read('word/document.xml')
+    tables = xml.split(b'<w:tbl>')[1:]
+    tokens = [
+        f'paragraphs:{_bucket(xml.count(b"<w:p>") + xml.count(b"<w:p "))}',
+        f'tables:{len(tables)}',
+    ]
+    for index, table in enumerate(tables):
+        table = table.split(b'</w:tbl>')[0]
+        rows = table.count(b'<w:tr>') + table.count(b'<w:tr ')
+        tokens.append(f'table:{index}:{rows}x{table.count(b"<w:gridCol ")}')
+    for index, style in enumerate(_HEADING.findall(xml)):
+        tokens.append(f'heading:{index}:{style.decode("ascii", "ignore")}')
+    return tokens
+
+
+def _excel_tokens(archive):
+    sheets = _numbered(archive, _SHEET_NAME)
+    tokens = [f'sheets:{len(sheets)}']
+    for index, sheet_name in enumerate(_SHEET_TITLE.findall(archive.read('xl/workbook.xml'))):
+        tokens.append(f'sheet:{index}:name:{sheet_name.decode("utf-8", "ignore")}')
+    for index, name in enumerate(sheets):
+        xml = archive.read(name)
+        dimension = _DIMENSION.search(xml[:2048])
+        if dimension:
+            tokens.append(f'sheet:{index}:{dimension.group(1).decode()}')
+        else:
+            # ملفات write_only لا تحتوي dimension
+            tokens.append(f'sheet:{index}:rows:{_bucket(xml.count(b"<row "))}')
+        tokens.append(f'sheet:{index}:formulas:{_bucket(xml.count(b"<f>") + xml.count(b"<f "))}')
+    return tokens
+
+
+def _ppt_tokens(archive):
+    slides = _numbered(archive, _SLIDE_NAME)
+    tokens = [f'slides:{len(slides)}']
+    for index, name in enumerate(slides):
+        xml = archive.read(name)
+        tokens.append(f'slide:{index}:shapes:{xml.count(b"<p:sp>")}')
+        tokens.append(f'slide:{index}:pictures:{xml.count(b"<p:pic>")}')
+    return tokens
+
+
+_TOKENIZERS = {
+    'docx': _word_tokens,
+    'xlsx': _excel_tokens,
+    'pptx': _ppt_tokens,
+}
+
+
+def structure_tokens(file_path, file_ext):
+    """
+    رموز البنية للمستند
+
+    Returns:
+        set[str] | None: None إذا لم يكن الملف OOXML صالحاً
+    """
+    tokenizer = _TOKENIZERS.get(file_ext)
+    if tokenizer is None:
+        return None
+    try:
+        with zipfile.ZipFile(file_path) as archive:
+            tokens = tokenizer(archive)
+            tokens += _media_tokens(archive, MEDIA_PREFIXES[file_ext])
+    except (zipfile.BadZipFile, KeyError, OSError) as e:
+        logger.warning(f"⚠️ تعذر قراءة بنية المستند {file_path}: {str(e)}")
+        return None
+    return set(tokens)
+
+
+def check_and_index(submission, file_path, file_ext):
+    """
+    مقارنة بنية المستند مع التسليمات السابقة في المشروع ثم إضافتها للفهرس
+
+    Returns:
+        dict | None: {'max_similarity', 'matches', 'tokens', 'media'} أو None
+    """
+    from .text_index import minhash_tokens, check_and_index_signature
+
+    tokens = structure_tokens(file_path, file_ext)
+    if not tokens:
+        return None
+
+    match = check_and_index_signature(submission, KIND, minhash_tokens(tokens))
+    match['tokens'] = len(tokens)
+    match['media'] = sum(1 for token in tokens if token.startswith('media:'))
+    return match
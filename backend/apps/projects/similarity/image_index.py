@@ -0,0 +1,284 @@
+"""
+Image Fingerprint Index (BK-tree)
+فهرس البصمات الإدراكية للصور لكشف الصور المتشابهة في كل المشروع
+
+- بصمة كل صورة (average hash 64-bit) تُحفظ في جدول image_fingerprints
+- لكل مشروع شجرة BK-tree في ذاكرة العملية للبحث بمسافة Hamming
+- الشجرة تُحدّث عند كل إضافة، ويتم جلب البصمات التي أضافتها عمليات
+  أخرى (id أكبر من آخر id محمّل) قبل كل بحث
+"""
+import threading
+import logging
+from collections import OrderedDict
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+HASH_BITS = 64
+_UNSIGNED_MASK = (1 << HASH_BITS) - 1
+
+# مفتاح validation_data القديم (أمر index_fingerprints يفهرس التسليمات السابقة منه)
+LEGACY_HASH_KEY = 'image_hash'
+
+
+def to_signed(value):
+    """تحويل بصمة 64-bit إلى قيمة BigInteger موقّعة صالحة للتخزين"""
+    value &= _UNSIGNED_MASK
+    return value - (1 << HASH_BITS) if value >= (1 << (HASH_BITS - 1)) else value
+
+
+def to_unsigned(value):
+    return value & _UNSIGNED_MASK
+
+
+def hash_to_int(image_hash):
+    """
+    تحويل imagehash.ImageHash أو نص hex إلى عدد صحيح
+
+    Returns:
+        int | None
+    """
+    try:
+        return int(str(image_hash), 16) & _UNSIGNED_MASK
+    except (TypeError, ValueError):
+        return None
+
+
+def hamming(a, b):
+    return (a ^ b).bit_count()
+
+
+def similarity_from_distance(distance):
+    """نفس مقياس التشابه المستخدم سابقاً (كل bit مختلف = 2%)"""
+    return max(0, 100 - distance * 2)
+
+
+class BKTree:
+    """
+    شجرة BK-tree للبحث عن القيم ضمن مسافة Hamming محددة
+
+    كل عقدة: [القيمة، معرفات التسليمات، {المسافة: العقدة الفرعية}]
+    """
+
+    def __init__(self):
+        self._root = None
+        self.size = 0
+
+    def add(self, value, submission_id):
+        self.size += 1
+        if self._root is None:
+            self._root = [value, [submission_id], {}]
+            return
+
+        node = self._root
+        while True:
+            distance = hamming(value, node[0])
+            if distance == 0:
+                node[1].append(submission_id)
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [value, [submission_id], {}]
+                return
+            node = child
+
+    def search(self, value, radius):
+        """
+        Returns:
+            list[tuple]: [(المسافة، submission_id)] مرتبة تصاعدياً حسب المسافة
+        """
+        if self._root is None:
+            return []
+
+        matches = []
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            distance = hamming(value, node[0])
+            if distance <= radius:
+                matches.extend((distance, sub_id) for sub_id in node[1])
+            # خاصية المثلث: الفروع المحتملة فقط ضمن [d - r, d + r]
+            low, high = distance - radius, distance + radius
+            stack.extend(child for d, child in node[2].items() if low <= d <= high)
+
+        matches.sort()
+        return matches
+
+
+class _ProjectIndex:
+    """الشجرة المحمّلة لمشروع واحد مع آخر بصمة تمت قراءتها من قاعدة البيانات"""
+
+    def __init__(self):
+        self.tree = BKTree()
+        self.last_id = 0
+        self.lock = threading.Lock()
+
+
+_indexes = OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+def _get_project_index(project_id):
+    """الحصول على فهرس المشروع من ذاكرة العملية (LRU)"""
+    max_projects = getattr(settings, 'IMAGE_INDEX_CACHED_PROJECTS', 64)
+    with _indexes_lock:
+        index = _indexes.get(project_id)
+        if index is None:
+            index = _ProjectIndex()
+            _indexes[project_id] = index
+        _indexes.move_to_end(project_id)
+        while len(_indexes) > max_projects:
+            _indexes.popitem(last=False)
+    return index
+
+
+def _refresh(index, project):
+    """تحميل البصمات الجديدة فقط (التي أضيفت بعد آخر تحميل)"""
+    from ..models import ImageFingerprint
+
+    rows = ImageFingerprint.objects.filter(
+        project=project,
+        id__gt=index.last_id
+    ).order_by('id').values_list('id', 'submission_id', 'phash')
+
+    for fp_id, submission_id, phash in rows.iterator():
+        index.tree.add(to_unsigned(phash), submission_id)
+        index.last_id = fp_id
+
+
+def backfill_legacy(project):
+    """
+    فهرسة الصور القديمة التي حُفظت بصمتها في validation_data ولا تملك بصمة
+    (أمر index_fingerprints - مرة واحدة بعد الترقية وليس أثناء الفحص)
+
+    Returns:
+        int: عدد الصور المفهرسة
+    """
+    from ..models import Submission, ImageFingerprint
+
+    fingerprints = []
+    legacy = Submission.objects.filter(
+        project=project,
+        image_fingerprint__isnull=True,
+        **{f'validation_data__{LEGACY_HASH_KEY}__isnull': False}
+    ).only('id', 'validation_data')
+
+    for sub in legacy.iterator():
+        value = hash_to_int((sub.validation_data or {}).get(LEGACY_HASH_KEY))
+        if value is not None:
+            fingerprints.append(ImageFingerprint(project=project, submission_id=sub.id, phash=to_signed(value)))
+
+    ImageFingerprint.objects.bulk_create(fingerprints, ignore_conflicts=True)
+    if fingerprints:
+        logger.info(f"📚 فهرسة {len(fingerprints)} صورة سابقة للمشروع #{project.id}")
+    return len(fingerprints)
+
+
+def warm(project):
+    """تحميل فهرس المشروع في ذاكرة العملية قبل المقارنات"""
+    index = _get_project_index(project.id)
+    with index.lock:
+        _refresh(index, project)
+    return index
+
+
+def find_similar(project, value, before_submission_id=None, radius=None):
+    """
+    البحث عن الصور القريبة من البصمة في كل المشروع
+
+    Args:
+        project: المشروع
+        value: البصمة (int غير موقّع)
+        before_submission_id: المقارنة مع التسليمات الأقدم فقط (id أصغر)
+        radius: أقصى مسافة Hamming (None = IMAGE_SIMILARITY_MAX_DISTANCE)
+
+    Returns:
+        list[dict]: [{'submission_id', 'distance', 'similarity'}] الأقرب أولاً
+    """
+    from ..models import Submission
+
+    if radius is None:
+        radius = getattr(settings, 'IMAGE_SIMILARITY_MAX_DISTANCE', 15)
+
+    index = _get_project_index(project.id)
+    with index.lock:
+        _refresh(index, project)
+        found = index.tree.search(value, radius)
+
+    if before_submission_id:
+        found = [(d, sub_id) for d, sub_id in found if sub_id < before_submission_id]
+    if not found:
+        return []
+
+    # الشجرة لا تحذف العقد، لذلك نتجاهل التسليمات المحذوفة
+    existing = set(Submission.objects.filter(
+        id__in=[sub_id for _, sub_id in found]
+    ).values_list('id', flat=True))
+
+    return [
+        {
+            'submission_id': sub_id,
+            'distance': distance,
+            'similarity': similarity_from_distance(distance),
+        }
+        for distance, sub_id in found
+        if sub_id in existing
+    ]
+
+
+def add_fingerprint(submission, value):
+    """
+    حفظ بصمة الصورة للتسليم وإضافتها لشجرة المشروع
+    """
+    from ..models import ImageFingerprint
+
+    fingerprint, created = ImageFingerprint.objects.update_or_create(
+        submission=submission,
+        defaults={'project_id': submission.project_id, 'phash': to_signed(value)}
+    )
+
+    if not created:
+        # تغيرت بصمة موجودة (إعادة فحص) - إعادة بناء الشجرة عند البحث القادم
+        with _indexes_lock:
+            _indexes.pop(submission.project_id, None)
+        return fingerprint
+
+    index = _get_project_index(submission.project_id)
+    with index.lock:
+        # إضافة البصمة الجديدة (وأي بصمات أضافتها عمليات أخرى) للشجرة المحمّلة
+        if index.last_id and fingerprint.id > index.last_id:
+            _refresh(index, submission.project)
+    return fingerprint
+
+
+def check_and_index(submission, image_hash):
+    """
+    مقارنة بصمة الصورة مع كل صور المشروع ثم إضافتها للفهرس
+
+    Returns:
+        dict | None: {'max_similarity', 'matches'} أو None إذا كانت البصمة غير صالحة
+    """
+    value = hash_to_int(image_hash)
+    if value is None:
+        return None
+
+    from ..check_runner import is_abandoned
+
+    matches = find_similar(submission.project, value, before_submission_id=submission.id)
+    # الفحص تجاوز مهلته - نتيجته مُهملة فلا يُكتب في الفهرس
+    if not is_abandoned():
+        add_fingerprint(submission, value)
+
+    return {
+        'max_similarity': matches[0]['similarity'] if matches else 0,
+        'matches': matches[:5],
+    }
+
+
+def copy_fingerprints(source_submission_id, submission):
+    """نسخ بصمة صورة تسليم سابق لتسليم جديد بنفس الملف"""
+    from ..models import ImageFingerprint
+
+    fingerprint = ImageFingerprint.objects.filter(submission_id=source_submission_id).first()
+    if fingerprint:
+        add_fingerprint(submission, to_unsigned(fingerprint.phash))
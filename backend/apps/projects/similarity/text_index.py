@@ -0,0 +1,267 @@
+"""
+Text Fingerprint Index (MinHash + LSH)
+فهرس بصمات النصوص لكشف الانتحال في PDF والصوت والمستندات
+
+- لكل تسليم بصمة MinHash ثابتة الحجم تُحفظ مرة واحدة عند التحقق
+- البصمة مقسمة إلى نطاقات (bands) مفهرسة في قاعدة البيانات، لذلك
+  يتم جلب المرشحين المتشابهين فقط بدلاً من مقارنة كل التسليمات
+- التشابه المقدّر = نسبة Jaccard بين مجموعات المقاطع (shingles)، ويُعرض للمعلم
+  بعد تحويله لمقياس Dice (انظر to_percent) حتى تبقى حدود الانتحال القديمة
+  (85، plagiarism_threshold، 60) بنفس معناها في مقياس TF-IDF cosine السابق
+- التسليمات القديمة (نصها في validation_data) تُفهرس مرة واحدة بالأمر
+  index_fingerprints وليس أثناء الفحص
+"""
+import re
+import zlib
+import hashlib
+import logging
+import numpy as np
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+NUM_PERM = 128
+BANDS = 32
+ROWS = NUM_PERM // BANDS
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+# معاملات التبديل ثابتة حتى تبقى البصمات المحفوظة قابلة للمقارنة
+_rng = np.random.RandomState(1)
+_PERM_A = _rng.randint(1, (1 << 32) - 1, size=NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.randint(0, (1 << 32) - 1, size=NUM_PERM, dtype=np.uint64)
+
+_DIACRITICS = re.compile(r'[\u064B-\u065F\u0670\u0640]')
+_NON_WORD = re.compile(r'[^\w\s]', flags=re.UNICODE)
+_SPACES = re.compile(r'\s+')
+
+# مفتاح validation_data القديم لكل نوع (للفهرسة الأولى للتسليمات السابقة)
+LEGACY_TEXT_KEYS = {
+    'pdf': 'pdf_text',
+    'audio': 'audio_text',
+}
+
+
+def normalize_text(text):
+    """توحيد النص قبل التقطيع (الحروف العربية، التشكيل، الترقيم)"""
+    text = _DIACRITICS.sub('', text or '')
+    text = re.sub('[إأآٱ]', 'ا', text)
+    text = text.replace('ة', 'ه').replace('ى', 'ي')
+    text = _NON_WORD.sub(' ', text)
+    return _SPACES.sub(' ', text).strip().lower()
+
+
+def shingles(text, size=5):
+    """
+    تقطيع النص إلى مقاطع حروف متداخلة (character shingles)
+
+    Returns:
+        np.ndarray: hash كل مقطع (uint64)
+    """
+    max_chars = getattr(settings, 'SIMILARITY_MAX_TEXT_CHARS', 20000)
+    text = normalize_text(text)[:max_chars]
+    if len(text) < size:
+        return np.array([], dtype=np.uint64)
+
+    values = {zlib.crc32(text[i:i + size].encode('utf-8')) for i in range(len(text) - size + 1)}
+    return np.fromiter(values, dtype=np.uint64, count=len(values))
+
+
+def minhash(text, batch_size=8192):
+    """
+    حساب بصمة MinHash للنص
+
+    Returns:
+        np.ndarray | None: مصفوفة uint32 بطول NUM_PERM أو None إذا كان النص قصيراً
+    """
+    return minhash_values(shingles(text), batch_size)
+
+
+def minhash_tokens(tokens):
+    """
+    بصمة MinHash لمجموعة رموز (tokens) بدلاً من نص حر
+    (تُستخدم للبصمة البنيوية للمستندات)
+    """
+    values = {zlib.crc32(str(token).encode('utf-8')) for token in tokens}
+    return minhash_values(np.fromiter(values, dtype=np.uint64, count=len(values)))
+
+
+def minhash_values(values, batch_size=8192):
+    """بصمة MinHash لقيم hash جاهزة (uint64)، None إذا كانت فارغة"""
+    if values.size == 0:
+        return None
+
+    signature = np.full(NUM_PERM, _MAX_HASH, dtype=np.uint64)
+    for start in range(0, values.size, batch_size):
+        batch = values[start:start + batch_size, None]
+        hashed = np.bitwise_and((batch * _PERM_A + _PERM_B) % _MERSENNE_PRIME, _MAX_HASH)
+        signature = np.minimum(signature, hashed.min(axis=0))
+
+    return signature.astype(np.uint32)
+
+
+def band_keys(signature):
+    """
+    مفاتيح LSH للبصمة (مفتاح لكل نطاق)
+
+    Returns:
+        list[int]: قيم BigInteger موقّعة صالحة للتخزين
+    """
+    keys = []
+    for band in range(BANDS):
+        chunk = signature[band * ROWS:(band + 1) * ROWS].tobytes()
+        digest = hashlib.blake2b(bytes([band]) + chunk, digest_size=8).digest()
+        keys.append(int.from_bytes(digest, 'big', signed=True))
+    return keys
+
+
+def estimate_similarity(signature, other):
+    """نسبة Jaccard المقدّرة بين بصمتين (0-1)"""
+    return float(np.mean(signature == other))
+
+
+def to_percent(jaccard):
+    """
+    تحويل Jaccard إلى مقياس cosine القديم (0-100)
+
+    Dice = 2J / (1 + J) يساوي cosine للمجموعات الثنائية عندما يتقارب حجم النصين.
+    Jaccard لمقاطع 5 حروف أقل بكثير من TF-IDF cosine للكلمات لنفس النسخ
+    (استبدال 10% من الكلمات: cosine ≈ 89، Jaccard ≈ 75، Dice ≈ 86؛
+    استبدال 30%: cosine ≈ 68، Jaccard ≈ 44، Dice ≈ 61) فيُقارن Dice بالحدود.
+    """
+    return 200 * jaccard / (1 + jaccard)
+
+
+def signature_from_bytes(data):
+    return np.frombuffer(bytes(data), dtype=np.uint32)
+
+
+def index_signature(submission, kind, signature):
+    """
+    حفظ بصمة التسليم ومفاتيح LSH الخاصة بها (يستبدل أي بصمة سابقة لنفس التسليم)
+    """
+    from django.db import transaction
+    from ..models import TextFingerprint, TextFingerprintBand
+
+    with transaction.atomic():
+        TextFingerprint.objects.filter(submission=submission, kind=kind).delete()
+        fingerprint = TextFingerprint.objects.create(
+            project_id=submission.project_id,
+            submission=submission,
+            kind=kind,
+            signature=signature.tobytes()
+        )
+        TextFingerprintBand.objects.bulk_create([
+            TextFingerprintBand(
+                fingerprint=fingerprint,
+                project_id=submission.project_id,
+                kind=kind,
+                band_key=key
+            )
+            for key in band_keys(signature)
+        ])
+    return fingerprint
+
+
+def backfill_legacy(project, kind):
+    """
+    فهرسة التسليمات القديمة التي حُفظ نصها في validation_data ولا تملك بصمة
+    (أمر index_fingerprints - مرة واحدة بعد الترقية وليس أثناء الفحص)
+
+    Returns:
+        int: عدد التسليمات المفهرسة
+    """
+    from ..models import Submission
+
+    legacy_key = LEGACY_TEXT_KEYS.get(kind)
+    if not legacy_key:
+        return 0
+
+    indexed = 0
+    legacy = Submission.objects.filter(
+        project=project,
+        **{f'validation_data__{legacy_key}__isnull': False}
+    ).exclude(text_fingerprints__kind=kind).only('id', 'project_id', 'validation_data')
+
+    for sub in legacy.iterator():
+        signature = minhash((sub.validation_data or {}).get(legacy_key, ''))
+        if signature is not None:
+            index_signature(sub, kind, signature)
+            indexed += 1
+
+    if indexed:
+        logger.info(f"📚 فهرسة {indexed} تسليم سابق ({kind}) للمشروع #{project.id}")
+    return indexed
+
+
+def find_similar(project, kind, signature, before_submission_id=None, limit=5):
+    """
+    البحث عن أكثر التسليمات تشابهاً عبر مفاتيح LSH
+
+    before_submission_id: المقارنة مع التسليمات الأقدم فقط (id أصغر)؛ عند إعادة
+    التحقق الجماعية لا يُقارن التسليم الأصلي بنسخة سُلّمت بعده
+
+    Returns:
+        list[dict]: [{'submission_id', 'similarity'}] مرتبة تنازلياً (similarity 0-100 بمقياس to_percent)
+    """
+    from ..models import TextFingerprint, TextFingerprintBand
+
+    candidate_ids = TextFingerprintBand.objects.filter(
+        project=project,
+        kind=kind,
+        band_key__in=band_keys(signature)
+    ).values_list('fingerprint_id', flat=True).distinct()
+
+    candidates = TextFingerprint.objects.filter(id__in=list(candidate_ids))
+    if before_submission_id:
+        candidates = candidates.filter(submission_id__lt=before_submission_id)
+
+    matches = [
+        {
+            'submission_id': fp.submission_id,
+            'similarity': to_percent(estimate_similarity(signature, signature_from_bytes(fp.signature)))
+        }
+        for fp in candidates.only('submission_id', 'signature')
+    ]
+    matches.sort(key=lambda m: m['similarity'], reverse=True)
+    return matches[:limit]
+
+
+def check_and_index(submission, kind, text):
+    """
+    مقارنة نص التسليم مع التسليمات السابقة في المشروع ثم إضافته للفهرس
+
+    Returns:
+        dict | None: {'max_similarity', 'matches'} أو None إذا كان النص قصيراً
+    """
+    signature = minhash(text)
+    if signature is None:
+        return None
+    return check_and_index_signature(submission, kind, signature)
+
+
+def check_and_index_signature(submission, kind, signature):
+    """نفس check_and_index لبصمة محسوبة مسبقاً"""
+    from ..check_runner import is_abandoned
+
+    matches = find_similar(
+        submission.project, kind, signature,
+        before_submission_id=submission.id
+    )
+    # الفحص تجاوز مهلته - نتيجته مُهملة فلا يُكتب في الفهرس
+    if not is_abandoned():
+        index_signature(submission, kind, signature)
+
+    return {
+        'max_similarity': matches[0]['similarity'] if matches else 0.0,
+        'matches': matches,
+    }
+
+
+def copy_fingerprints(source_submission_id, submission):
+    """نسخ بصمات تسليم سابق لتسليم جديد بنفس الملف (عند إعادة استخدام النتيجة)"""
+    from ..models import TextFingerprint
+
+    for fp in TextFingerprint.objects.filter(submission_id=source_submission_id):
+        index_signature(submission, fp.kind, signature_from_bytes(fp.signature))
@@ -0,0 +1,292 @@
+"""
+Video Fingerprint Index
+بصمات الفيديو لكشف الفيديوهات المتشابهة في المشروع
+
+- لكل فيديو بصمة dHash (64-bit) لعدد ثابت من الإطارات الموزعة على مدته
+- التوقيع العام = تصويت الأغلبية على bits بصمات الإطارات
+- المقارنة مع كل فيديوهات المشروع دفعة واحدة (XOR + popcount عبر NumPy)
+- مطابقة الإطارات تكشف الفيديو المقصوص أو المعاد ترتيبه حتى لو اختلف التوقيع العام
+"""
+import logging
+import threading
+from contextlib import contextmanager
+import numpy as np
+from django.conf import settings
+from .image_index import to_signed, to_unsigned
+
+logger = logging.getLogger(__name__)
+
+HASH_BITS = 64
+
+# بصمات مشاريع محمّلة مسبقاً لعمليات إعادة التحقق الجماعية {project_id: arrays}
+_snapshots = {}
+_snapshots_lock = threading.Lock()
+
+
+def popcount(values):
+    """
+    عدد الـ bits المفعلة لكل عنصر في مصفوفة uint64
+
+    Returns:
+        np.ndarray: نفس شكل المصفوفة
+    """
+    values = np.ascontiguousarray(values, dtype=np.uint64)
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(values)
+    bits = np.unpackbits(values.view(np.uint8).reshape(values.shape + (8,)), axis=-1)
+    return bits.sum(axis=-1)
+
+
+def _frame_dhash(frame):
+    """بصمة dHash للإطار (فرق السطوع بين كل بكسلين متجاورين في صورة 9x8)"""
+    import cv2
+
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+    small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int(np.packbits(bits).view('>u8')[0])
+
+
+def compute_fingerprint(file_path, frames=None):
+    """
+    حساب بصمة الفيديو
+
+    Args:
+        file_path: مسار الفيديو
+        frames: عدد الإطارات (None = VIDEO_FINGERPRINT_FRAMES)
+
+    Returns:
+        tuple | None: (التوقيع العام، np.ndarray uint64 لبصمات الإطارات)
+    """
+    import cv2
+
+    frames = frames or getattr(settings, 'VIDEO_FINGERPRINT_FRAMES', 16)
+    video = cv2.VideoCapture(file_path)
+    if not video.isOpened():
+        return None
+
+    try:
+        total_frames = int(video.get(cv2.CAP_PROP_FRAME_COUNT))
+        if total_frames <= 0:
+            return None
+
+        # إطارات موزعة بالتساوي مع تجاهل أول وآخر 5%
+        positions = np.linspace(total_frames * 0.05, total_frames * 0.95, num=min(frames, total_frames))
+        hashes = []
+        for position in positions.astype(int):
+            video.set(cv2.CAP_PROP_POS_FRAMES, int(position))
+            ret, frame = video.read()
+            if ret:
+                hashes.append(_frame_dhash(frame))
+    finally:
+        video.release()
+
+    if not hashes:
+        return None
+
+    keyframes = np.array(hashes, dtype=np.uint64)
+    bits = np.unpackbits(keyframes.astype('>u8').view(np.uint8).reshape(-1, 8), axis=1)
+    majority = (bits.sum(axis=0) * 2 >= len(hashes)).astype(np.uint8)
+    signature = int(np.packbits(majority).view('>u8')[0])
+    return signature, keyframes
+
+
+def _load_project(project, before_submission_id=None):
+    """
+    تحميل كل بصمات فيديوهات المشروع كمصفوفات
+
+    Returns:
+        tuple: (submission_ids, signatures uint64, keyframes uint64, owners int)
+    """
+    from ..models import VideoFingerprint
+
+    rows = VideoFingerprint.objects.filter(project=project)
+    if before_submission_id:
+        rows = rows.filter(submission_id__lt=before_submission_id)
+
+    submission_ids, signatures, keyframes, owners = [], [], [], []
+    for position, (submission_id, signature, frames) in enumerate(
+        rows.values_list('submission_id', 'signature', 'keyframes').iterator()
+    ):
+        frames = np.frombuffer(bytes(frames), dtype=np.uint64)
+        submission_ids.append(submission_id)
+        signatures.append(to_unsigned(signature))
+        keyframes.append(frames)
+        owners.append(np.full(frames.size, position, dtype=np.int64))
+
+    if not submission_ids:
+        return [], None, None, None
+
+    return (
+        submission_ids,
+        np.array(signatures, dtype=np.uint64),
+        np.concatenate(keyframes),
+        np.concatenate(owners),
+    )
+
+
+def find_similar(project, signature, keyframes, before_submission_id=None, min_similarity=None, limit=3):
+    """
+    مقارنة البصمة مع فيديوهات المشروع الأقدم من before_submission_id
+
+    التشابه = الأعلى بين:
+    - تشابه التوقيع العام (100 - نسبة الـ bits المختلفة)
+    - نسبة إطارات الفيديو الحالي التي لها إطار مطابق في الفيديو الآخر
+
+    Returns:
+        list[dict]: [{'submission_id', 'similarity', 'difference', 'matched_frames'}] الأعلى أولاً
+    """
+    if min_similarity is None:
+        min_similarity = getattr(settings, 'VIDEO_SIMILARITY_MIN_REPORT', 80)
+    match_distance = getattr(settings, 'VIDEO_KEYFRAME_MATCH_DISTANCE', 10)
+
+    snapshot = _snapshots.get(project.id)
+    if snapshot is not None:
+        submission_ids, signatures, all_frames, owners = snapshot
+    else:
+        submission_ids, signatures, all_frames, owners = _load_project(project, before_submission_id)
+    if not submission_ids:
+        return []
+
+    differences = popcount(signatures ^ np.uint64(signature))
+    global_similarity = 100.0 * (1 - differences / HASH_BITS)
+
+    # مصفوفة المسافات: (إطارات الفيديو الحالي × كل إطارات المشروع)
+    distances = popcount(keyframes[:, None] ^ all_frames[None, :])
+    matched = distances <= match_distance
+
+    # لكل فيديو سابق: هل يوجد إطار مطابق لكل إطار من الفيديو الحالي؟
+    matched_per_video = np.zeros((keyframes.size, len(submission_ids)), dtype=bool)
+    rows, cols = np.nonzero(matched)
+    matched_per_video[rows, owners[cols]] = True
+    matched_frames = matched_per_video.sum(axis=0)
+    frame_similarity = 100.0 * matched_frames / keyframes.size
+
+    similarity = np.maximum(global_similarity, frame_similarity)
+    if snapshot is not None and before_submission_id:
+        # اللقطة تحتوي كل المشروع: تجاهل التسليم نفسه وما سُلّم بعده
+        similarity[np.array(submission_ids) >= before_submission_id] = -1
+    order = np.argsort(-similarity)
+
+    return [
+        {
+            'submission_id': submission_ids[i],
+            'similarity': float(similarity[i]),
+            'difference': int(differences[i]),
+            'matched_frames': int(matched_frames[i]),
+        }
+        for i in order[:limit]
+        if similarity[i] > min_similarity
+    ]
+
+
+def add_fingerprint(submission, signature, keyframes):
+    """حفظ بصمة الفيديو للتسليم"""
+    from ..models import VideoFingerprint
+
+    fingerprint, _ = VideoFingerprint.objects.update_or_create(
+        submission=submission,
+        defaults={
+            'project_id': submission.project_id,
+            'signature': to_signed(signature),
+            'keyframes': np.asarray(keyframes, dtype=np.uint64).tobytes(),
+        }
+    )
+    return fingerprint
+
+
+def backfill_missing(project, limit=None):
+    """
+    حساب بصمات فيديوهات المشروع السابقة التي لا تملك بصمة
+    (أمر index_fingerprints أو بداية إعادة التحقق الجماعية - وليس أثناء فحص تسليم)
+
+    المستدعي يحصر ذلك في مشاريع الفيديو؛ Submission.file_type يحمل الامتداد
+    أو MIME type فلا يُستخدم للتصفية هنا
+
+    Args:
+        limit: أقصى عدد فيديوهات (None = الكل)
+
+    Returns:
+        int: عدد الفيديوهات المفهرسة
+    """
+    import os
+    from ..models import Submission
+
+    missing = Submission.objects.filter(
+        project=project,
+        video_fingerprint__isnull=True
+    ).only('id', 'project_id', 'file_path').order_by('-id')
+    if limit:
+        missing = missing[:limit]
+
+    indexed = 0
+    for sub in missing.iterator():
+        if not sub.file_path or not os.path.exists(sub.file_path):
+            continue
+        try:
+            fingerprint = compute_fingerprint(sub.file_path)
+        except Exception as e:
+            logger.warning(f"⚠️ تعذر حساب بصمة الفيديو للتسليم #{sub.id}: {str(e)}")
+            continue
+        if fingerprint:
+            add_fingerprint(sub, *fingerprint)
+            indexed += 1
+
+    if indexed:
+        logger.info(f"📚 حساب بصمات {indexed} فيديو سابق للمشروع #{project.id}")
+    return indexed
+
+
+def check_and_index(submission, file_path):
+    """
+    حساب بصمة الفيديو ومقارنتها مع كل فيديوهات المشروع ثم حفظها
+
+    Returns:
+        dict | None: {'signature', 'matches'} أو None إذا تعذرت قراءة الفيديو
+    """
+    fingerprint = compute_fingerprint(file_path)
+    if fingerprint is None:
+        return None
+
+    from ..check_runner import is_abandoned
+
+    signature, keyframes = fingerprint
+    matches = find_similar(submission.project, signature, keyframes, before_submission_id=submission.id)
+    # الفحص تجاوز مهلته - نتيجته مُهملة فلا يُكتب في الفهرس
+    if not is_abandoned():
+        add_fingerprint(submission, signature, keyframes)
+
+    return {
+        'signature': f'{signature:016x}',
+        'matches': matches,
+    }
+
+
+@contextmanager
+def project_snapshot(project):
+    """
+    تحميل كل بصمات فيديوهات المشروع مرة واحدة لكل المقارنات داخل الكتلة
+    (لإعادة التحقق الجماعية - البصمات المضافة أثناء الكتلة لا تدخل في المقارنة)
+    """
+    backfill_missing(project)
+
+    with _snapshots_lock:
+        _snapshots[project.id] = _load_project(project)
+    try:
+        yield
+    finally:
+        with _snapshots_lock:
+            _snapshots.pop(project.id, None)
+
+
+def copy_fingerprints(source_submission_id, submission):
+    """نسخ بصمة فيديو تسليم سابق لتسليم جديد بنفس الملف"""
+    from ..models import VideoFingerprint
+
+    fingerprint = VideoFingerprint.objects.filter(submission_id=source_submission_id).first()
+    if fingerprint:
+        add_fingerprint(
+            submission,
+            to_unsigned(fingerprint.signature),
+            np.frombuffer(bytes(fingerprint.keyframes), dtype=np.uint64)
+        )
@@ -0,0 +1,315 @@
+"""
+Speech-to-Text
+تحويل الصوت إلى نص على كامل مدة الملف
+
+- فك ترميز الصوت كتدفق PCM عبر ffmpeg (بدون ملفات WAV مؤقتة)
+- تقسيم التدفق إلى نوافذ ثابتة المدة مع تداخل بسيط
+- التعرف على النوافذ بالتوازي ثم دمج النص بالترتيب
+- محرك التعرف قابل للتبديل: google (عبر الإنترنت)، vosk أو whisper (بدون إنترنت)
+"""
+import wave
+import logging
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from django.conf import settings
+from utils import external_calls
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_WIDTH = 2  # PCM 16-bit
+
+
+class SpeechBackend:
+    """
+    واجهة محرك التعرف على الكلام
+
+    max_parallel: أقصى عدد نوافذ يعالجها المحرك في نفس الوقت
+    """
+
+    name = None
+    max_parallel = None
+
+    def transcribe(self, pcm, sample_rate):
+        """
+        Args:
+            pcm: bytes بصيغة PCM 16-bit mono
+            sample_rate: معدل العينات
+
+        Returns:
+            str: النص ('' إذا لم يتم التعرف على كلام)
+        """
+        raise NotImplementedError
+
+
+class GoogleSpeechBackend(SpeechBackend):
+    """Google Web Speech عبر speech_recognition (يحتاج اتصال إنترنت)"""
+
+    name = 'google'
+
+    def __init__(self):
+        import speech_recognition as sr
+
+        self._sr = sr
+        self.languages = getattr(settings, 'STT_LANGUAGES', ['ar-SA', 'en-US'])
+
+    def transcribe(self, pcm, sample_rate):
+        recognizer = self._sr.Recognizer()
+        audio_data = self._sr.AudioData(pcm, sample_rate, SAMPLE_WIDTH)
+
+        # العربية أولاً، ثم الإنجليزية
+        for language in self.languages:
+            try:
+                return recognizer.recognize_google(audio_data, language=language)
+            except self._sr.UnknownValueError:
+                continue
+        return ''
+
+
+class VoskSpeechBackend(SpeechBackend):
+    """Vosk (بدون إنترنت) - النموذج يُحمّل مرة واحدة في العملية"""
+
+    name = 'vosk'
+    _model = None
+    _model_lock = threading.Lock()
+
+    def __init__(self):
+        import vosk
+
+        self._vosk = vosk
+        with self._model_lock:
+            if VoskSpeechBackend._model is None:
+                model_path = getattr(settings, 'VOSK_MODEL_PATH', '')
+                logger.info(f"📥 تحميل نموذج Vosk من {model_path}")
+                VoskSpeechBackend._model = vosk.Model(model_path)
+
+    def transcribe(self, pcm, sample_rate):
+        import json
+
+        recognizer = self._vosk.KaldiRecognizer(self._model, sample_rate)
+        recognizer.AcceptWaveform(pcm)
+        return json.loads(recognizer.FinalResult()).get('text', '')
+
+
+class WhisperSpeechBackend(SpeechBackend):
+    """Whisper محلي (بدون إنترنت) - نافذة واحدة في كل مرة لأن النموذج يستخدم كل الأنوية"""
+
+    name = 'whisper'
+    max_parallel = 1
+    _model = None
+    _model_lock = threading.Lock()
+
+    def __init__(self):
+        import whisper
+
+        with self._model_lock:
+            if WhisperSpeechBackend._model is None:
+                model_name = getattr(settings, 'WHISPER_MODEL', 'base')
+                logger.info(f"📥 تحميل نموذج Whisper ({model_name})")
+                WhisperSpeechBackend._model = whisper.load_model(model_name)
+
+    def transcribe(self, pcm, sample_rate):
+        # Whisper يتوقع float32 بمعدل 16kHz
+        samples = np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768.0
+        with self._model_lock:
+            result = self._model.transcribe(samples, fp16=False)
+        return (result.get('text') or '').strip()
+
+
+BACKENDS = {
+    GoogleSpeechBackend.name: GoogleSpeechBackend,
+    VoskSpeechBackend.name: VoskSpeechBackend,
+    WhisperSpeechBackend.name: WhisperSpeechBackend,
+}
+
+
+def register_backend(backend_class):
+    """تسجيل محرك تعرف إضافي (يُستخدم عبر STT_BACKEND)"""
+    BACKENDS[backend_class.name] = backend_class
+    return backend_class
+
+
+def get_backend(name=None):
+    """
+    إنشاء محرك التعرف المحدد في الإعدادات
+
+    Raises:
+        ValueError: إذا كان المحرك غير معروف
+    """
+    name = name or getattr(settings, 'STT_BACKEND', 'google')
+    if name not in BACKENDS:
+        raise ValueError(f'محرك التعرف على الكلام غير معروف: {name}')
+    return BACKENDS[name]()
+
+
+def _stream_ffmpeg(file_path, sample_rate, block_size):
+    """فك ترميز الصوت إلى PCM mono وقراءته كتدفق من ffmpeg"""
+    binary = getattr(settings, 'FFMPEG_BINARY', 'ffmpeg')
+    process = subprocess.Popen(
+        [binary, '-nostdin', '-v', 'error', '-i', file_path,
+         '-f', 's16le', '-acodec', 'pcm_s16le', '-ac', '1', '-ar', str(sample_rate), '-'],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL
+    )
+    try:
+        while True:
+            block = process.stdout.read(block_size)
+            if not block:
+                break
+            yield block
+    finally:
+        process.stdout.close()
+        process.kill()
+        process.wait()
+
+
+def _stream_wav(file_path, sample_rate, block_size):
+    """قراءة WAV (PCM 16-bit mono بنفس المعدل) مباشرة بدون ffmpeg"""
+    with wave.open(file_path, 'rb') as w:
+        while True:
+            block = w.readframes(block_size // SAMPLE_WIDTH)
+            if not block:
+                break
+            yield block
+
+
+def iter_windows(file_path, window_seconds=None, overlap_seconds=None, sample_rate=None, max_seconds=None):
+    """
+    تقسيم الصوت إلى نوافذ PCM متتالية أثناء فك الترميز
+
+    Yields:
+        tuple: (رقم النافذة، وقت البداية بالثواني، bytes)
+    """
+    sample_rate = sample_rate or getattr(settings, 'STT_SAMPLE_RATE', 16000)
+    window_seconds = window_seconds or getattr(settings, 'STT_WINDOW_SECONDS', 30)
+    if overlap_seconds is None:
+        overlap_seconds = getattr(settings, 'STT_WINDOW_OVERLAP_SECONDS', 1)
+    if max_seconds is None:
+        max_seconds = getattr(settings, 'STT_MAX_SECONDS', 0)
+
+    bytes_per_second = sample_rate * SAMPLE_WIDTH
+    window_size = int(window_seconds * bytes_per_second)
+    step = window_size - int(overlap_seconds * bytes_per_second)
+    max_bytes = int(max_seconds * bytes_per_second) if max_seconds else None
+
+    if str(file_path).lower().endswith('.wav'):
+        try:
+            with wave.open(file_path, 'rb') as w:
+                direct = (w.getsampwidth(), w.getnchannels(), w.getframerate()) == (SAMPLE_WIDTH, 1, sample_rate)
+        except (wave.Error, EOFError):
+            direct = False
+        blocks = _stream_wav(file_path, sample_rate, step) if direct else _stream_ffmpeg(file_path, sample_rate, step)
+    else:
+        blocks = _stream_ffmpeg(file_path, sample_rate, step)
+
+    buffer = b''
+    offset = 0
+    index = 0
+    for block in blocks:
+        buffer += block
+        while len(buffer) >= window_size:
+            yield index, offset / bytes_per_second, buffer[:window_size]
+            buffer = buffer[step:]
+            offset += step
+            index += 1
+            if max_bytes and offset >= max_bytes:
+                return
+
+    # النافذة الأخيرة (أطول من التداخل فقط)
+    if len(buffer) > window_size - step:
+        yield index, offset / bytes_per_second, buffer
+
+
+def is_silent(pcm):
+    """هل النافذة صامتة؟ (لا حاجة لإرسالها للمحرك)"""
+    threshold = getattr(settings, 'STT_SILENCE_RMS', 100)
+    samples = np.frombuffer(pcm, dtype=np.int16).astype(np.float32)
+    return samples.size == 0 or float(np.sqrt(np.mean(samples ** 2))) < threshold
+
+
+def stitch(parts, max_overlap_words=8):
+    """
+    دمج نصوص النوافذ بالترتيب مع حذف الكلمات المكررة بسبب التداخل
+
+    Args:
+        parts: قائمة نصوص النوافذ بالترتيب
+
+    Returns:
+        str: النص الكامل
+    """
+    words = []
+    for part in parts:
+        part_words = (part or '').split()
+        if not part_words:
+            continue
+        overlap = 0
+        for size in range(min(max_overlap_words, len(words), len(part_words)), 0, -1):
+            if [w.lower() for w in words[-size:]] == [w.lower() for w in part_words[:size]]:
+                overlap = size
+                break
+        words.extend(part_words[overlap:])
+    return ' '.join(words)
+
+
+def transcribe(file_path, backend=None, max_workers=None):
+    """
+    تحويل كامل الملف الصوتي إلى نص
+
+    Args:
+        file_path: مسار الملف
+        backend: اسم المحرك أو كائن SpeechBackend (None = STT_BACKEND)
+        max_workers: عدد النوافذ المعالجة بالتوازي (None = STT_MAX_WORKERS)
+
+    Returns:
+        dict: {'text', 'windows', 'silent_windows', 'failed_windows', 'duration', 'backend'}
+    """
+    if not isinstance(backend, SpeechBackend):
+        backend = get_backend(backend)
+
+    sample_rate = getattr(settings, 'STT_SAMPLE_RATE', 16000)
+    max_workers = max_workers or getattr(settings, 'STT_MAX_WORKERS', 4)
+    if backend.max_parallel:
+        max_workers = min(max_workers, backend.max_parallel)
+
+    def recognize(index, pcm):
+        try:
+            return backend.transcribe(pcm, sample_rate)
+        except Exception as e:
+            logger.warning(f"⚠️ فشل التعرف على النافذة #{index}: {str(e)}")
+            raise
+
+    futures = {}
+    silent = 0
+    duration = 0.0
+    # حد للنوافذ المنتظرة حتى لا يتم تحميل الملف كاملاً في الذاكرة
+    in_flight = threading.BoundedSemaphore(max_workers * 2)
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='stt') as executor:
+        for index, start, pcm in iter_windows(file_path, sample_rate=sample_rate):
+            duration = start + len(pcm) / (sample_rate * SAMPLE_WIDTH)
+            if is_silent(pcm):
+                silent += 1
+                continue
+            in_flight.acquire()
+            external_calls.record('speech')
+            future = executor.submit(recognize, index, pcm)
+            future.add_done_callback(lambda _: in_flight.release())
+            futures[index] = future
+
+        parts = []
+        failed = 0
+        for index in sorted(futures):
+            try:
+                parts.append(futures[index].result())
+            except Exception:
+                failed += 1
+
+    return {
+        'text': stitch(parts),
+        'windows': len(futures) + silent,
+        'silent_windows': silent,
+        'failed_windows': failed,
+        'duration': duration,
+        'backend': backend.name,
+    }
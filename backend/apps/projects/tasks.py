@@ -8,6 +8,29 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# حقول التسليم التي تتغير بنتيجة التحقق
+RESULT_FIELDS = [
+    'validation_results',
+    'ai_score',
+    'validation_status',
+    'rejection_reasons',
+    'processing_time',
+    'processed_at',
+    'ai_checked',
+    'validation_data',
+]
+
+
+def apply_results(submission, results, processing_time):
+    """نسخ نتيجة التحقق إلى حقول التسليم (بدون حفظ)"""
+    submission.validation_results = results
+    submission.ai_score = results.get('overall_score', 0)
+    submission.validation_status = results.get('status', 'rejected')
+    submission.rejection_reasons = results.get('rejection_reasons', [])
+    submission.processing_time = processing_time
+    submission.processed_at = timezone.now()
+    submission.ai_checked = True
+
 
 @shared_task(bind=True, max_retries=3)
 def process_submission_with_ai(self, submission_id):
@@ -32,29 +55,38 @@ def process_submission_with_ai(self, submission_id):
         submission.validation_status = 'processing'
         submission.save()
         
-        # التحليل بالـ AI
-        from .ai_validator import AIValidator
-        validator = AIValidator()
-        results = validator.validate_submission(submission)
+        # نشر نتيجة كل فحص للطالب فور انتهائه
+        from .progress import reporting
+        
+        with reporting(submission_id) as reporter:
+            # إعادة استخدام نتيجة سابقة لنفس الملف (إعادة رفع بعد الرفض)
+            from .validation_cache import get_cached_results, store_results
+            results = get_cached_results(submission)
+            
+            if results is None:
+                # التحليل بالـ AI
+                from .ai_validator import AIValidator
+                validator = AIValidator()
+                results = validator.validate_submission(submission)
+                store_results(submission, results)
         
         # حساب وقت المعالجة
         processing_time = time.time() - start_time
         
         # حفظ النتائج
-        submission.validation_results = results
-        submission.ai_score = results.get('overall_score', 0)
-        submission.validation_status = results.get('status', 'rejected')
-        submission.rejection_reasons = results.get('rejection_reasons', [])
-        submission.processing_time = processing_time
-        submission.processed_at = timezone.now()
-        submission.ai_checked = True
+        apply_results(submission, results, processing_time)
         submission.save()
+        reporter.finish(submission)
         
         logger.info(f"✅ انتهت معالجة Submission #{submission_id} - الحالة: {submission.validation_status}")
         
         # إرسال الإشعارات
         send_submission_notification.delay(submission_id)
         
+        # معاينة قائمة المعلم (بعد التحقق حتى لا تنافسه على الـ worker)
+        from .previews import enqueue
+        enqueue(submission)
+        
         return {
             'submission_id': submission_id,
             'status': submission.validation_status,
@@ -74,6 +106,9 @@ def process_submission_with_ai(self, submission_id):
             submission = Submission.objects.get(id=submission_id)
             submission.validation_status = 'pending'
             submission.save()
+            
+            from .progress import clear
+            clear(submission_id)
         except:
             pass
         
@@ -114,6 +149,30 @@ def send_submission_notification(submission_id):
         logger.error(f"❌ خطأ في إرسال إشعار #{submission_id}: {str(e)}")
 
 
+@shared_task
+def generate_submission_previews(submission_id):
+    """
+    إنشاء معاينة التسليم لقائمة المعلم (مصغّرة أو شكل موجي)
+    
+    Args:
+        submission_id: معرف التسليم
+    """
+    from .models import Submission
+    from .previews import generate
+    
+    try:
+        submission = Submission.objects.get(id=submission_id)
+        submission.previews = generate(submission.file_path, submission.file_hash)
+        submission.save(update_fields=['previews'])
+        
+        logger.info(f"🖼️ معاينة Submission #{submission_id}: {submission.previews.get('kind', 'بدون')}")
+        
+    except Submission.DoesNotExist:
+        logger.error(f"❌ Submission #{submission_id} غير موجود")
+    except Exception as e:
+        logger.error(f"❌ خطأ في إنشاء معاينة #{submission_id}: {str(e)}")
+
+
 @shared_task
 def check_submission_status(submission_id):
     """
@@ -142,3 +201,37 @@ def check_submission_status(submission_id):
         
     except Submission.DoesNotExist:
         return {'error': 'Submission not found'}
+
+
+@shared_task(bind=True, max_retries=3)
+def revalidate_project_task(self, job_id):
+    """
+    إعادة التحقق الجماعية لتسليمات مشروع (على شرائح زمنية)
+    
+    كل شريحة تعمل حتى REVALIDATION_SLICE_SECONDS ثم تعيد إرسال المهمة
+    لتكمل من نقطة الاستئناف، حتى لا تحجز الـ worker لفترة طويلة.
+    
+    Args:
+        job_id: معرف RevalidationJob
+    """
+    from celery.exceptions import SoftTimeLimitExceeded
+    from django.conf import settings
+    from .revalidation import run_job, enqueue
+    
+    try:
+        job = run_job(job_id, max_seconds=getattr(settings, 'REVALIDATION_SLICE_SECONDS', 600))
+    except SoftTimeLimitExceeded:
+        # الشريحة الحالية لم تُحفظ - الاستئناف من آخر نقطة محفوظة
+        from .models import RevalidationJob
+        job = RevalidationJob.objects.get(pk=job_id)
+        logger.warning(f"⏱️ إعادة التحقق #{job_id}: انتهت مهلة الشريحة عند {job.processed}/{job.total}")
+    
+    if job.status == 'running':
+        enqueue(job)
+    
+    return {
+        'job_id': job_id,
+        'status': job.status,
+        'processed': job.processed,
+        'total': job.total,
+    }
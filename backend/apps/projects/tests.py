@@ -0,0 +1,1481 @@
+"""
+Tests for Projects App
+"""
+from django.test import SimpleTestCase, TestCase
+from .similarity import text_index
+
+
+class TextIndexTest(SimpleTestCase):
+    """اختبار بصمات النصوص (MinHash)"""
+
+    TEXT = (
+        'تعتبر الطاقة الشمسية من أهم مصادر الطاقة المتجددة في العالم، '
+        'حيث تستخدم الألواح الشمسية لتحويل ضوء الشمس إلى كهرباء نظيفة '
+        'تساعد على تقليل التلوث والحفاظ على البيئة للأجيال القادمة.'
+    )
+
+    def test_identical_texts(self):
+        """النص المطابق يعطي تشابه 100%"""
+        signature = text_index.minhash(self.TEXT)
+        self.assertEqual(len(signature), text_index.NUM_PERM)
+        self.assertEqual(text_index.estimate_similarity(signature, text_index.minhash(self.TEXT)), 1.0)
+
+    def test_normalization(self):
+        """اختلاف الهمزات والتشكيل والترقيم لا يغير البصمة"""
+        variant = self.TEXT.replace('أ', 'ا').replace('،', '') + '!!'
+        self.assertEqual(
+            text_index.band_keys(text_index.minhash(self.TEXT)),
+            text_index.band_keys(text_index.minhash(variant))
+        )
+
+    def test_different_texts(self):
+        """النصوص المختلفة تعطي تشابه منخفض"""
+        other = 'The water cycle describes how water evaporates, condenses into clouds and falls as rain.'
+        similarity = text_index.estimate_similarity(
+            text_index.minhash(self.TEXT),
+            text_index.minhash(other)
+        )
+        self.assertLess(similarity, 0.2)
+
+    def test_percent_scale(self):
+        """Jaccard يُحوَّل لمقياس cosine القديم قبل مقارنته بحدود الانتحال"""
+        self.assertEqual(text_index.to_percent(1.0), 100)
+        self.assertEqual(text_index.to_percent(0.0), 0)
+        self.assertAlmostEqual(text_index.to_percent(0.75), 85.7, places=1)
+        self.assertGreater(text_index.to_percent(0.45), 60)
+
+    def test_short_text(self):
+        """النص القصير جداً لا ينتج بصمة"""
+        self.assertIsNone(text_index.minhash('abc'))
+        self.assertEqual(len(text_index.band_keys(text_index.minhash(self.TEXT))), text_index.BANDS)
+
+
+class ImageIndexTest(SimpleTestCase):
+    """اختبار شجرة BK-tree لبصمات الصور"""
+
+    def test_radius_search(self):
+        """البحث يعيد كل البصمات ضمن المسافة فقط مرتبة حسب القرب"""
+        import random
+        from .similarity.image_index import BKTree, hamming
+
+        rng = random.Random(7)
+        values = [rng.getrandbits(64) for _ in range(500)]
+        tree = BKTree()
+        for sub_id, value in enumerate(values):
+            tree.add(value, sub_id)
+
+        query = values[42] ^ 0b1011  # 3 bits مختلفة
+        expected = sorted(
+            (hamming(query, value), sub_id)
+            for sub_id, value in enumerate(values)
+            if hamming(query, value) <= 10
+        )
+        self.assertEqual(tree.search(query, 10), expected)
+        self.assertEqual(tree.search(query, 10)[0], (3, 42))
+
+    def test_signed_roundtrip(self):
+        """تحويل البصمة للتخزين في BigInteger والعكس"""
+        from .similarity.image_index import to_signed, to_unsigned, hash_to_int
+
+        value = hash_to_int('ffd8000000000001')
+        self.assertLess(to_signed(value), 0)
+        self.assertEqual(to_unsigned(to_signed(value)), value)
+
+
+class VideoIndexTest(SimpleTestCase):
+    """اختبار مقارنة بصمات الفيديو"""
+
+    def test_popcount(self):
+        """عدد الـ bits المختلفة بين البصمات"""
+        import numpy as np
+        from .similarity.video_index import popcount
+
+        values = np.array([0, 1, 0xFF, (1 << 64) - 1], dtype=np.uint64)
+        self.assertEqual(popcount(values).tolist(), [0, 1, 8, 64])
+
+    def test_find_similar(self):
+        """الفيديو المقصوص يطابق عبر الإطارات حتى لو اختلف التوقيع العام"""
+        import numpy as np
+        from types import SimpleNamespace
+        from unittest import mock
+        from .similarity import video_index
+
+        rng = np.random.default_rng(3)
+        frames = rng.integers(0, 2 ** 63, size=16, dtype=np.uint64)
+        unrelated = rng.integers(0, 2 ** 63, size=16, dtype=np.uint64)
+        loaded = (
+            [10, 11],
+            np.array([(1 << 64) - 1, (1 << 64) - 1], dtype=np.uint64),
+            np.concatenate([unrelated, frames[4:]]),
+            np.repeat([0, 1], [16, 12]),
+        )
+
+        with mock.patch.object(video_index, '_load_project', return_value=loaded):
+            matches = video_index.find_similar(SimpleNamespace(id=1), 0, frames[4:], min_similarity=0)
+
+        self.assertEqual(len(matches), 1)
+        self.assertEqual(matches[0]['submission_id'], 11)
+        self.assertEqual(matches[0]['difference'], 64)
+        self.assertEqual(matches[0]['matched_frames'], 12)
+        self.assertEqual(matches[0]['similarity'], 100.0)
+
+    def test_snapshot_compares_earlier_submissions_only(self):
+        """البصمات المحمّلة مسبقاً لا تقارن التسليم بنفسه ولا بما سُلّم بعده"""
+        import numpy as np
+        from types import SimpleNamespace
+        from .similarity import video_index
+
+        frames = np.arange(1, 9, dtype=np.uint64) * np.uint64(0x0101010101010101)
+        video_index._snapshots[99] = (
+            [20, 21, 22],
+            np.array([5, 5, 5], dtype=np.uint64),
+            np.concatenate([frames, frames, frames]),
+            np.repeat([0, 1, 2], [8, 8, 8]),
+        )
+        self.addCleanup(video_index._snapshots.pop, 99, None)
+
+        matches = video_index.find_similar(SimpleNamespace(id=99), 5, frames, before_submission_id=21)
+        self.assertEqual([m['submission_id'] for m in matches], [20])
+
+
+class MediaProbeTest(SimpleTestCase):
+    """اختبار قراءة معلومات الوسائط من رأس الملف"""
+
+    def _write(self, data, suffix):
+        import os
+        import tempfile
+
+        fd, path = tempfile.mkstemp(suffix=suffix)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def test_wav_header(self):
+        """مدة WAV من الرأس"""
+        import io
+        import wave
+        from .media_probe import _probe_wav
+
+        buffer = io.BytesIO()
+        with wave.open(buffer, 'wb') as w:
+            w.setnchannels(1)
+            w.setsampwidth(2)
+            w.setframerate(8000)
+            w.writeframes(b'\x00\x00' * 8000 * 3)
+
+        info = _probe_wav(self._write(buffer.getvalue(), '.wav'))
+        self.assertAlmostEqual(info['duration'], 3.0)
+        self.assertEqual(info['sample_rate'], 8000)
+
+    def _mp4(self, duration_ms):
+        """MP4 بصندوق moov بعد mdat (1280x720، avc1)"""
+        import struct
+
+        def box(kind, payload):
+            return struct.pack('>I4s', 8 + len(payload), kind) + payload
+
+        mvhd = box(b'mvhd', b'\x00' * 12 + struct.pack('>II', 1000, duration_ms) + b'\x00' * 80)
+        tkhd = box(b'tkhd', b'\x00' * 76 + struct.pack('>II', 1280 << 16, 720 << 16))
+        hdlr = box(b'hdlr', b'\x00' * 8 + b'vide' + b'\x00' * 12)
+        stsd = box(b'stsd', b'\x00' * 8 + struct.pack('>I', 16) + b'avc1' + b'\x00' * 8)
+        trak = box(b'trak', tkhd + box(b'mdia', hdlr + box(b'minf', box(b'stbl', stsd))))
+        data = box(b'ftyp', b'isom\x00\x00\x00\x00') + box(b'mdat', b'\x00' * 4096) + box(b'moov', mvhd + trak)
+        return self._write(data, '.mp4')
+
+    def test_mp4_moov(self):
+        """مدة ودقة MP4 من صندوق moov حتى لو كان بعد mdat"""
+        from .media_probe import _probe_mp4
+
+        info = _probe_mp4(self._mp4(25500))
+        self.assertAlmostEqual(info['duration'], 25.5)
+        self.assertEqual((info['width'], info['height']), (1280, 720))
+        self.assertEqual(info['video_codec'], 'avc1')
+        self.assertTrue(info['has_video'])
+
+    def test_upload_rejects_long_video(self):
+        """FileValidator يرفض الفيديو الأطول من قيود المشروع قبل إنشاء التسليم"""
+        import uuid
+        from unittest import mock
+        from types import SimpleNamespace
+        from .utils.file_validator import FileValidator
+
+        upload = SimpleNamespace(path=self._mp4(25500), sha256=uuid.uuid4().hex)
+        for max_duration, expected in ((20, ['duration']), (30, [])):
+            project = SimpleNamespace(file_constraints={'duration': {'max': max_duration}})
+            validator = FileValidator(SimpleNamespace(name='clip.mp4'), project, upload=upload)
+            with mock.patch('apps.projects.media_probe._probe_ffprobe', return_value=None):
+                validator._validate_duration()
+            self.assertEqual([error['type'] for error in validator.errors], expected)
+
+
+class SpeechTest(SimpleTestCase):
+    """اختبار تقسيم الصوت إلى نوافذ ودمج النص"""
+
+    def test_stitch_overlap(self):
+        """حذف الكلمات المكررة بسبب تداخل النوافذ"""
+        from .speech import stitch
+
+        self.assertEqual(
+            stitch(['بسم الله الرحمن', 'الرحمن الرحيم الحمد لله', '', 'لله رب العالمين']),
+            'بسم الله الرحمن الرحيم الحمد لله رب العالمين'
+        )
+
+    def test_transcribe_all_windows(self):
+        """كل نوافذ الملف تُرسل للمحرك ويُدمج النص بالترتيب"""
+        import os
+        import wave
+        import tempfile
+        import numpy as np
+        from .speech import SpeechBackend, transcribe
+
+        class EchoBackend(SpeechBackend):
+            name = 'echo'
+
+            def transcribe(self, pcm, sample_rate):
+                # أول عينة في النافذة = رقم الثانية
+                return f'w{np.frombuffer(pcm, dtype=np.int16)[0] // 300}'
+
+        # 95 ثانية: كل ثانية بقيمة مختلفة
+        samples = np.repeat(np.arange(95, dtype=np.int16) * 300 + 150, 16000)
+        fd, path = tempfile.mkstemp(suffix='.wav')
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+        with wave.open(path, 'wb') as w:
+            w.setnchannels(1)
+            w.setsampwidth(2)
+            w.setframerate(16000)
+            w.writeframes(samples.tobytes())
+
+        result = transcribe(path, backend=EchoBackend(), max_workers=3)
+        self.assertEqual(result['text'], 'w0 w29 w58 w87')
+        self.assertEqual(result['failed_windows'], 0)
+        self.assertAlmostEqual(result['duration'], 95.0)
+
+
+class TextStoreTest(SimpleTestCase):
+    """اختبار تقسيم النص المستخرج إلى صفحات"""
+
+    def test_page_offsets(self):
+        """موضع كل صفحة وعدد كلماتها"""
+        from .text_store import ExtractedDocument
+
+        document = ExtractedDocument.from_pages('pdf', ['الصفحة الأولى', '', 'الصفحة الثالثة هنا'])
+        self.assertEqual(document.page_count, 3)
+        self.assertEqual(document.page_word_counts, [2, 0, 3])
+        self.assertEqual(document.word_count, 5)
+        self.assertEqual(document.pages(), ['الصفحة الأولى', '', 'الصفحة الثالثة هنا'])
+
+    def test_kind_for_name(self):
+        from .text_store import kind_for_name
+
+        self.assertEqual(kind_for_name('/media/projects/1/Report.PDF'), 'pdf')
+        self.assertEqual(kind_for_name('slides.pptx'), 'pptx')
+        self.assertIsNone(kind_for_name('video.mp4'))
+
+
+def _make_pdf(pages):
+    """PDF بسيط بنص مختلف في كل صفحة (للاختبارات فقط)"""
+    objects = ['<< /Type /Catalog /Pages 2 0 R >>', None, '<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>']
+    kids = []
+    for text in pages:
+        stream = f'BT /F1 12 Tf 72 720 Td ({text}) Tj ET'
+        objects.append(f'<< /Length {len(stream)} >>\nstream\n{stream}\nendstream')
+        objects.append(
+            f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] '
+            f'/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>'
+        )
+        kids.append(f'{len(objects)} 0 R')
+    objects[1] = f'<< /Type /Pages /Kids [{" ".join(kids)}] /Count {len(kids)} >>'
+
+    data = b'%PDF-1.4\n'
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(data))
+        data += f'{number} 0 obj\n{body}\nendobj\n'.encode('latin-1')
+    xref = len(data)
+    data += f'xref\n0 {len(objects) + 1}\n0000000000 65535 f \n'.encode('latin-1')
+    data += ''.join(f'{offset:010d} 00000 n \n' for offset in offsets).encode('latin-1')
+    data += f'trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n'.encode('latin-1')
+    return data
+
+
+class PDFExtractorTest(SimpleTestCase):
+    """اختبار استخراج صفحات PDF بالتوازي"""
+
+    def setUp(self):
+        import os
+        import tempfile
+
+        fd, self.path = tempfile.mkstemp(suffix='.pdf')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(_make_pdf([f'page number {i} text' for i in range(1, 13)]))
+        self.addCleanup(os.remove, self.path)
+
+    def test_all_pages_in_order(self):
+        """كل الصفحات بالترتيب مع زمن كل صفحة"""
+        from django.test import override_settings
+        from .pdf_extractor import extract_pdf
+
+        with override_settings(PDF_EXTRACT_PROCESSES=1, PDF_EXTRACT_BATCH_PAGES=5):
+            pages, metadata = extract_pdf(self.path, ocr=False)
+
+        self.assertEqual(pages, [f'page number {i} text' for i in range(1, 13)])
+        self.assertEqual(metadata['total_pages'], 12)
+        self.assertFalse(metadata['partial'])
+        self.assertEqual([t['page'] for t in metadata['page_timings']], list(range(1, 13)))
+
+    def test_early_termination(self):
+        """التوقف بعد الوصول لعدد الأحرف المطلوب"""
+        from django.test import override_settings
+        from .pdf_extractor import extract_pdf
+
+        with override_settings(PDF_EXTRACT_PROCESSES=1, PDF_EXTRACT_BATCH_PAGES=2):
+            pages, metadata = extract_pdf(self.path, max_chars=50, ocr=False)
+
+        self.assertEqual(len(pages), 4)
+        self.assertTrue(metadata['partial'])
+        self.assertEqual(metadata['total_pages'], 12)
+
+    def test_quick_extract_skips_ocr_and_process_pool(self):
+        """الاستخراج داخل طلب الرفع: بدون OCR ولا عمليات فرعية"""
+        from unittest import mock
+        from django.test import override_settings
+        from . import pdf_extractor, text_store
+
+        with override_settings(PDF_EXTRACT_PROCESSES=4, PDF_EXTRACT_BATCH_PAGES=2), \
+                mock.patch.object(pdf_extractor, '_get_executor') as get_executor, \
+                mock.patch.object(pdf_extractor, '_ocr_page') as ocr_page:
+            document = text_store.extract(self.path, 'pdf', max_chars=50, quick=True)
+
+        get_executor.assert_not_called()
+        ocr_page.assert_not_called()
+        self.assertTrue(document.partial)
+
+
+class GeminiClientTest(SimpleTestCase):
+    """اختبار cache الردود وإعادة المحاولة في عميل Gemini"""
+
+    def test_cache_key(self):
+        """نفس النموذج والمدخلات = نفس المفتاح"""
+        from utils.gemini_client import cache_key
+
+        key = cache_key('gemini-pro', ['prompt', b'data'])
+        self.assertEqual(key, cache_key('gemini-pro', ['prompt', b'data']))
+        self.assertNotEqual(key, cache_key('gemini-1.5-flash', ['prompt', b'data']))
+        self.assertNotEqual(key, cache_key('gemini-pro', ['prompt', b'other']))
+        self.assertIsNone(cache_key('gemini-pro', [object()]))
+
+    def test_ttl_and_eviction(self):
+        """انتهاء الصلاحية وإخراج الأقدم استخداماً"""
+        from unittest import mock
+        from utils.gemini_client import ResponseCache
+
+        cache = ResponseCache(max_entries=2, ttl=10)
+        cache.set('a', '1')
+        cache.set('b', '2')
+        cache.get('a')
+        cache.set('c', '3')
+        self.assertEqual(cache.get('a'), '1')
+        self.assertIsNone(cache.get('b'))
+
+        with mock.patch('utils.gemini_client.time.monotonic', return_value=10 ** 9):
+            self.assertIsNone(cache.get('a'))
+
+    def test_retry_on_quota(self):
+        """إعادة المحاولة عند 429 فقط"""
+        from unittest import mock
+        from utils.gemini_client import call_with_retry
+
+        calls = []
+
+        def flaky():
+            calls.append(1)
+            if len(calls) < 3:
+                raise Exception('429 Resource has been exhausted (e.g. check quota).')
+            return 'ok'
+
+        with mock.patch('utils.gemini_client.time.sleep'):
+            self.assertEqual(call_with_retry(flaky), 'ok')
+        self.assertEqual(len(calls), 3)
+
+        with self.assertRaises(ValueError):
+            call_with_retry(mock.Mock(side_effect=ValueError('bad request')))
+
+    def test_uploaded_file_reused(self):
+        """مرجع الملف المرفوع يُعاد استخدامه لنفس المحتوى حتى انتهاء صلاحيته"""
+        from types import SimpleNamespace
+        from unittest import mock
+        from django.core.cache import cache
+        from utils import gemini_client
+
+        remote = SimpleNamespace(name='files/abc', state=SimpleNamespace(name='ACTIVE'), expiration_time=None)
+        genai = mock.Mock()
+        genai.upload_file.return_value = remote
+        genai.get_file.return_value = remote
+
+        cache.delete(f'{gemini_client.FILE_CACHE_PREFIX}:hash:proxy')
+        with mock.patch('utils.gemini_client._genai', return_value=genai):
+            self.assertIsNone(gemini_client.get_cached_file('hash:proxy'))
+            gemini_client.upload_file('/tmp/video.mp4', cache_key='hash:proxy')
+            self.assertIs(gemini_client.get_cached_file('hash:proxy'), remote)
+
+            genai.get_file.side_effect = Exception('404 File not found')
+            self.assertIsNone(gemini_client.get_cached_file('hash:proxy'))
+
+        self.assertEqual(genai.upload_file.call_count, 1)
+
+
+class ValidationQueuesTest(SimpleTestCase):
+    """اختبار توجيه مهام التحقق وأولوياتها"""
+
+    def _submission(self, hours_left, attempt):
+        from datetime import timedelta
+        from types import SimpleNamespace
+        from django.utils import timezone
+
+        project = SimpleNamespace(deadline=timezone.now() + timedelta(hours=hours_left), file_type='video')
+        return SimpleNamespace(project=project, attempt_number=attempt)
+
+    def test_priority(self):
+        """إعادة التسليم قرب الموعد النهائي أولاً"""
+        from . import queues
+
+        self.assertEqual(queues.priority_for(self._submission(0.5, 2)), queues.PRIORITY_RESUBMISSION_LAST_HOUR)
+        self.assertEqual(queues.priority_for(self._submission(5, 3)), queues.PRIORITY_RESUBMISSION_URGENT)
+        self.assertEqual(queues.priority_for(self._submission(5, 1)), queues.PRIORITY_URGENT)
+        self.assertEqual(queues.priority_for(self._submission(200, 2)), queues.PRIORITY_DEFAULT)
+
+    def test_queue_config(self):
+        """كل نوع ملف في طابوره ونوع غير معروف في طابور pdf"""
+        from . import queues
+
+        self.assertEqual(queues.queue_config('video')['queue'], 'validation.video')
+        self.assertEqual(queues.queue_config('unknown')['queue'], 'validation.pdf')
+
+    def test_lag_tracking(self):
+        """زمن الانتظار من وقت الإرسال حتى بدء التنفيذ"""
+        import time
+        from types import SimpleNamespace
+        from django.core.cache import cache
+        from . import queues
+
+        cache.delete(f'{queues.LAG_CACHE_PREFIX}:validation.test')
+        headers = {}
+        queues.stamp_ready_at(headers)
+        headers[queues.LAG_HEADER] -= 30
+
+        task = SimpleNamespace(request=SimpleNamespace(
+            headers=headers, delivery_info={'routing_key': 'validation.test'}
+        ))
+        stats = queues.track_task_start(task)
+        self.assertEqual(stats['samples'], 1)
+        self.assertAlmostEqual(stats['last'], 30, delta=1)
+        self.assertLess(headers[queues.LAG_HEADER], time.time())
+
+
+class ValidationProgressTest(SimpleTestCase):
+    """اختبار نشر نتائج الفحوصات أولاً بأول"""
+
+    def test_checks_published_as_they_finish(self):
+        """كل فحص يُنشر عند انتهائه والحالة المبدئية rejected عند أول فشل"""
+        from unittest import mock
+        from . import progress
+        from .check_runner import Check, run_checks
+
+        published = []
+        reporter = progress.ProgressReporter(1)
+        token = progress._current.set(reporter)
+        self.addCleanup(progress._current.reset, token)
+
+        with mock.patch.object(reporter, '_publish', side_effect=lambda persist=True: published.append(
+            (list(reporter.state['completed_checks']), reporter.state['provisional_status'])
+        )):
+            run_checks([
+                Check('ocr', lambda: {'status': 'pass', 'message': 'ok', 'score': 90}),
+                Check('similarity', lambda: {'status': 'fail', 'message': 'منسوخ', 'score': 0}),
+            ], parallel=False)
+
+        self.assertEqual(published, [(['ocr'], None), (['ocr', 'similarity'], 'rejected')])
+        self.assertEqual(reporter.state['rejection_reasons'], ['منسوخ'])
+
+    def test_progress_returns_immediately_with_retry_after(self):
+        """الاستعلام يعود فوراً بالحالة الحالية و Retry-After حتى النتيجة النهائية"""
+        from django.core.cache import cache
+        from django.test import RequestFactory
+        from .views import submission_progress
+
+        cache.set('validation_progress:77', {'version': 3, 'done': False, 'checks': {}})
+        self.addCleanup(cache.delete, 'validation_progress:77')
+
+        response = submission_progress(RequestFactory().get('/', {'since': 3}), submission_id=77)
+        self.assertFalse(response.data['changed'])
+        self.assertEqual(response['Retry-After'], '2')
+
+        cache.set('validation_progress:77', {'version': 4, 'done': True, 'checks': {}})
+        response = submission_progress(RequestFactory().get('/', {'since': 3}), submission_id=77)
+        self.assertTrue(response.data['changed'])
+        self.assertFalse(response.has_header('Retry-After'))
+
+
+class ValidatorBenchmarkTest(SimpleTestCase):
+    """اختبار أدوات قياس أداء التحقق"""
+
+    def test_fixtures_are_deterministic(self):
+        """نفس المعاملات تعطي نفس الملف، والـ PDF يُقرأ بعدد الصفحات المطلوب"""
+        import tempfile
+        import pdfplumber
+        from .benchmarks import fixtures
+
+        with tempfile.TemporaryDirectory() as first, tempfile.TemporaryDirectory() as second:
+            a = fixtures.make_fixtures(first, ['pdf', 'audio'], ['small'])
+            b = fixtures.make_fixtures(second, ['pdf', 'audio'], ['small'])
+            for x, y in zip(a, b):
+                with open(x['path'], 'rb') as f1, open(y['path'], 'rb') as f2:
+                    self.assertEqual(f1.read(), f2.read())
+            with pdfplumber.open(a[0]['path']) as pdf:
+                self.assertEqual(len(pdf.pages), fixtures.SIZES['pdf']['small']['pages'])
+
+    def test_compare_flags_regressions(self):
+        """التراجع يُحسب فقط عند تجاوز النسبة والحد الأدنى للفرق"""
+        from .benchmarks.runner import compare
+
+        def report(total, check):
+            return {'results': [{
+                'key': 'pdf/small/pdf', 'wall_seconds': total, 'peak_rss_delta_mb': 10,
+                'checks': {'extract_pdf_text': {'seconds': check, 'peak_rss_delta_mb': 10}},
+            }]}
+
+        rows = compare(report(2.0, 0.011), report(1.0, 0.01), threshold=0.2)
+        flagged = {(row['check'], row['metric']) for row in rows if row['regression']}
+        # extract_pdf_text أبطأ بـ 10% فقط (وأقل من الحد الأدنى للفرق)
+        self.assertEqual(flagged, {(None, 'wall_seconds')})
+
+
+class CheckRunnerTest(SimpleTestCase):
+    """تشغيل الفحوصات بالتوازي مع مهلة لكل فحص"""
+
+    def test_timed_out_check_is_abandoned(self):
+        """الفحص المتأخر يأخذ النتيجة البديلة فوراً ولا تُدمج بياناته ولا يكتب في الفهرس"""
+        import threading
+        import time
+        from types import SimpleNamespace
+        from .check_runner import Check, is_abandoned, merge_validation_data, run_checks
+
+        release = threading.Event()
+        finished = threading.Event()
+        seen = {}
+
+        def slow():
+            release.wait(5)
+            seen['abandoned'] = is_abandoned()
+            finished.set()
+            return {'status': 'pass', 'message': 'ok', 'validation_data': {'video_hash': 'late'}, 'score': 100}
+
+        def fast(name):
+            return {'status': 'pass', 'message': name, 'validation_data': {name: 1}, 'score': 90}
+
+        started = time.monotonic()
+        results = run_checks([
+            Check('ocr', fast, 'ocr'),
+            Check('similarity', slow, timeout=0.2, fallback_score=80),
+            Check('quality', fast, 'quality'),
+        ], parallel=True)
+        elapsed = time.monotonic() - started
+
+        self.assertLess(elapsed, 2)
+        self.assertFalse(finished.is_set())
+        self.assertEqual(list(results), ['ocr', 'similarity', 'quality'])
+        self.assertTrue(results['similarity']['timed_out'])
+        self.assertTrue(results['similarity']['fallback'])
+        self.assertEqual(results['similarity']['score'], 80)
+
+        submission = SimpleNamespace(validation_data=None)
+        merge_validation_data(submission, results)
+        self.assertEqual(submission.validation_data, {'ocr': 1, 'quality': 1})
+        self.assertNotIn('validation_data', results['ocr'])
+
+        release.set()
+        self.assertTrue(finished.wait(5))
+        self.assertTrue(seen['abandoned'])
+        self.assertNotIn('video_hash', submission.validation_data)
+
+
+class CheckMetricsTest(SimpleTestCase):
+    """اختبار قياس الفحوصات وتجميعها"""
+
+    def test_check_records_metrics_and_external_calls(self):
+        """كل فحص يحمل زمنه وعدد استدعاءاته الخارجية، حتى عند الفشل"""
+        from utils import external_calls
+        from .check_runner import Check, run_checks
+
+        def analyze():
+            external_calls.record('gemini')
+            external_calls.record('gemini')
+            return {'status': 'pass', 'message': 'ok', 'score': 90}
+
+        def broken():
+            external_calls.record('speech')
+            raise RuntimeError('boom')
+
+        results = run_checks([Check('analysis', analyze), Check('stt', broken)], parallel=True)
+
+        self.assertEqual(results['analysis']['metrics']['external_calls'], {'gemini': 2})
+        self.assertGreaterEqual(results['analysis']['metrics']['wall_ms'], 0)
+        self.assertEqual(results['stt']['status'], 'warning')
+        self.assertEqual(results['stt']['metrics']['external_calls'], {'speech': 1})
+
+    def test_aggregate_percentiles(self):
+        """p50/p95 لكل فحص حسب نوع الملف والمشروع، مع تجاهل النتائج الجزئية والمعاد استخدامها"""
+        from .check_metrics import aggregate
+
+        def results(wall, calls):
+            return {'checks': {'ocr': {'status': 'pass', 'metrics': {
+                'wall_ms': wall, 'cpu_ms': wall / 2, 'bytes_read': 100, 'external_calls': calls
+            }}}}
+
+        rows = [(1, 'A', 'video', 2.0, results(float(i), {'gemini': 1} if i % 2 else {})) for i in range(1, 21)]
+        rows.append((2, 'B', 'video', 1.0, {'partial': True, 'checks': {}}))
+        rows.append((3, 'C', 'video', 0.1, {**results(500.0, {'gemini': 1}), 'cached': True}))
+
+        report = aggregate(rows)
+        ocr = report['by_file_type']['video']['checks']['ocr']
+        self.assertEqual(report['by_file_type']['video']['submissions'], 20)
+        self.assertEqual((ocr['wall_ms']['p50'], ocr['wall_ms']['p95']), (10.0, 19.0))
+        self.assertEqual(ocr['external_calls']['gemini']['count'], 20)
+        self.assertEqual(list(report['by_project']), [1])
+        self.assertEqual(report['cached_hits'], 1)
+
+
+class OCRReaderPoolTest(SimpleTestCase):
+    """مجموعة قارئات EasyOCR (بدون تحميل النموذج)"""
+
+    def _pool(self, **kwargs):
+        from itertools import count
+        from unittest import mock
+        from .ocr_pool import OCRReaderPool
+
+        ids = count(1)
+        patcher = mock.patch.object(OCRReaderPool, '_create_reader', side_effect=lambda: f'reader-{next(ids)}')
+        self.factory = patcher.start()
+        self.addCleanup(patcher.stop)
+        return OCRReaderPool(**kwargs)
+
+    def test_never_creates_more_than_size(self):
+        """الخيوط المتزامنة تتشارك القارئات دون تجاوز حجم المجموعة"""
+        import threading
+        import time
+
+        pool = self._pool(size=2, max_memory_mb=0)
+        used = []
+
+        def work():
+            with pool.acquire(timeout=5) as reader:
+                used.append(reader)
+                time.sleep(0.02)
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(used), 8)
+        self.assertLessEqual(pool.created, 2)
+        self.assertEqual(self.factory.call_count, pool.created)
+        self.assertLessEqual(set(used), {'reader-1', 'reader-2'})
+
+    def test_memory_cap_limits_growth(self):
+        """فوق حد الذاكرة لا يُحمّل قارئ إضافي (الأول مسموح دائماً)"""
+        from unittest import mock
+
+        pool = self._pool(size=4, max_memory_mb=100)
+        with mock.patch('apps.projects.ocr_pool._current_rss_mb', return_value=500):
+            with pool.acquire(timeout=1):
+                with self.assertRaises(TimeoutError):
+                    with pool.acquire(timeout=0.05):
+                        pass
+        self.assertEqual(pool.created, 1)
+
+    def test_reader_returned_after_exception(self):
+        """القارئ يعود للمجموعة حتى إذا فشل الـ OCR"""
+        pool = self._pool(size=1)
+
+        with self.assertRaises(RuntimeError):
+            with pool.acquire(timeout=1):
+                raise RuntimeError('boom')
+
+        with pool.acquire(timeout=0.05) as reader:
+            self.assertEqual(reader, 'reader-1')
+        self.assertEqual(self.factory.call_count, 1)
+
+    def test_acquire_times_out_when_all_in_use(self):
+        """عند انشغال كل القارئات ينتظر حتى المهلة ثم TimeoutError"""
+        pool = self._pool(size=1)
+
+        with pool.acquire(timeout=1):
+            with self.assertRaises(TimeoutError):
+                with pool.acquire(timeout=0.05):
+                    pass
+        with pool.acquire(timeout=0.05) as reader:
+            self.assertEqual(reader, 'reader-1')
+
+
+class VideoOCRTest(SimpleTestCase):
+    """اختبار تجهيز إطارات الفيديو وقراءة الاسم من مناطق النص"""
+
+    def setUp(self):
+        from .benchmarks.fixtures import video_frames
+
+        # RGB -> BGR كما يعيدها OpenCV
+        self.frames = [frame[..., ::-1].copy() for frame in video_frames(6, 1920, 1080, 2, 'محمد أحمد العلي')]
+
+    def test_frames_downscaled_and_deduplicated(self):
+        """الإطارات تُصغّر والمتطابقة منها تُحذف"""
+        from .video_ocr import FrameFilter
+
+        frames_filter = FrameFilter(max_side=640)
+        kept = [gray for gray in (frames_filter.add(frame) for frame in self.frames + self.frames[-1:]) if gray is not None]
+
+        self.assertEqual(kept[0].shape, (360, 640))
+        self.assertLess(len(kept), len(self.frames))
+        self.assertGreaterEqual(frames_filter.dropped, 1)
+
+    def test_name_read_from_regions_in_one_batch(self):
+        """منطقة الاسم تُكتشف ويُتعرف على كل القصاصات في استدعاء واحد بدون قراءة كاملة"""
+        from .video_ocr import FrameFilter, text_regions, read_name
+
+        frames_filter = FrameFilter()
+        frames = [gray for gray in (frames_filter.add(frame) for frame in self.frames) if gray is not None]
+        height, width = frames[-1].shape
+        # شريط الاسم في الثلث الأخير من الإطار
+        self.assertTrue(any(y0 >= 2 * height // 3 - 16 and x1 - x0 > width // 5 for x0, x1, y0, y1 in text_regions(frames[-1])))
+
+        class Reader:
+            calls = []
+
+            def recognize(self, image, horizontal_list, free_list, batch_size, detail):
+                self.calls.append(('recognize', len(horizontal_list)))
+                return ['محمد احمد العلي'] + [''] * (len(horizontal_list) - 1)
+
+            def readtext(self, image, detail=1):
+                self.calls.append(('readtext', 1))
+                return []
+
+        reading = read_name(Reader(), frames, 'محمد أحمد العلي')
+        self.assertEqual(reading['match_percentage'], 100)
+        self.assertEqual(reading['mode'], 'regions')
+        self.assertEqual([name for name, _ in Reader.calls], ['recognize'])
+
+    def test_regions_miss_falls_back_to_all_frames(self):
+        """إذا لم تحتوِ المناطق الاسم تُقرأ كل الإطارات كاملة (وليس آخر إطار فقط)"""
+        from .video_ocr import FrameFilter, read_name
+
+        frames_filter = FrameFilter()
+        frames = [gray for gray in (frames_filter.add(frame) for frame in self.frames) if gray is not None]
+        # الاسم ظاهر في إطار قبل النهاية والإطار الأخير معتم
+        self.assertGreater(len(frames), 1)
+        name_frame = frames[0]
+
+        class Reader:
+            read = []
+
+            def recognize(self, image, horizontal_list, free_list, batch_size, detail):
+                return [''] * len(horizontal_list)
+
+            def readtext(self, image, detail=1):
+                self.read.append(image)
+                return ['محمد احمد العلي'] if image is name_frame else []
+
+        reading = read_name(Reader(), frames, 'محمد أحمد العلي')
+        self.assertEqual(reading['match_percentage'], 100)
+        self.assertEqual(reading['mode'], 'regions+full')
+        self.assertEqual(len(Reader.read), len(frames))
+
+
+class DocumentIndexTest(SimpleTestCase):
+    """البصمة البنيوية لمستندات Word/Excel/PowerPoint"""
+
+    def setUp(self):
+        import tempfile
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def _pptx(self, name, titles, image=None):
+        import os
+        from pptx import Presentation
+
+        presentation = Presentation()
+        for title in titles:
+            slide = presentation.slides.add_slide(presentation.slide_layouts[1])
+            slide.shapes.title.text = title
+            if image:
+                slide.shapes.add_picture(image, 0, 0)
+        path = os.path.join(self.tmp.name, name)
+        presentation.save(path)
+        return path
+
+    def test_reworded_copy_has_same_structure(self):
+        """إعادة صياغة النص مع نفس الشرائح والصور تعطي نفس البصمة البنيوية"""
+        import os
+        from PIL import Image
+        from .similarity.document_index import structure_tokens
+
+        image = os.path.join(self.tmp.name, 'chart.png')
+        Image.new('RGB', (64, 48), (200, 30, 30)).save(image)
+
+        original = structure_tokens(self._pptx('a.pptx', ['الطاقة', 'الشمس', 'الرياح', 'الخاتمة'], image), 'pptx')
+        reworded = structure_tokens(self._pptx('b.pptx', ['مصادر الطاقة', 'طاقة شمسية', 'طاقة الرياح', 'النهاية'], image), 'pptx')
+        other = structure_tokens(self._pptx('c.pptx', ['الطاقة', 'الشمس']), 'pptx')
+
+        self.assertEqual(original, reworded)
+        self.assertIn('slides:4', original)
+        self.assertTrue(any(token.startswith('media:') for token in original))
+
+        signature = text_index.minhash_tokens(original)
+        self.assertEqual(text_index.estimate_similarity(signature, text_index.minhash_tokens(reworded)), 1.0)
+        self.assertLess(text_index.estimate_similarity(signature, text_index.minhash_tokens(other)), 0.5)
+
+    def test_legacy_or_broken_files_skipped(self):
+        """الملفات غير OOXML لا تُحسب لها بصمة بنيوية"""
+        import os
+        from .similarity.document_index import structure_tokens
+
+        path = os.path.join(self.tmp.name, 'old.docx')
+        with open(path, 'wb') as f:
+            f.write(b'\xd0\xcf\x11\xe0 not a zip')
+
+        self.assertIsNone(structure_tokens(path, 'docx'))
+        self.assertIsNone(structure_tokens(path, 'doc'))
+
+
+class ImageQualityTest(SimpleTestCase):
+    """فحص جودة الصور من معاينة مصغّرة"""
+
+    def setUp(self):
+        import tempfile
+        import numpy as np
+        from PIL import Image
+
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        rng = np.random.default_rng(0)
+        self.sharp = Image.fromarray(rng.integers(0, 255, (300, 400), dtype=np.uint8)).resize((2400, 1800), Image.NEAREST)
+
+    def _save(self, img, name):
+        import os
+        path = os.path.join(self.tmp.name, name)
+        img.save(path)
+        return path
+
+    def test_jpeg_measured_from_draft_preview(self):
+        """JPEG يُقرأ مصغّراً والأبعاد الأصلية من الرأس، والضبابية تخفض الحدة"""
+        from PIL import ImageFilter
+        from .image_quality import measure
+
+        sharp = measure(self._save(self.sharp, 'sharp.jpg'))
+        blurred = measure(self._save(self.sharp.filter(ImageFilter.GaussianBlur(12)), 'blurred.jpg'))
+
+        self.assertEqual((sharp['width'], sharp['height']), (2400, 1800))
+        self.assertLessEqual(max(sharp['preview']), 512)
+        self.assertLess(blurred['sharpness'] * 20, sharp['sharpness'])
+        self.assertAlmostEqual(sharp['brightness'], 127, delta=10)
+
+    def test_exposure_and_decode_limit(self):
+        """الصورة المعتمة تُكتشف، وغير JPEG فوق الحد تُقاس أبعادها فقط"""
+        from PIL import Image
+        from django.test.utils import override_settings
+        from .image_quality import measure
+
+        dark = measure(self._save(Image.new('L', (800, 600), 5), 'dark.png'))
+        self.assertEqual(dark['dark_ratio'], 1.0)
+
+        with override_settings(IMAGE_QUALITY_MAX_DECODE_PIXELS=1000000):
+            large = measure(self._save(self.sharp, 'large.png'))
+        self.assertEqual((large['width'], large['height']), (2400, 1800))
+        self.assertIsNone(large['sharpness'])
+
+    def test_large_non_jpeg_skips_hashing_without_full_decode(self):
+        """بدون معاينة لا يُفك الملف كاملاً، وفحص التشابه يُتخطى بتحذير"""
+        from types import SimpleNamespace
+        from unittest import mock
+        from django.test.utils import override_settings
+        from .ai_validator import AIValidator
+
+        path = self._save(self.sharp, 'large.png')
+        validator = AIValidator.__new__(AIValidator)
+        with override_settings(IMAGE_QUALITY_MAX_DECODE_PIXELS=1000000), \
+                mock.patch('PIL.ImageFile.ImageFile.load') as load, \
+                mock.patch('apps.projects.similarity.image_index.check_and_index') as index:
+            result = validator._check_image_similarity(path, SimpleNamespace(validation_data={}))
+        self.assertEqual(result['status'], 'warning')
+        load.assert_not_called()
+        index.assert_not_called()
+
+
+class UploadStreamTest(SimpleTestCase):
+    """خط رفع الملفات بمرور واحد"""
+
+    def setUp(self):
+        import tempfile
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def _upload(self, content):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        upload = SimpleUploadedFile('report.pdf', content, content_type='application/pdf')
+        reads = []
+        chunks = upload.chunks
+        upload.chunks = lambda chunk_size=None: (reads.append(1), chunks(chunk_size=1024))[1]
+        return upload, reads
+
+    def test_single_pass_hash_head_and_write(self):
+        """الملف يُقرأ مرة واحدة ويُحفظ مع hash وأول بايتاته"""
+        import os
+        import hashlib
+        from utils.upload_stream import stream_upload
+
+        content = b'%PDF-1.4\n' + os.urandom(10000)
+        upload, reads = self._upload(content)
+        destination = os.path.join(self.tmp.name, 'saved.pdf')
+
+        result = stream_upload(upload, destination=destination, scan=False)
+
+        self.assertEqual(len(reads), 1)
+        self.assertEqual(result.sha256, hashlib.sha256(content).hexdigest())
+        self.assertEqual(result.size, len(content))
+        self.assertEqual(result.head, content[:2048])
+        with open(destination, 'rb') as f:
+            self.assertEqual(f.read(), content)
+
+        too_large = stream_upload(self._upload(content)[0], destination=destination, max_size=4096, scan=False)
+        self.assertTrue(too_large.too_large)
+        self.assertFalse(os.path.exists(destination))
+
+    def test_clamd_instream_protocol(self):
+        """الأجزاء تُرسل لـ clamd بصيغة INSTREAM ويُقرأ اسم الفيروس من الرد"""
+        import socket
+        import struct
+        import threading
+        from utils.av import InstreamScan
+
+        server = socket.socket()
+        server.bind(('127.0.0.1', 0))
+        server.listen(1)
+        self.addCleanup(server.close)
+        received = []
+
+        def clamd():
+            conn, _ = server.accept()
+            with conn, conn.makefile('rb') as stream:
+                command = b''
+                while not command.endswith(b'\0'):
+                    command += stream.read(1)
+                received.append(command)
+                data = b''
+                while True:
+                    size = struct.unpack('!L', stream.read(4))[0]
+                    if not size:
+                        break
+                    data += stream.read(size)
+                received.append(data)
+                conn.sendall(b'stream: Eicar-Test-Signature FOUND\0')
+
+        thread = threading.Thread(target=clamd)
+        thread.start()
+
+        scan = InstreamScan(*server.getsockname(), timeout=5)
+        for chunk in (b'X5O!P%', b'@AP[4\\PZX54'):
+            scan.send(chunk)
+        result = scan.finish()
+        thread.join(5)
+
+        self.assertEqual(received, [b'zINSTREAM\0', b'X5O!P%@AP[4\\PZX54'])
+        self.assertFalse(result['is_safe'])
+        self.assertEqual(result['virus_name'], 'Eicar-Test-Signature')
+
+
+class ChunkedUploadTest(TestCase):
+    """الرفع على أجزاء قابل للاستئناف"""
+
+    def setUp(self):
+        import io
+        import tempfile
+        from datetime import timedelta
+        from django.test.utils import override_settings
+        from django.utils import timezone
+
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        override = override_settings(MEDIA_ROOT=self.tmp.name, UPLOAD_CHUNK_MAX_SIZE=4096)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.io = io
+        self.expires_at = timezone.now() + timedelta(hours=1)
+
+    def _session(self, data, name='video.mp4'):
+        from unittest import mock
+        from types import SimpleNamespace
+        from . import chunked_upload
+
+        session = SimpleNamespace(
+            pk=1, upload_id=f'test-{id(data)}', file_name=name, file_ext=name.rsplit('.', 1)[-1],
+            file_size=len(data), received=0, status='uploading', mime_type='', error='', file_hash='',
+            expires_at=self.expires_at, save=lambda **kwargs: None,
+        )
+        chunked_upload.partial_dir().mkdir(parents=True, exist_ok=True)
+        chunked_upload.partial_path(session).touch()
+        # تحديث الموضع في قاعدة البيانات ينجح دائماً في هذا الاختبار
+        patcher = mock.patch('apps.projects.models.UploadSession.objects')
+        patcher.start().filter.return_value.update.return_value = 1
+        self.addCleanup(patcher.stop)
+        return session
+
+    def test_resume_after_interrupted_chunk(self):
+        """الجزء المنقطع يُحفظ ما وصل منه والاستئناف يكمل نفس hash"""
+        import os
+        import hashlib
+        from . import chunked_upload
+
+        data = b'\x00\x00\x00\x18ftypmp42' + os.urandom(10000)
+        session = self._session(data)
+
+        chunked_upload.write_chunk(session, 0, self.io.BytesIO(data[:3000]), 4000, ['mp4'])
+        self.assertEqual(session.received, 3000)
+
+        with self.assertRaises(chunked_upload.UploadError) as error:
+            chunked_upload.write_chunk(session, 0, self.io.BytesIO(data), 4000, ['mp4'])
+        self.assertEqual((error.exception.status, error.exception.extra['offset']), (409, 3000))
+
+        # عملية أخرى بدون hash في الذاكرة
+        chunked_upload._forget(session.upload_id)
+        offset = session.received
+        while offset < len(data):
+            chunk = data[offset:offset + 4096]
+            chunked_upload.write_chunk(session, offset, self.io.BytesIO(chunk), len(chunk), ['mp4'])
+            offset = session.received
+
+        result = chunked_upload.finalize(session)
+        self.assertEqual(result['sha256'], hashlib.sha256(data).hexdigest())
+        self.assertFalse(os.path.exists(chunked_upload.partial_path(session)))
+        with open(result['file_path'], 'rb') as f:
+            self.assertEqual(f.read(), data)
+
+    def test_finalize_can_be_retried(self):
+        """بعد فشل ما بعد آخر جزء: PUT فارغ عند نهاية الملف ثم finalize يعيد نفس الملف بدون مرجع إضافي"""
+        import os
+        from . import chunked_upload
+        from .models import MediaBlob
+
+        data = b'\x00\x00\x00\x18ftypmp42' + os.urandom(3000)
+        session = self._session(data)
+        chunked_upload.write_chunk(session, 0, self.io.BytesIO(data), len(data), ['mp4'])
+        first = chunked_upload.finalize(session)
+
+        chunked_upload.write_chunk(session, len(data), self.io.BytesIO(b''), 0, ['mp4'])
+        retry = chunked_upload.finalize(session)
+        self.assertEqual((retry['file_path'], retry['sha256']), (first['file_path'], first['sha256']))
+        self.assertEqual(MediaBlob.objects.get().ref_count, 1)
+
+        # الجلسة رُفضت بدون تسليم - المرجع يُحرر مرة واحدة
+        chunked_upload.reject(session, 'test')
+        chunked_upload.discard(session)
+        self.assertFalse(MediaBlob.objects.exists())
+        self.assertFalse(os.path.exists(first['file_path']))
+
+    def test_first_chunk_rejects_wrong_extension(self):
+        """الجزء الأول يُرفض إذا كان الامتداد غير مسموح ويُحذف الملف الجزئي"""
+        import os
+        from . import chunked_upload
+
+        data = os.urandom(5000)
+        session = self._session(data, name='video.exe')
+
+        with self.assertRaises(chunked_upload.UploadError) as error:
+            chunked_upload.write_chunk(session, 0, self.io.BytesIO(data[:4096]), 4096, ['mp4'])
+        self.assertEqual(error.exception.status, 415)
+        self.assertEqual(session.status, 'rejected')
+        self.assertFalse(os.path.exists(chunked_upload.partial_path(session)))
+
+
+class MediaStoreTest(TestCase):
+    """مخزن المحتوى: نسخة واحدة لكل محتوى مع عدّ المراجع"""
+
+    def setUp(self):
+        import tempfile
+        from django.test.utils import override_settings
+
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        override = override_settings(MEDIA_ROOT=self.tmp.name)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def _put(self, data):
+        import hashlib
+        from utils import media_store
+
+        source = media_store.temp_path('pdf')
+        source.write_bytes(data)
+        return source, media_store.put(source, hashlib.sha256(data).hexdigest(), 'pdf')
+
+    def test_duplicate_content_is_stored_once(self):
+        """المحتوى المكرر يضيف مرجعاً فقط والملف يُحذف بعد تحرير آخر مرجع"""
+        import os
+        from utils import media_store
+        from .models import MediaBlob
+
+        data = b'%PDF-1.4 worksheet'
+        first_source, first = self._put(data)
+        second_source, second = self._put(data)
+
+        self.assertEqual(first, second)
+        self.assertEqual(first.relative_to(media_store.store_root()).parts[:2], (first.name[:2], first.name[2:4]))
+        self.assertFalse(os.path.exists(first_source) or os.path.exists(second_source))
+        self.assertEqual(MediaBlob.objects.get().ref_count, 2)
+
+        self.assertFalse(media_store.release(str(first)))
+        self.assertTrue(first.exists())
+        self.assertTrue(media_store.release(media_store.relative_path(first)))
+        self.assertFalse(first.exists())
+        self.assertFalse(MediaBlob.objects.exists())
+
+    def test_release_ignores_files_outside_store(self):
+        """الملفات القديمة خارج المخزن لا تُحذف"""
+        from pathlib import Path
+        from django.conf import settings
+        from utils import media_store
+
+        legacy = Path(settings.MEDIA_ROOT) / 'projects' / '1' / 'old.pdf'
+        legacy.parent.mkdir(parents=True)
+        legacy.write_bytes(b'%PDF-1.4')
+
+        self.assertFalse(media_store.release(str(legacy)))
+        self.assertTrue(legacy.exists())
+
+
+class RevalidationJobTest(TestCase):
+    """مهمة إعادة التحقق الجماعية"""
+
+    def test_stale_running_job_is_resumed(self):
+        """مهمة running توقفت نبضتها تُستأنف من نقطة الحفظ بدل إرجاعها كما هي"""
+        from datetime import timedelta
+        from django.test.utils import override_settings
+        from django.utils import timezone
+        from apps.accounts.models import Teacher
+        from .models import Project, RevalidationJob
+        from .revalidation import start_job
+        from .validation_cache import requirements_digest
+
+        teacher = Teacher.objects.create(
+            email='revalidate@test.local', full_name='Test', phone='0500000000',
+            school_name='Test', password_hash='!',
+        )
+        project = Project.objects.create(
+            teacher=teacher, title='Test', subject='Test',
+            deadline=timezone.now() + timedelta(days=7), file_type='pdf',
+        )
+        job = RevalidationJob.objects.create(
+            project=project, status='running', total=10, processed=4, last_submission_id=40,
+            requirements_digest=requirements_digest(project),
+        )
+
+        with override_settings(REVALIDATION_STALE_SECONDS=600):
+            same, created = start_job(project, dispatch=False)
+            self.assertEqual((same.id, same.status, created), (job.id, 'running', False))
+
+            RevalidationJob.objects.filter(pk=job.pk).update(updated_at=timezone.now() - timedelta(seconds=601))
+            resumed, created = start_job(project, dispatch=False)
+
+        self.assertEqual((resumed.id, resumed.status, created), (job.id, 'pending', False))
+        self.assertEqual((resumed.processed, resumed.last_submission_id), (4, 40))
+
+
+class ValidationCacheTest(TestCase):
+    """إعادة استخدام نتائج التحقق لنفس الملف"""
+
+    def setUp(self):
+        from datetime import timedelta
+        from django.utils import timezone
+        from apps.accounts.models import Teacher
+        from .models import Project
+
+        teacher = Teacher.objects.create(
+            email='validation-cache@test.local', full_name='Test', phone='0500000000',
+            school_name='Test', password_hash='!',
+        )
+        self.project = Project.objects.create(
+            teacher=teacher, title='Test', subject='Test',
+            deadline=timezone.now() + timedelta(days=7), file_type='pdf',
+        )
+        self.results = {
+            'overall_status': 'pass',
+            'checks': {'file_size': {'status': 'pass', 'message': 'ok', 'score': 100, 'metrics': {'wall_ms': 5}}},
+        }
+
+    def _submission(self, student_id='1001'):
+        from .models import Submission
+
+        return Submission.objects.create(
+            project=self.project, file_path='/tmp/missing.pdf', file_name='report.pdf', file_size=1,
+            file_type='pdf', file_hash='a' * 64, submitted_student_id=student_id,
+        )
+
+    def test_same_file_and_student_is_hit(self):
+        """نفس الملف من نفس الطالب يعيد النتيجة المخزنة بدون metrics"""
+        from .validation_cache import get_cached_results, store_results
+
+        source = self._submission()
+        self.assertIsNotNone(store_results(source, self.results))
+
+        cached = get_cached_results(self._submission())
+        self.assertTrue(cached['cached'])
+        self.assertEqual(cached['cached_from_submission'], source.id)
+        self.assertNotIn('metrics', cached['checks']['file_size'])
+
+    def test_other_student_is_miss(self):
+        """نفس الملف من طالب آخر يمر بالتحقق كاملاً"""
+        from .validation_cache import get_cached_results, store_results
+
+        store_results(self._submission('1001'), self.results)
+        self.assertIsNone(get_cached_results(self._submission('2002')))
+
+    def test_requirements_change_is_miss(self):
+        """تعديل قيود المشروع يغير بصمة المتطلبات"""
+        from .validation_cache import get_cached_results, store_results
+
+        store_results(self._submission(), self.results)
+        self.project.file_constraints = {'max_size_mb': 5}
+        self.project.save()
+        self.assertIsNone(get_cached_results(self._submission()))
+
+    def test_invalidate_project(self):
+        """حذف كل النتائج المخزنة للمشروع"""
+        from .validation_cache import get_cached_results, invalidate_project, store_results
+
+        store_results(self._submission(), self.results)
+        self.assertEqual(invalidate_project(self.project), 1)
+        self.assertIsNone(get_cached_results(self._submission()))
+
+    def test_degraded_results_not_stored(self):
+        """نتائج الاستثناءات وانتهاء المهلة لا تُخزن"""
+        from .check_runner import Check
+        from .validation_cache import store_results
+
+        fallback = Check('gemini', lambda: None, fallback_score=70).fallback('Gemini غير متاح')
+        for check in (fallback, {'status': 'warning', 'message': 'timeout', 'score': 50, 'timed_out': True}):
+            results = {'overall_status': 'warning', 'checks': {'file_size': self.results['checks']['file_size'], 'gemini': check}}
+            self.assertIsNone(store_results(self._submission(), results))
+
+
+class ImageBackfillTest(TestCase):
+    """فهرسة بصمات الصور القديمة بالأمر وليس أثناء الفحص"""
+
+    def test_legacy_hashes_indexed_by_command_only(self):
+        """find_similar يقرأ ImageFingerprint فقط، والأمر يفهرس validation_data القديم مرة واحدة"""
+        from datetime import timedelta
+        from io import StringIO
+        from django.core.management import call_command
+        from django.utils import timezone
+        from apps.accounts.models import Teacher
+        from .models import ImageFingerprint, Project, Submission
+        from .similarity import image_index
+
+        teacher = Teacher.objects.create(
+            email='image-backfill@test.local', full_name='Test', phone='0500000000',
+            school_name='Test', password_hash='!',
+        )
+        project = Project.objects.create(
+            teacher=teacher, title='Test', subject='Test',
+            deadline=timezone.now() + timedelta(days=7), file_type='image',
+        )
+        self.addCleanup(image_index._indexes.pop, project.id, None)
+        legacy = Submission.objects.create(
+            project=project, file_path='/tmp/old.png', file_name='old.png', file_size=1, file_type='png',
+            validation_data={'image_hash': 'ffff0000ffff0000'},
+        )
+
+        value = image_index.hash_to_int('ffff0000ffff0000')
+        self.assertEqual(image_index.find_similar(project, value), [])
+        self.assertFalse(ImageFingerprint.objects.filter(project=project).exists())
+
+        call_command('index_fingerprints', kind=['image'], stdout=StringIO())
+        self.assertEqual(
+            [match['submission_id'] for match in image_index.find_similar(project, value)],
+            [legacy.id]
+        )
+        self.assertEqual(image_index.backfill_legacy(project), 0)
+
+
+class VideoBackfillTest(TestCase):
+    """فهرسة بصمات الفيديوهات السابقة خارج فحص التسليم"""
+
+    def test_backfill_indexes_older_video_submission(self):
+        """تسليم فيديو قديم بدون بصمة (file_type = الامتداد) يُفهرس بالأمر"""
+        import os
+        import tempfile
+        from datetime import timedelta
+        from unittest import mock
+        import numpy as np
+        from django.utils import timezone
+        from apps.accounts.models import Teacher
+        from .models import Project, Submission, VideoFingerprint
+        from .similarity import video_index
+
+        fd, path = tempfile.mkstemp(suffix='.mp4')
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+
+        teacher = Teacher.objects.create(
+            email='video-backfill@test.local', full_name='Test', phone='0500000000',
+            school_name='Test', password_hash='!',
+        )
+        project = Project.objects.create(
+            teacher=teacher, title='Test', subject='Test',
+            deadline=timezone.now() + timedelta(days=7), file_type='video',
+        )
+        submission = Submission.objects.create(
+            project=project, file_path=path, file_name='clip.mp4', file_size=1, file_type='mp4',
+        )
+
+        keyframes = np.arange(1, 5, dtype=np.uint64)
+        with mock.patch.object(video_index, 'compute_fingerprint', return_value=(7, keyframes)):
+            self.assertEqual(video_index.backfill_missing(project), 1)
+
+        fingerprint = VideoFingerprint.objects.get(submission=submission)
+        self.assertEqual(video_index.to_unsigned(fingerprint.signature), 7)
+        self.assertEqual(video_index.backfill_missing(project), 0)
+
+
+class MediaDeliveryTest(SimpleTestCase):
+    """تقديم ملفات التسليمات مع Range و ETag"""
+
+    def setUp(self):
+        import os
+        import tempfile
+
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.data = os.urandom(10000)
+        self.path = os.path.join(self.tmp.name, 'video.mp4')
+        with open(self.path, 'wb') as f:
+            f.write(self.data)
+
+    def _get(self, **headers):
+        from django.test import RequestFactory
+        from . import media_delivery
+
+        request = RequestFactory().get('/media/x/', headers=headers)
+        return media_delivery.serve(request, self.path, 'فيديو.mp4', 'ab' * 32)
+
+    def test_range_request_returns_partial_content(self):
+        """Range يعيد الجزء المطلوب فقط مع Content-Range"""
+        response = self._get(Range='bytes=1000-1999')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], 'bytes 1000-1999/10000')
+        self.assertEqual(response['Content-Length'], '1000')
+        self.assertEqual(b''.join(response.streaming_content), self.data[1000:2000])
+        response.close()
+
+        response = self._get(Range='bytes=-500')
+        self.assertEqual(b''.join(response.streaming_content), self.data[-500:])
+        response.close()
+
+        self.assertEqual(self._get(Range='bytes=20000-').status_code, 416)
+
+    def test_etag_from_file_hash(self):
+        """ETag من hash الملف والطلب المتكرر يُرد بـ 304"""
+        from . import media_delivery
+
+        response = self._get()
+        self.assertEqual(response['ETag'], f'"{"ab" * 32}"')
+        response.close()
+        self.assertEqual(self._get(If_None_Match=response['ETag']).status_code, 304)
+
+        # If-Range بـ ETag قديم = الملف كاملاً
+        response = self._get(Range='bytes=0-9', If_Range='"old"')
+        self.assertEqual(response.status_code, 200)
+        response.close()
+
+        self.assertIsNone(media_delivery.unsign('tampered'))
+
+
+class PreviewsTest(SimpleTestCase):
+    """معاينات قائمة المعلم"""
+
+    def setUp(self):
+        import tempfile
+        from django.test.utils import override_settings
+
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        override = override_settings(MEDIA_ROOT=self.tmp.name, PREVIEW_THUMBNAIL_SIDE=128)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_image_and_pdf_thumbnails(self):
+        """مصغّرة WebP صغيرة للصورة والصفحة الأولى من PDF"""
+        import os
+        from PIL import Image
+        from . import previews
+        from .benchmarks.fixtures import make_pdf
+
+        image_path = os.path.join(self.tmp.name, 'photo.jpg')
+        Image.new('RGB', (2000, 1000), (200, 80, 40)).save(image_path, quality=90)
+        result = previews.generate(image_path, 'a' * 64)
+        self.assertEqual((result['kind'], result['width'], result['height']), ('image', 128, 64))
+        thumbnail = os.path.join(self.tmp.name, result['thumbnail'])
+        self.assertLess(os.path.getsize(thumbnail), 4096)
+
+        pdf_path = os.path.join(self.tmp.name, 'report.pdf')
+        make_pdf(pdf_path, 3)
+        result = previews.generate(pdf_path, 'b' * 64)
+        self.assertEqual(result['kind'], 'pdf')
+        self.assertEqual(max(result['width'], result['height']), 128)
+
+        previews.remove('a' * 64)
+        self.assertFalse(os.path.exists(thumbnail))
+        self.assertEqual(previews.generate(os.path.join(self.tmp.name, 'notes.docx'), 'c' * 64), {})
+
+    def test_wav_waveform(self):
+        """الشكل الموجي: قمم مطبّعة بعدد النقاط المطلوب"""
+        import os
+        import wave
+        import numpy as np
+        from . import previews
+
+        path = os.path.join(self.tmp.name, 'voice.wav')
+        rate = previews.WAVEFORM_SAMPLE_RATE
+        samples = np.concatenate([np.full(rate, 1000), np.full(rate, 4000)]).astype(np.int16)
+        with wave.open(path, 'wb') as w:
+            w.setnchannels(1)
+            w.setsampwidth(2)
+            w.setframerate(rate)
+            w.writeframes(samples.tobytes())
+
+        waveform = previews.audio_waveform(path, points=4)
+        self.assertEqual(waveform, [25, 25, 100, 100])
+
+    def test_preview_link_expires(self):
+        """رابط المصغّرة ثابت داخل النافذة وينتهي بعد PREVIEW_LINK_MAX_AGE على الأكثر"""
+        from unittest import mock
+        from types import SimpleNamespace
+        from django.core import signing
+        from django.test.utils import override_settings
+        from . import media_delivery
+
+        with override_settings(PREVIEW_LINK_MAX_AGE=1000):
+            self.assertEqual(media_delivery.preview_expiry(1000), media_delivery.preview_expiry(1499))
+            self.assertEqual(media_delivery.preview_expiry(1499), 2000)
+            self.assertLessEqual(media_delivery.preview_expiry(1000) - 1000, 1000)
+
+            request = SimpleNamespace(build_absolute_uri=lambda path: path)
+            with mock.patch('apps.projects.media_delivery.time.time', return_value=1000):
+                token = media_delivery.preview_url(request, SimpleNamespace(id=5), SimpleNamespace(id=9)).rstrip('/').split('/')[-1]
+                self.assertEqual(media_delivery.unsign_preview(token), (5, 9, 2000))
+            with mock.patch('apps.projects.media_delivery.time.time', return_value=2000):
+                self.assertIsNone(media_delivery.unsign_preview(token))
+
+        legacy = signing.Signer(salt=media_delivery.PREVIEW_SALT).sign('5.9')
+        self.assertIsNone(media_delivery.unsign_preview(legacy))
@@ -0,0 +1,289 @@
+"""
+Extracted Text Store
+استخراج نص المستندات مرة واحدة لكل ملف وحفظه مضغوطاً
+
+كل من يحتاج نص الملف (فحص الرفع، تحليل AI، كشف الانتحال، معاينة المعلم)
+يقرأ من نفس النسخة المحفوظة حسب hash الملف بدلاً من قراءة الملف من جديد.
+"""
+import os
+import zlib
+import logging
+from django.db import IntegrityError, transaction
+
+logger = logging.getLogger(__name__)
+
+# امتداد الملف -> نوع المستخرج
+EXTENSION_KINDS = {
+    'pdf': 'pdf',
+    'doc': 'docx',
+    'docx': 'docx',
+    'xls': 'xlsx',
+    'xlsx': 'xlsx',
+    'ppt': 'pptx',
+    'pptx': 'pptx',
+    'txt': 'txt',
+    'md': 'txt',
+}
+
+PAGE_SEPARATOR = '\n'
+
+
+def kind_for_name(name):
+    """نوع المستخرج حسب اسم الملف (None = غير مدعوم)"""
+    ext = os.path.splitext(str(name).lower())[1].lstrip('.')
+    return EXTENSION_KINDS.get(ext)
+
+
+class ExtractedDocument:
+    """
+    نص مستند مقسم إلى صفحات (صفحة PDF، شريحة، ورقة Excel)
+
+    Attributes:
+        text: النص الكامل
+        page_offsets: موضع بداية كل صفحة في النص
+        page_word_counts: عدد كلمات كل صفحة
+        page_count: عدد صفحات الملف (قد يكون أكبر من الصفحات المستخرجة عند التوقف المبكر)
+        metadata: بيانات خاصة بنوع الملف (عدد الصور، الخلايا...)
+    """
+
+    def __init__(self, kind, text, page_offsets, page_word_counts, metadata=None, file_hash=None, page_count=None):
+        self.kind = kind
+        self.text = text
+        self.page_offsets = page_offsets
+        self.page_word_counts = page_word_counts
+        self.metadata = metadata or {}
+        self.file_hash = file_hash
+        self.page_count = page_count if page_count is not None else len(page_offsets)
+
+    @classmethod
+    def from_pages(cls, kind, pages, metadata=None, file_hash=None):
+        offsets = []
+        position = 0
+        for page in pages:
+            offsets.append(position)
+            position += len(page) + len(PAGE_SEPARATOR)
+        return cls(
+            kind=kind,
+            text=PAGE_SEPARATOR.join(pages),
+            page_offsets=offsets,
+            page_word_counts=[len(page.split()) for page in pages],
+            metadata=metadata,
+            file_hash=file_hash,
+            page_count=(metadata or {}).get('total_pages'),
+        )
+
+    @classmethod
+    def from_model(cls, entry):
+        return cls(
+            kind=entry.kind,
+            text=zlib.decompress(bytes(entry.content)).decode('utf-8'),
+            page_offsets=entry.page_offsets,
+            page_word_counts=entry.page_word_counts,
+            metadata=entry.metadata,
+            file_hash=entry.file_hash,
+            page_count=entry.page_count,
+        )
+
+    @property
+    def word_count(self):
+        return sum(self.page_word_counts)
+
+    @property
+    def extracted_pages(self):
+        return len(self.page_offsets)
+
+    @property
+    def partial(self):
+        """هل توقف الاستخراج قبل آخر صفحة؟"""
+        return self.extracted_pages < self.page_count
+
+    @property
+    def estimated_word_count(self):
+        """عدد الكلمات (تقديري حسب متوسط الصفحات المستخرجة إذا كان الاستخراج جزئياً)"""
+        if not self.partial or not self.extracted_pages:
+            return self.word_count
+        return int(self.word_count / self.extracted_pages * self.page_count)
+
+    def page(self, index):
+        """نص صفحة واحدة (تبدأ من 0)"""
+        start = self.page_offsets[index]
+        end = self.page_offsets[index + 1] - len(PAGE_SEPARATOR) if index + 1 < self.extracted_pages else len(self.text)
+        return self.text[start:end]
+
+    def pages(self):
+        return [self.page(i) for i in range(self.extracted_pages)]
+
+
+def _rewind(source):
+    if hasattr(source, 'seek'):
+        source.seek(0)
+    return source
+
+
+def _extract_pdf(source, max_chars=None, ocr=True, parallel=True):
+    from .pdf_extractor import extract_pdf
+
+    return extract_pdf(source, max_chars=max_chars, ocr=ocr, parallel=parallel)
+
+
+def _extract_docx(source, max_chars=None):
+    from docx import Document
+
+    doc = Document(_rewind(source))
+    text = '\n'.join(para.text for para in doc.paragraphs if para.text)
+    return [text], {'paragraph_count': len(doc.paragraphs)}
+
+
+def _extract_xlsx(source, max_chars=None):
+    from openpyxl import load_workbook
+
+    wb = load_workbook(_rewind(source), read_only=True, data_only=True)
+    pages = []
+    cell_count = 0
+    try:
+        for ws in wb.worksheets:
+            cells = []
+            for row in ws.iter_rows(values_only=True):
+                for cell in row:
+                    if cell:
+                        cells.append(str(cell))
+            cell_count += len(cells)
+            pages.append(' '.join(cells))
+    finally:
+        wb.close()
+    return pages, {'cell_count': cell_count}
+
+
+def _extract_pptx(source, max_chars=None):
+    from pptx import Presentation
+
+    prs = Presentation(_rewind(source))
+    pages = []
+    for slide in prs.slides:
+        pages.append('\n'.join(shape.text for shape in slide.shapes if hasattr(shape, 'text')))
+    return pages, {'slide_count': len(pages)}
+
+
+def _extract_txt(source, max_chars=None):
+    if hasattr(source, 'read'):
+        data = _rewind(source).read()
+    else:
+        with open(source, 'rb') as f:
+            data = f.read()
+    if isinstance(data, bytes):
+        data = data.decode('utf-8', errors='ignore')
+    return [data], {}
+
+
+EXTRACTORS = {
+    'pdf': _extract_pdf,
+    'docx': _extract_docx,
+    'xlsx': _extract_xlsx,
+    'pptx': _extract_pptx,
+    'txt': _extract_txt,
+}
+
+
+def extract(source, kind, file_hash=None, max_chars=None, quick=False):
+    """
+    استخراج النص بدون حفظ
+
+    Args:
+        source: مسار الملف أو كائن ملف
+        kind: نوع المستخرج (pdf, docx, xlsx, pptx, txt)
+        max_chars: يكفي هذا العدد من الأحرف (PDF يتوقف مبكراً، None = كامل الملف)
+        quick: PDF بدون OCR ولا عمليات فرعية (داخل طلب الرفع)
+
+    Returns:
+        ExtractedDocument
+    """
+    if kind not in EXTRACTORS:
+        raise ValueError(f'نوع ملف غير مدعوم لاستخراج النص: {kind}')
+    if kind == 'pdf' and quick:
+        pages, metadata = _extract_pdf(source, max_chars=max_chars, ocr=False, parallel=False)
+    else:
+        pages, metadata = EXTRACTORS[kind](source, max_chars=max_chars)
+    return ExtractedDocument.from_pages(kind, pages, metadata=metadata, file_hash=file_hash)
+
+
+def find_document(file_hash, max_chars=None):
+    """
+    النص المحفوظ للملف إذا كان يكفي max_chars (بدون استخراج)
+
+    Returns:
+        ExtractedDocument | None
+    """
+    from .models import ExtractedText
+
+    if not file_hash:
+        return None
+    entry = ExtractedText.objects.filter(file_hash=file_hash).first()
+    # النسخة المحفوظة جزئية ولا تكفي المطلوب - إعادة الاستخراج
+    if entry is None or (entry.metadata.get('partial') and (not max_chars or entry.char_count < max_chars)):
+        return None
+    entry.save(update_fields=['last_used_at'])
+    return ExtractedDocument.from_model(entry)
+
+
+def get_document(file_hash, source, kind=None, max_chars=None):
+    """
+    الحصول على نص الملف من المخزن أو استخراجه وحفظه
+
+    Args:
+        file_hash: SHA-256 للملف (None = استخراج بدون حفظ)
+        source: مسار الملف أو كائن ملف (يُستخدم فقط إذا لم يكن النص محفوظاً)
+        kind: نوع المستخرج (None = حسب اسم الملف)
+        max_chars: يكفي هذا العدد من الأحرف (None = كامل الملف)
+
+    Returns:
+        ExtractedDocument
+    """
+    kind = kind or kind_for_name(getattr(source, 'name', source))
+
+    document = find_document(file_hash, max_chars)
+    if document:
+        return document
+
+    document = extract(source, kind, file_hash=file_hash, max_chars=max_chars)
+    if file_hash:
+        store(document)
+    return document
+
+
+def store(document):
+    """حفظ النص المستخرج مضغوطاً"""
+    from .models import ExtractedText
+
+    try:
+        with transaction.atomic():
+            ExtractedText.objects.update_or_create(
+                file_hash=document.file_hash,
+                defaults={
+                    'kind': document.kind,
+                    'content': zlib.compress(document.text.encode('utf-8'), 6),
+                    'page_offsets': document.page_offsets,
+                    'page_word_counts': document.page_word_counts,
+                    'word_count': document.word_count,
+                    'char_count': len(document.text),
+                    'page_count': document.page_count,
+                    'metadata': document.metadata,
+                }
+            )
+    except IntegrityError:
+        # تم حفظه من عملية أخرى في نفس الوقت
+        pass
+
+
+def get_for_submission(submission, max_chars=None):
+    """
+    نص ملف التسليم
+
+    Returns:
+        ExtractedDocument
+    """
+    from .validation_cache import ensure_file_hash
+
+    return get_document(
+        ensure_file_hash(submission), submission.file_path,
+        kind_for_name(submission.file_path), max_chars=max_chars
+    )
@@ -32,8 +32,14 @@ urlpatterns = [
     path('<int:project_id>/students/', views.student_list_create, name='student_list_create'),
     path('<int:project_id>/submissions/', views.submission_list, name='submission_list'),
     path('<int:project_id>/validate/', views.validate_file, name='validate_file'),
+    path('<int:project_id>/revalidate/', views.project_revalidation, name='project_revalidation'),
+    path('validation-metrics/', views.validation_metrics, name='validation_metrics'),
     path('submissions/upload/', views.upload_submission, name='upload_submission'),
     path('submissions/<int:submission_id>/review/', views.review_submission, name='review_submission'),
+    path('submissions/<int:submission_id>/text/', views.submission_text_preview, name='submission_text_preview'),
+    path('submissions/<int:submission_id>/media/', views.submission_media_link, name='submission_media_link'),
+    path('media/<str:token>/', views.submission_media, name='submission_media'),
+    path('previews/<str:token>/', views.submission_preview, name='submission_preview'),
     
     # Telegram Notifications
     path('<int:project_id>/send-telegram/', views.send_project_telegram, name='send_project_telegram'),
@@ -41,7 +47,11 @@ urlpatterns = [
     
     # AI Submission (NEW)
     path('<int:project_id>/submit-ai/', views.submit_project_with_ai, name='submit_project_with_ai'),
+    path('<int:project_id>/uploads/', views.start_chunked_upload, name='start_chunked_upload'),
+    path('uploads/<str:upload_id>/', views.chunked_upload_detail, name='chunked_upload_detail'),
     path('submissions/<int:submission_id>/status/', views.check_submission_status_view, name='check_submission_status'),
+    path('submissions/<int:submission_id>/progress/', views.submission_progress, name='submission_progress'),
+    path('submissions/<int:submission_id>/progress/stream/', views.submission_progress_stream, name='submission_progress_stream'),
     
     # Student Verification (للطلاب بدون تسجيل دخول)
     path('verify-student/', views.verify_student_for_submission, name='verify_student_for_submission'),
@@ -2,5 +2,11 @@
 Projects Utilities
 """
 from .file_validator import FileValidator
+from .names import (
+    normalize_arabic_name, calculate_name_similarity, validate_full_name, find_similar_students
+)
 
-__all__ = ['FileValidator']
+__all__ = [
+    'FileValidator',
+    'normalize_arabic_name', 'calculate_name_similarity', 'validate_full_name', 'find_similar_students',
+]
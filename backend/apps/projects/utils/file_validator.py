@@ -7,57 +7,78 @@ import mimetypes
 import hashlib
 from django.conf import settings
 from django.core.exceptions import ValidationError
-import google.generativeai as genai
-import PyPDF2
-import docx
-import openpyxl
-from io import BytesIO
-
-# محاولة استيراد المكتبات الاختيارية
-try:
-    import magic
-    MAGIC_AVAILABLE = True
-except ImportError:
-    MAGIC_AVAILABLE = False
-
-try:
-    import pyclamd
-    CLAMAV_AVAILABLE = True
-except ImportError:
-    CLAMAV_AVAILABLE = False
+from utils import gemini_client
+from utils.upload_stream import stream_upload, MAGIC_AVAILABLE
 
 
 class FileValidator:
     """
     فئة للتحقق من الملفات المرفوعة
+    
+    محتوى الملف يُقرأ مرة واحدة عبر utils.upload_stream (hash، النوع، الفيروسات)؛
+    عند الرفع الفعلي تُمرَّر نتيجة الحفظ (upload) فلا يُقرأ الملف مرة أخرى.
     """
     
-    def __init__(self, file, project):
+    def __init__(self, file, project, upload=None):
         """
         Args:
             file: ملف Django UploadedFile
             project: كائن Project
+            upload: نتيجة stream_upload (اختياري - من secure_upload.save_file)
         """
         self.file = file
         self.project = project
+        self.upload = upload
         self.errors = []
         self.warnings = []
+        self._metadata_checked = False
+    
+    def validate_metadata(self):
+        """
+        الفحوصات التي لا تحتاج قراءة المحتوى (الحجم المعلن، الامتداد، الاسم)
+        تُستدعى قبل الحفظ لرفض الملف مبكراً
+        
+        Returns:
+            bool: True إذا لم تكن هناك أخطاء
+        """
+        if not self._metadata_checked:
+            self._metadata_checked = True
+            
+            # 1. التحقق من الحجم
+            self._validate_size()
+            
+            # 2. التحقق من الامتداد
+            self._validate_extension()
+            
+            # 3. التحقق من الاسم
+            self._validate_filename()
         
-    def validate_all(self):
+        return len(self.errors) == 0
+        
+    def validate_all(self, upload=None):
         """
         التحقق الشامل من الملف
         
+        Args:
+            upload: نتيجة stream_upload إذا كان الملف قد حُفظ (اختياري)
+        
         Returns:
             dict: النتيجة {valid, errors, warnings, ai_check}
         """
-        # 1. التحقق من الحجم
-        self._validate_size()
+        self.upload = upload or self.upload
         
-        # 2. التحقق من النوع
-        self._validate_type()
+        # 1-3. الحجم والامتداد والاسم
+        self.validate_metadata()
         
-        # 3. التحقق من الاسم
-        self._validate_filename()
+        # مرور واحد على المحتوى (للمعاينة بدون حفظ)
+        if self.upload is None:
+            self.upload = stream_upload(self.file, max_size=self._max_size())
+        
+        # 2. التحقق من النوع الحقيقي
+        self._validate_mime()
+        
+        # 3. مدة الفيديو من رأس الملف (النتيجة تُخزن حسب hash ويعيد فحص AI استخدامها)
+        self._validate_duration()
         
         # 4. فحص الفيروسات
         virus_result = self._scan_virus()
@@ -75,15 +96,18 @@ class FileValidator:
             'ai_check': ai_result,
             'file_info': {
                 'name': self.file.name,
-                'size': self.file.size,
+                'size': self.upload.size if self.upload and not self.upload.too_large else self.file.size,
                 'type': self.file.content_type,
                 'hash': self._get_file_hash()
             }
         }
     
+    def _max_size(self):
+        return self.project.max_file_size * 1024 * 1024  # MB to bytes
+    
     def _validate_size(self):
         """التحقق من حجم الملف"""
-        max_size = self.project.max_file_size * 1024 * 1024  # MB to bytes
+        max_size = self._max_size()
         
         if self.file.size > max_size:
             self.errors.append({
@@ -98,41 +122,53 @@ class FileValidator:
                 'message': 'الملف صغير جداً، تأكد من رفع الملف الصحيح'
             })
     
-    def _validate_type(self):
-        """التحقق من نوع الملف"""
-        # الحصول على الامتداد
+    def _get_extension(self):
         _, ext = os.path.splitext(self.file.name.lower())
-        ext = ext.lstrip('.')
+        return ext.lstrip('.')
+    
+    def _validate_extension(self):
+        """التحقق من امتداد الملف"""
+        ext = self._get_extension()
         
-        # قائمة الامتدادات المسموحة
-        allowed = self.project.allowed_extensions.split(',')
+        # قائمة الامتدادات المسموحة (قيود المشروع ثم أنواع الملفات - فارغة = بدون قيود)
+        allowed = (self.project.file_constraints or {}).get('formats', []) or self.project.allowed_file_types or []
         allowed = [e.strip().lower() for e in allowed]
         
-        if ext not in allowed:
+        if allowed and ext not in allowed:
             self.errors.append({
                 'type': 'extension',
                 'message': f'نوع الملف .{ext} غير مسموح. الأنواع المسموحة: {", ".join(allowed)}'
             })
+    
+    def _validate_mime(self):
+        """التحقق من MIME type الحقيقي (منع التزييف) - من أول بايتات الملف المقروءة أثناء الحفظ"""
+        if any(error['type'] == 'extension' for error in self.errors):
+            return
+        
+        if self.upload.too_large:
+            # الحجم الفعلي تجاوز الحد رغم أن الحجم المعلن مقبول
+            if not any(error['type'] == 'size' for error in self.errors):
+                self.errors.append({
+                    'type': 'size',
+                    'message': f'حجم الملف يتجاوز الحد المسموح {self.project.max_file_size} MB'
+                })
             return
         
-        # التحقق من MIME type الحقيقي (منع التزييف)
         if MAGIC_AVAILABLE:
-            try:
-                mime = magic.Magic(mime=True)
-                actual_mime = mime.from_buffer(self.file.read(1024))
-                self.file.seek(0)  # إعادة المؤشر للبداية
-                
-                # التحقق من توافق MIME مع الامتداد
-                expected_mimes = self._get_expected_mimes(ext)
-                if expected_mimes and actual_mime not in expected_mimes:
-                    self.errors.append({
-                        'type': 'mime',
-                        'message': f'محتوى الملف لا يطابق امتداده. النوع الفعلي: {actual_mime}'
-                    })
-            except Exception as e:
+            actual_mime = self.upload.mime
+            if actual_mime is None:
                 self.warnings.append({
                     'type': 'mime',
-                    'message': f'تعذر التحقق من نوع الملف: {str(e)}'
+                    'message': 'تعذر التحقق من نوع الملف'
+                })
+                return
+            
+            # التحقق من توافق MIME مع الامتداد
+            expected_mimes = self._get_expected_mimes(self._get_extension())
+            if expected_mimes and actual_mime not in expected_mimes:
+                self.errors.append({
+                    'type': 'mime',
+                    'message': f'محتوى الملف لا يطابق امتداده. النوع الفعلي: {actual_mime}'
                 })
         else:
             self.warnings.append({
@@ -140,6 +176,28 @@ class FileValidator:
                 'message': 'التحقق المتقدم من MIME غير متاح (python-magic غير مثبت)'
             })
     
+    def _validate_duration(self):
+        """رفض الفيديو الأطول من قيود المشروع قبل إنشاء التسليم"""
+        from apps.projects.validators import SUPPORTED_FILE_TYPES, validate_video_duration
+        
+        if self.errors or f'.{self._get_extension()}' not in SUPPORTED_FILE_TYPES['video']['extensions']:
+            return
+        
+        path = self.upload.path if self.upload and self.upload.path else None
+        if path is None and hasattr(self.file, 'temporary_file_path'):
+            path = self.file.temporary_file_path()
+        if path is None:
+            # المعاينة بدون حفظ لملف في الذاكرة - فحص AI يتحقق من المدة لاحقاً
+            return
+        
+        max_duration = ((self.project.file_constraints or {}).get('duration') or {}).get('max', 30)
+        is_valid, error, _ = validate_video_duration(path, max_duration, file_hash=self._get_file_hash())
+        if not is_valid:
+            self.errors.append({
+                'type': 'duration',
+                'message': error
+            })
+    
     def _validate_filename(self):
         """التحقق من اسم الملف"""
         # التحقق من الأحرف الخطيرة
@@ -160,60 +218,44 @@ class FileValidator:
             })
     
     def _scan_virus(self):
-        """فحص الفيروسات باستخدام ClamAV"""
-        if not CLAMAV_AVAILABLE:
+        """نتيجة فحص الفيروسات (ClamAV INSTREAM أثناء قراءة الملف)"""
+        virus = self.upload.virus if self.upload else None
+        
+        if not virus:
             return {
                 'scanned': False,
-                'message': 'فحص الفيروسات غير متاح (pyclamd غير مثبت)'
+                'message': 'فحص الفيروسات غير متاح'
             }
         
-        try:
-            # الاتصال بـ ClamAV
-            cd = pyclamd.ClamdNetworkSocket(
-                host=settings.CLAMAV_HOST,
-                port=settings.CLAMAV_PORT
-            )
-            
-            # التحقق من اتصال ClamAV
-            if not cd.ping():
-                return {
-                    'scanned': False,
-                    'message': 'خدمة فحص الفيروسات غير متاحة'
-                }
-            
-            # فحص الملف
-            self.file.seek(0)
-            result = cd.scan_stream(self.file.read())
-            self.file.seek(0)
-            
-            if result:
-                # وُجد فيروس!
-                self.errors.append({
-                    'type': 'virus',
-                    'message': f'تم اكتشاف تهديد أمني: {result}'
-                })
-                return {
-                    'scanned': True,
-                    'clean': False,
-                    'threat': result
-                }
-            
+        if virus.get('virus_name'):
+            # وُجد فيروس!
+            self.errors.append({
+                'type': 'virus',
+                'message': f'تم اكتشاف تهديد أمني: {virus["virus_name"]}'
+            })
+            return {
+                'scanned': True,
+                'clean': False,
+                'threat': virus['virus_name']
+            }
+        
+        if virus.get('scanned'):
             return {
                 'scanned': True,
                 'clean': True,
                 'message': 'الملف آمن'
             }
-            
-        except Exception as e:
-            # ClamAV غير مثبت أو غير متاح
+        
+        # ClamAV غير مثبت أو غير متاح
+        if not virus.get('is_safe', True):
             self.warnings.append({
                 'type': 'virus_scan',
-                'message': f'تعذر فحص الفيروسات: {str(e)}'
+                'message': f'تعذر فحص الفيروسات: {virus["message"]}'
             })
-            return {
-                'scanned': False,
-                'message': str(e)
-            }
+        return {
+            'scanned': False,
+            'message': virus['message']
+        }
     
     def _validate_with_ai(self):
         """
@@ -236,9 +278,8 @@ class FileValidator:
                     'message': 'لا يمكن قراءة محتوى الملف'
                 }
             
-            # إعداد Gemini
-            genai.configure(api_key=settings.GEMINI_API_KEY)
-            model = genai.GenerativeModel('gemini-pro')
+            # نموذج Gemini المشترك
+            model = gemini_client.get_model('gemini-pro')
             
             # بناء Prompt
             prompt = self._build_ai_prompt(content)
@@ -267,59 +308,32 @@ class FileValidator:
                 'message': f'خطأ في التحقق بالذكاء الاصطناعي: {str(e)}'
             }
     
-    def _extract_file_content(self):
-        """استخراج محتوى الملف حسب نوعه"""
-        _, ext = os.path.splitext(self.file.name.lower())
+    def _extract_file_content(self, max_chars=5000):
+        """
+        استخراج محتوى الملف حسب نوعه
         
-        try:
-            self.file.seek(0)
-            
-            if ext == '.pdf':
-                return self._extract_pdf_content()
-            elif ext in ['.docx', '.doc']:
-                return self._extract_docx_content()
-            elif ext in ['.xlsx', '.xls']:
-                return self._extract_excel_content()
-            elif ext in ['.txt', '.md']:
-                return self.file.read().decode('utf-8', errors='ignore')
-            else:
-                # للأنواع الأخرى (صور، فيديو، صوت)
-                return None
-                
-        except Exception as e:
-            return None
-    
-    def _extract_pdf_content(self):
-        """استخراج نص من PDF"""
-        try:
-            pdf_reader = PyPDF2.PdfReader(BytesIO(self.file.read()))
-            text = ""
-            for page in pdf_reader.pages[:5]:  # أول 5 صفحات فقط
-                text += page.extract_text()
-            return text[:5000]  # أول 5000 حرف
-        except:
-            return None
-    
-    def _extract_docx_content(self):
-        """استخراج نص من Word"""
-        try:
-            doc = docx.Document(BytesIO(self.file.read()))
-            text = "\n".join([para.text for para in doc.paragraphs[:50]])  # أول 50 فقرة
-            return text[:5000]
-        except:
+        يُستخدم النص المحفوظ في مخزن النصوص إن وُجد، وإلا استخراج سريع داخل
+        طلب الرفع: PDF بدون OCR ولا عمليات فرعية، ولا يُحفظ المقتطع في المخزن
+        (الـ worker يستخرج النص الكامل ويحفظه عند التحقق).
+        """
+        from apps.projects.text_store import extract, find_document, kind_for_name
+        
+        kind = kind_for_name(self.file.name)
+        if not kind:
+            # للأنواع الأخرى (صور، فيديو، صوت)
             return None
-    
-    def _extract_excel_content(self):
-        """استخراج بيانات من Excel"""
+        
+        # الملف المحفوظ (إذا وُجد) بدلاً من إعادة قراءة الملف المؤقت
+        source = self.upload.path if self.upload and self.upload.path else self.file
         try:
-            wb = openpyxl.load_workbook(BytesIO(self.file.read()))
-            ws = wb.active
-            text = ""
-            for row in list(ws.rows)[:50]:  # أول 50 صف
-                text += " ".join([str(cell.value) for cell in row if cell.value]) + "\n"
-            return text[:5000]
-        except:
+            document = find_document(self._get_file_hash(), max_chars) or extract(
+                source, kind, max_chars=max_chars, quick=True
+            )
+            return document.text[:max_chars]
+        except Exception as e:
             return None
+        finally:
+            self.file.seek(0)
     
     def _build_ai_prompt(self, content):
         """بناء prompt للذكاء الاصطناعي"""
@@ -386,14 +400,19 @@ class FileValidator:
         }
     
     def _get_file_hash(self):
-        """حساب hash للملف"""
+        """حساب hash للملف (مرة واحدة)"""
+        if self.upload and self.upload.sha256:
+            return self.upload.sha256
+        if getattr(self, '_file_hash', None):
+            return self._file_hash
         try:
             self.file.seek(0)
             file_hash = hashlib.sha256()
             for chunk in self.file.chunks():
                 file_hash.update(chunk)
             self.file.seek(0)
-            return file_hash.hexdigest()
+            self._file_hash = file_hash.hexdigest()
+            return self._file_hash
         except:
             return None
     
@@ -0,0 +1,181 @@
+"""
+Validation Result Cache
+إعادة استخدام نتائج التحقق عند رفع نفس الملف مرة أخرى
+
+المفتاح: (hash الملف، المشروع، بصمة متطلبات المشروع، الطالب)
+- بصمة المتطلبات تتغير تلقائياً عند تعديل قيود المشروع
+- الطالب جزء من المفتاح لأن فحص الاسم (OCR) ونتيجة التشابه خاصة به،
+  ونفس الملف من طالب آخر يجب أن يمر بفحص التشابه كاملاً
+"""
+import json
+import hashlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+# مفاتيح validation_data التي تكتبها فحوصات التشابه وتُستخدم للمقارنة المستقبلية
+COMPARISON_KEYS = ('video_hash', 'image_hash', 'pdf_text', 'audio_text', 'max_similarity')
+
+
+def compute_file_hash(file_path, chunk_size=1024 * 1024):
+    """
+    حساب SHA-256 لملف على القرص بدون تحميله كاملاً في الذاكرة
+
+    Returns:
+        str | None: الـ hash أو None إذا تعذرت القراءة
+    """
+    try:
+        file_hash = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                file_hash.update(chunk)
+        return file_hash.hexdigest()
+    except OSError as e:
+        logger.warning(f"⚠️ تعذر حساب hash الملف {file_path}: {str(e)}")
+        return None
+
+
+def requirements_digest(project):
+    """
+    بصمة لكل إعدادات المشروع التي تؤثر على نتيجة التحقق
+
+    Args:
+        project: كائن المشروع
+
+    Returns:
+        str: SHA-256 للإعدادات
+    """
+    payload = {
+        'file_type': project.file_type,
+        'file_constraints': project.file_constraints or {},
+        'validation_requirements': project.validation_requirements or [],
+        'plagiarism_threshold': project.plagiarism_threshold,
+        # العنوان والوصف جزء من prompt تحليل Gemini
+        'title': project.title,
+        'description': project.description or '',
+    }
+    encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+def student_key(submission):
+    """معرف الطالب صاحب التسليم"""
+    if submission.submitted_student_id:
+        return f'sid:{submission.submitted_student_id}'
+    if submission.student_id:
+        return f'student:{submission.student_id}'
+    if submission.group_id:
+        return f'group:{submission.group_id}'
+    return ''
+
+
+def ensure_file_hash(submission):
+    """حساب hash الملف وحفظه في التسليم إذا لم يكن موجوداً"""
+    if not submission.file_hash:
+        submission.file_hash = compute_file_hash(submission.file_path)
+        if submission.file_hash:
+            submission.save(update_fields=['file_hash'])
+    return submission.file_hash
+
+
+def _cache_key(submission):
+    return {
+        'project': submission.project,
+        'file_hash': submission.file_hash,
+        'requirements_digest': requirements_digest(submission.project),
+        'student_key': student_key(submission),
+    }
+
+
+def get_cached_results(submission):
+    """
+    البحث عن نتيجة تحقق سابقة لنفس الملف
+
+    عند وجودها يتم نسخ بيانات المقارنة للتسليم الجديد حتى يبقى مشاركاً
+    في فحوصات التشابه القادمة. قياسات الفحوصات (metrics) تخص التشغيل الأصلي
+    فتُحذف من النتيجة المعاد استخدامها (cached=True ولا تدخل في check_metrics).
+
+    Returns:
+        dict | None: نتائج التحقق المخزنة
+    """
+    from .models import ValidationCache
+
+    if not ensure_file_hash(submission):
+        return None
+
+    entry = ValidationCache.objects.filter(**_cache_key(submission)).first()
+    if not entry:
+        return None
+
+    submission.validation_data = submission.validation_data or {}
+    submission.validation_data.update(entry.validation_data or {})
+
+    from .similarity import copy_fingerprints
+    copy_fingerprints(entry.source_submission_id, submission)
+
+    entry.hit_count += 1
+    entry.save(update_fields=['hit_count', 'last_used_at'])
+
+    logger.info(f"♻️ إعادة استخدام نتيجة التحقق للملف {submission.file_hash[:12]} (Submission #{submission.id})")
+
+    results = dict(entry.results)
+    results['checks'] = {
+        name: {key: value for key, value in check.items() if key != 'metrics'} if isinstance(check, dict) else check
+        for name, check in (results.get('checks') or {}).items()
+    }
+    results['cached'] = True
+    results['cached_from_submission'] = entry.source_submission_id
+    return results
+
+
+def store_results(submission, results):
+    """
+    حفظ نتيجة التحقق لإعادة استخدامها
+
+    لا يتم حفظ النتائج الناتجة عن أخطاء أو فحوصات انتهت مهلتها أو نتائج بديلة
+    (fallback: استثناء أو خدمة غير متاحة) حتى لا يصبح عطل مؤقت نتيجة دائمة للملف.
+    """
+    from .models import ValidationCache
+
+    if not submission.file_hash or results.get('error') or results.get('cached'):
+        return None
+
+    checks = results.get('checks', {})
+    if any(isinstance(check, dict) and (check.get('timed_out') or check.get('fallback')) for check in checks.values()):
+        return None
+
+    validation_data = {
+        key: value
+        for key, value in (submission.validation_data or {}).items()
+        if key in COMPARISON_KEYS
+    }
+
+    try:
+        key = _cache_key(submission)
+        entry, _ = ValidationCache.objects.update_or_create(
+            **key,
+            defaults={
+                'source_submission': submission,
+                'results': results,
+                'validation_data': validation_data,
+            }
+        )
+        return entry
+    except Exception as e:
+        logger.warning(f"⚠️ تعذر حفظ نتيجة التحقق في الـ cache: {str(e)}")
+        return None
+
+
+def invalidate_project(project):
+    """
+    حذف كل النتائج المخزنة للمشروع (عند تعديل المعلم للمشروع)
+
+    Returns:
+        int: عدد السجلات المحذوفة
+    """
+    from .models import ValidationCache
+
+    deleted, _ = ValidationCache.objects.filter(project=project).delete()
+    if deleted:
+        logger.info(f"🗑️ حذف {deleted} نتيجة تحقق مخزنة للمشروع #{project.id}")
+    return deleted
@@ -172,33 +172,29 @@ def validate_file_size(file_size_bytes, max_size_mb):
     return False, f'حجم الملف ({file_size_mb:.2f} MB) يتجاوز الحد الأقصى المسموح ({max_size_mb} MB)'
 
 
-def validate_video_duration(file_path, max_duration_seconds=30):
+def validate_video_duration(file_path, max_duration_seconds=30, file_hash=None):
     """
-    Validate video duration (optional - requires moviepy or ffmpeg)
+    Validate video duration (read from the container headers, no decoding)
     
     Args:
         file_path (str): Path to video file
         max_duration_seconds (int): Maximum duration in seconds
+        file_hash (str): SHA-256 of the file, reuses a cached probe result
     
     Returns:
         tuple: (is_valid, error_message, duration)
     """
     try:
-        # This requires moviepy or ffmpeg-python
-        # Uncomment if you want to implement video duration checking
-        """
-        from moviepy.editor import VideoFileClip
+        from .media_probe import get_duration
         
-        clip = VideoFileClip(file_path)
-        duration = clip.duration
-        clip.close()
+        duration = get_duration(file_path, file_hash=file_hash)
+        if duration is None:
+            return True, None, 0  # Don't fail validation if we can't check duration
         
         if duration <= max_duration_seconds:
             return True, None, duration
         
         return False, f'مدة الفيديو ({duration:.1f} ثانية) تتجاوز الحد الأقصى ({max_duration_seconds} ثانية)', duration
-        """
-        return True, None, 0
     except Exception as e:
         return True, None, 0  # Don't fail validation if we can't check duration
 
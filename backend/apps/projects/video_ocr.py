@@ -0,0 +1,388 @@
+"""
+Video OCR
+قراءة اسم الطالب من آخر ثوانٍ الفيديو بأقل تكلفة ممكنة
+
+- فك ترميز تسلسلي لآخر الثواني فقط (قفزة واحدة ثم grab بدون تحويل الإطارات غير المطلوبة)
+- تصغير الإطارات لحجم مناسب للـ OCR (4K لا يفيد قراءة اسم)
+- حذف الإطارات شبه المتطابقة (الاسم عادة ثابت على الشاشة)
+- كشف سريع لمناطق النص (كثافة الحواف) وقص المناطق المرشحة فقط
+- التعرف على كل المناطق في استدعاء واحد (batch) بدون مرحلة الكشف في EasyOCR
+"""
+import logging
+from collections import deque
+import numpy as np
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+SIGNATURE_SIZE = (32, 18)
+CELL = 8
+MOSAIC_GAP = 8
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+# ==================== Frames ====================
+
+def to_gray(frame):
+    """إطار BGR أو رمادي إلى رمادي uint8"""
+    if frame.ndim == 2:
+        return frame
+    try:
+        import cv2
+        return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    except ImportError:
+        pass
+    # BGR بأوزان ITU-R 601 (نفس cv2.COLOR_BGR2GRAY)
+    return (frame[..., 0] * 0.114 + frame[..., 1] * 0.587 + frame[..., 2] * 0.299).astype(np.uint8)
+
+
+def downscale(frame, max_side=None):
+    """تصغير الإطار بحيث لا يتجاوز أطول ضلع max_side"""
+    max_side = max_side or _setting('VIDEO_OCR_MAX_SIDE', 1280)
+    height, width = frame.shape[:2]
+    scale = max_side / max(height, width)
+    if scale >= 1:
+        return frame
+    size = (max(1, int(width * scale)), max(1, int(height * scale)))
+    try:
+        import cv2
+        return cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+    except ImportError:
+        from PIL import Image
+        return np.asarray(Image.fromarray(frame).resize(size, Image.BOX))
+
+
+def signature(gray):
+    """بصمة صغيرة للإطار (متوسط كتل) لمقارنة الإطارات المتشابهة"""
+    cols, rows = SIGNATURE_SIZE
+    height, width = gray.shape
+    if height < rows or width < cols:
+        return gray.astype(np.float32)
+    block_h, block_w = height // rows, width // cols
+    trimmed = gray[:block_h * rows, :block_w * cols].astype(np.float32)
+    return trimmed.reshape(rows, block_h, cols, block_w).mean(axis=(1, 3))
+
+
+def is_duplicate(a, b, threshold=None):
+    """هل البصمتان لإطارين شبه متطابقين؟ (متوسط الفرق المطلق بمقياس 0-255)"""
+    if a is None or b is None or a.shape != b.shape:
+        return False
+    threshold = _setting('VIDEO_OCR_DEDUP_THRESHOLD', 4.0) if threshold is None else threshold
+    return float(np.abs(a - b).mean()) < threshold
+
+
+class FrameFilter:
+    """تصغير الإطارات وحذف المتكرر منها"""
+
+    def __init__(self, max_side=None, threshold=None):
+        self.max_side = max_side
+        self.threshold = threshold
+        self.last_signature = None
+        self.sampled = 0
+        self.dropped = 0
+
+    def add(self, frame):
+        """
+        Returns:
+            ndarray | None: الإطار الرمادي المصغر أو None إذا كان مكرراً
+        """
+        self.sampled += 1
+        gray = downscale(to_gray(frame), self.max_side)
+        current = signature(gray)
+        if is_duplicate(current, self.last_signature, self.threshold):
+            self.dropped += 1
+            return None
+        self.last_signature = current
+        return gray
+
+
+def sample_tail_frames(file_path, seconds=None, per_second=None, max_frames=None):
+    """
+    إطارات آخر الثواني من الفيديو (رمادية، مصغرة، بدون تكرار)
+
+    Returns:
+        tuple: (قائمة الإطارات، إحصائيات {'decoded', 'sampled', 'kept', 'resolution'})
+
+    Raises:
+        ValueError: إذا تعذر فتح الفيديو
+    """
+    import cv2
+
+    seconds = seconds or _setting('VIDEO_OCR_TAIL_SECONDS', 5)
+    per_second = per_second or _setting('VIDEO_OCR_SAMPLES_PER_SECOND', 2)
+    max_frames = max_frames or _setting('VIDEO_OCR_MAX_FRAMES', 10)
+
+    video = cv2.VideoCapture(file_path)
+    if not video.isOpened():
+        raise ValueError('فشل في فتح الفيديو')
+
+    frames_filter = FrameFilter()
+    decoded = 0
+    try:
+        fps = video.get(cv2.CAP_PROP_FPS) or 0
+        total = int(video.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+        resolution = (int(video.get(cv2.CAP_PROP_FRAME_WIDTH)), int(video.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+        step = max(1, int(round((fps or 30) / per_second)))
+
+        if fps > 0 and total > 0:
+            # قفزة واحدة إلى بداية النافذة ثم قراءة تسلسلية
+            start = max(0, total - int(fps * seconds))
+            if start:
+                video.set(cv2.CAP_PROP_POS_FRAMES, start)
+            kept = []
+        else:
+            # عدد الإطارات غير معروف (بعض صيغ webm) - قراءة كاملة مع الاحتفاظ بآخر العينات فقط
+            kept = deque(maxlen=seconds * per_second)
+
+        index = 0
+        while video.grab():
+            decoded += 1
+            if index % step == 0:
+                ok, frame = video.retrieve()
+                # الإطار يُصغّر فوراً - لا نحتفظ بإطارات بالدقة الكاملة
+                gray = frames_filter.add(frame) if ok else None
+                if gray is not None:
+                    kept.append(gray)
+            index += 1
+    finally:
+        video.release()
+
+    kept = list(kept)
+    if len(kept) > max_frames:
+        # توزيع متساوٍ على النافذة مع الاحتفاظ بالإطار الأخير
+        positions = np.linspace(0, len(kept) - 1, max_frames).round().astype(int)
+        kept = [kept[i] for i in sorted(set(positions))]
+
+    return kept, {
+        'decoded': decoded,
+        'sampled': frames_filter.sampled,
+        'kept': len(kept),
+        'resolution': resolution,
+    }
+
+
+# ==================== Text regions ====================
+
+def _components(mask):
+    """المكونات المتصلة (8 اتجاهات) في شبكة الخلايا - Returns: [(row0, row1, col0, col1)]"""
+    rows, cols = mask.shape
+    seen = np.zeros_like(mask, dtype=bool)
+    boxes = []
+    for r, c in zip(*np.nonzero(mask)):
+        if seen[r, c]:
+            continue
+        stack = [(r, c)]
+        seen[r, c] = True
+        r0 = r1 = r
+        c0 = c1 = c
+        while stack:
+            y, x = stack.pop()
+            r0, r1, c0, c1 = min(r0, y), max(r1, y), min(c0, x), max(c1, x)
+            for ny in range(max(0, y - 1), min(rows, y + 2)):
+                for nx in range(max(0, x - 1), min(cols, x + 2)):
+                    if mask[ny, nx] and not seen[ny, nx]:
+                        seen[ny, nx] = True
+                        stack.append((ny, nx))
+        boxes.append((r0, r1, c0, c1))
+    return boxes
+
+
+def _merge_lines(boxes):
+    """دمج كلمات نفس السطر (تداخل رأسي وفراغ أفقي صغير) في منطقة واحدة"""
+    boxes = sorted(boxes, key=lambda box: box[2])
+    merged = True
+    while merged:
+        merged = False
+        result = []
+        for box in boxes:
+            for i, other in enumerate(result):
+                overlap = min(box[1], other[1]) - max(box[0], other[0]) + 1
+                height = min(box[1] - box[0], other[1] - other[0]) + 1
+                gap = max(box[2], other[2]) - min(box[3], other[3]) - 1
+                if overlap * 2 >= height and gap <= max(2, height):
+                    result[i] = (
+                        min(box[0], other[0]), max(box[1], other[1]),
+                        min(box[2], other[2]), max(box[3], other[3]),
+                    )
+                    merged = True
+                    break
+            else:
+                result.append(box)
+        boxes = result
+    return boxes
+
+
+def text_regions(gray, max_regions=None):
+    """
+    مناطق مرشحة لاحتواء نص (حواف أفقية كثيفة في صفوف متجاورة)
+
+    Returns:
+        list: [[x_min, x_max, y_min, y_max]] بصيغة horizontal_list في EasyOCR، الأكبر أولاً
+    """
+    max_regions = max_regions or _setting('VIDEO_OCR_MAX_REGIONS', 12)
+    height, width = gray.shape
+    rows, cols = height // CELL, width // CELL
+    if rows < 2 or cols < 2:
+        return []
+
+    image = gray[:rows * CELL, :cols * CELL].astype(np.int16)
+    # الحروف تعطي تغيرات حادة متكررة في الاتجاه الأفقي
+    edges = np.abs(np.diff(image, axis=1)) > _setting('VIDEO_OCR_EDGE_THRESHOLD', 40)
+    edges = np.pad(edges, ((0, 0), (0, 1)))
+    density = edges.reshape(rows, CELL, cols, CELL).mean(axis=(1, 3))
+    mask = density > _setting('VIDEO_OCR_EDGE_DENSITY', 0.08)
+
+    # وصل الحروف المتباعدة في نفس السطر
+    joined = mask.copy()
+    joined[:, 1:] |= mask[:, :-1]
+    joined[:, :-1] |= mask[:, 1:]
+
+    regions = []
+    for r0, r1, c0, c1 in _merge_lines(_components(joined)):
+        box_w, box_h = c1 - c0 + 1, r1 - r0 + 1
+        # سطر نص: أعرض من ارتفاعه ولا يغطي الإطار كاملاً
+        if box_w < 3 or box_w < box_h or box_h > rows // 2:
+            continue
+        regions.append((
+            box_w * box_h,
+            [
+                int(max(0, (c0 - 1) * CELL)), int(min(width, (c1 + 2) * CELL)),
+                int(max(0, (r0 - 1) * CELL)), int(min(height, (r1 + 2) * CELL)),
+            ],
+        ))
+    regions.sort(key=lambda item: -item[0])
+    return [box for _, box in regions[:max_regions]]
+
+
+def collect_crops(frames):
+    """
+    قص مناطق النص من كل الإطارات مع حذف القصاصات المتكررة بين الإطارات
+
+    Returns:
+        list: قصاصات رمادية
+    """
+    crops = []
+    signatures = []
+    for gray in frames:
+        for x0, x1, y0, y1 in text_regions(gray):
+            crop = gray[y0:y1, x0:x1]
+            current = signature(crop)
+            if any(is_duplicate(current, previous) for previous in signatures):
+                continue
+            signatures.append(current)
+            crops.append(crop)
+    return crops
+
+
+def build_mosaic(crops, max_height=None):
+    """
+    تجميع القصاصات في صور عمودية لاستدعاء تعرف واحد لكل صورة
+
+    Returns:
+        list: [(الصورة، [[x_min, x_max, y_min, y_max]])]
+    """
+    max_height = max_height or _setting('VIDEO_OCR_MOSAIC_MAX_HEIGHT', 4096)
+    mosaics = []
+    group = []
+    group_height = 0
+    for crop in crops:
+        if group and group_height + crop.shape[0] + MOSAIC_GAP > max_height:
+            mosaics.append(group)
+            group, group_height = [], 0
+        group.append(crop)
+        group_height += crop.shape[0] + MOSAIC_GAP
+    if group:
+        mosaics.append(group)
+
+    result = []
+    for group in mosaics:
+        width = max(crop.shape[1] for crop in group)
+        height = sum(crop.shape[0] + MOSAIC_GAP for crop in group)
+        canvas = np.full((height, width), 255, dtype=np.uint8)
+        boxes = []
+        y = 0
+        for crop in group:
+            h, w = crop.shape
+            canvas[y:y + h, :w] = crop
+            boxes.append([0, w, y, y + h])
+            y += h + MOSAIC_GAP
+        result.append((canvas, boxes))
+    return result
+
+
+# ==================== Recognition ====================
+
+def recognize_regions(reader, crops, batch_size=None):
+    """التعرف على القصاصات دفعة واحدة (بدون مرحلة كشف النص في EasyOCR)"""
+    batch_size = batch_size or _setting('VIDEO_OCR_BATCH_SIZE', 8)
+    texts = []
+    for canvas, boxes in build_mosaic(crops):
+        if hasattr(reader, 'recognize'):
+            texts.extend(reader.recognize(
+                canvas, horizontal_list=boxes, free_list=[], batch_size=batch_size, detail=0
+            ))
+        else:
+            for x0, x1, y0, y1 in boxes:
+                texts.extend(reader.readtext(canvas[y0:y1, x0:x1], detail=0))
+    return [text for text in texts if text]
+
+
+def read_full(reader, frames):
+    """قراءة الإطارات كاملة (كشف + تعرف)"""
+    texts = []
+    for gray in frames:
+        texts.extend(reader.readtext(gray, detail=0))
+    return texts
+
+
+def name_match(student_name, text):
+    """
+    نسبة أجزاء اسم الطالب الموجودة في النص
+
+    Returns:
+        tuple: (النسبة المئوية، الأجزاء الموجودة، عدد الأجزاء)
+    """
+    from apps.projects.utils import normalize_arabic_name
+
+    name_parts = normalize_arabic_name(student_name).split()
+    detected = normalize_arabic_name(text)
+    found = sum(1 for part in name_parts if part in detected)
+    return ((found / len(name_parts)) * 100 if name_parts else 0), found, len(name_parts)
+
+
+def read_name(reader, frames, student_name, required=75):
+    """
+    قراءة النص من الإطارات ومطابقة اسم الطالب
+
+    المناطق المقصوصة أولاً؛ إذا لم يكتمل التطابق تُقرأ كل الإطارات المحتفظ بها
+    كاملة (محدودة بـ VIDEO_OCR_MAX_FRAMES) كما في القراءة الكاملة السابقة،
+    فالاسم الظاهر قبل نهاية الفيديو بثوانٍ لا يفوت إذا كان آخر إطار معتماً.
+
+    Returns:
+        dict: {'text', 'match_percentage', 'found_parts', 'name_parts', 'regions', 'mode'}
+    """
+    crops = collect_crops(frames)
+    if crops:
+        texts = recognize_regions(reader, crops)
+        mode = 'regions'
+    else:
+        texts = read_full(reader, frames)
+        mode = 'full'
+
+    percentage, found, parts = name_match(student_name, ' '.join(texts))
+    if percentage < required and mode == 'regions' and frames:
+        texts += read_full(reader, frames)
+        percentage, found, parts = name_match(student_name, ' '.join(texts))
+        mode = 'regions+full'
+
+    return {
+        'text': ' '.join(texts),
+        'match_percentage': percentage,
+        'found_parts': found,
+        'name_parts': parts,
+        'regions': len(crops),
+        'mode': mode,
+    }
@@ -0,0 +1,160 @@
+"""
+Video Proxy for AI Analysis
+تجهيز نسخة خفيفة من الفيديو قبل إرسالها إلى Gemini
+
+- نسخة proxy بدقة ومعدل بت منخفضين عبر ffmpeg (بدلاً من الملف الأصلي)
+- بديل بدون ffmpeg: شريط إطارات (keyframe strip) كصورة واحدة بدون رفع
+- مرجع الملف المرفوع يُحفظ حسب hash المحتوى، فإعادة الفحص لا تعيد الرفع
+"""
+import os
+import logging
+import tempfile
+import subprocess
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+def make_proxy(file_path, output_path):
+    """
+    إنشاء نسخة منخفضة الدقة ومعدل البت من الفيديو
+
+    Returns:
+        str: مسار النسخة
+
+    Raises:
+        FileNotFoundError: ffmpeg غير متوفر
+        subprocess.SubprocessError: فشل التحويل
+    """
+    binary = getattr(settings, 'FFMPEG_BINARY', 'ffmpeg')
+    height = getattr(settings, 'GEMINI_PROXY_HEIGHT', 360)
+    fps = getattr(settings, 'GEMINI_PROXY_FPS', 2)
+    crf = getattr(settings, 'GEMINI_PROXY_CRF', 32)
+    max_seconds = getattr(settings, 'GEMINI_PROXY_MAX_SECONDS', 0)
+
+    command = [binary, '-nostdin', '-v', 'error', '-y', '-i', file_path]
+    if max_seconds:
+        command += ['-t', str(max_seconds)]
+    command += [
+        # Gemini يحلل الفيديو بمعدل إطار واحد في الثانية تقريباً
+        '-vf', f"fps={fps},scale=-2:'min({height},ih)'",
+        '-c:v', 'libx264', '-preset', 'veryfast', '-crf', str(crf),
+        '-c:a', 'aac', '-b:a', '32k', '-ac', '1',
+        '-movflags', '+faststart',
+        output_path,
+    ]
+    subprocess.run(
+        command,
+        capture_output=True,
+        timeout=getattr(settings, 'GEMINI_PROXY_TIMEOUT', 120),
+        check=True
+    )
+    return output_path
+
+
+def make_keyframe_strip(file_path, frames=None, frame_width=None, columns=4):
+    """
+    شريط إطارات موزعة على مدة الفيديو في صورة واحدة
+
+    Returns:
+        PIL.Image | None
+    """
+    import cv2
+    from PIL import Image
+
+    frames = frames or getattr(settings, 'GEMINI_KEYFRAME_COUNT', 8)
+    frame_width = frame_width or getattr(settings, 'GEMINI_KEYFRAME_WIDTH', 320)
+
+    video = cv2.VideoCapture(file_path)
+    images = []
+    try:
+        total = int(video.get(cv2.CAP_PROP_FRAME_COUNT))
+        if total <= 0:
+            return None
+        for i in range(frames):
+            video.set(cv2.CAP_PROP_POS_FRAMES, int((i + 0.5) * total / frames))
+            ret, frame = video.read()
+            if not ret:
+                continue
+            image = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+            image.thumbnail((frame_width, frame_width))
+            images.append(image)
+    finally:
+        video.release()
+
+    if not images:
+        return None
+
+    tile_w = max(image.width for image in images)
+    tile_h = max(image.height for image in images)
+    columns = min(columns, len(images))
+    rows = (len(images) + columns - 1) // columns
+    strip = Image.new('RGB', (tile_w * columns, tile_h * rows))
+    for i, image in enumerate(images):
+        strip.paste(image, ((i % columns) * tile_w, (i // columns) * tile_h))
+    return strip
+
+
+def _upload_proxy(file_path, file_hash):
+    """رفع نسخة proxy (تُحذف من القرص بعد الرفع)"""
+    from utils import gemini_client
+
+    fd, proxy_path = tempfile.mkstemp(suffix='.mp4', prefix='gemini_proxy_')
+    os.close(fd)
+    try:
+        make_proxy(file_path, proxy_path)
+        original_size = os.path.getsize(file_path)
+        proxy_size = os.path.getsize(proxy_path)
+        logger.info(
+            f"📦 نسخة proxy للفيديو: {proxy_size / 1024:.0f}KB بدلاً من {original_size / 1024:.0f}KB"
+        )
+        return gemini_client.upload_file(
+            proxy_path,
+            cache_key=f'{file_hash}:proxy' if file_hash else None,
+            mime_type='video/mp4'
+        )
+    finally:
+        os.remove(proxy_path)
+
+
+def get_video_input(file_path, file_hash=None):
+    """
+    مدخل الفيديو لطلب Gemini
+
+    الترتيب حسب GEMINI_VIDEO_INPUT:
+        proxy: ملف مرفوع محفوظ -> نسخة proxy -> شريط إطارات -> الملف الأصلي
+        keyframes: شريط إطارات -> الملف الأصلي
+        original: الملف الأصلي (مع حفظ مرجعه)
+
+    Returns:
+        tuple: (المدخل: File أو PIL.Image، النوع: 'proxy' | 'keyframes' | 'original')
+    """
+    from utils import gemini_client
+
+    mode = getattr(settings, 'GEMINI_VIDEO_INPUT', 'proxy')
+
+    if mode == 'proxy':
+        remote = gemini_client.get_cached_file(f'{file_hash}:proxy') if file_hash else None
+        if remote:
+            logger.info(f"♻️ استخدام نسخة الفيديو المرفوعة سابقاً ({remote.name})")
+            return remote, 'proxy'
+        try:
+            return _upload_proxy(file_path, file_hash), 'proxy'
+        except (FileNotFoundError, subprocess.SubprocessError) as e:
+            logger.warning(f"⚠️ تعذر إنشاء نسخة proxy للفيديو: {str(e)}")
+
+    if mode in ('proxy', 'keyframes'):
+        try:
+            strip = make_keyframe_strip(file_path)
+            if strip is not None:
+                return strip, 'keyframes'
+        except ImportError:
+            pass
+        except Exception as e:
+            logger.warning(f"⚠️ تعذر استخراج إطارات الفيديو: {str(e)}")
+
+    cache_key = f'{file_hash}:original' if file_hash else None
+    remote = gemini_client.get_cached_file(cache_key) if cache_key else None
+    if remote:
+        return remote, 'original'
+    return gemini_client.upload_file(file_path, cache_key=cache_key), 'original'
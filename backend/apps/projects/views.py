@@ -1,7 +1,9 @@
 """
 Views for Projects App
 """
+from django.conf import settings
 from django.utils import timezone
+from django.views.decorators.http import require_GET, require_http_methods
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes, parser_classes
 from rest_framework.permissions import IsAuthenticated, AllowAny
@@ -14,6 +16,8 @@ from .serializers import (
     SubmissionSerializer, SubmissionReviewSerializer
 )
 from utils.storage import secure_upload
+from utils.validation import InputValidator
+from . import chunked_upload, media_delivery
 import logging
 
 logger = logging.getLogger(__name__)
@@ -107,6 +111,10 @@ def project_detail(request, pk):
             
             serializer.save()
             
+            # نتائج التحقق المخزنة لم تعد صالحة بعد تعديل المشروع
+            from .validation_cache import invalidate_project
+            invalidate_project(project)
+            
             logger.info(f"Project updated: {project.title}")
             
             return Response({
@@ -270,10 +278,8 @@ def upload_submission(request):
         from apps.projects.utils import FileValidator
         
         validator = FileValidator(uploaded_file, project)
-        validation_result = validator.validate_all()
         
-        # إذا كانت هناك أخطاء، نرفض الملف
-        if not validation_result['valid']:
+        def rejected(validation_result):
             logger.warning(f"File validation failed: {uploaded_file.name}")
             return Response({
                 'error': 'الملف لا يستوفي الشروط',
@@ -283,14 +289,29 @@ def upload_submission(request):
                 }
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # رفع الملف بشكل آمن
-        result = secure_upload.save_file(uploaded_file, subfolder=f'projects/{project_id}')
+        # الحجم والامتداد والاسم قبل قراءة الملف
+        if not validator.validate_metadata():
+            return rejected({'errors': validator.errors, 'warnings': validator.warnings})
+        
+        # رفع الملف بشكل آمن (مرور واحد: الحفظ + hash + النوع + فحص الفيروسات)
+        result = secure_upload.save_file(
+            uploaded_file,
+            max_size=project.max_file_size * 1024 * 1024
+        )
         
         if not result['success']:
             return Response({
                 'error': result['error']
             }, status=status.HTTP_400_BAD_REQUEST)
         
+        # باقي الفحوصات من نتيجة الحفظ (بدون قراءة الملف مرة أخرى)
+        validation_result = validator.validate_all(upload=result['upload'])
+        
+        # إذا كانت هناك أخطاء، نرفض الملف
+        if not validation_result['valid']:
+            result['upload'].discard()
+            return rejected(validation_result)
+        
         # إنشاء سجل التسليم
         submission = Submission.objects.create(
             project=project,
@@ -298,9 +319,9 @@ def upload_submission(request):
             student=student,
             file_path=result['file_path'],
             file_name=uploaded_file.name,
-            file_size=uploaded_file.size,
+            file_size=result['upload'].size,
             file_type=uploaded_file.content_type,
-            file_hash=validation_result['file_info']['hash'],
+            file_hash=result['upload'].sha256,
             validation_data=validation_result,
             # بيانات الفحص
             virus_scanned=validation_result['virus_scan'].get('scanned', False),
@@ -312,6 +333,10 @@ def upload_submission(request):
         
         logger.info(f"Submission uploaded: {uploaded_file.name} for project {project.title}")
         
+        # معاينة قائمة المعلم (لا يوجد تحقق AI في هذا المسار)
+        from .previews import enqueue
+        enqueue(submission)
+        
         return Response({
             'message': 'تم رفع المشروع بنجاح',
             'submission': SubmissionSerializer(submission).data,
@@ -397,12 +422,17 @@ def submission_list(request, project_id):
                 'error': 'لم يتم العثور على المشروع'
             }, status=status.HTTP_404_NOT_FOUND)
         
-        submissions = Submission.objects.filter(project=project)
-        serializer = SubmissionSerializer(submissions, many=True)
+        submissions = list(Submission.objects.filter(project=project))
+        data = SubmissionSerializer(submissions, many=True).data
+        
+        # روابط موقّعة لمعاينة الملفات (تدعم Range لتقليب الفيديو)
+        for item, submission in zip(data, submissions):
+            item['media_url'] = media_delivery.signed_url(request, submission, teacher)
+            item['preview'] = _preview_data(request, submission, teacher)
         
         return Response({
-            'submissions': serializer.data,
-            'count': submissions.count()
+            'submissions': data,
+            'count': len(submissions)
         }, status=status.HTTP_200_OK)
         
     except Exception as e:
@@ -413,6 +443,23 @@ def submission_list(request, project_id):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+def _preview_data(request, submission, teacher):
+    """معاينة التسليم في قائمة المعلم (رابط المصغّرة أو الشكل الموجي - بضع مئات من البايتات)"""
+    preview = submission.previews or {}
+    if not preview:
+        return None
+    data = {'kind': preview.get('kind')}
+    if preview.get('thumbnail'):
+        data.update(
+            thumbnail_url=media_delivery.preview_url(request, submission, teacher),
+            width=preview.get('width'),
+            height=preview.get('height')
+        )
+    if 'waveform' in preview:
+        data['waveform'] = preview['waveform']
+    return data
+
+
 @api_view(['PUT'])
 @permission_classes([IsAuthenticated])
 def review_submission(request, submission_id):
@@ -462,6 +509,273 @@ def review_submission(request, submission_id):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def submission_text_preview(request, submission_id):
+    """
+    معاينة نص التسليم للمعلم (من مخزن النصوص المستخرجة)
+    
+    Query params:
+        page: رقم أول صفحة (يبدأ من 1)
+        count: عدد الصفحات (حد أقصى 10)
+    """
+    try:
+        email = request.user.email if hasattr(request.user, 'email') else request.auth.get('email')
+        teacher = Teacher.objects.filter(email=email).first()
+        
+        if not teacher:
+            return Response({
+                'error': 'لم يتم العثور على المعلم'
+            }, status=status.HTTP_404_NOT_FOUND)
+        
+        submission = Submission.objects.filter(pk=submission_id, project__teacher=teacher).first()
+        
+        if not submission:
+            return Response({
+                'error': 'لم يتم العثور على التسليم'
+            }, status=status.HTTP_404_NOT_FOUND)
+        
+        from .text_store import get_for_submission, kind_for_name
+        
+        if not kind_for_name(submission.file_path):
+            return Response({
+                'error': 'لا يمكن معاينة نص هذا النوع من الملفات'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            page = max(1, int(request.query_params.get('page', 1)))
+            count = min(10, max(1, int(request.query_params.get('count', 1))))
+        except ValueError:
+            return Response({
+                'error': 'رقم الصفحة غير صحيح'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        document = get_for_submission(submission)
+        first = page - 1
+        last = min(first + count, document.extracted_pages)
+        
+        return Response({
+            'submission_id': submission.id,
+            'kind': document.kind,
+            'page_count': document.page_count,
+            'word_count': document.word_count,
+            'page_word_counts': document.page_word_counts,
+            'pages': [
+                {
+                    'number': index + 1,
+                    'text': document.page(index),
+                    'word_count': document.page_word_counts[index]
+                }
+                for index in range(first, last)
+            ]
+        }, status=status.HTTP_200_OK)
+        
+    except Exception as e:
+        logger.error(f"Error in submission_text_preview: {str(e)}")
+        return Response({
+            'error': 'حدث خطأ',
+            'details': str(e)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def submission_media_link(request, submission_id):
+    """رابط موقّع لملف التسليم (لعناصر <video>/<iframe> التي لا ترسل رأس Authorization)"""
+    try:
+        email = request.user.email if hasattr(request.user, 'email') else request.auth.get('email')
+        teacher = Teacher.objects.filter(email=email).first()
+        
+        if not teacher:
+            return Response({
+                'error': 'لم يتم العثور على المعلم'
+            }, status=status.HTTP_404_NOT_FOUND)
+        
+        submission = Submission.objects.filter(pk=submission_id, project__teacher=teacher).first()
+        
+        if not submission:
+            return Response({
+                'error': 'لم يتم العثور على التسليم'
+            }, status=status.HTTP_404_NOT_FOUND)
+        
+        return Response({
+            'submission_id': submission.id,
+            'url': media_delivery.signed_url(request, submission, teacher),
+            'expires_in': settings.MEDIA_LINK_MAX_AGE
+        }, status=status.HTTP_200_OK)
+        
+    except Exception as e:
+        logger.error(f"Error in submission_media_link: {str(e)}")
+        return Response({
+            'error': 'حدث خطأ',
+            'details': str(e)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@require_http_methods(['GET', 'HEAD'])
+def submission_media(request, token):
+    """
+    ملف التسليم مع دعم HTTP Range و ETag
+    
+    view عادي بدون DRF: الصلاحية من الرابط الموقّع (submission_media_link)
+    والملف يُقدّم عبر FileResponse/sendfile أو الخادم الأمامي (MEDIA_ACCEL_BACKEND).
+    """
+    import os
+    from django.http import JsonResponse
+    
+    claims = media_delivery.unsign(token)
+    if claims is None:
+        return JsonResponse({'error': 'الرابط غير صالح أو منتهي الصلاحية'}, status=403)
+    
+    submission_id, teacher_id = claims
+    submission = Submission.objects.filter(pk=submission_id, project__teacher_id=teacher_id).first()
+    if not submission or not submission.file_path or not os.path.isfile(submission.file_path):
+        return JsonResponse({'error': 'لم يتم العثور على الملف'}, status=404)
+    
+    return media_delivery.serve(request, submission.file_path, submission.file_name, submission.file_hash)
+
+
+@require_http_methods(['GET', 'HEAD'])
+def submission_preview(request, token):
+    """
+    مصغّرة التسليم (WebP) بتخزين طويل في المتصفح
+    
+    الرابط ثابت داخل نافذة صلاحيته والمصغّرة مشتقة من hash المحتوى فلا تتغير (immutable).
+    """
+    import os
+    import time
+    from django.http import JsonResponse
+    
+    claims = media_delivery.unsign_preview(token)
+    if claims is None:
+        return JsonResponse({'error': 'الرابط غير صالح أو منتهي'}, status=403)
+    
+    submission_id, teacher_id, expires = claims
+    submission = Submission.objects.filter(pk=submission_id, project__teacher_id=teacher_id).first()
+    thumbnail = (submission.previews or {}).get('thumbnail') if submission else None
+    path = os.path.join(settings.MEDIA_ROOT, thumbnail) if thumbnail else None
+    if not path or not os.path.isfile(path):
+        return JsonResponse({'error': 'لا توجد معاينة'}, status=404)
+    
+    return media_delivery.serve(
+        request, path, f'{submission.id}.webp',
+        file_hash=f'{submission.file_hash}-thumb',
+        cache_control=f'private, max-age={min(settings.PREVIEW_CACHE_MAX_AGE, int(expires - time.time()))}, immutable'
+    )
+
+
+@api_view(['GET', 'POST', 'DELETE'])
+@permission_classes([IsAuthenticated])
+def project_revalidation(request, project_id):
+    """
+    إعادة التحقق الجماعية من كل تسليمات المشروع
+    
+    GET: حالة آخر مهمة (أو ?job_id=)
+    POST: بدء مهمة جديدة (أو إرجاع المهمة الجارية / استئناف مهمة فاشلة)
+    DELETE: إلغاء المهمة الجارية
+    """
+    try:
+        email = request.user.email if hasattr(request.user, 'email') else request.auth.get('email')
+        teacher = Teacher.objects.filter(email=email).first()
+        
+        if not teacher:
+            return Response({
+                'error': 'لم يتم العثور على المعلم'
+            }, status=status.HTTP_404_NOT_FOUND)
+        
+        project = Project.objects.filter(pk=project_id, teacher=teacher).first()
+        
+        if not project:
+            return Response({
+                'error': 'لم يتم العثور على المشروع'
+            }, status=status.HTTP_404_NOT_FOUND)
+        
+        from .revalidation import start_job, job_status
+        
+        if request.method == 'POST':
+            job, created = start_job(project, requested_by=teacher)
+            return Response({
+                'success': True,
+                'created': created,
+                'job': job_status(job)
+            }, status=status.HTTP_202_ACCEPTED)
+        
+        jobs = project.revalidation_jobs.order_by('-created_at')
+        if request.query_params.get('job_id'):
+            jobs = jobs.filter(pk=request.query_params.get('job_id'))
+        job = jobs.first()
+        
+        if not job:
+            return Response({
+                'error': 'لا توجد عملية إعادة تحقق لهذا المشروع'
+            }, status=status.HTTP_404_NOT_FOUND)
+        
+        if request.method == 'DELETE':
+            if job.is_active:
+                job.status = 'cancelled'
+                job.finished_at = timezone.now()
+                job.save(update_fields=['status', 'finished_at', 'updated_at'])
+        
+        return Response({'job': job_status(job)}, status=status.HTTP_200_OK)
+        
+    except Exception as e:
+        logger.error(f"Error in project_revalidation: {str(e)}")
+        return Response({
+            'error': 'حدث خطأ',
+            'details': str(e)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def validation_metrics(request):
+    """
+    زمن وموارد كل فحص تحقق (p50/p95) حسب نوع الملف والمشروع
+    
+    Query params:
+        project_id: مشروع واحد (اختياري)
+        file_type: نوع ملف واحد (اختياري)
+        days: الفترة بالأيام (افتراضي 30)
+        limit: أقصى عدد تسليمات (افتراضي VALIDATION_METRICS_LIMIT)
+    """
+    try:
+        email = request.user.email if hasattr(request.user, 'email') else request.auth.get('email')
+        teacher = Teacher.objects.filter(email=email).first()
+        
+        if not teacher:
+            return Response({
+                'error': 'لم يتم العثور على المعلم'
+            }, status=status.HTTP_404_NOT_FOUND)
+        
+        max_limit = getattr(settings, 'VALIDATION_METRICS_LIMIT', 2000)
+        try:
+            days = max(1, int(request.query_params.get('days', 30)))
+            limit = min(max_limit, max(1, int(request.query_params.get('limit', max_limit))))
+            project_id = int(request.query_params['project_id']) if request.query_params.get('project_id') else None
+        except ValueError:
+            return Response({
+                'error': 'قيم غير صحيحة في days أو limit أو project_id'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        from .check_metrics import collect
+        
+        report = collect(
+            teacher,
+            project_id=project_id,
+            file_type=request.query_params.get('file_type') or None,
+            days=days,
+            limit=limit
+        )
+        return Response({'success': True, **report}, status=status.HTTP_200_OK)
+        
+    except Exception as e:
+        logger.error(f"Error in validation_metrics: {str(e)}")
+        return Response({
+            'error': 'حدث خطأ',
+            'details': str(e)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def send_project_telegram(request, project_id):
@@ -533,6 +847,120 @@ def send_project_telegram(request, project_id):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+def _submission_limits(project):
+    """الامتدادات المسموحة وحد الحجم (MB) لتسليمات المشروع"""
+    allowed_formats = project.file_constraints.get('formats', []) or project.allowed_file_types
+    max_size_mb = project.file_constraints.get('max_size_mb') or project.max_file_size
+    return allowed_formats, max_size_mb
+
+
+def _check_submission_allowed(project, student_id, file_name, file_size):
+    """
+    فحوصات ما قبل الرفع (المحاولات، الموعد النهائي، النوع، الحجم)
+    
+    Returns:
+        Response | None: رد الخطأ أو None إذا كان التسليم مسموحاً
+    """
+    import os
+    
+    # 2. التحقق من عدد المحاولات
+    previous_attempts = Submission.objects.filter(
+        project=project,
+        submitted_student_id=student_id
+    ).count()
+    
+    if previous_attempts >= project.max_attempts:
+        return Response({
+            'error': f'لقد تجاوزت الحد الأقصى للمحاولات ({project.max_attempts})',
+            'attempts': previous_attempts,
+            'max_attempts': project.max_attempts
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    # 3. التحقق من الموعد النهائي
+    if project.is_expired and not project.allow_late_submission:
+        return Response({
+            'error': 'انتهى موعد التسليم',
+            'deadline': project.deadline
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    # 4. التحقق من نوع الملف
+    file_extension = os.path.splitext(file_name)[1].lower().replace('.', '')
+    allowed_formats, max_size_mb = _submission_limits(project)
+    
+    if allowed_formats and file_extension not in allowed_formats:
+        return Response({
+            'error': f'نوع الملف غير مقبول. المسموح: {", ".join(allowed_formats)}',
+            'file_type': file_extension,
+            'allowed': allowed_formats
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    # 5. التحقق من الحجم
+    if file_size > max_size_mb * 1024 * 1024:
+        return Response({
+            'error': f'حجم الملف كبير جداً. الحد الأقصى: {max_size_mb} MB',
+            'file_size': file_size / (1024 * 1024),  # MB
+            'max_size': max_size_mb
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    return None
+
+
+def _create_ai_submission(project, student_name, student_id, file_path, file_name, file_size, file_extension, file_hash):
+    """
+    إنشاء التسليم وإرساله للتحقق بالـ AI
+    
+    Returns:
+        Response: رد 201 بمعلومات التسليم
+    """
+    previous_attempts = Submission.objects.filter(
+        project=project,
+        submitted_student_id=student_id
+    ).count()
+    
+    # 7. إنشاء Submission
+    submission = Submission.objects.create(
+        project=project,
+        submitted_student_name=student_name,
+        submitted_student_id=student_id,
+        file_path=file_path,
+        file_name=file_name,
+        file_size=file_size,
+        file_type=file_extension,
+        file_hash=file_hash,
+        attempt_number=previous_attempts + 1,
+        validation_status='pending'
+    )
+    
+    logger.info(f"✅ تم إنشاء Submission #{submission.id} للمشروع #{project.id}")
+    
+    # 8. إضافة للـ Queue للمعالجة بالـ AI
+    if project.ai_validation_enabled:
+        from .queues import dispatch_validation
+        dispatch_validation(submission)
+        
+        message = 'تم رفع المشروع بنجاح. جاري التحليل بالذكاء الاصطناعي...'
+    else:
+        submission.validation_status = 'pending'
+        submission.save()
+        message = 'تم رفع المشروع بنجاح. في انتظار مراجعة المعلم.'
+        
+        # بدون تحقق AI: المعاينة لا تنتظر نهاية التحقق
+        from .previews import enqueue
+        enqueue(submission)
+    
+    return Response({
+        'success': True,
+        'message': message,
+        'submission': {
+            'id': submission.id,
+            'attempt_number': submission.attempt_number,
+            'remaining_attempts': project.max_attempts - submission.attempt_number,
+            'status': submission.validation_status,
+            'submitted_at': submission.submitted_at
+        }
+    }, status=status.HTTP_201_CREATED)
+
+
 @api_view(['POST'])
 @permission_classes([AllowAny])
 @parser_classes([MultiPartParser, FormParser])
@@ -553,53 +981,18 @@ def submit_project_with_ai(request, project_id):
                 'error': 'جميع الحقول مطلوبة (student_name, student_id, file)'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # 2. التحقق من عدد المحاولات
-        previous_attempts = Submission.objects.filter(
-            project=project,
-            submitted_student_id=student_id
-        ).count()
-        
-        if previous_attempts >= project.max_attempts:
-            return Response({
-                'error': f'لقد تجاوزت الحد الأقصى للمحاولات ({project.max_attempts})',
-                'attempts': previous_attempts,
-                'max_attempts': project.max_attempts
-            }, status=status.HTTP_400_BAD_REQUEST)
-        
-        # 3. التحقق من الموعد النهائي
-        if project.is_expired and not project.allow_late_submission:
-            return Response({
-                'error': 'انتهى موعد التسليم',
-                'deadline': project.deadline
-            }, status=status.HTTP_400_BAD_REQUEST)
-        
-        # 4. التحقق من نوع الملف
-        import os
-        file_extension = os.path.splitext(file.name)[1].lower().replace('.', '')
-        allowed_formats = project.file_constraints.get('formats', []) or project.allowed_file_types
-        
-        if allowed_formats and file_extension not in allowed_formats:
-            return Response({
-                'error': f'نوع الملف غير مقبول. المسموح: {", ".join(allowed_formats)}',
-                'file_type': file_extension,
-                'allowed': allowed_formats
-            }, status=status.HTTP_400_BAD_REQUEST)
+        # 2-5. المحاولات والموعد النهائي والنوع والحجم
+        error_response = _check_submission_allowed(project, student_id, file.name, file.size)
+        if error_response:
+            return error_response
         
-        # 5. التحقق من الحجم
-        max_size_mb = project.file_constraints.get('max_size_mb') or project.max_file_size
-        max_size_bytes = max_size_mb * 1024 * 1024
-        
-        if file.size > max_size_bytes:
-            return Response({
-                'error': f'حجم الملف كبير جداً. الحد الأقصى: {max_size_mb} MB',
-                'file_size': file.size / (1024 * 1024),  # MB
-                'max_size': max_size_mb
-            }, status=status.HTTP_400_BAD_REQUEST)
+        allowed_formats, max_size_mb = _submission_limits(project)
+        file_extension = file.name.rsplit('.', 1)[-1].lower() if '.' in file.name else ''
         
         # 6. حفظ الملف بشكل آمن
-        upload_result = secure_upload(
+        upload_result = secure_upload.save_file(
             file,
-            subfolder=f'projects/{project.id}',
+            max_size=max_size_mb * 1024 * 1024,
             allowed_extensions=allowed_formats
         )
         
@@ -609,45 +1002,107 @@ def submit_project_with_ai(request, project_id):
                 'details': upload_result.get('error', 'Unknown error')
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
         
-        file_path = upload_result['file_path']
-        
-        # 7. إنشاء Submission
-        submission = Submission.objects.create(
-            project=project,
-            submitted_student_name=student_name,
-            submitted_student_id=student_id,
-            file_path=file_path,
+        # 7-8. إنشاء التسليم وإرساله للتحقق
+        return _create_ai_submission(
+            project, student_name, student_id,
+            file_path=upload_result['file_path'],
             file_name=file.name,
-            file_size=file.size,
-            file_type=file_extension,
-            attempt_number=previous_attempts + 1,
-            validation_status='pending'
+            file_size=upload_result['upload'].size,
+            file_extension=file_extension,
+            file_hash=upload_result['upload'].sha256
         )
         
-        logger.info(f"✅ تم إنشاء Submission #{submission.id} للمشروع #{project.id}")
+    except Project.DoesNotExist:
+        return Response({
+            'error': 'المشروع غير موجود أو غير نشط'
+        }, status=status.HTTP_404_NOT_FOUND)
+    
+    except Exception as e:
+        logger.error(f"❌ Error in submit_project_with_ai: {str(e)}", exc_info=True)
+        return Response({
+            'error': 'حدث خطأ أثناء رفع المشروع',
+            'details': str(e)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+def _upload_session_data(session):
+    return {
+        'upload_id': session.upload_id,
+        'status': session.status,
+        'offset': session.received,
+        'file_size': session.file_size,
+        'chunk_size': chunked_upload.chunk_size(),
+        'expires_at': session.expires_at,
+        'submission_id': session.submission_id,
+        'error': session.error or None,
+    }
+
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def start_chunked_upload(request, project_id):
+    """
+    بدء رفع ملف كبير على أجزاء (قابل للاستئناف)
+    
+    Body: submit_token، student_id، file_name، file_size
+    """
+    try:
+        from apps.otp_system.models import ProjectOTP
         
-        # 8. إضافة للـ Queue للمعالجة بالـ AI
-        if project.ai_validation_enabled:
-            from .tasks import process_submission_with_ai
-            process_submission_with_ai.delay(submission.id)
-            
-            message = 'تم رفع المشروع بنجاح. جاري التحليل بالذكاء الاصطناعي...'
-        else:
-            submission.validation_status = 'pending'
-            submission.save()
-            message = 'تم رفع المشروع بنجاح. في انتظار مراجعة المعلم.'
+        project = Project.objects.get(id=project_id, is_active=True)
         
-        return Response({
-            'success': True,
-            'message': message,
-            'submission': {
-                'id': submission.id,
-                'attempt_number': submission.attempt_number,
-                'remaining_attempts': project.max_attempts - submission.attempt_number,
-                'status': submission.validation_status,
-                'submitted_at': submission.submitted_at
-            }
-        }, status=status.HTTP_201_CREATED)
+        submit_token = request.data.get('submit_token')
+        student_id = request.data.get('student_id')
+        file_name = request.data.get('file_name')
+        
+        try:
+            file_size = int(request.data.get('file_size'))
+        except (TypeError, ValueError):
+            file_size = 0
+        
+        if not all([submit_token, student_id, file_name]) or file_size <= 0:
+            return Response({
+                'error': 'جميع الحقول مطلوبة (submit_token, student_id, file_name, file_size)'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        otp_record = ProjectOTP.objects.filter(
+            submit_token=submit_token,
+            status='verified',
+            project_id=project.id,
+            submit_token_expires__gt=timezone.now()
+        ).first()
+        
+        if not otp_record:
+            return Response({
+                'error': 'رمز التسليم غير صالح أو منتهي'
+            }, status=status.HTTP_401_UNAUTHORIZED)
+        
+        # رفض الملف قبل رفع أي جزء (المحاولات، الموعد، النوع، الحجم)
+        error_response = _check_submission_allowed(project, student_id, file_name, file_size)
+        if error_response:
+            return error_response
+        
+        if not InputValidator.is_safe_filename(file_name) or '.' not in file_name:
+            return Response({
+                'error': 'اسم الملف غير آمن'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        if file_size > settings.MAX_UPLOAD_SIZE:
+            return Response({
+                'error': f'حجم الملف كبير جداً. الحد الأقصى: {settings.MAX_UPLOAD_SIZE // (1024 * 1024)} MB'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        chunked_upload.cleanup_expired()
+        session = chunked_upload.start(
+            project, otp_record,
+            student_name=otp_record.student_name,
+            student_id=student_id,
+            file_name=file_name,
+            file_ext=file_name.rsplit('.', 1)[-1].lower(),
+            file_size=file_size
+        )
+        
+        return Response(_upload_session_data(session), status=status.HTTP_201_CREATED)
         
     except Project.DoesNotExist:
         return Response({
@@ -655,9 +1110,93 @@ def submit_project_with_ai(request, project_id):
         }, status=status.HTTP_404_NOT_FOUND)
     
     except Exception as e:
-        logger.error(f"❌ Error in submit_project_with_ai: {str(e)}", exc_info=True)
+        logger.error(f"❌ Error in start_chunked_upload: {str(e)}", exc_info=True)
         return Response({
-            'error': 'حدث خطأ أثناء رفع المشروع',
+            'error': 'حدث خطأ أثناء بدء الرفع',
+            'details': str(e)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET', 'PUT', 'DELETE'])
+@permission_classes([AllowAny])
+def chunked_upload_detail(request, upload_id):
+    """
+    GET: الموضع الحالي (للاستئناف بعد الانقطاع)
+    PUT: رفع جزء (الجسم خام، رأس Upload-Offset) - بعد آخر جزء يُنشأ التسليم؛
+         PUT فارغ عند Upload-Offset = file_size يعيد محاولة الإنهاء بعد فشله
+    DELETE: إلغاء الرفع
+    """
+    from .models import UploadSession
+    
+    session = UploadSession.objects.select_related('project').filter(upload_id=upload_id).first()
+    if not session:
+        return Response({
+            'error': 'جلسة الرفع غير موجودة'
+        }, status=status.HTTP_404_NOT_FOUND)
+    
+    if request.method == 'GET':
+        return Response(_upload_session_data(session), status=status.HTTP_200_OK)
+    
+    if request.method == 'DELETE':
+        if session.status == 'uploading':
+            chunked_upload.reject(session, 'ألغى الطالب الرفع')
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    
+    try:
+        project = session.project
+        allowed_formats, _ = _submission_limits(project)
+        
+        try:
+            offset = int(request.headers.get('Upload-Offset', request.query_params.get('offset', '')))
+            length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            return Response({
+                'error': 'Upload-Offset غير صالح'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        # الجسم يُقرأ مباشرة من الطلب على دفعات (بدون تحميله في الذاكرة)
+        chunked_upload.write_chunk(session, offset, request.stream, length, allowed_formats or None)
+        
+        if session.received < session.file_size:
+            return Response(_upload_session_data(session), status=status.HTTP_200_OK)
+        
+        # رمز التسليم يُستخدم لتسليم واحد فقط
+        if session.otp_id and session.otp.status == 'used':
+            chunked_upload.reject(session, 'رمز التسليم مستخدم بالفعل')
+            return Response({
+                'error': 'رمز التسليم مستخدم بالفعل'
+            }, status=status.HTTP_409_CONFLICT)
+        
+        # آخر جزء: فحص الفيروسات ونقل الملف ثم إنشاء التسليم
+        result = chunked_upload.finalize(session)
+        response = _create_ai_submission(
+            project, session.student_name, session.student_id,
+            file_path=result['file_path'],
+            file_name=session.file_name,
+            file_size=result['size'],
+            file_extension=session.file_ext,
+            file_hash=result['sha256']
+        )
+        
+        session.status = 'completed'
+        session.submission_id = response.data['submission']['id']
+        session.save(update_fields=['status', 'submission', 'updated_at'])
+        if session.otp_id:
+            session.otp.mark_as_used()
+        
+        response.data['upload'] = _upload_session_data(session)
+        return response
+        
+    except chunked_upload.UploadError as e:
+        return Response({
+            'error': e.message,
+            **e.extra
+        }, status=e.status)
+    
+    except Exception as e:
+        logger.error(f"❌ Error in chunked_upload_detail: {str(e)}", exc_info=True)
+        return Response({
+            'error': 'حدث خطأ أثناء رفع الجزء',
             'details': str(e)
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -699,6 +1238,81 @@ def check_submission_status_view(request, submission_id):
         }, status=status.HTTP_404_NOT_FOUND)
 
 
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def submission_progress(request, submission_id):
+    """
+    نتائج الفحوصات أولاً بأول
+    
+    الرد فوري بالحالة الحالية (بدون انتظار داخل الخادم)، ورأس Retry-After
+    يحدد موعد الاستعلام التالي حتى تصل النتيجة النهائية.
+    
+    Query params:
+        since: آخر رقم إصدار وصل للطالب (changed=False إذا لم يصدر أحدث منه)
+    """
+    from .progress import get_state, retry_after
+    
+    try:
+        since = int(request.query_params.get('since', 0))
+    except ValueError:
+        return Response({
+            'error': 'قيمة غير صحيحة'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    state = get_state(submission_id)
+    
+    if state is None:
+        return Response({
+            'error': 'التسليم غير موجود'
+        }, status=status.HTTP_404_NOT_FOUND)
+    
+    retry = retry_after(state)
+    response = Response(dict(
+        state,
+        changed=state['version'] > since or state['done'],
+        retry_after=retry
+    ), status=status.HTTP_200_OK)
+    if retry:
+        response['Retry-After'] = str(retry)
+    return response
+
+
+@require_GET
+def submission_progress_stream(request, submission_id):
+    """
+    نتائج الفحوصات أولاً بأول (Server-Sent Events)
+    
+    view عادي بدون DRF لأن EventSource يرسل Accept: text/event-stream.
+    الرد قصير: الحالة إذا تغيرت منذ Last-Event-ID ثم يُغلق الاتصال، والمتصفح
+    يعيد الاتصال تلقائياً بعد retry (لا يُحجز worker أثناء انتظار التحديث).
+    """
+    import json
+    from django.http import HttpResponse, JsonResponse
+    from .progress import get_state, retry_after
+    
+    state = get_state(submission_id)
+    if state is None:
+        return JsonResponse({'error': 'التسليم غير موجود'}, status=404)
+    
+    try:
+        since = int(request.headers.get('Last-Event-ID') or request.GET.get('since', 0))
+    except ValueError:
+        since = 0
+    
+    retry = retry_after(state)
+    lines = [f'retry: {int((retry or settings.VALIDATION_PROGRESS_RETRY_AFTER) * 1000)}\n\n']
+    if state['version'] > since or state['done']:
+        # done: العميل يغلق EventSource عند هذا الحدث
+        event = 'done' if state['done'] else 'progress'
+        lines.append(f"id: {state['version']}\nevent: {event}\ndata: {json.dumps(state, ensure_ascii=False)}\n\n")
+    else:
+        lines.append(': no-change\n\n')
+    
+    response = HttpResponse(''.join(lines), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    return response
+
+
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def verify_student_for_submission(request):
@@ -7,8 +7,7 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 from apps.accounts.models import Teacher
-from django.conf import settings
-import google.generativeai as genai
+from utils import gemini_client
 import logging
 from .prompts import (
     PROFESSIONAL_PROMPTS,
@@ -19,9 +18,7 @@ from .prompts import (
 
 logger = logging.getLogger(__name__)
 
-# Configure Gemini
-genai.configure(api_key=settings.GEMINI_API_KEY)
-model = genai.GenerativeModel('models/gemini-2.5-flash')  # Latest stable & fast model
+GEMINI_MODEL = 'models/gemini-2.5-flash'  # Latest stable & fast model
 
 
 def get_teacher_from_request(request):
@@ -90,7 +87,7 @@ def generate_project_content(request):
 def generate_with_gemini(prompt):
     """استدعاء Gemini API"""
     try:
-        response = model.generate_content(prompt)
+        response = gemini_client.get_model(GEMINI_MODEL).generate_content(prompt)
         return response.text.strip()
     except Exception as e:
         logger.error(f"Gemini API Error: {str(e)}")
@@ -2,7 +2,6 @@
 Views for Project Creation
 Updated: 2025-10-24 22:42 - Force reload
 """
-import os
 import logging
 import jwt
 from django.conf import settings
@@ -248,7 +247,7 @@ def handle_project_files(request, project):
         # Video file
         if 'video' in request.FILES:
             video = request.FILES['video']
-            file_path = save_file(video, 'projects/videos')
+            file_path = save_file(video)
             
             ProjectFile.objects.create(
                 project=project,
@@ -274,7 +273,7 @@ def handle_project_files(request, project):
         if 'pdfs' in request.FILES:
             pdfs = request.FILES.getlist('pdfs')
             for pdf in pdfs[:5]:  # Max 5 files
-                file_path = save_file(pdf, 'projects/pdfs')
+                file_path = save_file(pdf)
                 ProjectFile.objects.create(
                     project=project,
                     file_type='pdf',
@@ -288,7 +287,7 @@ def handle_project_files(request, project):
         if 'docs' in request.FILES:
             docs = request.FILES.getlist('docs')
             for doc in docs[:5]:  # Max 5 files
-                file_path = save_file(doc, 'projects/docs')
+                file_path = save_file(doc)
                 ProjectFile.objects.create(
                     project=project,
                     file_type='doc',
@@ -318,28 +317,15 @@ def handle_project_files(request, project):
         return files_saved
 
 
-def save_file(uploaded_file, subfolder):
-    """Save uploaded file and return path"""
-    import hashlib
-    from datetime import datetime
+def save_file(uploaded_file):
+    """Save uploaded file in the content-addressed media store and return its relative path
     
-    # Create directory
-    base_dir = os.path.join(settings.MEDIA_ROOT, subfolder)
-    os.makedirs(base_dir, exist_ok=True)
-    
-    # Generate unique filename
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    name, ext = os.path.splitext(uploaded_file.name)
-    filename = f"{timestamp}_{hashlib.md5(name.encode()).hexdigest()[:8]}{ext}"
-    
-    # Save file
-    file_path = os.path.join(base_dir, filename)
-    with open(file_path, 'wb+') as destination:
-        for chunk in uploaded_file.chunks():
-            destination.write(chunk)
+    Identical files (the same worksheet attached to many projects) are stored once
+    and reference-counted; see utils.media_store.
+    """
+    from utils.media_store import save_uploaded
     
-    # Return relative path
-    return os.path.join(subfolder, filename)
+    return save_uploaded(uploaded_file)
 
 
 def send_project_to_telegram(project):
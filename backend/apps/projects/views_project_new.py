@@ -11,6 +11,7 @@ from rest_framework.response import Response
 from rest_framework import status
 
 from .models import Project, ProjectFile
+from utils.media_store import save_uploaded
 from .serializers_new import ProjectCreateSerializer
 from apps.sections.models import Section
 from apps.accounts.models import Teacher
@@ -165,7 +166,7 @@ def create_project_v2(request):
             ProjectFile.objects.create(
                 project=project,
                 file_type='video',
-                file_path=f'projects/{project.id}/{video_file.name}',
+                file_path=save_uploaded(video_file),
                 file_name=video_file.name,
                 file_size=video_file.size
             )
@@ -176,7 +177,7 @@ def create_project_v2(request):
             ProjectFile.objects.create(
                 project=project,
                 file_type='pdf',
-                file_path=f'projects/{project.id}/{pdf.name}',
+                file_path=save_uploaded(pdf),
                 file_name=pdf.name,
                 file_size=pdf.size
             )
@@ -187,7 +188,7 @@ def create_project_v2(request):
             ProjectFile.objects.create(
                 project=project,
                 file_type='doc',
-                file_path=f'projects/{project.id}/{doc.name}',
+                file_path=save_uploaded(doc),
                 file_name=doc.name,
                 file_size=doc.size
             )
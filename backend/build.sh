@@ -34,6 +34,9 @@ python manage.py collectstatic --no-input
 # Run migrations
 python manage.py migrate
 
+# Index text and image fingerprints for earlier submissions (skips indexed ones)
+python manage.py index_fingerprints --kind text --kind image
+
 # Create superuser if doesn't exist (optional)
 python manage.py shell << EOF
 from django.contrib.auth import get_user_model
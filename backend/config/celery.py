@@ -3,6 +3,7 @@ Celery Configuration
 """
 import os
 from celery import Celery
+from celery.signals import worker_process_init, before_task_publish, task_prerun
 
 # Set default Django settings
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
@@ -16,6 +17,36 @@ app.config_from_object('django.conf:settings', namespace='CELERY')
 # Auto-discover tasks from all registered Django apps
 app.autodiscover_tasks()
 
+
+@worker_process_init.connect
+def preload_ocr_readers(**kwargs):
+    """تحميل قارئ EasyOCR مسبقاً في كل عملية worker (اختياري)"""
+    from django.conf import settings
+    
+    if getattr(settings, 'OCR_PRELOAD_ON_WORKER_START', False):
+        from apps.projects.ocr_pool import preload_readers
+        preload_readers()
+
+
+@before_task_publish.connect
+def stamp_publish_time(headers=None, **kwargs):
+    """تسجيل وقت إرسال المهمة لحساب زمن الانتظار في الطابور"""
+    if headers is not None:
+        from apps.projects.queues import stamp_ready_at
+        stamp_ready_at(headers)
+
+
+@task_prerun.connect
+def report_queue_lag(task=None, **kwargs):
+    """حساب زمن انتظار المهمة في طابورها عند بدء التنفيذ"""
+    from apps.projects.queues import track_task_start
+    
+    try:
+        track_task_start(task)
+    except Exception:
+        pass
+
+
 @app.task(bind=True)
 def debug_task(self):
     """Debug task for testing"""
@@ -228,6 +228,24 @@ ALLOWED_EXTENSIONS = os.getenv('ALLOWED_EXTENSIONS', 'pdf,docx,xlsx,jpg,jpeg,png
 CLAMAV_HOST = os.getenv('CLAMAV_HOST', '127.0.0.1')
 CLAMAV_PORT = int(os.getenv('CLAMAV_PORT', 3310))
 
+# الرفع على أجزاء (قابل للاستئناف)
+UPLOAD_CHUNK_SIZE = int(os.getenv('UPLOAD_CHUNK_SIZE', 2 * 1024 * 1024))  # حجم الجزء المقترح للعميل
+UPLOAD_CHUNK_MAX_SIZE = int(os.getenv('UPLOAD_CHUNK_MAX_SIZE', 8 * 1024 * 1024))  # أقصى حجم لجزء واحد
+UPLOAD_SESSION_TTL_HOURS = int(os.getenv('UPLOAD_SESSION_TTL_HOURS', '24'))  # مدة صلاحية جلسة الرفع
+
+# تقديم ملفات التسليمات للمعلم (Range + روابط موقّعة)
+MEDIA_LINK_MAX_AGE = int(os.getenv('MEDIA_LINK_MAX_AGE', '3600'))  # صلاحية الرابط الموقّع بالثواني
+MEDIA_ACCEL_BACKEND = os.getenv('MEDIA_ACCEL_BACKEND', '')  # '' (Django) أو nginx (X-Accel-Redirect) أو sendfile (X-Sendfile)
+MEDIA_ACCEL_PREFIX = os.getenv('MEDIA_ACCEL_PREFIX', '/protected-media/')  # موقع internal في nginx يشير إلى MEDIA_ROOT
+
+# معاينات التسليمات (تُنشأ في الخلفية بعد التحقق)
+PREVIEW_THUMBNAIL_SIDE = int(os.getenv('PREVIEW_THUMBNAIL_SIDE', '320'))  # أقصى طول لضلع المصغّرة
+PREVIEW_THUMBNAIL_QUALITY = int(os.getenv('PREVIEW_THUMBNAIL_QUALITY', '70'))  # جودة WebP
+PREVIEW_WAVEFORM_POINTS = int(os.getenv('PREVIEW_WAVEFORM_POINTS', '64'))  # عدد نقاط الشكل الموجي للصوت
+PREVIEW_TIMEOUT = int(os.getenv('PREVIEW_TIMEOUT', '60'))  # مهلة ffmpeg لإطار الغلاف
+PREVIEW_CACHE_MAX_AGE = int(os.getenv('PREVIEW_CACHE_MAX_AGE', str(30 * 24 * 3600)))  # تخزين المصغّرة في المتصفح (بحد أقصى صلاحية الرابط)
+PREVIEW_LINK_MAX_AGE = int(os.getenv('PREVIEW_LINK_MAX_AGE', str(7 * 24 * 3600)))  # أقصى صلاحية لرابط المصغّرة
+
 # Frontend URL
 FRONTEND_URL = os.getenv('FRONTEND_URL', 'http://localhost:5500')
 
@@ -274,6 +292,23 @@ OTP_SECRET_KEY = os.getenv('OTP_SECRET_KEY', SECRET_KEY)
 
 # Gemini AI Configuration
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
+GEMINI_MAX_CONCURRENCY = int(os.getenv('GEMINI_MAX_CONCURRENCY', '4'))  # أقصى طلبات متزامنة لكل عملية
+GEMINI_MAX_RETRIES = int(os.getenv('GEMINI_MAX_RETRIES', '4'))  # إعادة المحاولة عند تجاوز الحصة
+GEMINI_RETRY_BASE_DELAY = float(os.getenv('GEMINI_RETRY_BASE_DELAY', '2'))  # ثواني (تتضاعف مع كل محاولة)
+GEMINI_RETRY_MAX_DELAY = float(os.getenv('GEMINI_RETRY_MAX_DELAY', '60'))
+GEMINI_CACHE_TTL = int(os.getenv('GEMINI_CACHE_TTL', '3600'))  # مدة صلاحية الردود المحفوظة (0 = بدون cache)
+GEMINI_CACHE_MAX_ENTRIES = int(os.getenv('GEMINI_CACHE_MAX_ENTRIES', '512'))
+GEMINI_FILE_ACTIVE_TIMEOUT = int(os.getenv('GEMINI_FILE_ACTIVE_TIMEOUT', '120'))  # انتظار معالجة الملف المرفوع
+GEMINI_FILE_POLL_INTERVAL = 2
+GEMINI_FILE_EXPIRY_MARGIN = 600  # حذف مرجع الملف قبل انتهاء صلاحيته في Gemini (ثواني)
+GEMINI_VIDEO_INPUT = os.getenv('GEMINI_VIDEO_INPUT', 'proxy')  # proxy | keyframes | original
+GEMINI_PROXY_HEIGHT = int(os.getenv('GEMINI_PROXY_HEIGHT', '360'))
+GEMINI_PROXY_FPS = int(os.getenv('GEMINI_PROXY_FPS', '2'))
+GEMINI_PROXY_CRF = int(os.getenv('GEMINI_PROXY_CRF', '32'))  # جودة الترميز (أعلى = حجم أصغر)
+GEMINI_PROXY_MAX_SECONDS = int(os.getenv('GEMINI_PROXY_MAX_SECONDS', '0'))  # 0 = كامل المدة
+GEMINI_PROXY_TIMEOUT = int(os.getenv('GEMINI_PROXY_TIMEOUT', '120'))
+GEMINI_KEYFRAME_COUNT = 8
+GEMINI_KEYFRAME_WIDTH = 320
 
 # Frontend URL
 FRONTEND_URL = os.getenv('FRONTEND_URL', 'http://localhost:5500')
@@ -296,6 +331,26 @@ FRONTEND_URL = os.getenv('FRONTEND_URL', 'http://localhost:5500')
 #     }
 # }
 
+# ============================================================
+# Cache
+# ============================================================
+
+# Redis مشترك بين الـ workers إذا تم تحديده، وإلا ذاكرة محلية لكل عملية
+CACHE_URL = os.getenv('CACHE_URL', '')
+if CACHE_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
 # ============================================================
 # Celery Configuration (Background Tasks)
 # ============================================================
@@ -309,6 +364,60 @@ CELERY_TIMEZONE = 'Asia/Riyadh'
 CELERY_TASK_TRACK_STARTED = True
 CELERY_TASK_TIME_LIMIT = 30 * 60  # 30 minutes
 CELERY_TASK_SOFT_TIME_LIMIT = 25 * 60  # 25 minutes
+# أولويات الرسائل في Redis (0 = الأعلى أولوية)
+CELERY_BROKER_TRANSPORT_OPTIONS = {
+    'priority_steps': list(range(10)),
+    'queue_order_strategy': 'priority',
+}
+
+# طوابير التحقق حسب نوع ملف المشروع (Project.file_type)
+# كل طابور له worker خاص: python manage.py validation_worker <type>
+VALIDATION_QUEUES = {
+    'pdf': {
+        'queue': 'validation.pdf',
+        'concurrency': int(os.getenv('VALIDATION_PDF_CONCURRENCY', '4')),
+        'prefetch': 4,
+        'time_limit': 5 * 60,
+        'soft_time_limit': 4 * 60,
+    },
+    'document': {
+        'queue': 'validation.document',
+        'concurrency': int(os.getenv('VALIDATION_DOCUMENT_CONCURRENCY', '4')),
+        'prefetch': 4,
+        'time_limit': 5 * 60,
+        'soft_time_limit': 4 * 60,
+    },
+    'image': {
+        'queue': 'validation.image',
+        'concurrency': int(os.getenv('VALIDATION_IMAGE_CONCURRENCY', '2')),
+        'prefetch': 2,
+        'time_limit': 5 * 60,
+        'soft_time_limit': 4 * 60,
+    },
+    'audio': {
+        'queue': 'validation.audio',
+        'concurrency': int(os.getenv('VALIDATION_AUDIO_CONCURRENCY', '2')),
+        'prefetch': 1,
+        'time_limit': 15 * 60,
+        'soft_time_limit': 13 * 60,
+    },
+    'video': {
+        'queue': 'validation.video',
+        'concurrency': int(os.getenv('VALIDATION_VIDEO_CONCURRENCY', '1')),
+        'prefetch': 1,
+        'time_limit': 30 * 60,
+        'soft_time_limit': 25 * 60,
+    },
+}
+VALIDATION_URGENT_HOURS = int(os.getenv('VALIDATION_URGENT_HOURS', '24'))  # التسليمات قرب الموعد النهائي أولاً
+VALIDATION_LAG_WARNING_SECONDS = int(os.getenv('VALIDATION_LAG_WARNING_SECONDS', '120'))
+REVALIDATION_CHUNK_SIZE = int(os.getenv('REVALIDATION_CHUNK_SIZE', '25'))  # تسليمات في كل bulk_update / نقطة استئناف
+REVALIDATION_WORKERS = int(os.getenv('REVALIDATION_WORKERS', '4'))  # تسليمات تُعالج بالتوازي داخل الدفعة
+REVALIDATION_SLICE_SECONDS = int(os.getenv('REVALIDATION_SLICE_SECONDS', '600'))  # مدة كل شريحة قبل إعادة الإرسال
+REVALIDATION_STALE_SECONDS = int(os.getenv('REVALIDATION_STALE_SECONDS', '1800'))  # مهمة بدون نبضة لهذه المدة تُعتبر متوقفة وتُستأنف (أطول من مهلة ملف واحد)
+VALIDATION_PROGRESS_TTL = 3600  # مدة بقاء تقدم التحقق في الـ cache
+VALIDATION_PROGRESS_RETRY_AFTER = int(os.getenv('VALIDATION_PROGRESS_RETRY_AFTER', '2'))  # ثواني بين استعلامات تقدم التحقق (Retry-After)
+VALIDATION_METRICS_LIMIT = int(os.getenv('VALIDATION_METRICS_LIMIT', '2000'))  # أقصى عدد تسليمات في تجميع قياسات الفحوصات
 
 # ============================================================
 # AI Validation Settings
@@ -318,6 +427,58 @@ AI_VALIDATION_ENABLED = os.getenv('AI_VALIDATION_ENABLED', 'True').lower() == 't
 AI_DEFAULT_THRESHOLD = int(os.getenv('AI_DEFAULT_THRESHOLD', '70'))
 PLAGIARISM_THRESHOLD = int(os.getenv('PLAGIARISM_THRESHOLD', '50'))
 MAX_SUBMISSION_ATTEMPTS = int(os.getenv('MAX_SUBMISSION_ATTEMPTS', '5'))
+SIMILARITY_MAX_TEXT_CHARS = int(os.getenv('SIMILARITY_MAX_TEXT_CHARS', '20000'))  # حد النص في بصمة التشابه
+IMAGE_SIMILARITY_MAX_DISTANCE = int(os.getenv('IMAGE_SIMILARITY_MAX_DISTANCE', '15'))  # أقصى مسافة Hamming لاعتبار الصور متشابهة
+DOCUMENT_STRUCTURE_THRESHOLD = int(os.getenv('DOCUMENT_STRUCTURE_THRESHOLD', '90'))  # أقل تشابه بنيوي (شرائح/أوراق/صور مضمّنة) للتحذير
+DOCUMENT_STRUCTURE_MIN_TOKENS = int(os.getenv('DOCUMENT_STRUCTURE_MIN_TOKENS', '8'))  # أقل عدد عناصر بنيوية لاعتبار البنية مميزة
+IMAGE_INDEX_CACHED_PROJECTS = int(os.getenv('IMAGE_INDEX_CACHED_PROJECTS', '64'))  # عدد المشاريع المحمّلة في فهرس الصور لكل عملية
+IMAGE_QUALITY_PREVIEW_SIDE = int(os.getenv('IMAGE_QUALITY_PREVIEW_SIDE', '512'))  # حجم المعاينة لمقاييس الحدة والإضاءة
+IMAGE_QUALITY_MAX_DECODE_PIXELS = int(os.getenv('IMAGE_QUALITY_MAX_DECODE_PIXELS', '25000000'))  # أقصى بكسلات لفك صورة غير JPEG كاملة
+IMAGE_BLUR_THRESHOLD = float(os.getenv('IMAGE_BLUR_THRESHOLD', '100'))  # أقل تباين Laplacian (على المعاينة) قبل التحذير من الضبابية - بدون خصم من الدرجة
+IMAGE_ANALYSIS_MAX_SIDE = int(os.getenv('IMAGE_ANALYSIS_MAX_SIDE', '2048'))  # حجم الصورة المرسلة لـ Gemini Vision
+VIDEO_FINGERPRINT_FRAMES = int(os.getenv('VIDEO_FINGERPRINT_FRAMES', '16'))  # عدد الإطارات في بصمة الفيديو
+VIDEO_KEYFRAME_MATCH_DISTANCE = int(os.getenv('VIDEO_KEYFRAME_MATCH_DISTANCE', '10'))  # أقصى مسافة Hamming لتطابق إطارين
+VIDEO_SIMILARITY_MIN_REPORT = int(os.getenv('VIDEO_SIMILARITY_MIN_REPORT', '80'))  # أقل تشابه يتم الإبلاغ عنه
+
+# تشغيل الفحوصات المستقلة بالتوازي مع مهلة لكل فحص (بالثواني)
+AI_VALIDATION_PARALLEL = os.getenv('AI_VALIDATION_PARALLEL', 'True').lower() == 'true'
+AI_VALIDATION_MAX_WORKERS = int(os.getenv('AI_VALIDATION_MAX_WORKERS', '4'))
+AI_CHECK_DEFAULT_TIMEOUT = int(os.getenv('AI_CHECK_DEFAULT_TIMEOUT', '120'))
+AI_CHECK_TIMEOUTS = {
+    'ocr': int(os.getenv('AI_CHECK_TIMEOUT_OCR', '180')),
+    'content_analysis': int(os.getenv('AI_CHECK_TIMEOUT_CONTENT', '90')),
+    'vision_analysis': int(os.getenv('AI_CHECK_TIMEOUT_CONTENT', '90')),
+    'similarity': int(os.getenv('AI_CHECK_TIMEOUT_SIMILARITY', '60')),
+    'plagiarism': int(os.getenv('AI_CHECK_TIMEOUT_SIMILARITY', '60')),
+    'statistics': 30,
+    'quality': 30,
+}
+
+# Media Probe (قراءة المدة والدقة من رأس الملف)
+FFPROBE_BINARY = os.getenv('FFPROBE_BINARY', 'ffprobe')
+MEDIA_PROBE_TIMEOUT = int(os.getenv('MEDIA_PROBE_TIMEOUT', '15'))
+MEDIA_PROBE_CACHE_TIMEOUT = int(os.getenv('MEDIA_PROBE_CACHE_TIMEOUT', str(7 * 24 * 3600)))
+
+# PDF Extraction (صفحات بالتوازي مع توقف مبكر)
+PDF_EXTRACT_PROCESSES = int(os.getenv('PDF_EXTRACT_PROCESSES', '2'))  # 1 = بدون عمليات فرعية
+PDF_EXTRACT_START_METHOD = os.getenv('PDF_EXTRACT_START_METHOD', 'spawn')
+PDF_EXTRACT_BATCH_PAGES = int(os.getenv('PDF_EXTRACT_BATCH_PAGES', '4'))
+PDF_EXTRACT_BATCH_TIMEOUT = int(os.getenv('PDF_EXTRACT_BATCH_TIMEOUT', '120'))
+PDF_EXTRACT_TARGET_CHARS = int(os.getenv('PDF_EXTRACT_TARGET_CHARS', '20000'))  # ما تحتاجه فحوصات التحقق
+PDF_OCR_MAX_PAGES = int(os.getenv('PDF_OCR_MAX_PAGES', '10'))  # صفحات بدون نص تُقرأ بـ OCR
+
+# Speech-to-Text (نوافذ متوازية على كامل الملف)
+FFMPEG_BINARY = os.getenv('FFMPEG_BINARY', 'ffmpeg')
+STT_BACKEND = os.getenv('STT_BACKEND', 'google')  # google | vosk | whisper
+STT_LANGUAGES = [lang.strip() for lang in os.getenv('STT_LANGUAGES', 'ar-SA,en-US').split(',') if lang.strip()]
+STT_SAMPLE_RATE = 16000
+STT_WINDOW_SECONDS = int(os.getenv('STT_WINDOW_SECONDS', '30'))
+STT_WINDOW_OVERLAP_SECONDS = int(os.getenv('STT_WINDOW_OVERLAP_SECONDS', '1'))
+STT_MAX_WORKERS = int(os.getenv('STT_MAX_WORKERS', '4'))
+STT_MAX_SECONDS = int(os.getenv('STT_MAX_SECONDS', '0'))  # 0 = كامل الملف
+STT_SILENCE_RMS = int(os.getenv('STT_SILENCE_RMS', '100'))
+VOSK_MODEL_PATH = os.getenv('VOSK_MODEL_PATH', '')
+WHISPER_MODEL = os.getenv('WHISPER_MODEL', 'base')
 
 # Video Processing
 VIDEO_MAX_DURATION = int(os.getenv('VIDEO_MAX_DURATION', '30'))
@@ -327,3 +488,19 @@ VIDEO_ALLOWED_FORMATS = os.getenv('VIDEO_ALLOWED_FORMATS', 'mp4,mov,avi').split(
 
 # OCR Settings
 TESSERACT_LANGUAGES = os.getenv('TESSERACT_LANGUAGES', 'ara+eng')
+
+# OCR Reader Pool (EasyOCR)
+OCR_READER_POOL_SIZE = int(os.getenv('OCR_READER_POOL_SIZE', '1'))  # قارئات لكل عملية worker
+OCR_READER_MAX_MEMORY_MB = int(os.getenv('OCR_READER_MAX_MEMORY_MB', '2048'))  # لا قارئ إضافي فوق هذا الحد
+OCR_READER_ACQUIRE_TIMEOUT = int(os.getenv('OCR_READER_ACQUIRE_TIMEOUT', '120'))
+OCR_PRELOAD_ON_WORKER_START = os.getenv('OCR_PRELOAD_ON_WORKER_START', 'False').lower() == 'true'
+OCR_PRELOAD_READERS = int(os.getenv('OCR_PRELOAD_READERS', '1'))
+
+# Video OCR (اسم الطالب في آخر الفيديو)
+VIDEO_OCR_TAIL_SECONDS = 5
+VIDEO_OCR_SAMPLES_PER_SECOND = int(os.getenv('VIDEO_OCR_SAMPLES_PER_SECOND', '2'))  # إطارات تُفحص من كل ثانية
+VIDEO_OCR_MAX_FRAMES = int(os.getenv('VIDEO_OCR_MAX_FRAMES', '10'))  # بعد حذف المكرر
+VIDEO_OCR_MAX_SIDE = int(os.getenv('VIDEO_OCR_MAX_SIDE', '1280'))  # أطول ضلع للإطار قبل OCR
+VIDEO_OCR_DEDUP_THRESHOLD = float(os.getenv('VIDEO_OCR_DEDUP_THRESHOLD', '4'))  # متوسط فرق البكسل (0-255) للإطار المكرر
+VIDEO_OCR_MAX_REGIONS = int(os.getenv('VIDEO_OCR_MAX_REGIONS', '12'))  # مناطق نص لكل إطار
+VIDEO_OCR_BATCH_SIZE = int(os.getenv('VIDEO_OCR_BATCH_SIZE', '8'))  # مناطق في كل دفعة تعرف
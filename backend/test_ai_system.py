@@ -210,7 +210,6 @@ def check_libraries():
         '🎬 Video': [
             ('cv2', 'OpenCV'),
             ('moviepy.editor', 'MoviePy'),
-            ('videohash', 'VideoHash'),
         ],
         '📄 PDF': [
             ('pdfplumber', 'PDFPlumber'),
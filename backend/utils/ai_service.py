@@ -22,10 +22,10 @@ class AIContentGenerator:
         
         if self.enabled:
             try:
-                genai.configure(api_key=self.api_key)
+                from utils import gemini_client
                 # استخدام أحدث موديل متاح (Gemini 2.5 Flash)
                 # سريع جداً ومجاني ويدعم العربية بشكل ممتاز
-                self.model = genai.GenerativeModel('models/gemini-2.5-flash')
+                self.model = gemini_client.get_model('models/gemini-2.5-flash')
                 logger.info("✅ Gemini AI initialized successfully (gemini-2.5-flash)")
             except Exception as e:
                 logger.error(f"❌ Failed to initialize Gemini: {e}")
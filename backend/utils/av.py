@@ -2,6 +2,8 @@
 نظام فحص الفيروسات باستخدام ClamAV
 """
 import os
+import socket
+import struct
 import logging
 from django.conf import settings
 
@@ -15,6 +17,89 @@ except ImportError:
     logger.warning("pyclamd not installed. Antivirus scanning disabled.")
 
 
+class InstreamScan:
+    """
+    فحص تدفقي عبر أمر INSTREAM في clamd
+    الأجزاء تُرسل أثناء قراءة الملف بدلاً من تحميله كاملاً في الذاكرة
+    
+    Usage:
+        scan = av_scanner.open_stream()
+        for chunk in uploaded_file.chunks():
+            scan.send(chunk)
+        result = scan.finish()
+    """
+    
+    def __init__(self, host, port, timeout=30):
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.sock.sendall(b'zINSTREAM\0')
+        self.error = None
+    
+    def send(self, chunk: bytes):
+        """إرسال جزء من الملف (يتوقف بصمت بعد أول خطأ ويُبلغ عنه في finish)"""
+        if self.error or not chunk:
+            return
+        try:
+            self.sock.sendall(struct.pack('!L', len(chunk)) + chunk)
+        except OSError as e:
+            # clamd يغلق الاتصال عند تجاوز StreamMaxLength - الرد يوضح السبب
+            self.error = e
+    
+    def _read_reply(self) -> str:
+        reply = b''
+        while not reply.endswith(b'\0'):
+            data = self.sock.recv(4096)
+            if not data:
+                break
+            reply += data
+        return reply.rstrip(b'\0').decode('utf-8', 'replace').strip()
+    
+    def finish(self) -> dict:
+        """
+        إنهاء الإرسال وقراءة النتيجة
+        
+        Returns:
+            dict: {'is_safe': bool, 'virus_name': str or None, 'message': str}
+        """
+        try:
+            if not self.error:
+                self.sock.sendall(struct.pack('!L', 0))
+            reply = self._read_reply()
+        except OSError as e:
+            reply = ''
+            self.error = self.error or e
+        finally:
+            self.close()
+        
+        if reply.endswith('FOUND'):
+            virus_name = reply[len('stream:'):-len('FOUND')].strip() if reply.startswith('stream:') else reply
+            return {
+                'is_safe': False,
+                'virus_name': virus_name,
+                'message': f'تم اكتشاف فيروس: {virus_name}'
+            }
+        
+        if reply == 'stream: OK':
+            return {
+                'is_safe': True,
+                'virus_name': None,
+                'message': 'الملف آمن'
+            }
+        
+        error = reply or str(self.error)
+        logger.error(f"Error scanning stream: {error}")
+        return {
+            'is_safe': False,
+            'virus_name': None,
+            'message': f'خطأ في الفحص: {error}'
+        }
+    
+    def close(self):
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+
+
 class AntivirusScanner:
     """فحص الملفات من الفيروسات"""
     
@@ -144,6 +229,20 @@ class AntivirusScanner:
                 'message': f'خطأ في الفحص: {str(e)}'
             }
     
+    def open_stream(self):
+        """
+        بدء فحص تدفقي (INSTREAM)
+        
+        Returns:
+            InstreamScan | None: None إذا لم يكن ClamAV متوفراً
+            
+        Raises:
+            OSError: تعذر الاتصال بـ clamd
+        """
+        if not self.is_available():
+            return None
+        return InstreamScan(settings.CLAMAV_HOST, settings.CLAMAV_PORT, timeout=30)
+    
     def get_version(self) -> str:
         """الحصول على إصدار ClamAV"""
         if not self.is_available():
@@ -0,0 +1,33 @@
+"""
+External Call Counter
+عدّ الاستدعاءات الخارجية (Gemini، التعرف على الكلام...) داخل كتلة قياس
+
+العداد مرتبط بالخيط الحالي (contextvar)، فكل فحص يعمل في خيطه يعدّ استدعاءاته فقط.
+"""
+import contextvars
+from contextlib import contextmanager
+
+_counter = contextvars.ContextVar('external_calls', default=None)
+
+
+def record(kind, count=1):
+    """تسجيل استدعاء خارجي إذا كانت هناك كتلة قياس مفتوحة"""
+    counter = _counter.get()
+    if counter is not None:
+        counter[kind] = counter.get(kind, 0) + count
+
+
+@contextmanager
+def track():
+    """
+    Usage:
+        with track() as calls:
+            ...
+        calls  # {'gemini': 2, 'speech': 6}
+    """
+    calls = {}
+    token = _counter.set(calls)
+    try:
+        yield calls
+    finally:
+        _counter.reset(token)
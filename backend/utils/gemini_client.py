@@ -0,0 +1,365 @@
+"""
+Gemini Client
+طبقة موحدة لكل استدعاءات Google Gemini في المشروع
+
+- إعداد المكتبة (configure) مرة واحدة في العملية
+- نموذج واحد لكل اسم نموذج يُعاد استخدامه
+- حد أقصى للطلبات المتزامنة على مستوى العملية (semaphore)
+- إعادة المحاولة مع تأخير متزايد عند تجاوز الحصة (429 / quota)
+- cache للردود حسب hash (النموذج، الـ prompt، المدخلات) مع مدة صلاحية وحد للحجم
+- حفظ مرجع الملفات المرفوعة حسب hash المحتوى حتى انتهاء صلاحيتها (بدون إعادة رفع)
+"""
+import json
+import time
+import random
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from django.conf import settings
+from . import external_calls
+
+logger = logging.getLogger(__name__)
+
+
+class GeminiUnavailable(Exception):
+    """Gemini غير مفعّل (لا يوجد مفتاح API أو المكتبة غير مثبتة)"""
+
+
+class CachedResponse:
+    """رد محفوظ في الـ cache (نفس واجهة رد Gemini المستخدمة في المشروع)"""
+
+    cached = True
+
+    def __init__(self, text):
+        self.text = text
+
+
+class _Uncacheable(Exception):
+    pass
+
+
+class ResponseCache:
+    """cache في الذاكرة بمدة صلاحية وإخراج الأقدم استخداماً (LRU)"""
+
+    def __init__(self, max_entries=512, ttl=3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value):
+        if self.max_entries <= 0 or self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+FILE_CACHE_PREFIX = 'gemini_file'
+
+_configure_lock = threading.Lock()
+_configured = False
+_models = {}
+_models_lock = threading.Lock()
+_semaphore = threading.BoundedSemaphore(getattr(settings, 'GEMINI_MAX_CONCURRENCY', 4))
+_cache = ResponseCache(
+    max_entries=getattr(settings, 'GEMINI_CACHE_MAX_ENTRIES', 512),
+    ttl=getattr(settings, 'GEMINI_CACHE_TTL', 3600),
+)
+
+
+def _genai():
+    """مكتبة Gemini بعد إعدادها (مرة واحدة)"""
+    global _configured
+
+    try:
+        import google.generativeai as genai
+    except ImportError:
+        raise GeminiUnavailable('مكتبة google-generativeai غير مثبتة')
+
+    if not _configured:
+        with _configure_lock:
+            if not _configured:
+                api_key = getattr(settings, 'GEMINI_API_KEY', None)
+                if not api_key:
+                    raise GeminiUnavailable('GEMINI_API_KEY غير موجود')
+                genai.configure(api_key=api_key)
+                _configured = True
+    return genai
+
+
+def is_enabled():
+    """هل Gemini متاح للاستخدام؟"""
+    try:
+        _genai()
+        return True
+    except GeminiUnavailable:
+        return False
+
+
+def _is_retryable(error):
+    """أخطاء الحصة والضغط المؤقت التي تستحق إعادة المحاولة"""
+    try:
+        from google.api_core import exceptions
+        if isinstance(error, (
+            exceptions.ResourceExhausted,
+            exceptions.TooManyRequests,
+            exceptions.ServiceUnavailable,
+            exceptions.InternalServerError,
+            exceptions.DeadlineExceeded,
+        )):
+            return True
+    except ImportError:
+        pass
+
+    message = str(error).lower()
+    return '429' in message or 'quota' in message or 'rate limit' in message
+
+
+def _retry_delay(error, attempt):
+    """التأخير قبل المحاولة التالية (يحترم retry_delay من الخادم إن وجد)"""
+    base = getattr(settings, 'GEMINI_RETRY_BASE_DELAY', 2)
+    max_delay = getattr(settings, 'GEMINI_RETRY_MAX_DELAY', 60)
+
+    server_delay = getattr(getattr(error, 'retry_delay', None), 'seconds', None)
+    if server_delay:
+        return min(max_delay, server_delay)
+
+    delay = min(max_delay, base * (2 ** attempt))
+    return delay * (0.5 + random.random() / 2)
+
+
+def call_with_retry(func, *args, **kwargs):
+    """
+    تنفيذ استدعاء Gemini ضمن حد التزامن مع إعادة المحاولة عند تجاوز الحصة
+    """
+    max_retries = getattr(settings, 'GEMINI_MAX_RETRIES', 4)
+    attempt = 0
+    while True:
+        with _semaphore:
+            external_calls.record('gemini')
+            try:
+                return func(*args, **kwargs)
+            except Exception as e:
+                if attempt >= max_retries or not _is_retryable(e):
+                    raise
+                error = e
+
+        delay = _retry_delay(error, attempt)
+        attempt += 1
+        logger.warning(f"⏳ Gemini: تجاوز الحصة - إعادة المحاولة {attempt}/{max_retries} بعد {delay:.1f}ث")
+        time.sleep(delay)
+
+
+def _update_digest(digest, value):
+    """إضافة مدخل إلى hash مفتاح الـ cache"""
+    if value is None or isinstance(value, (str, int, float, bool)):
+        digest.update(json.dumps(value, ensure_ascii=False).encode('utf-8'))
+    elif isinstance(value, (bytes, bytearray, memoryview)):
+        digest.update(hashlib.sha256(value).digest())
+    elif isinstance(value, (list, tuple)):
+        digest.update(b'[')
+        for item in value:
+            _update_digest(digest, item)
+        digest.update(b']')
+    elif isinstance(value, dict):
+        digest.update(b'{')
+        for key in sorted(value, key=str):
+            _update_digest(digest, str(key))
+            _update_digest(digest, value[key])
+        digest.update(b'}')
+    elif hasattr(value, 'tobytes') and hasattr(value, 'mode') and hasattr(value, 'size'):
+        # PIL.Image
+        digest.update(f'image:{value.mode}:{value.size}'.encode())
+        digest.update(hashlib.sha256(value.tobytes()).digest())
+    elif getattr(value, 'uri', None) or getattr(value, 'name', None):
+        # ملف مرفوع إلى Gemini (genai.upload_file)
+        digest.update(f"file:{getattr(value, 'uri', None) or value.name}".encode())
+    else:
+        raise _Uncacheable(type(value).__name__)
+
+
+def cache_key(model_name, contents, **kwargs):
+    """
+    مفتاح الـ cache لطلب معين
+
+    Returns:
+        str | None: None إذا كانت المدخلات غير قابلة للـ hash
+    """
+    digest = hashlib.sha256(model_name.encode('utf-8'))
+    try:
+        _update_digest(digest, contents)
+        _update_digest(digest, {key: repr(value) for key, value in kwargs.items()})
+    except _Uncacheable:
+        return None
+    return digest.hexdigest()
+
+
+class GeminiModel:
+    """
+    نموذج Gemini مشترك (نفس واجهة generate_content)
+
+    Usage:
+        model = get_model('models/gemini-2.5-flash')
+        response = model.generate_content(prompt)
+        response.text
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._model = _genai().GenerativeModel(name)
+
+    def generate_content(self, contents, use_cache=True, **kwargs):
+        key = cache_key(self.name, contents, **kwargs) if use_cache else None
+        if key:
+            cached = _cache.get(key)
+            if cached is not None:
+                logger.info(f"♻️ Gemini ({self.name}): رد من الـ cache")
+                return CachedResponse(cached)
+
+        response = call_with_retry(self._model.generate_content, contents, **kwargs)
+
+        if key:
+            try:
+                _cache.set(key, response.text)
+            except Exception:
+                # رد بدون نص (محجوب أو متعدد الأجزاء) - لا يتم حفظه
+                pass
+        return response
+
+
+def get_model(name=None):
+    """
+    النموذج المشترك لهذا الاسم (يُنشأ مرة واحدة في العملية)
+
+    Args:
+        name: اسم النموذج (None = GEMINI_MODEL)
+
+    Raises:
+        GeminiUnavailable: إذا لم يكن Gemini مفعّلاً
+    """
+    name = name or getattr(settings, 'GEMINI_MODEL', 'models/gemini-2.5-flash')
+    model = _models.get(name)
+    if model is None:
+        with _models_lock:
+            model = _models.get(name)
+            if model is None:
+                model = GeminiModel(name)
+                _models[name] = model
+    return model
+
+
+def _file_state(remote):
+    state = getattr(remote, 'state', None)
+    return getattr(state, 'name', state)
+
+
+def wait_until_active(remote):
+    """
+    انتظار انتهاء معالجة الملف المرفوع (الفيديو لا يمكن استخدامه قبل ACTIVE)
+
+    Raises:
+        RuntimeError: إذا فشلت المعالجة أو تجاوزت المهلة
+    """
+    timeout = getattr(settings, 'GEMINI_FILE_ACTIVE_TIMEOUT', 120)
+    interval = getattr(settings, 'GEMINI_FILE_POLL_INTERVAL', 2)
+    deadline = time.monotonic() + timeout
+
+    while _file_state(remote) == 'PROCESSING':
+        if time.monotonic() >= deadline:
+            raise RuntimeError(f'انتهت مهلة معالجة الملف في Gemini ({remote.name})')
+        time.sleep(interval)
+        remote = get_file(remote.name)
+
+    if _file_state(remote) == 'FAILED':
+        raise RuntimeError(f'فشلت معالجة الملف في Gemini ({remote.name})')
+    return remote
+
+
+def _file_cache_timeout(remote):
+    """مدة حفظ مرجع الملف (حتى قبل انتهاء صلاحيته في Gemini بقليل)"""
+    from datetime import datetime, timezone
+
+    margin = getattr(settings, 'GEMINI_FILE_EXPIRY_MARGIN', 600)
+    expires = getattr(remote, 'expiration_time', None)
+    if isinstance(expires, datetime):
+        if expires.tzinfo is None:
+            expires = expires.replace(tzinfo=timezone.utc)
+        return int((expires - datetime.now(timezone.utc)).total_seconds()) - margin
+    # الملفات في Gemini تُحذف بعد 48 ساعة
+    return 48 * 3600 - margin
+
+
+def get_cached_file(cache_key):
+    """
+    الملف المرفوع سابقاً لهذا المفتاح إن كان ما زال متاحاً في Gemini
+
+    Returns:
+        File | None
+    """
+    from django.core.cache import cache
+
+    key = f'{FILE_CACHE_PREFIX}:{cache_key}'
+    name = cache.get(key)
+    if not name:
+        return None
+    try:
+        return wait_until_active(get_file(name))
+    except Exception as e:
+        logger.info(f"🔄 Gemini: الملف المحفوظ {name} غير متاح ({str(e)}) - سيتم رفعه من جديد")
+        cache.delete(key)
+        return None
+
+
+def upload_file(path, cache_key=None, **kwargs):
+    """
+    رفع ملف إلى Gemini (ضمن حد التزامن مع إعادة المحاولة) وانتظار جاهزيته
+
+    Args:
+        path: مسار الملف
+        cache_key: مفتاح لحفظ مرجع الملف (مثل hash المحتوى) حتى تنتهي صلاحيته،
+                   لتجنب إعادة الرفع عند إعادة الفحص
+    """
+    from django.core.cache import cache
+
+    remote = wait_until_active(call_with_retry(_genai().upload_file, path, **kwargs))
+
+    if cache_key:
+        timeout = _file_cache_timeout(remote)
+        if timeout > 0:
+            cache.set(f'{FILE_CACHE_PREFIX}:{cache_key}', remote.name, timeout)
+    return remote
+
+
+def get_file(name):
+    """حالة ملف مرفوع إلى Gemini"""
+    return call_with_retry(_genai().get_file, name)
+
+
+def cache_stats():
+    """إحصائيات الـ cache في هذه العملية"""
+    return {'entries': len(_cache), 'hits': _cache.hits, 'misses': _cache.misses}
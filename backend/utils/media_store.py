@@ -0,0 +1,172 @@
+"""
+Content-Addressed Media Store
+مخزن الملفات حسب المحتوى (نسخة واحدة لكل محتوى)
+
+- مسار الملف مشتق من SHA-256 للمحتوى: MEDIA_ROOT/store/ab/cd/<sha256>.<ext>
+  (مجلدات فرعية من أول 4 أحرف حتى لا يتضخم مجلد واحد)
+- إعادة التسليم أو رفع نفس المرفق لعدة مشاريع لا يكتب الملف مرة أخرى،
+  بل يزيد عدد المراجع في MediaBlob ويحذف الملف المؤقت
+- file_path في Submission و ProjectFile مرجع لملف في المخزن؛ حذف السجل
+  يُنقص عدد المراجع، والملف يُحذف فقط عند وصول العدد إلى صفر
+- الملفات المؤقتة تُكتب داخل المخزن نفسه (نفس نظام الملفات) فالنقل rename بدون نسخ
+"""
+import os
+import uuid
+import logging
+from pathlib import Path
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+
+logger = logging.getLogger(__name__)
+
+STORE_DIR = 'store'
+
+
+def store_root():
+    return Path(settings.MEDIA_ROOT) / STORE_DIR
+
+
+def temp_path(ext=''):
+    """مسار مؤقت داخل المخزن للكتابة قبل معرفة hash"""
+    tmp_dir = store_root() / 'tmp'
+    tmp_dir.mkdir(parents=True, exist_ok=True)
+    return tmp_dir / f"{uuid.uuid4()}.{ext or 'bin'}.part"
+
+
+def blob_path(sha256, ext=''):
+    """المسار المطلق لملف المحتوى"""
+    name = f'{sha256}.{ext}' if ext else sha256
+    return store_root() / sha256[:2] / sha256[2:4] / name
+
+
+def relative_path(path):
+    """المسار نسبةً إلى MEDIA_ROOT (لبناء الروابط)"""
+    return Path(path).relative_to(settings.MEDIA_ROOT).as_posix()
+
+
+def _parse(path):
+    """(sha256, ext) إذا كان المسار داخل المخزن، وإلا None"""
+    if not path:
+        return None
+    path = Path(path)
+    if not path.is_absolute():
+        path = Path(settings.MEDIA_ROOT) / path
+    try:
+        parts = path.relative_to(store_root()).parts
+    except ValueError:
+        return None
+    if len(parts) != 3 or parts[0] == 'tmp':
+        return None
+    sha256, _, ext = parts[2].partition('.')
+    if len(sha256) != 64 or not sha256.startswith(parts[0] + parts[1]):
+        return None
+    return sha256, ext
+
+
+def is_stored(path):
+    return _parse(path) is not None
+
+
+def put(source, sha256, ext='', size=None):
+    """
+    إضافة مرجع لمحتوى ملف مؤقت
+
+    إذا كان المحتوى موجوداً في المخزن يُحذف الملف المؤقت ويزيد عدد المراجع فقط،
+    وإلا يُنقل الملف المؤقت لمساره في المخزن.
+
+    Args:
+        source: مسار الملف المؤقت (يُستهلك في الحالتين)
+        sha256: hash المحتوى
+        ext: الامتداد (بدون نقطة)
+        size: الحجم بالبايت (افتراضياً حجم الملف)
+
+    Returns:
+        Path: المسار المطلق للملف في المخزن
+    """
+    from apps.projects.models import MediaBlob
+
+    ext = (ext or '').lower()
+    destination = blob_path(sha256, ext)
+    if size is None:
+        size = os.path.getsize(source)
+
+    with transaction.atomic():
+        blob, created = MediaBlob.objects.select_for_update().get_or_create(
+            sha256=sha256, ext=ext, defaults={'size': size, 'ref_count': 1}
+        )
+        if not created:
+            MediaBlob.objects.filter(pk=blob.pk).update(ref_count=F('ref_count') + 1)
+
+        if destination.exists():
+            os.remove(source)
+            logger.info(f"♻️ محتوى مكرر {sha256[:12]} - مرجع جديد بدون كتابة")
+        else:
+            destination.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(source, destination)
+            logger.info(f"💾 محتوى جديد في المخزن: {relative_path(destination)}")
+
+    return destination
+
+
+def acquire(path):
+    """
+    مرجع إضافي لملف موجود في المخزن (مثل نسخ مرفق لمشروع آخر)
+
+    Returns:
+        bool: False إذا لم يكن المسار في المخزن
+    """
+    from apps.projects.models import MediaBlob
+
+    key = _parse(path)
+    if key is None:
+        return False
+    return MediaBlob.objects.filter(sha256=key[0], ext=key[1]).update(ref_count=F('ref_count') + 1) > 0
+
+
+def release(path):
+    """
+    إنقاص عدد المراجع وحذف الملف عند وصوله إلى صفر
+
+    المسارات خارج المخزن (ملفات قديمة أو روابط) لا تُحذف.
+
+    Returns:
+        bool: True إذا حُذف الملف من القرص
+    """
+    from apps.projects.models import MediaBlob
+
+    key = _parse(path)
+    if key is None:
+        return False
+
+    with transaction.atomic():
+        blob = MediaBlob.objects.select_for_update().filter(sha256=key[0], ext=key[1]).first()
+        if blob is None:
+            return False
+        if blob.ref_count > 1:
+            MediaBlob.objects.filter(pk=blob.pk).update(ref_count=F('ref_count') - 1)
+            return False
+
+        blob.delete()
+        try:
+            os.remove(blob_path(*key))
+        except FileNotFoundError:
+            pass
+
+    logger.info(f"🗑️ حذف {key[0][:12]} من المخزن (لا توجد مراجع)")
+    return True
+
+
+def save_uploaded(uploaded_file, scan=False):
+    """
+    حفظ ملف مرفوع في المخزن (مرفقات المعلم)
+
+    Returns:
+        str: المسار نسبةً إلى MEDIA_ROOT
+    """
+    from .upload_stream import stream_upload
+
+    ext = Path(uploaded_file.name).suffix.lstrip('.').lower()
+    source = temp_path(ext)
+    upload = stream_upload(uploaded_file, destination=str(source), scan=scan)
+    return relative_path(put(source, upload.sha256, ext, upload.size))
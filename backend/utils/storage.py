@@ -2,13 +2,13 @@
 نظام رفع وتخزين الملفات الآمن
 """
 import os
-import uuid
 import logging
-from pathlib import Path
 from django.conf import settings
 from django.core.exceptions import ValidationError
 from .av import av_scanner
 from .validation import InputValidator
+from .upload_stream import stream_upload
+from . import media_store
 
 # محاولة استيراد python-magic (اختياري)
 try:
@@ -59,6 +59,22 @@ class SecureFileUpload:
         Returns:
             dict: {'valid': bool, 'error': str or None}
         """
+        metadata_result = self._validate_metadata(uploaded_file)
+        if not metadata_result['valid']:
+            return metadata_result
+        
+        # التحقق من نوع MIME الحقيقي
+        mime_result = self._verify_mime_type(uploaded_file)
+        if not mime_result['valid']:
+            return mime_result
+        
+        return {'valid': True, 'error': None}
+    
+    def _validate_metadata(self, uploaded_file, allowed_extensions=None, max_size=None) -> dict:
+        """التحقق من الاسم والامتداد والحجم المعلن (بدون قراءة محتوى الملف)"""
+        allowed_extensions = allowed_extensions or self.allowed_extensions
+        max_size = max_size or self.max_size
+        
         # التحقق من وجود الملف
         if not uploaded_file:
             return {'valid': False, 'error': 'لم يتم رفع أي ملف'}
@@ -69,24 +85,22 @@ class SecureFileUpload:
         
         # التحقق من الامتداد
         ext = self._get_extension(uploaded_file.name)
-        if ext not in self.allowed_extensions:
+        if ext not in allowed_extensions:
             return {
                 'valid': False,
-                'error': f'امتداد الملف غير مسموح. الامتدادات المسموحة: {", ".join(self.allowed_extensions)}'
+                'error': f'امتداد الملف غير مسموح. الامتدادات المسموحة: {", ".join(allowed_extensions)}'
             }
         
         # التحقق من الحجم
-        if uploaded_file.size > self.max_size:
-            max_mb = self.max_size / (1024 * 1024)
-            return {'valid': False, 'error': f'حجم الملف كبير جداً. الحد الأقصى: {max_mb:.0f}MB'}
-        
-        # التحقق من نوع MIME الحقيقي
-        mime_result = self._verify_mime_type(uploaded_file)
-        if not mime_result['valid']:
-            return mime_result
+        if uploaded_file.size > max_size:
+            return self._too_large(max_size)
         
         return {'valid': True, 'error': None}
     
+    def _too_large(self, max_size) -> dict:
+        max_mb = max_size / (1024 * 1024)
+        return {'valid': False, 'error': f'حجم الملف كبير جداً. الحد الأقصى: {max_mb:.0f}MB'}
+    
     def _get_extension(self, filename: str) -> str:
         """الحصول على امتداد الملف"""
         return filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
@@ -100,49 +114,53 @@ class SecureFileUpload:
             uploaded_file.seek(0)
             
             # إذا كان magic متاحاً، استخدمه للتحقق المتقدم
+            detected_mime = None
             if MAGIC_AVAILABLE:
                 try:
                     # استخدام python-magic لتحديد نوع الملف الحقيقي
                     mime = magic.Magic(mime=True)
                     detected_mime = mime.from_buffer(file_head)
-                    
-                    # التحقق من أن نوع MIME مسموح
-                    if detected_mime not in self.allowed_mime_types:
-                        return {
-                            'valid': False,
-                            'error': f'نوع الملف غير مسموح: {detected_mime}'
-                        }
-                    
-                    # التحقق من تطابق الامتداد مع نوع MIME
-                    file_ext = self._get_extension(uploaded_file.name)
-                    expected_ext = self.allowed_mime_types[detected_mime]
-                    
-                    if file_ext != expected_ext:
-                        return {
-                            'valid': False,
-                            'error': f'امتداد الملف لا يتطابق مع محتواه'
-                        }
-                    
-                    return {'valid': True, 'error': None}
                 except Exception as magic_error:
                     logger.warning(f"Magic MIME detection failed, using basic validation: {str(magic_error)}")
             
-            # Fallback: التحقق الأساسي من الامتداد فقط
-            # (عندما magic غير متاح أو فشل)
-            file_ext = self._get_extension(uploaded_file.name)
-            if file_ext in self.allowed_extensions:
-                logger.info(f"Using basic MIME validation for: {uploaded_file.name}")
-                return {'valid': True, 'error': None}
-            else:
-                return {
-                    'valid': False,
-                    'error': f'امتداد الملف غير مسموح: {file_ext}'
-                }
+            return self.check_mime(uploaded_file.name, detected_mime)
             
         except Exception as e:
             logger.error(f"Error verifying MIME type: {str(e)}")
             return {'valid': False, 'error': 'فشل التحقق من نوع الملف'}
     
+    def check_mime(self, filename: str, detected_mime, allowed_extensions=None) -> dict:
+        """مطابقة نوع MIME المكتشف مع امتداد الملف (None = التحقق من الامتداد فقط)"""
+        allowed_extensions = allowed_extensions or self.allowed_extensions
+        file_ext = self._get_extension(filename)
+        
+        if detected_mime:
+            # التحقق من أن نوع MIME مسموح
+            if detected_mime not in self.allowed_mime_types:
+                return {
+                    'valid': False,
+                    'error': f'نوع الملف غير مسموح: {detected_mime}'
+                }
+            
+            # التحقق من تطابق الامتداد مع نوع MIME
+            if file_ext != self.allowed_mime_types[detected_mime]:
+                return {
+                    'valid': False,
+                    'error': f'امتداد الملف لا يتطابق مع محتواه'
+                }
+            
+            return {'valid': True, 'error': None}
+        
+        # Fallback: التحقق الأساسي من الامتداد فقط
+        # (عندما magic غير متاح أو فشل)
+        if file_ext in allowed_extensions:
+            logger.info(f"Using basic MIME validation for: {filename}")
+            return {'valid': True, 'error': None}
+        return {
+            'valid': False,
+            'error': f'امتداد الملف غير مسموح: {file_ext}'
+        }
+    
     def scan_for_viruses(self, uploaded_file) -> dict:
         """
         فحص الملف من الفيروسات
@@ -171,83 +189,96 @@ class SecureFileUpload:
                 'message': f'خطأ في فحص الفيروسات: {str(e)}'
             }
     
-    def save_file(self, uploaded_file, subfolder: str = '') -> dict:
+    def save_file(self, uploaded_file, max_size: int = None, allowed_extensions=None) -> dict:
         """
-        حفظ الملف بشكل آمن
+        حفظ الملف بشكل آمن في مخزن المحتوى (utils.media_store)
+        
+        الملف يُقرأ مرة واحدة فقط: الحفظ وhash وكشف النوع وفحص الفيروسات
+        تتم في نفس المرور (utils.upload_stream). الملف المكرر لا يُكتب مرة
+        أخرى بل يُضاف مرجع للنسخة الموجودة.
         
         Args:
             uploaded_file: الملف المرفوع
-            subfolder: مجلد فرعي لحفظ الملف فيه
+            max_size: حد الحجم بالبايت (افتراضياً MAX_UPLOAD_SIZE)
+            allowed_extensions: الامتدادات المسموحة (افتراضياً ALLOWED_EXTENSIONS)
             
         Returns:
             dict: {
                 'success': bool,
                 'file_path': str or None,
                 'file_url': str or None,
-                'error': str or None
+                'error': str or None,
+                'upload': StreamedUpload or None (hash، الحجم، النوع، نتيجة فحص الفيروسات)
             }
         """
-        # التحقق من صحة الملف
-        validation = self.validate_file(uploaded_file)
-        if not validation['valid']:
-            return {
-                'success': False,
-                'file_path': None,
-                'file_url': None,
-                'error': validation['error']
-            }
+        max_size = min(max_size or self.max_size, self.max_size)
         
-        # فحص الفيروسات
-        virus_scan = self.scan_for_viruses(uploaded_file)
-        if not virus_scan['is_safe']:
+        def failure(error, upload=None):
+            if upload:
+                upload.discard()
             return {
                 'success': False,
                 'file_path': None,
                 'file_url': None,
-                'error': virus_scan['message']
+                'error': error,
+                'upload': upload
             }
         
+        # التحقق من الاسم والامتداد والحجم المعلن (بدون قراءة)
+        validation = self._validate_metadata(uploaded_file, allowed_extensions, max_size)
+        if not validation['valid']:
+            return failure(validation['error'])
+        
         try:
-            # توليد اسم ملف آمن وفريد
+            # الكتابة لملف مؤقت داخل المخزن (hash المحتوى غير معروف بعد)
             ext = self._get_extension(uploaded_file.name)
-            unique_filename = f"{uuid.uuid4()}.{ext}"
-            
-            # إنشاء المسار الكامل
-            upload_dir = Path(settings.MEDIA_ROOT) / subfolder
-            upload_dir.mkdir(parents=True, exist_ok=True)
-            
-            file_path = upload_dir / unique_filename
-            
-            # حفظ الملف
-            with open(file_path, 'wb+') as destination:
-                for chunk in uploaded_file.chunks():
-                    destination.write(chunk)
-            
-            # إنشاء URL للملف
-            relative_path = Path(subfolder) / unique_filename
-            file_url = f"{settings.MEDIA_URL}{relative_path.as_posix()}"
-            
-            logger.info(f"File saved successfully: {file_path}")
-            
-            return {
-                'success': True,
-                'file_path': str(file_path),
-                'file_url': file_url,
-                'error': None
-            }
+            temp_path = media_store.temp_path(ext)
             
+            # حفظ الملف (مرور واحد)
+            upload = stream_upload(uploaded_file, destination=str(temp_path), max_size=max_size)
         except Exception as e:
             logger.error(f"Error saving file: {str(e)}")
-            return {
-                'success': False,
-                'file_path': None,
-                'file_url': None,
-                'error': f'فشل حفظ الملف: {str(e)}'
-            }
+            return failure(f'فشل حفظ الملف: {str(e)}')
+        
+        if upload.too_large:
+            return failure(self._too_large(max_size)['error'], upload)
+        
+        # التحقق من نوع MIME الحقيقي (من أول بايتات الملف)
+        mime_result = self.check_mime(uploaded_file.name, upload.mime, allowed_extensions)
+        if not mime_result['valid']:
+            return failure(mime_result['error'], upload)
+        
+        # فحص الفيروسات
+        if not upload.virus['is_safe']:
+            return failure(upload.virus['message'], upload)
+        
+        # نقل الملف للمخزن (أو مرجع جديد للنسخة الموجودة)
+        try:
+            file_path = media_store.put(temp_path, upload.sha256, ext, upload.size)
+        except Exception as e:
+            logger.error(f"Error storing file: {str(e)}")
+            return failure(f'فشل حفظ الملف: {str(e)}', upload)
+        upload.path = str(file_path)
+        upload.stored = True
+        
+        # إنشاء URL للملف
+        file_url = f"{settings.MEDIA_URL}{media_store.relative_path(file_path)}"
+        
+        logger.info(f"File saved successfully: {file_path}")
+        
+        return {
+            'success': True,
+            'file_path': str(file_path),
+            'file_url': file_url,
+            'error': None,
+            'upload': upload
+        }
     
     def delete_file(self, file_path: str) -> bool:
-        """حذف ملف"""
+        """حذف ملف (ملفات المخزن: إنقاص عدد المراجع فقط)"""
         try:
+            if media_store.is_stored(file_path):
+                return media_store.release(file_path)
             if os.path.exists(file_path):
                 os.remove(file_path)
                 logger.info(f"File deleted: {file_path}")
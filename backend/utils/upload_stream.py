@@ -0,0 +1,156 @@
+"""
+Streaming Upload Pipeline
+قراءة الملف المرفوع مرة واحدة فقط
+
+كل جزء (chunk) من الملف يمر في نفس الحلقة على:
+- SHA-256
+- كشف النوع الحقيقي (أول 2KB)
+- حد الحجم (التوقف فور التجاوز)
+- ClamAV (أمر INSTREAM)
+- ملف الوجهة
+
+فلا يُحمّل الفيديو كاملاً في الذاكرة ولا يُقرأ الملف المؤقت أكثر من مرة.
+"""
+import os
+import hashlib
+import logging
+from .av import av_scanner
+
+try:
+    import magic
+    MAGIC_AVAILABLE = True
+except ImportError:
+    MAGIC_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+SNIFF_BYTES = 2048
+
+
+def detect_mime(head):
+    """نوع MIME الحقيقي من أول بايتات الملف (None إذا لم يتوفر python-magic)"""
+    if not MAGIC_AVAILABLE or not head:
+        return None
+    try:
+        return magic.Magic(mime=True).from_buffer(head)
+    except Exception as e:
+        logger.warning(f"Magic MIME detection failed: {str(e)}")
+        return None
+
+
+class StreamedUpload:
+    """نتيجة تمرير الملف المرفوع عبر خط المعالجة"""
+
+    def __init__(self, name):
+        self.name = name
+        self.path = None
+        self.size = 0
+        self.sha256 = None
+        self.head = b''
+        self.mime = None
+        self.virus = None
+        self.too_large = False
+        # True بعد نقل الملف لمخزن المحتوى (قد يشاركه تسليمات أخرى)
+        self.stored = False
+
+    @property
+    def virus_scanned(self):
+        return bool(self.virus and self.virus.get('scanned'))
+
+    def discard(self):
+        """حذف ملف الوجهة (عند رفض الملف بعد حفظه)"""
+        if self.stored:
+            from .media_store import release
+            release(self.path)
+            self.stored = False
+        elif self.path and os.path.exists(self.path):
+            os.remove(self.path)
+        self.path = None
+
+
+def _unavailable_scan():
+    return {
+        'scanned': False,
+        'is_safe': True,
+        'virus_name': None,
+        'message': 'تم قبول الملف (ClamAV غير متوفر)'
+    }
+
+
+def stream_upload(uploaded_file, destination=None, max_size=None, scan=True):
+    """
+    تمرير الملف المرفوع مرة واحدة عبر hash وكشف النوع وحد الحجم وClamAV والحفظ
+
+    Args:
+        uploaded_file: ملف Django UploadedFile
+        destination: مسار الحفظ (None = بدون حفظ، مثل المعاينة)
+        max_size: أقصى حجم بالبايت (None = بدون حد)
+        scan: فحص الفيروسات أثناء القراءة
+
+    Returns:
+        StreamedUpload: عند تجاوز الحجم too_large=True ولا يبقى ملف محفوظ
+    """
+    result = StreamedUpload(uploaded_file.name)
+    digest = hashlib.sha256()
+    head = bytearray()
+
+    scanner = None
+    if scan:
+        try:
+            scanner = av_scanner.open_stream()
+        except OSError as e:
+            logger.error(f"Cannot open ClamAV stream: {str(e)}")
+            result.virus = {
+                'scanned': False,
+                'is_safe': False,
+                'virus_name': None,
+                'message': f'خطأ في الفحص: {str(e)}'
+            }
+
+    out = open(destination, 'wb') if destination else None
+    try:
+        uploaded_file.seek(0)
+        for chunk in uploaded_file.chunks():
+            result.size += len(chunk)
+            if max_size and result.size > max_size:
+                result.too_large = True
+                break
+            digest.update(chunk)
+            if len(head) < SNIFF_BYTES:
+                head += chunk[:SNIFF_BYTES - len(head)]
+            if scanner:
+                scanner.send(chunk)
+            if out:
+                out.write(chunk)
+    except Exception:
+        if scanner:
+            scanner.close()
+        if out:
+            out.close()
+            os.remove(destination)
+        raise
+    finally:
+        uploaded_file.seek(0)
+
+    if out:
+        out.close()
+        result.path = destination
+
+    if result.too_large:
+        if scanner:
+            scanner.close()
+        result.discard()
+        return result
+
+    result.sha256 = digest.hexdigest()
+    result.head = bytes(head)
+    result.mime = detect_mime(result.head)
+    if scanner:
+        verdict = scanner.finish()
+        # خطأ الاتصال أثناء الفحص = لم يُفحص (والملف غير مقبول)
+        verdict['scanned'] = verdict['is_safe'] or verdict['virus_name'] is not None
+        result.virus = verdict
+    elif result.virus is None:
+        result.virus = _unavailable_scan() if scan else None
+
+    return result